@@ -5,6 +5,7 @@ from sys import exit
 from collections import OrderedDict
 from os.path import dirname, basename, join, splitext
 from optparse import OptionParser
+import hashlib
 
 class InstaParseFile:
     """ Simple custom file class used by code generation components. """
@@ -372,6 +373,13 @@ class InstaParseFormat:
         for className in self._userClasses:
             self._classes[className] = _generateFormatLines( className, self._userClasses )
         self._bodyTypeName = self._model.body.typeName
+        # Repetitions that repeat until an instance fails to parse are given a lookahead check.
+        for lines in self._classes.values():
+            for line in lines:
+                if line.isZeroOrMoreRepetition() or line.isOneOrMoreRepetition():
+                    typeName = line.getField(0).typeName()
+                    line._lookahead = self._firstLineSignature(typeName)
+                    line._isLookaheadDecisive = line._lookahead is not None and self._isSingleLine(typeName)
 
     def lineDelimiter(self):
         return self._model.lineDelimiter
@@ -384,6 +392,131 @@ class InstaParseFormat:
     def bodyTypeName(self):
         return self._bodyTypeName
 
+    def isScalarRecord( self, typeName ):
+        """ Whether the given type is a user class made of exactly one line of non-list primitive
+        fields, so that all of its instances share the same fixed shape. """
+        if isPrimitive(typeName):
+            return False
+        lines = self._classes[typeName]
+        if len(lines) != 1 or lines[0].isEmpty() or lines[0].isRepeating():
+            return False
+        # Index the fields, leaving the line part way through a for loop would break its iteration
+        for i in range(lines[0].numFields()):
+            field = lines[0].getField(i)
+            if not field.isPrimitive() or field.isList():
+                return False
+        return True
+
+    def fixedLineCount( self, typeName ):
+        """ Return the number of lines every instance of the given type consists of, or None if
+        it depends on the input. """
+        if isPrimitive(typeName):
+            return 1
+        numLines = 0
+        for line in self._classes[typeName]:
+            if line.isEmpty():
+                numLines += 1
+                continue
+            field = line.getField(0)
+            if not line.isRepeating():
+                numLines += self.fixedLineCount(field.typeName()) if not field.isPrimitive() else 1
+                continue
+            if not line.isIntegerRepetition():
+                return None
+            instanceLines = self.fixedLineCount(field.typeName())
+            if instanceLines is None:
+                return None
+            numInstances = int(line.repetitionAmountString())
+            numLines += numInstances * instanceLines
+            if line.isSplitByNewline() and numInstances > 0:
+                numLines += numInstances - 1
+        return numLines
+
+    def containsEmptyLines( self, typeName ):
+        """ Whether an instance of the given type may contain an empty line, either from the
+        format or from separating repeated instances. """
+        if isPrimitive(typeName):
+            return False
+        for line in self._classes[typeName]:
+            if line.isEmpty():
+                return True
+            field = line.getField(0)
+            if line.isRepeating() and line.isSplitByNewline():
+                return True
+            if not field.isPrimitive() and self.containsEmptyLines(field.typeName()):
+                return True
+        return False
+
+    def _firstLineSignature( self, typeName ):
+        """ Return the LineSignature of the first line consumed when parsing an instance of the
+        given type, or None if it cannot be determined without parsing. """
+        if isPrimitive(typeName):
+            if isList(typeName):
+                return LineSignature( [], listType(typeName), True )
+            return LineSignature( [typeName], None, False )
+        lines = self._classes[typeName]
+        if len(lines) == 0:
+            return None
+        line = lines[0]
+        if line.isEmpty():
+            return LineSignature( [], None, False )
+        field = line.getField(0)
+        if line.isRepeating():
+            # Only repetitions that consume at least one instance have a known first line.
+            if line.isOneOrMoreRepetition() or ( line.isIntegerRepetition() and
+                    int(line.repetitionAmountString()) > 0 ):
+                return self._firstLineSignature(field.typeName())
+            return None
+        if line.numFields() == 1 and not field.isPrimitive():
+            return self._firstLineSignature(field.typeName())
+        if line.numFields() == 1 and not field.isList():
+            return LineSignature( [field.typeName()], None, False )
+        tokenTypes = [ f.typeName() for f in line if not f.isList() ]
+        return LineSignature( tokenTypes, line.getField(-1).listType(), True )
+
+    def _isSingleLine( self, typeName ):
+        """ Whether an instance of the given type always consists of exactly one non-empty line. """
+        if isPrimitive(typeName):
+            return True
+        lines = self._classes[typeName]
+        if len(lines) != 1 or lines[0].isEmpty() or lines[0].isRepeating():
+            return False
+        field = lines[0].getField(0)
+        return field.isPrimitive() or self._isSingleLine(field.typeName())
+
+class LineSignature:
+    """ The shape of the first line of an instance, used as a cheap lookahead check before parsing
+    an instance of a repetition. The line is either empty, a single token spanning the whole line,
+    or split by the delimiter into tokens of the given primitive types, optionally followed by one
+    or more tokens of a list type. """
+    def __init__( self, tokenTypes, listType, isSplit ):
+        self._tokenTypes = tokenTypes
+        self._listType = listType
+        self._isSplit = isSplit
+
+    def isEmptyLine(self):
+        return len(self._tokenTypes) == 0 and self._listType is None
+
+    def tokenTypes(self):
+        """ The primitive types of the leading tokens of the line, in order. """
+        return self._tokenTypes
+
+    def listType(self):
+        """ The primitive type of the trailing list tokens, or None if the line has no list. """
+        return self._listType
+
+    def isSplit(self):
+        """ Whether the line is split by the delimiter, rather than being a single token. """
+        return self._isSplit
+
+    def __str__(self):
+        if self.isEmptyLine():
+            return "<empty line>"
+        s = " ".join(self._tokenTypes)
+        if self._listType:
+            s += " %s..." % self._listType
+        return s
+
 class FormatField:
     def __init__( self, field, userClasses, parent=None ):
         self._field = field
@@ -406,6 +539,12 @@ class FormatField:
     def isRepeating(self):
         return self._instanceRepetitionModeString() != ""
 
+    def isCountedRepetition(self):
+        """ Whether the number of instances of this repeated field is known before they are
+        parsed, given either as an integer or by an earlier field. """
+        return self.isRepeating() and self._instanceRepetitionModeString() not in \
+            ( StringConstants.LINE_ZERO_OR_MORE, StringConstants.LINE_ONE_OR_MORE )
+
     def _instanceRepetitionModeString(self):
         mode = self._field.instanceRepetitionModeString
         try:
@@ -462,6 +601,9 @@ class FormatLine:
         self._repetitionString = fields[0]._instanceRepetitionModeString() if len(fields) == 1 else ""
         self._isSplitByNewline = fields[0]._shouldSeparateInstancesByAdditionalNewline() if \
             len(fields) == 1 else ""
+        # Set by InstaParseFormat for '*' and '+' repetitions
+        self._lookahead = None
+        self._isLookaheadDecisive = False
 
     def container(self):
         return self._container
@@ -503,6 +645,17 @@ class FormatLine:
     def isSplitByNewline(self):
         return self._isSplitByNewline
 
+    def lookahead(self):
+        """ The LineSignature that the first line of every instance of a '*' or '+' repetition
+        matches, or None if there is no such signature. """
+        return self._lookahead
+
+    def isLookaheadDecisive(self):
+        """ Whether an upcoming line matching the lookahead signature is enough to know that the
+        next instance of the repetition is present, i.e. every instance is a single line. When it
+        is not, the instance still has to be parsed on trial after the lookahead check passes. """
+        return self._isLookaheadDecisive
+
     def __iter__(self):
         return self
 
@@ -598,6 +751,29 @@ def getFormat(fileName):
     return InstaParseFormat(p.objectModel)
 
 
+class GeneratorOptions:
+    """ Options changing the code a CodeGenerator produces. Every option defaults to off, which
+    generates the standard parser. Options that do not apply to a language are ignored by its
+    generator. """
+
+    def __init__( self, **kwargs ):
+        # Python only, convert list(int) and list(float) fields to NumPy arrays
+        self.numpy = kwargs.get( "numpy", False )
+        # Python only, store repeated scalar records as one typed column per field
+        self.columnar = kwargs.get( "columnar", False )
+        # Python only, generate namedtuples instead of slotted classes for read-only consumers
+        self.namedtuples = kwargs.get( "namedtuples", False )
+        # Python and Java, read the input file through a memory mapping
+        self.mmap = kwargs.get( "mmap", False )
+        # Python only, parse the structure of the input and convert fields on first access
+        self.lazy = kwargs.get( "lazy", False )
+        # Count the calls, lines, time, rollbacks and exceptions of the parser of each class
+        self.instrument = kwargs.get( "instrument", False )
+        # Python only, load the bodies of files parsed before from a cache on disk
+        self.cache = kwargs.get( "cache", False )
+        # Java only, store lists and repetitions of ints, floats and bools unboxed
+        self.primitives = kwargs.get( "primitives", False )
+
 class CodeGenerator:
     """ Base class for generating the parser code. Subclass this for every language supported by InstaParse. """
 
@@ -623,14 +799,24 @@ class CodeGenerator:
     PARSE_FLOAT_LIST = "parseFloatList"
     PARSE_NEWLINE = "parseNewline"
     PARSE_INPUT = "parse"
+    PARSE_STREAM = "parseStream"
+    PARSE_BUFFER = "parseBuffer"
+    ITERPARSE_INPUT = "iterparse"
+    STREAM_RECORDS = "streamRecords"
+    DUMP_SNAPSHOT = "dump"
+    LOAD_SNAPSHOT = "load"
+
+    # Starts every binary snapshot, followed by the schema hash
+    SNAPSHOT_MAGIC = "IPSNAP01"
 
-    def __init__( self, filename, format ):
+    def __init__( self, filename, format, options = None ):
         self.foldername = dirname(filename)
         self.filename = basename(filename)
         self.main = InstaParseFile(filename)
         self.util = InstaParseFile(join(self.foldername, CodeGenerator.UTIL_FILE_NAME))
         self.data = InstaParseFile(join(self.foldername, CodeGenerator.DATA_FILE_NAME))
         self.format = format
+        self.options = options if options is not None else GeneratorOptions()
         self.classes = format.classes()
         self.bodyTypeName = format.bodyTypeName()
         self.currentFile = None
@@ -701,6 +887,7 @@ class CodeGenerator:
         self.generateUtilFileHeader()
         self.generateHelperFunctions()
         self.generateClassParserFunctions()
+        self.generateClassSnapshotFunctions()
 
     def generateUtilFileHeader(self):
         """ For generating the util file header, such as the import statements. """
@@ -720,6 +907,65 @@ class CodeGenerator:
         is the class name and the second argument is a list of FormatLine's. """
         raise NotImplementedError
 
+    def generateClassSnapshotFunctions(self):
+        """ For generating the functions writing every user defined class to a binary snapshot and
+        reading it back. """
+        for className, lines in self.classes.items():
+            self.generateClassSnapshotFunction( className, lines )
+
+    def generateClassSnapshotFunction( self, className, lines ):
+        """ For generating the functions writing an instance of a user defined class to a binary
+        snapshot and reading it back. The first argument is the class name and the second argument
+        is a list of FormatLine's.
+
+        Every language writes the same layout, so that a snapshot written by one parser can be read
+        by the others. The fields are written in order, little-endian and unaligned: an int as 8
+        bytes, a float as an 8 byte double, a bool as 1 byte and a string as its 4 byte length
+        followed by its UTF-8 bytes. Lists and repeated fields are their 4 byte number of elements
+        followed by the elements, and objects are their fields. """
+        raise NotImplementedError
+
+    def _recordLine(self):
+        """ The last line of the body if it repeats a type, either a known number of times or with
+        a lookahead, so that its instances, called records, can be parsed on their own. """
+        lines = self.classes[self.bodyTypeName]
+        if len(lines) == 0 or lines[-1].isEmpty() or not lines[-1].isRepeating():
+            return None
+        line = lines[-1]
+        if line.lookahead() is None and not ( line.isIntegerRepetition() or line.isVariableRepetition() ):
+            return None
+        return line
+
+    def _parallelRecords(self):
+        """ Find how the body can be split into chunks parsed in parallel. The body qualifies if it
+        ends in records, see _recordLine, that can be found without parsing them. Either every
+        record has the same number of lines, or records never contain empty lines and are
+        separated by one.
+
+        Returns the repeated line and the number of lines from one record to the next, which is
+        None for records found by their separating empty lines, or None if the body does not
+        qualify. """
+        line = self._recordLine()
+        if line is None:
+            return None
+        typeName = line.getField(0).typeName()
+        numLines = self.format.fixedLineCount(typeName)
+        if numLines is not None and numLines > 0:
+            return line, numLines + ( 1 if line.isSplitByNewline() else 0 )
+        if line.isSplitByNewline() and not self.format.containsEmptyLines(typeName):
+            return line, None
+        return None
+
+    def schemaHash(self):
+        """ The hex SHA-1 of the classes and fields of the format, which decide the layout of its
+        binary snapshots. It follows the magic number at the start of every snapshot, so that a
+        snapshot is only read by the parsers of formats of the same layout. """
+        description = [ self.bodyTypeName ]
+        for className in sorted(self.classes.keys()):
+            lines = self.classes[className]
+            description.append("%s: %s" % ( className, " | ".join([ str(line).strip() for line in lines ]) ))
+        return hashlib.sha1("\n".join(description)).hexdigest()
+
     ################################################################################
     # Generate Main File
     ################################################################################
@@ -746,31 +992,156 @@ class CodeGenerator:
 
 def javagenStaticHelpers():
     helpers = """
-public static int javagenParseInt(String s, int[] lineNumber)
+// The tokens of a line split by the delimiter, walked by their offsets in the line so that ints,
+// floats and bools are parsed without creating a String for each of them. Like String.split, it
+// drops the empty tokens at the end of the line, unless the line has no delimiter at all.
+public static class Tokenizer
 {
-\ttry
+\tprivate final Matcher floatMatcher = FLOAT_PATTERN.matcher("");
+\tprivate String line;
+\tprivate int count;
+\tprivate int index;
+\t// The current token is line[start, end), and the next one starts at position
+\tprivate int start;
+\tprivate int end;
+\tprivate int position;
+
+\tpublic Tokenizer reset(String line)
 \t{
-\t\treturn Integer.parseInt(s);
+\t\tthis.line = line;
+\t\tcount = 0;
+\t\tindex = 0;
+\t\tposition = 0;
+\t\tint tokens = 0;
+\t\tint tokenStart = 0;
+\t\twhile (true)
+\t\t{
+\t\t\tint delimiter = line.indexOf(DELIMITER, tokenStart);
+\t\t\tint tokenEnd = delimiter < 0 ? line.length() : delimiter;
+\t\t\ttokens += 1;
+\t\t\tif (tokenEnd > tokenStart)
+\t\t\t\tcount = tokens;
+\t\t\tif (delimiter < 0)
+\t\t\t\tbreak;
+\t\t\ttokenStart = delimiter + DELIMITER.length();
+\t\t}
+\t\t// A line without the delimiter is a single token, even when empty
+\t\tif (tokens == 1)
+\t\t\tcount = 1;
+\t\treturn this;
 \t}
-\tcatch (NumberFormatException e)
+
+\t// Makes the whole line the current and only token
+\tpublic void select(String line)
 \t{
-\t\tthrow new NumberFormatException(
-\t\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse \\"" + s + "\\" as int.");
+\t\tthis.line = line;
+\t\tcount = 1;
+\t\tindex = 1;
+\t\tstart = 0;
+\t\tend = line.length();
+\t}
+
+\tpublic int count()
+\t{
+\t\treturn count;
+\t}
+
+\tpublic int remaining()
+\t{
+\t\treturn count - index;
+\t}
+
+\t// Moves on to the next token
+\tpublic void next()
+\t{
+\t\tstart = position;
+\t\tint delimiter = line.indexOf(DELIMITER, start);
+\t\tend = delimiter < 0 ? line.length() : delimiter;
+\t\tposition = end + DELIMITER.length();
+\t\tindex += 1;
 \t}
 }
 
-public static boolean javagenParseBool(String s, int[] lineNumber)
+private static NumberFormatException parseError(String s, int start, int end, String typeName, int[] lineNumber)
+{
+\treturn new NumberFormatException(
+\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse \\"" + s.substring(start, end) + "\\" as " + typeName + ".");
+}
+
+// Parses s[start, end) as Integer.parseInt does
+public static int javagenParseInt(String s, int start, int end, int[] lineNumber)
+{
+\tint i = start;
+\tboolean negative = false;
+\tif (i < end && (s.charAt(i) == '-' || s.charAt(i) == '+'))
+\t{
+\t\tnegative = s.charAt(i) == '-';
+\t\ti += 1;
+\t}
+\tif (i == end)
+\t\tthrow parseError(s, start, end, "int", lineNumber);
+\t// Accumulated negatively, as Integer.MIN_VALUE has no positive counterpart
+\tint limit = negative ? Integer.MIN_VALUE : -Integer.MAX_VALUE;
+\tint result = 0;
+\tfor (; i < end; i++)
+\t{
+\t\tint digit = Character.digit(s.charAt(i), 10);
+\t\tif (digit < 0 || result < limit / 10)
+\t\t\tthrow parseError(s, start, end, "int", lineNumber);
+\t\tresult *= 10;
+\t\tif (result < limit + digit)
+\t\t\tthrow parseError(s, start, end, "int", lineNumber);
+\t\tresult -= digit;
+\t}
+\treturn negative ? result : -result;
+}
+
+public static int javagenParseInt(String s, int[] lineNumber)
+{
+\treturn javagenParseInt(s, 0, s.length(), lineNumber);
+}
+
+public static int javagenParseInt(Tokenizer tokens, int[] lineNumber)
+{
+\ttokens.next();
+\treturn javagenParseInt(tokens.line, tokens.start, tokens.end, lineNumber);
+}
+
+// Whether s[start, end) is the given lower case word, ignoring case
+private static boolean equalsIgnoreCase(String s, int start, int end, String word)
+{
+\tif (end - start != word.length())
+\t\treturn false;
+\tfor (int i = 0; i < word.length(); i++)
+\t{
+\t\tif (Character.toLowerCase(s.charAt(start + i)) != word.charAt(i))
+\t\t\treturn false;
+\t}
+\treturn true;
+}
+
+public static boolean javagenParseBool(String s, int start, int end, int[] lineNumber)
 {
-\tif (s.equals("1") || s.toLowerCase().equals("true"))
+\tif ((end - start == 1 && s.charAt(start) == '1') || equalsIgnoreCase(s, start, end, "true"))
 \t{
 \t\treturn true;
 \t}
-\telse if (s.equals("0") || s.toLowerCase().equals("false"))
+\telse if ((end - start == 1 && s.charAt(start) == '0') || equalsIgnoreCase(s, start, end, "false"))
 \t{
 \t\treturn false;
 \t}
-\tthrow new NumberFormatException(
-\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse \\"" + s + "\\" as bool.");
+\tthrow parseError(s, start, end, "bool", lineNumber);
+}
+
+public static boolean javagenParseBool(String s, int[] lineNumber)
+{
+\treturn javagenParseBool(s, 0, s.length(), lineNumber);
+}
+
+public static boolean javagenParseBool(Tokenizer tokens, int[] lineNumber)
+{
+\ttokens.next();
+\treturn javagenParseBool(tokens.line, tokens.start, tokens.end, lineNumber);
 }
 
 public static String javagenParseString(String s, int[] lineNumber)
@@ -778,99 +1149,344 @@ public static String javagenParseString(String s, int[] lineNumber)
 \treturn s;
 }
 
-public static float javagenParseFloat(String s, int[] lineNumber)
+public static String javagenParseString(Tokenizer tokens, int[] lineNumber)
+{
+\ttokens.next();
+\treturn tokens.line.substring(tokens.start, tokens.end);
+}
+
+// Every power of ten up to 10^10 is exact as a float
+private static final float[] POWERS_OF_TEN = { 1e0f, 1e1f, 1e2f, 1e3f, 1e4f, 1e5f, 1e6f, 1e7f, 1e8f, 1e9f, 1e10f };
+
+// Parses s[start, end) as Float.parseFloat does
+public static float javagenParseFloat(String s, int start, int end, int[] lineNumber)
 {
+\t// A plain decimal whose digits make an int below 2^24 is exact as a float, so a single float
+\t// division by an exact power of ten rounds it as Float.parseFloat does
+\tint i = start;
+\tboolean negative = false;
+\tif (i < end && (s.charAt(i) == '-' || s.charAt(i) == '+'))
+\t{
+\t\tnegative = s.charAt(i) == '-';
+\t\ti += 1;
+\t}
+\tint mantissa = 0;
+\tint digits = 0;
+\tint fractionDigits = -1;
+\tfor (; i < end && mantissa < 1 << 24; i++)
+\t{
+\t\tchar c = s.charAt(i);
+\t\tif (c >= '0' && c <= '9')
+\t\t{
+\t\t\tmantissa = mantissa * 10 + (c - '0');
+\t\t\tdigits += 1;
+\t\t\tif (fractionDigits >= 0)
+\t\t\t\tfractionDigits += 1;
+\t\t}
+\t\telse if (c == '.' && fractionDigits < 0)
+\t\t{
+\t\t\tfractionDigits = 0;
+\t\t}
+\t\telse
+\t\t{
+\t\t\tbreak;
+\t\t}
+\t}
+\tif (i == end && digits > 0 && mantissa < 1 << 24 && fractionDigits < POWERS_OF_TEN.length)
+\t{
+\t\tfloat value = fractionDigits > 0 ? mantissa / POWERS_OF_TEN[fractionDigits] : mantissa;
+\t\treturn negative ? -value : value;
+\t}
+\t// Anything else, such as exponents, long mantissas and NaN, takes the slow path
 \ttry
 \t{
-\t\treturn Float.parseFloat(s);
+\t\treturn Float.parseFloat(s.substring(start, end));
 \t}
 \tcatch (NumberFormatException e)
 \t{
-\t\tthrow new NumberFormatException(
-\t\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse \\"" + s + "\\" as float.");
+\t\tthrow parseError(s, start, end, "float", lineNumber);
 \t}
 }
 
-public static ArrayList<Integer> javagenParseIntList(String[] strings, int[] lineNumber)
+public static float javagenParseFloat(String s, int[] lineNumber)
+{
+\treturn javagenParseFloat(s, 0, s.length(), lineNumber);
+}
+
+public static float javagenParseFloat(Tokenizer tokens, int[] lineNumber)
+{
+\ttokens.next();
+\treturn javagenParseFloat(tokens.line, tokens.start, tokens.end, lineNumber);
+}
+
+public static ArrayList<Integer> javagenParseIntList(Tokenizer tokens, int[] lineNumber)
 {
-\tif (strings.length == 0)
+\tif (tokens.remaining() == 0)
 \t\tthrow new NumberFormatException(
 \t\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse empty string as list.");
-\tArrayList<Integer> resval = new ArrayList<Integer>();
-\tfor (String s : strings)
-\t\tresval.add(javagenParseInt(s, lineNumber));
+\tArrayList<Integer> resval = new ArrayList<Integer>(tokens.remaining());
+\twhile (tokens.remaining() > 0)
+\t\tresval.add(javagenParseInt(tokens, lineNumber));
 \treturn resval;
 }
 
-public static ArrayList<Boolean> javagenParseBoolList(String[] strings, int[] lineNumber)
+public static ArrayList<Boolean> javagenParseBoolList(Tokenizer tokens, int[] lineNumber)
 {
-\tif (strings.length == 0)
+\tif (tokens.remaining() == 0)
 \t\tthrow new NumberFormatException(
 \t\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse empty string as list.");
-\tArrayList<Boolean> resval = new ArrayList<Boolean>();
-\tfor (String s : strings)
-\t\tresval.add(javagenParseBool(s, lineNumber));
+\tArrayList<Boolean> resval = new ArrayList<Boolean>(tokens.remaining());
+\twhile (tokens.remaining() > 0)
+\t\tresval.add(javagenParseBool(tokens, lineNumber));
 \treturn resval;
 }
 
-public static ArrayList<String> javagenParseStringList(String[] strings, int[] lineNumber)
+public static ArrayList<String> javagenParseStringList(Tokenizer tokens, int[] lineNumber)
 {
-\tif (strings.length == 0)
+\tif (tokens.remaining() == 0)
 \t\tthrow new NumberFormatException(
 \t\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse empty string as list.");
-\tArrayList<String> resval = new ArrayList<String>();
-\tfor (String s : strings)
-\t\tresval.add(javagenParseString(s, lineNumber));
+\tArrayList<String> resval = new ArrayList<String>(tokens.remaining());
+\twhile (tokens.remaining() > 0)
+\t\tresval.add(javagenParseString(tokens, lineNumber));
 \treturn resval;
 }
 
-public static ArrayList<Float> javagenParseFloatList(String[] strings, int[] lineNumber)
+public static ArrayList<Float> javagenParseFloatList(Tokenizer tokens, int[] lineNumber)
 {
-\tif (strings.length == 0)
+\tif (tokens.remaining() == 0)
 \t\tthrow new NumberFormatException(
 \t\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse empty string as list.");
-\tArrayList<Float> resval = new ArrayList<Float>();
-\tfor (String s : strings)
-\t\tresval.add(javagenParseFloat(s, lineNumber));
+\tArrayList<Float> resval = new ArrayList<Float>(tokens.remaining());
+\twhile (tokens.remaining() > 0)
+\t\tresval.add(javagenParseFloat(tokens, lineNumber));
 \treturn resval;
 }
 
-public static String readLine(RandomAccessFile f, String className)
+public static class LineSignature
 {
-\ttry
+\tpublic final String[] tokenTypes;
+\tpublic final String listType;
+\tpublic final boolean isSplit;
+
+\tpublic LineSignature(String[] tokenTypes, String listType, boolean isSplit)
 \t{
-\t\tString result = f.readLine();
-\t\tif (result == null) throw new RuntimeException("Parser Error: Reached end of file while parsing object \\"" + className + "\\".");
-\t\treturn result;
+\t\tthis.tokenTypes = tokenTypes;
+\t\tthis.listType = listType;
+\t\tthis.isSplit = isSplit;
 \t}
-\tcatch (IOException e)
+}
+
+private static final Pattern FLOAT_PATTERN = Pattern.compile(
+\t"\\\\s*[-+]?(NaN|Infinity|((\\\\d+\\\\.?\\\\d*|\\\\.\\\\d+)([eE][-+]?\\\\d+)?[fFdD]?))\\\\s*");
+
+// Whether the current token looks like a value of the given type
+public static boolean tokenMatches(Tokenizer tokens, String tokenType)
+{
+\tString s = tokens.line;
+\tif (tokenType.equals("int"))
 \t{
-\t\tthrow new RuntimeException("IO Error: Unknown problem when reading input file.");
+\t\tint i = tokens.start;
+\t\tif (i < tokens.end && (s.charAt(i) == '-' || s.charAt(i) == '+'))
+\t\t\ti += 1;
+\t\tif (i == tokens.end)
+\t\t\treturn false;
+\t\tfor (; i < tokens.end; i++)
+\t\t{
+\t\t\tif (s.charAt(i) < '0' || s.charAt(i) > '9')
+\t\t\t\treturn false;
+\t\t}
+\t\treturn true;
 \t}
+\telse if (tokenType.equals("float"))
+\t\treturn tokens.floatMatcher.reset(s).region(tokens.start, tokens.end).matches();
+\telse if (tokenType.equals("bool"))
+\t\treturn (tokens.end - tokens.start == 1 && (s.charAt(tokens.start) == '1' || s.charAt(tokens.start) == '0'))
+\t\t\t|| equalsIgnoreCase(s, tokens.start, tokens.end, "true") || equalsIgnoreCase(s, tokens.start, tokens.end, "false");
+\treturn true;
 }
 
-public static void seek(RandomAccessFile f, long pos)
+public static boolean lineMatches(String line, LineSignature signature, Tokenizer tokens)
 {
-\ttry
+\tif (!signature.isSplit)
 \t{
-\t\tf.seek(pos);
+\t\tif (signature.tokenTypes.length == 0)
+\t\t\treturn line.trim().equals("");
+\t\ttokens.select(line);
+\t\treturn tokenMatches(tokens, signature.tokenTypes[0]);
 \t}
-\tcatch (IOException e)
+\ttokens.reset(line);
+\tint numTokenTypes = signature.tokenTypes.length;
+\tif (signature.listType == null ? tokens.count() != numTokenTypes : tokens.count() <= numTokenTypes)
+\t\treturn false;
+\tfor (int i = 0; i < tokens.count(); i++)
 \t{
-\t\tthrow new RuntimeException("IO Error: Unknown problem when reading input file.");
+\t\tString tokenType = i < numTokenTypes ? signature.tokenTypes[i] : signature.listType;
+\t\ttokens.next();
+\t\tif (!tokenMatches(tokens, tokenType))
+\t\t\treturn false;
 \t}
+\treturn true;
 }
 
-public static long getFilePointer(RandomAccessFile f)
+public static class LineCursor
 {
-\ttry
+\t// Hands out the lines of an input stream, which need not support seeking. Positions are line
+\t// indices, and the lines from the most recently released position on are kept in a buffer so
+\t// that the parser can return to them. Lines before it are discarded.
+\tprivate static final int BUFFER_SIZE = 1 << 16;
+\t// Released lines are only discarded once they make up half of the buffer, so that releasing
+\t// after every record does not shift the lines after it each time
+\tprivate static final int MIN_DISCARDED = 1024;
+\tprivate final BufferedReader reader;
+\tprivate final ArrayList<String> lines = new ArrayList<String>();
+\t// Shared by the parsers of every object, as each is done with a line before reading the next
+\tprivate final Tokenizer tokenizer = new Tokenizer();
+\t// The position of the first buffered line
+\tprivate long base = 0;
+\tprivate long position = 0;
+\tprivate long released = 0;
+
+\tpublic LineCursor(InputStream input)
 \t{
-\t\treturn f.getFilePointer();
+\t\t// The bytes are decoded as UTF-8 a whole buffer at a time
+\t\treader = new BufferedReader(new InputStreamReader(decompressed(input), StandardCharsets.UTF_8), BUFFER_SIZE);
 \t}
-\tcatch (IOException e)
+
+\t// For the cursors reading their lines from elsewhere
+\tprotected LineCursor()
+\t{
+\t\treader = null;
+\t}
+
+\t// Decompresses a gzip compressed input, as told by the two bytes it starts with, while it is read
+\tprivate static InputStream decompressed(InputStream input)
+\t{
+\t\ttry
+\t\t{
+\t\t\tBufferedInputStream buffered = new BufferedInputStream(input, BUFFER_SIZE);
+\t\t\tbuffered.mark(2);
+\t\t\tint first = buffered.read();
+\t\t\tint second = buffered.read();
+\t\t\tbuffered.reset();
+\t\t\tif (first == 0x1f && second == 0x8b)
+\t\t\t\treturn new GZIPInputStream(buffered, BUFFER_SIZE);
+\t\t\treturn buffered;
+\t\t}
+\t\tcatch (IOException e)
+\t\t{
+\t\t\tthrow new RuntimeException("IO Error: Unknown problem when reading input file.");
+\t\t}
+\t}
+
+\tpublic String readLine()
+\t{
+\t\tif (!fill(position))
+\t\t\treturn null;
+\t\tString line = lines.get((int) (position - base));
+\t\tposition += 1;
+\t\treturn line;
+\t}
+
+\tpublic String peekLine(int offset)
+\t{
+\t\tif (!fill(position + offset))
+\t\t\treturn null;
+\t\treturn lines.get((int) (position + offset - base));
+\t}
+
+\tpublic Tokenizer tokenize(String line)
+\t{
+\t\treturn tokenizer.reset(line);
+\t}
+
+\tpublic long mark()
+\t{
+\t\treturn position;
+\t}
+
+\tpublic void reset(long pos)
+\t{
+\t\tposition = pos;
+\t}
+
+\tpublic void release(long pos)
+\t{
+\t\treleased = pos;
+\t}
+
+\t// The number of lines between two positions
+\tpublic long linesBetween(long from, long to)
+\t{
+\t\treturn to - from;
+\t}
+
+\tpublic void close()
+\t{
+\t\ttry
+\t\t{
+\t\t\treader.close();
+\t\t}
+\t\tcatch (IOException e)
+\t\t{
+\t\t\tthrow new RuntimeException("IO Error: Unknown problem when reading input file.");
+\t\t}
+\t}
+
+\t// Reads lines until there is one at the given position. Returns false at the end of the input.
+\tprivate boolean fill(long pos)
+\t{
+\t\tint discarded = (int) (Math.min(released, position) - base);
+\t\tif (discarded >= MIN_DISCARDED && discarded * 2 >= lines.size())
+\t\t{
+\t\t\tlines.subList(0, discarded).clear();
+\t\t\tbase += discarded;
+\t\t}
+\t\ttry
+\t\t{
+\t\t\twhile (pos - base >= lines.size())
+\t\t\t{
+\t\t\t\tString line = reader.readLine();
+\t\t\t\tif (line == null)
+\t\t\t\t\treturn false;
+\t\t\t\tlines.add(line);
+\t\t\t}
+\t\t}
+\t\tcatch (IOException e)
+\t\t{
+\t\t\tthrow new RuntimeException("IO Error: Unknown problem when reading input file.");
+\t\t}
+\t\treturn true;
+\t}
+}
+
+public static boolean hasNextInstance(LineCursor f, LineSignature signature, boolean isSeparated)
+{
+\tif (isSeparated)
 \t{
-\t\tthrow new RuntimeException("IO Error: Unknown problem when reading input file.");
+\t\tString separator = f.peekLine(0);
+\t\tif (separator == null || !separator.trim().equals(""))
+\t\t\treturn false;
 \t}
+\tString line = f.peekLine(isSeparated ? 1 : 0);
+\treturn line != null && lineMatches(line, signature, f.tokenizer);
+}
+
+public static String readLine(LineCursor f, String className)
+{
+\tString result = f.readLine();
+\tif (result == null) throw new RuntimeException("Parser Error: Reached end of file while parsing object \\"" + className + "\\".");
+\treturn result;
+}
+
+public static void seek(LineCursor f, long pos)
+{
+\tf.reset(pos);
+}
+
+public static long getFilePointer(LineCursor f)
+{
+\treturn f.mark();
 }
 """
 
@@ -888,293 +1504,4195 @@ public static long getFilePointer(RandomAccessFile f)
 
     return helpers
 
+# The unboxed types stored by the primitives option, with the names of their lists and parsers
+PRIMITIVE_LISTS = [
+    { "typeName": StringConstants.INTEGER_TYPE, "type": "int", "boxed": "Integer", "name": "Int",
+        "parse": CodeGenerator.PARSE_INT },
+    { "typeName": StringConstants.FLOAT_TYPE, "type": "float", "boxed": "Float", "name": "Float",
+        "parse": CodeGenerator.PARSE_FLOAT },
+    { "typeName": StringConstants.BOOL_TYPE, "type": "boolean", "boxed": "Boolean", "name": "Bool",
+        "parse": CodeGenerator.PARSE_BOOL }
+]
+
+def javagenPrimitiveHelpers():
+    """ The growable lists of unboxed values held by the fields repeated an unknown number of
+    times, and the parsers of list fields into arrays sized by their number of tokens. """
+    template = """
+// A growable list of %(type)ss, held by the fields repeated an unknown number of times. Unlike an
+// ArrayList<%(boxed)s>, it stores its values unboxed.
+public static class %(name)sList
+{
+\tprivate %(type)s[] values;
+\tprivate int size;
 
+\tpublic %(name)sList()
+\t{
+\t\tvalues = new %(type)s[16];
+\t}
 
-""" Class for generating Java code. """
-class JavaGenerator(CodeGenerator):
+\t// Holds the given values, without copying them
+\tpublic %(name)sList(%(type)s[] values)
+\t{
+\t\tthis.values = values;
+\t\tsize = values.length;
+\t}
 
-    def initialize(self):
-        """ Perform additional initialization if required. """
-        InstaParseFile.commentString = "//"
-        self.main.setExtension("java")
-        self.util.setExtension("java")
-        self.classFiles = []
+\tpublic int size()
+\t{
+\t\treturn size;
+\t}
 
-    def codeGen(self):
-        """ This method is called to generate and write the parser to the specified file. """
-        self.generateClasses()
-        self.generateUtilFile()
-        self.generateMainFile()
-        self.main.save()
-        self.util.save()
-        map(lambda c: c.save(), self.classFiles)
+\tpublic %(type)s get(int index)
+\t{
+\t\tif (index < 0 || index >= size)
+\t\t\tthrow new IndexOutOfBoundsException("Index: " + index + ", Size: " + size);
+\t\treturn values[index];
+\t}
 
-    ################################################################################
-    # Generate Data File
-    ################################################################################
+\tpublic void add(%(type)s value)
+\t{
+\t\tif (size == values.length)
+\t\t\tvalues = Arrays.copyOf(values, Math.max(16, size * 2));
+\t\tvalues[size++] = value;
+\t}
 
-    def generateClass( self, className, fields ):
-        """ Helper function for generating the code segement defining a class (or the corresponding
-        data structure). The first argument is the class name and the second argument is a list of
-        fields (in order) of that class. """
-        self.typeNameToParseFuncName[className] = "parse%s" % className
-        classFile = InstaParseFile(join(self.foldername, className + ".java"))
-        self.classFiles.append(classFile)
-        self.currentFile = classFile
+\t// A copy of the values, sized exactly
+\tpublic %(type)s[] toArray()
+\t{
+\t\treturn Arrays.copyOf(values, size);
+\t}
+}
 
-        shouldImportArrayList = False
+public static %(type)s[] %(parse)sArray(Tokenizer tokens, int[] lineNumber)
+{
+\tif (tokens.remaining() == 0)
+\t\tthrow new NumberFormatException(
+\t\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse empty string as list.");
+\t%(type)s[] values = new %(type)s[tokens.remaining()];
+\tfor (int i = 0; i < values.length; i++)
+\t\tvalues[i] = %(parse)s(tokens, lineNumber);
+\treturn values;
+}
+"""
+    helpers = "".join([ template % primitive for primitive in PRIMITIVE_LISTS ])
 
-        self._beginBlock("public class " + className )
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
 
-        for field in fields:
-            if field.isRepeating() or field.isList():
-                shouldImportArrayList = True
-            classFile.writeLine("public " + self._getTypeName(field) + " " + field.name() + ";")
+    return helpers
 
-        if shouldImportArrayList:
-            classFile.writeImportLine("")
-            classFile.writeImportLine("import java.util.ArrayList;")
+def javagenMappedHelpers():
+    """ The cursor reading the lines of an input file through memory mappings of it, used by parse
+    with the mmap option and by streamRecords. """
+    helpers = """
+// Hands out the lines of a file through memory mappings of it, so that the file need not fit in the
+// heap. Positions are byte offsets, so returning to one only resets the offset, and nothing is
+// released as the operating system pages the file in and out. Files over 1 GB are mapped in
+// segments, as a single mapping holds at most 2 GB.
+public static class MappedLineCursor extends LineCursor
+{
+\tprivate static final int SEGMENT_BITS = 30;
+\tprivate static final long SEGMENT_MASK = (1L << SEGMENT_BITS) - 1;
+\tprivate final MappedByteBuffer[] segments;
+\tprivate final long size;
+\tprivate long position = 0;
+\t// Holds the bytes of the line being decoded
+\tprivate byte[] lineBytes = new byte[256];
+\t// The line decoded last, from cachedStart up to cachedNext, which the parser usually reads
+\t// right after the lookahead peeked at it
+\tprivate long cachedStart = -1;
+\tprivate long cachedNext;
+\tprivate String cachedLine;
+
+\tprivate MappedLineCursor(String filename) throws IOException
+\t{
+\t\tRandomAccessFile file = new RandomAccessFile(filename, "r");
+\t\ttry
+\t\t{
+\t\t\tFileChannel channel = file.getChannel();
+\t\t\tsize = channel.size();
+\t\t\tsegments = new MappedByteBuffer[(int) ((size + SEGMENT_MASK) >>> SEGMENT_BITS)];
+\t\t\tfor (int i = 0; i < segments.length; i++)
+\t\t\t{
+\t\t\t\tlong start = (long) i << SEGMENT_BITS;
+\t\t\t\tsegments[i] = channel.map(FileChannel.MapMode.READ_ONLY, start, Math.min(size - start, 1L << SEGMENT_BITS));
+\t\t\t}
+\t\t}
+\t\tfinally
+\t\t{
+\t\t\t// The mappings stay valid once the file is closed
+\t\t\tfile.close();
+\t\t}
+\t}
 
-        self._endBlock()
+\t// A cursor of its own over the mappings of another, so that threads can read the file at once
+\tprivate MappedLineCursor(MappedLineCursor other)
+\t{
+\t\tsegments = other.segments;
+\t\tsize = other.size;
+\t}
 
-    ################################################################################
-    # Generate Util File
-    ################################################################################
+\tpublic MappedLineCursor copy()
+\t{
+\t\treturn new MappedLineCursor(this);
+\t}
 
-    def generateUtilFile(self):
-        self.currentFile = self.util
-        self.generateUtilFileHeader()
-        self._beginBlock("public class " + CodeGenerator.UTIL_FILE_NAME)
-        self.generateHelperFunctions()
-        self.generateClassParserFunctions()
-        self._endBlock()
+\t// Maps the file, unless it is gzip compressed, in which case it is decompressed while it is read
+\tpublic static LineCursor open(String filename) throws IOException
+\t{
+\t\tMappedLineCursor cursor = new MappedLineCursor(filename);
+\t\tif (cursor.size >= 2 && cursor.byteAt(0) == (byte) 0x1f && cursor.byteAt(1) == (byte) 0x8b)
+\t\t\treturn new LineCursor(new FileInputStream(filename));
+\t\treturn cursor;
+\t}
 
-    def generateUtilFileHeader(self):
-        """ For generating the util file header, such as the import statements. """
-        # Import library headers
-        self.currentFile.writeLine("import java.util.ArrayList;")
-        self.currentFile.writeLine("import java.util.Arrays;")
-        self.currentFile.writeLine("import java.io.RandomAccessFile;")
-        self.currentFile.writeLine("import java.io.EOFException;")
-        self.currentFile.writeLine("import java.io.IOException;")
+\tprivate byte byteAt(long pos)
+\t{
+\t\treturn segments[(int) (pos >>> SEGMENT_BITS)].get((int) (pos & SEGMENT_MASK));
+\t}
 
-        self.currentFile.writeNewline()
+\t// The offset of the end of the line starting at the given offset. Like BufferedReader.readLine,
+\t// lines end with a line feed, a carriage return or both.
+\tprivate long lineEnd(long start)
+\t{
+\t\tlong end = start;
+\t\twhile (end < size)
+\t\t{
+\t\t\tbyte b = byteAt(end);
+\t\t\tif (b == '\\n' || b == '\\r')
+\t\t\t\tbreak;
+\t\t\tend += 1;
+\t\t}
+\t\treturn end;
+\t}
 
-    def generateHelperFunctions(self):
-        """ For generating the helper functions that will be useful when parsing in the util file. """
-        # Static helpers for primitives
-        helpers = javagenStaticHelpers()
-        map(lambda s: self.currentFile.writeLine(s), helpers.splitlines())
+\t// The offset of the line following the end of a line
+\tprivate long nextLine(long end)
+\t{
+\t\tif (end + 1 < size && byteAt(end) == '\\r' && byteAt(end + 1) == '\\n')
+\t\t\treturn end + 2;
+\t\treturn end < size ? end + 1 : end;
+\t}
+
+\t// Whether the line between two offsets holds nothing but whitespace, like String.trim tells
+\tprivate boolean isBlank(long start, long end)
+\t{
+\t\tfor (long pos = start; pos < end; pos++)
+\t\t\tif ((byteAt(pos) & 0xff) > ' ')
+\t\t\t\treturn false;
+\t\treturn true;
+\t}
+
+\t// Decodes the line starting at the given offset. Returns false at the end of the file.
+\tprivate boolean decode(long start)
+\t{
+\t\tif (start == cachedStart)
+\t\t\treturn true;
+\t\tif (start >= size)
+\t\t\treturn false;
+\t\tlong end = lineEnd(start);
+\t\tint length = (int) (end - start);
+\t\tif (length > lineBytes.length)
+\t\t\tlineBytes = new byte[Math.max(length, lineBytes.length * 2)];
+\t\tfor (int i = 0; i < length; i++)
+\t\t\tlineBytes[i] = byteAt(start + i);
+\t\tcachedLine = new String(lineBytes, 0, length, StandardCharsets.UTF_8);
+\t\tcachedStart = start;
+\t\tcachedNext = nextLine(end);
+\t\treturn true;
+\t}
+
+\t@Override
+\tpublic String readLine()
+\t{
+\t\tif (!decode(position))
+\t\t\treturn null;
+\t\tposition = cachedNext;
+\t\treturn cachedLine;
+\t}
+
+\t@Override
+\tpublic String peekLine(int offset)
+\t{
+\t\tlong pos = position;
+\t\tfor (int i = 0; i < offset; i++)
+\t\t{
+\t\t\tif (!decode(pos))
+\t\t\t\treturn null;
+\t\t\tpos = cachedNext;
+\t\t}
+\t\treturn decode(pos) ? cachedLine : null;
+\t}
+
+\t@Override
+\tpublic long mark()
+\t{
+\t\treturn position;
+\t}
+
+\t@Override
+\tpublic void reset(long pos)
+\t{
+\t\tposition = pos;
+\t}
+
+\t@Override
+\tpublic void release(long pos)
+\t{
+\t}
+
+\t@Override
+\tpublic void close()
+\t{
+\t}
+
+\t@Override
+\tpublic long linesBetween(long from, long to)
+\t{
+\t\tlong lines = 0;
+\t\tfor (long pos = from; pos < to; pos = nextLine(lineEnd(pos)))
+\t\t\tlines += 1;
+\t\treturn lines;
+\t}
+}
+"""
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def javagenRecordHelpers():
+    """ The helpers splitting the records of a mapped input file between threads, used by
+    streamRecords. """
+    helpers = """
+// The byte offsets and line numbers of the lines that may start a record, see findRecordStarts
+public static class RecordStarts
+{
+\tpublic long[] offsets = new long[1024];
+\tpublic int[] lineNumbers = new int[1024];
+\tpublic int count = 0;
+\t// The offset following the last line that is not empty
+\tpublic long end;
+
+\tprivate void add(long offset, int lineNumber)
+\t{
+\t\tif (count == offsets.length)
+\t\t{
+\t\t\toffsets = Arrays.copyOf(offsets, count * 2);
+\t\t\tlineNumbers = Arrays.copyOf(lineNumbers, count * 2);
+\t\t}
+\t\toffsets[count] = offset;
+\t\tlineNumbers[count] = lineNumber;
+\t\tcount += 1;
+\t}
+}
+
+// Scans the mapped file from the given offset, the line of the given number, on for the lines that
+// may start a record: every recordLines lines or, if recordLines is 0, the first line and those
+// following an empty line. At most maxRecords of them are kept, and none from the empty lines
+// ending the file on.
+public static RecordStarts findRecordStarts(MappedLineCursor f, long position, int lineNumber, int recordLines, int maxRecords)
+{
+\tRecordStarts starts = new RecordStarts();
+\tstarts.end = position;
+\tint numStarts = 0;
+\tboolean isAfterEmptyLine = false;
+\tfor (long line = 0; position < f.size; line++)
+\t{
+\t\tlong start = position;
+\t\tlong end = f.lineEnd(start);
+\t\tboolean isBlank = f.isBlank(start, end);
+\t\tboolean isStart = recordLines > 0 ? line % recordLines == 0 : line == 0 || (isAfterEmptyLine && !isBlank);
+\t\tif (isStart && starts.count < maxRecords)
+\t\t\tstarts.add(start, (int) (lineNumber + line));
+\t\tposition = f.nextLine(end);
+\t\tif (end > start)
+\t\t{
+\t\t\tnumStarts = starts.count;
+\t\t\tstarts.end = position;
+\t\t}
+\t\tisAfterEmptyLine = isBlank;
+\t}
+\tstarts.count = numStarts;
+\treturn starts;
+}
+
+// Whether a record parsed from the start of the given index is followed by the start of the next
+// one, past the empty line separating them if there is one, or by nothing but empty lines if it is
+// the last one
+public static boolean endsRecord(MappedLineCursor f, RecordStarts starts, int index, boolean isSeparated)
+{
+\tif (index + 1 == starts.count)
+\t{
+\t\tString line;
+\t\twhile ((line = f.readLine()) != null)
+\t\t\tif (!line.equals(""))
+\t\t\t\treturn false;
+\t\treturn true;
+\t}
+\tif (isSeparated)
+\t{
+\t\tString separator = f.readLine();
+\t\tif (separator == null || !separator.trim().equals(""))
+\t\t\treturn false;
+\t}
+\treturn f.mark() == starts.offsets[index + 1];
+}
+
+public interface RecordParser<T>
+{
+\t// Parses the record of the given index from its start, or returns null if it does not end where
+\t// the next one starts
+\tT parse(MappedLineCursor f, RecordStarts starts, int index);
+}
+
+// Hands out the records from their starts found by findRecordStarts, in order. Splitting it hands
+// the first half of its records to another spliterator, which reads them through a cursor of its
+// own over the same mappings, so that a parallel stream parses records on every core.
+public static class RecordSpliterator<T> implements Spliterator<T>
+{
+\tprivate final MappedLineCursor f;
+\tprivate final RecordStarts starts;
+\tprivate final RecordParser<T> parser;
+\tprivate int index;
+\tprivate final int end;
+
+\tpublic RecordSpliterator(MappedLineCursor f, RecordStarts starts, int index, int end, RecordParser<T> parser)
+\t{
+\t\tthis.f = f;
+\t\tthis.starts = starts;
+\t\tthis.index = index;
+\t\tthis.end = end;
+\t\tthis.parser = parser;
+\t}
+
+\t@Override
+\tpublic boolean tryAdvance(Consumer<? super T> action)
+\t{
+\t\tif (index >= end)
+\t\t\treturn false;
+\t\tT record = parser.parse(f, starts, index);
+\t\tindex += 1;
+\t\taction.accept(record);
+\t\treturn true;
+\t}
+
+\t@Override
+\tpublic Spliterator<T> trySplit()
+\t{
+\t\tif (end - index < 2)
+\t\t\treturn null;
+\t\tint middle = (index + end) >>> 1;
+\t\tRecordSpliterator<T> prefix = new RecordSpliterator<T>(f.copy(), starts, index, middle, parser);
+\t\tindex = middle;
+\t\treturn prefix;
+\t}
+
+\t@Override
+\tpublic long estimateSize()
+\t{
+\t\treturn end - index;
+\t}
+
+\t@Override
+\tpublic int characteristics()
+\t{
+\t\treturn ORDERED | SIZED | SUBSIZED | IMMUTABLE;
+\t}
+}
+"""
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def javagenStatsHelpers():
+    """ The counters of the parser of each class, updated by the instrumented parsers, and
+    dumpStats, which reports them. """
+    helpers = """
+public static class ParserStats
+{
+\t// The counters of the parser of a class. Lines only count those of successful calls. The
+\t// exclusive time leaves out the time spent in the instrumented parsers it called.
+\tpublic final String className;
+\tpublic long calls = 0;
+\tpublic long lines = 0;
+\tpublic double inclusiveSeconds = 0;
+\tpublic double exclusiveSeconds = 0;
+\tpublic long rollbacks = 0;
+\tpublic long exceptions = 0;
+
+\tprivate static final ArrayList<ParserStats> all = new ArrayList<ParserStats>();
+\t// The start of each call in progress and the time spent in the calls nested in it
+\tprivate static final ArrayList<long[]> callStack = new ArrayList<long[]>();
+
+\tprivate ParserStats(String className)
+\t{
+\t\tthis.className = className;
+\t}
+
+\tpublic static ParserStats get(String className)
+\t{
+\t\tfor (ParserStats stats : all)
+\t\t{
+\t\t\tif (stats.className.equals(className))
+\t\t\t\treturn stats;
+\t\t}
+\t\tParserStats stats = new ParserStats(className);
+\t\tall.add(stats);
+\t\treturn stats;
+\t}
+
+\tpublic void begin()
+\t{
+\t\tcalls += 1;
+\t\tcallStack.add(new long[] {System.nanoTime(), 0});
+\t}
+
+\tpublic void end()
+\t{
+\t\tlong[] call = callStack.remove(callStack.size() - 1);
+\t\tlong elapsed = System.nanoTime() - call[0];
+\t\tinclusiveSeconds += elapsed / 1e9;
+\t\texclusiveSeconds += (elapsed - call[1]) / 1e9;
+\t\tif (!callStack.isEmpty())
+\t\t\tcallStack.get(callStack.size() - 1)[1] += elapsed;
+\t}
+}
+
+// Prints the counters of each class as JSON, or writes them to the file of the given name.
+public static void dumpStats(String filename)
+{
+\tStringBuilder json = new StringBuilder("{\\n");
+\tfor (int i = 0; i < ParserStats.all.size(); i++)
+\t{
+\t\tParserStats stats = ParserStats.all.get(i);
+\t\tjson.append("  \\"" + stats.className + "\\": {\\"calls\\": " + stats.calls
+\t\t\t+ ", \\"lines\\": " + stats.lines
+\t\t\t+ ", \\"inclusiveSeconds\\": " + stats.inclusiveSeconds
+\t\t\t+ ", \\"exclusiveSeconds\\": " + stats.exclusiveSeconds
+\t\t\t+ ", \\"rollbacks\\": " + stats.rollbacks
+\t\t\t+ ", \\"exceptions\\": " + stats.exceptions + "}"
+\t\t\t+ (i + 1 < ParserStats.all.size() ? "," : "") + "\\n");
+\t}
+\tjson.append("}\\n");
+\tif (filename == null)
+\t{
+\t\tSystem.out.print(json);
+\t\treturn;
+\t}
+\ttry
+\t{
+\t\tFileWriter output = new FileWriter(filename);
+\t\toutput.write(json.toString());
+\t\toutput.close();
+\t}
+\tcatch (IOException e)
+\t{
+\t\tthrow new RuntimeException("IO Error: Could not write the parser stats to '" + filename + "'.");
+\t}
+}
+"""
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def javagenSnapshotHelpers(primitives):
+    """ The writer and reader of the fields of binary snapshots, used by the dumpX and loadX
+    methods generated for each class. With primitives, they also write the arrays and growable
+    lists of unboxed values, and read them back as arrays. """
+    primitiveWriter = """
+\tpublic void write%(name)sList(%(type)s[] values) throws IOException
+\t{
+\t\twriteCount(values.length);
+\t\tfor (%(type)s value : values)
+\t\t\twrite%(name)s(value);
+\t}
+
+\tpublic void write%(name)sList(%(name)sList values) throws IOException
+\t{
+\t\twriteCount(values.size());
+\t\tfor (int i = 0; i < values.size(); i++)
+\t\t\twrite%(name)s(values.get(i));
+\t}
+"""
+    primitiveReader = """
+\tpublic %(type)s[] read%(name)sArray()
+\t{
+\t\tint count = readCount();
+\t\t// Every value takes at least a byte
+\t\tif (count > buffer.remaining())
+\t\t\tthrow new BufferUnderflowException();
+\t\t%(type)s[] values = new %(type)s[count];
+\t\tfor (int i = 0; i < count; i++)
+\t\t\tvalues[i] = read%(name)s();
+\t\treturn values;
+\t}
+"""
+    helpers = """
+private static final byte[] SNAPSHOT_MAGIC = "%(magic)s".getBytes(StandardCharsets.US_ASCII);
+
+// Writes the fields of a binary snapshot, little-endian, through a buffer.
+public static class SnapshotWriter
+{
+\tprivate final OutputStream output;
+\tprivate final ByteBuffer buffer = ByteBuffer.allocate(1 << 16).order(ByteOrder.LITTLE_ENDIAN);
+
+\tpublic SnapshotWriter(OutputStream output)
+\t{
+\t\tthis.output = output;
+\t}
+
+\tprivate void reserve(int size) throws IOException
+\t{
+\t\tif (buffer.remaining() < size)
+\t\t\tflush();
+\t}
+
+\tpublic void flush() throws IOException
+\t{
+\t\toutput.write(buffer.array(), 0, buffer.position());
+\t\tbuffer.clear();
+\t}
+
+\tpublic void writeBytes(byte[] bytes) throws IOException
+\t{
+\t\tif (bytes.length > buffer.capacity())
+\t\t{
+\t\t\tflush();
+\t\t\toutput.write(bytes);
+\t\t\treturn;
+\t\t}
+\t\treserve(bytes.length);
+\t\tbuffer.put(bytes);
+\t}
+
+\t// Ints are written as 64 bits and floats as doubles, which the other languages parse them into
+\tpublic void writeInt(int value) throws IOException
+\t{
+\t\treserve(8);
+\t\tbuffer.putLong(value);
+\t}
+
+\tpublic void writeFloat(float value) throws IOException
+\t{
+\t\treserve(8);
+\t\tbuffer.putDouble(value);
+\t}
+
+\tpublic void writeBool(boolean value) throws IOException
+\t{
+\t\treserve(1);
+\t\tbuffer.put((byte) (value ? 1 : 0));
+\t}
+
+\tpublic void writeCount(int count) throws IOException
+\t{
+\t\treserve(4);
+\t\tbuffer.putInt(count);
+\t}
+
+\tpublic void writeString(String value) throws IOException
+\t{
+\t\tbyte[] bytes = value.getBytes(StandardCharsets.UTF_8);
+\t\twriteCount(bytes.length);
+\t\twriteBytes(bytes);
+\t}
+
+\tpublic void writeIntList(ArrayList<Integer> values) throws IOException
+\t{
+\t\twriteCount(values.size());
+\t\tfor (int value : values)
+\t\t\twriteInt(value);
+\t}
+
+\tpublic void writeFloatList(ArrayList<Float> values) throws IOException
+\t{
+\t\twriteCount(values.size());
+\t\tfor (float value : values)
+\t\t\twriteFloat(value);
+\t}
+
+\tpublic void writeBoolList(ArrayList<Boolean> values) throws IOException
+\t{
+\t\twriteCount(values.size());
+\t\tfor (boolean value : values)
+\t\t\twriteBool(value);
+\t}
+
+\tpublic void writeStringList(ArrayList<String> values) throws IOException
+\t{
+\t\twriteCount(values.size());
+\t\tfor (String value : values)
+\t\t\twriteString(value);
+\t}
+%(primitiveWriters)s}
+
+// Reads the fields of a binary snapshot from a buffer holding all of it. Reading past its end
+// throws a BufferUnderflowException.
+public static class SnapshotReader
+{
+\tprivate final ByteBuffer buffer;
+
+\tpublic SnapshotReader(ByteBuffer buffer)
+\t{
+\t\tthis.buffer = buffer.order(ByteOrder.LITTLE_ENDIAN);
+\t}
+
+\t// Skips the given bytes if the snapshot continues with them
+\tpublic boolean readPrefix(byte[] prefix)
+\t{
+\t\tif (buffer.remaining() < prefix.length)
+\t\t\treturn false;
+\t\tfor (int i = 0; i < prefix.length; i++)
+\t\t{
+\t\t\tif (buffer.get(buffer.position() + i) != prefix[i])
+\t\t\t\treturn false;
+\t\t}
+\t\tbuffer.position(buffer.position() + prefix.length);
+\t\treturn true;
+\t}
+
+\tpublic boolean hasRemaining()
+\t{
+\t\treturn buffer.hasRemaining();
+\t}
+
+\t// A count read from a corrupt snapshot must not reserve more than it can hold
+\tpublic int capacity(int count)
+\t{
+\t\treturn Math.min(count, buffer.remaining());
+\t}
+
+\tpublic int readInt()
+\t{
+\t\tlong value = buffer.getLong();
+\t\tif ((int) value != value)
+\t\t\tthrow new RuntimeException("Parser Error: An int of the binary snapshot does not fit in an int.");
+\t\treturn (int) value;
+\t}
+
+\tpublic float readFloat()
+\t{
+\t\treturn (float) buffer.getDouble();
+\t}
+
+\tpublic boolean readBool()
+\t{
+\t\treturn buffer.get() != 0;
+\t}
+
+\tpublic int readCount()
+\t{
+\t\tlong count = buffer.getInt() & 0xFFFFFFFFL;
+\t\tif (count > Integer.MAX_VALUE)
+\t\t\tthrow new RuntimeException("Parser Error: A list of the binary snapshot is too long to be read.");
+\t\treturn (int) count;
+\t}
+
+\tpublic String readString()
+\t{
+\t\tint length = readCount();
+\t\tif (length > buffer.remaining())
+\t\t\tthrow new BufferUnderflowException();
+\t\tbyte[] bytes = new byte[length];
+\t\tbuffer.get(bytes);
+\t\treturn new String(bytes, StandardCharsets.UTF_8);
+\t}
+
+\tpublic ArrayList<Integer> readIntList()
+\t{
+\t\tint count = readCount();
+\t\tArrayList<Integer> values = new ArrayList<Integer>(capacity(count));
+\t\tfor (int i = 0; i < count; i++)
+\t\t\tvalues.add(readInt());
+\t\treturn values;
+\t}
+
+\tpublic ArrayList<Float> readFloatList()
+\t{
+\t\tint count = readCount();
+\t\tArrayList<Float> values = new ArrayList<Float>(capacity(count));
+\t\tfor (int i = 0; i < count; i++)
+\t\t\tvalues.add(readFloat());
+\t\treturn values;
+\t}
+
+\tpublic ArrayList<Boolean> readBoolList()
+\t{
+\t\tint count = readCount();
+\t\tArrayList<Boolean> values = new ArrayList<Boolean>(capacity(count));
+\t\tfor (int i = 0; i < count; i++)
+\t\t\tvalues.add(readBool());
+\t\treturn values;
+\t}
+
+\tpublic ArrayList<String> readStringList()
+\t{
+\t\tint count = readCount();
+\t\tArrayList<String> values = new ArrayList<String>(capacity(count));
+\t\tfor (int i = 0; i < count; i++)
+\t\t\tvalues.add(readString());
+\t\treturn values;
+\t}
+%(primitiveReaders)s}
+"""
+    primitiveWriters = ""
+    primitiveReaders = ""
+    if primitives:
+        for primitive in PRIMITIVE_LISTS:
+            primitiveWriters += primitiveWriter % primitive
+            primitiveReaders += primitiveReader % primitive
+    helpers = helpers % { "magic": CodeGenerator.SNAPSHOT_MAGIC, "primitiveWriters": primitiveWriters,
+        "primitiveReaders": primitiveReaders }
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+
+
+""" Class for generating Java code. """
+class JavaGenerator(CodeGenerator):
+
+    def initialize(self):
+        """ Perform additional initialization if required. """
+        InstaParseFile.commentString = "//"
+        self.main.setExtension("java")
+        self.util.setExtension("java")
+        self.classFiles = []
+        if self.options.primitives:
+            # List fields of unboxed values are parsed straight into arrays
+            for primitive in PRIMITIVE_LISTS:
+                self.typeNameToParseFuncName["list(%s)" % primitive["typeName"]] = primitive["parse"] + "Array"
+
+    def codeGen(self):
+        """ This method is called to generate and write the parser to the specified file. """
+        self.generateClasses()
+        self.generateUtilFile()
+        self.generateMainFile()
+        self.main.save()
+        self.util.save()
+        map(lambda c: c.save(), self.classFiles)
+
+    ################################################################################
+    # Generate Data File
+    ################################################################################
+
+    def generateClass( self, className, fields ):
+        """ Helper function for generating the code segement defining a class (or the corresponding
+        data structure). The first argument is the class name and the second argument is a list of
+        fields (in order) of that class. """
+        self.typeNameToParseFuncName[className] = "parse%s" % className
+        classFile = InstaParseFile(join(self.foldername, className + ".java"))
+        self.classFiles.append(classFile)
+        self.currentFile = classFile
+
+        shouldImportArrayList = False
+
+        self._beginBlock("public class " + className )
+
+        for field in fields:
+            typeName = self._getTypeName(field)
+            if typeName.startswith("ArrayList"):
+                shouldImportArrayList = True
+            classFile.writeLine("public " + typeName + " " + field.name() + ";")
+
+        if shouldImportArrayList:
+            classFile.writeImportLine("")
+            classFile.writeImportLine("import java.util.ArrayList;")
+
+        self._endBlock()
+
+    ################################################################################
+    # Generate Util File
+    ################################################################################
+
+    def generateUtilFile(self):
+        self.currentFile = self.util
+        self.generateUtilFileHeader()
+        self._beginBlock("public class " + CodeGenerator.UTIL_FILE_NAME)
+        self.generateHelperFunctions()
+        self.generateClassParserFunctions()
+        self.generateClassSnapshotFunctions()
+        self._endBlock()
+
+    def generateUtilFileHeader(self):
+        """ For generating the util file header, such as the import statements. """
+        # Import library headers
+        self.currentFile.writeLine("import java.util.ArrayList;")
+        self.currentFile.writeLine("import java.util.Arrays;")
+        self.currentFile.writeLine("import java.io.BufferedInputStream;")
+        self.currentFile.writeLine("import java.io.BufferedReader;")
+        self.currentFile.writeLine("import java.io.InputStream;")
+        self.currentFile.writeLine("import java.io.InputStreamReader;")
+        self.currentFile.writeLine("import java.io.EOFException;")
+        self.currentFile.writeLine("import java.io.IOException;")
+        self.currentFile.writeLine("import java.io.OutputStream;")
+        self.currentFile.writeLine("import java.io.FileOutputStream;")
+        self.currentFile.writeLine("import java.io.RandomAccessFile;")
+        self.currentFile.writeLine("import java.nio.BufferUnderflowException;")
+        self.currentFile.writeLine("import java.nio.ByteBuffer;")
+        self.currentFile.writeLine("import java.nio.ByteOrder;")
+        self.currentFile.writeLine("import java.nio.channels.FileChannel;")
+        self.currentFile.writeLine("import java.nio.charset.StandardCharsets;")
+        self.currentFile.writeLine("import java.util.zip.GZIPInputStream;")
+        self.currentFile.writeLine("import java.util.regex.Matcher;")
+        self.currentFile.writeLine("import java.util.regex.Pattern;")
+        if self.options.instrument:
+            self.currentFile.writeLine("import java.io.FileWriter;")
+        if self.options.mmap or self._streamsRecords():
+            self.currentFile.writeLine("import java.io.FileInputStream;")
+            self.currentFile.writeLine("import java.nio.MappedByteBuffer;")
+        if self._streamsRecords():
+            self.currentFile.writeLine("import java.util.Spliterator;")
+            self.currentFile.writeLine("import java.util.function.Consumer;")
+            self.currentFile.writeLine("import java.util.stream.Stream;")
+            self.currentFile.writeLine("import java.util.stream.StreamSupport;")
+
+        self.currentFile.writeNewline()
+
+    def generateHelperFunctions(self):
+        """ For generating the helper functions that will be useful when parsing in the util file. """
+        self.currentFile.writeLine("private static final String DELIMITER = \"" + self.format.lineDelimiter() + "\";")
+        # Static helpers for primitives
+        helpers = javagenStaticHelpers()
+        map(lambda s: self.currentFile.writeLine(s), helpers.splitlines())
+        if self.options.primitives:
+            map(lambda s: self.currentFile.writeLine(s), javagenPrimitiveHelpers().splitlines())
+        if self.options.mmap or self._streamsRecords():
+            map(lambda s: self.currentFile.writeLine(s), javagenMappedHelpers().splitlines())
+        if self._streamsRecords():
+            map(lambda s: self.currentFile.writeLine(s), javagenRecordHelpers().splitlines())
+        if self.options.instrument:
+            map(lambda s: self.currentFile.writeLine(s), javagenStatsHelpers().splitlines())
+        self.currentFile.writeLine("// Tells the binary snapshots of formats of this layout apart from those of other formats")
+        self.currentFile.writeLine("private static final byte[] SCHEMA_HASH = \"%s\".getBytes(StandardCharsets.US_ASCII);"
+            % self.schemaHash())
+        map(lambda s: self.currentFile.writeLine(s), javagenSnapshotHelpers(self.options.primitives).splitlines())
+        self.currentFile.writeNewline()
+
+    def generateClassSnapshotFunctions(self):
+        """ For generating the methods writing every user defined class to a binary snapshot and
+        reading it back, followed by those writing and reading the snapshot file of a body. """
+        writeLine = self.currentFile.writeLine
+        CodeGenerator.generateClassSnapshotFunctions(self)
+
+        self._beginBlock("public static void writeSnapshot(%s body, String filename) throws IOException" % self.bodyTypeName)
+        writeLine("OutputStream output = new FileOutputStream(filename);")
+        self._beginBlock("try")
+        writeLine("SnapshotWriter out = new SnapshotWriter(output);")
+        writeLine("out.writeBytes(SNAPSHOT_MAGIC);")
+        writeLine("out.writeBytes(SCHEMA_HASH);")
+        writeLine("dump%s(out, body);" % self.bodyTypeName)
+        writeLine("out.flush();")
+        self._endBlock()
+        self._beginBlock("finally")
+        writeLine("output.close();")
+        self._endBlock()
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._beginBlock("public static %s readSnapshot(String filename) throws IOException" % self.bodyTypeName)
+        # The mapping stays valid once the file is closed
+        writeLine("ByteBuffer buffer;")
+        writeLine("RandomAccessFile file = new RandomAccessFile(filename, \"r\");")
+        self._beginBlock("try")
+        writeLine("FileChannel channel = file.getChannel();")
+        self._beginBlock("if (channel.size() > Integer.MAX_VALUE)")
+        writeLine("throw new RuntimeException(\"Parser Error: The binary snapshot \" + filename + \" is too large to be mapped.\");")
+        self._endBlock()
+        writeLine("buffer = channel.map(FileChannel.MapMode.READ_ONLY, 0, channel.size());")
+        self._endBlock()
+        self._beginBlock("finally")
+        writeLine("file.close();")
+        self._endBlock()
+        writeLine("SnapshotReader in = new SnapshotReader(buffer);")
+        self._beginBlock("if (!in.readPrefix(SNAPSHOT_MAGIC))")
+        writeLine("throw new RuntimeException(\"Parser Error: \" + filename + \" is not a binary snapshot.\");")
+        self._endBlock()
+        self._beginBlock("if (!in.readPrefix(SCHEMA_HASH))")
+        writeLine("throw new RuntimeException(\"Parser Error: The binary snapshot \" + filename + \" was written for a format of another layout.\");")
+        self._endBlock()
+        writeLine("%s body;" % self.bodyTypeName)
+        self._beginBlock("try")
+        writeLine("body = load%s(in);" % self.bodyTypeName)
+        self._endBlock()
+        self._beginBlock("catch (BufferUnderflowException e)")
+        writeLine("throw new RuntimeException(\"Parser Error: The binary snapshot \" + filename + \" is truncated.\");")
+        self._endBlock()
+        self._beginBlock("if (in.hasRemaining())")
+        writeLine("throw new RuntimeException(\"Parser Error: The binary snapshot \" + filename + \" continues after its body.\");")
+        self._endBlock()
+        writeLine("return body;")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+    def _snapshotFunctionSuffix( self, typeName ):
+        """ The suffix of the SnapshotWriter and SnapshotReader methods of a primitive type. """
+        if isList(typeName):
+            return self._snapshotFunctionSuffix(listType(typeName)) + "List"
+        return { StringConstants.INTEGER_TYPE: "Int", StringConstants.FLOAT_TYPE: "Float",
+            StringConstants.BOOL_TYPE: "Bool", StringConstants.STRING_TYPE: "String" }[typeName]
+
+    def _snapshotReadSuffix( self, typeName ):
+        """ The suffix of the SnapshotReader method reading a value of a primitive type, which
+        reads lists of unboxed values as arrays with the primitives option. """
+        if isList(typeName) and self._isUnboxed(listType(typeName)):
+            return self._snapshotFunctionSuffix(listType(typeName)) + "Array"
+        return self._snapshotFunctionSuffix(typeName)
+
+    def generateClassSnapshotFunction( self, className, lines ):
+        """ For generating "dumpX", which writes an instance of the class X to a binary snapshot,
+        and "loadX", which reads one back. Repeated fields of a primitive type share the layout of
+        lists, and are written and read as such. With the primitives option, lists of unboxed values
+        are read back as arrays. """
+        writeLine = self.currentFile.writeLine
+        fields = [ field for line in lines if not line.isEmpty() for field in line ]
+
+        self._beginBlock("public static void dump%s(SnapshotWriter out, %s value) throws IOException" % ( className, className ))
+        for field in fields:
+            value = "value." + field.name()
+            if field.isPrimitive() and not ( field.isRepeating() and field.isList() ):
+                suffix = self._snapshotFunctionSuffix(field.typeName())
+                writeLine("out.write%s%s(%s);" % ( suffix, "List" if field.isRepeating() else "", value ))
+            elif not field.isRepeating():
+                writeLine("dump%s(out, %s);" % ( field.typeName(), value ))
+            else:
+                writeLine("out.writeCount(%s.size());" % value)
+                self._beginBlock("for (%s instance : %s)" % ( self._getBasicTypeName(field.typeName()) or field.typeName(), value ))
+                if field.isList():
+                    writeLine("out.write%s(instance);" % self._snapshotFunctionSuffix(field.typeName()))
+                else:
+                    writeLine("dump%s(out, instance);" % field.typeName())
+                self._endBlock()
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._beginBlock("public static %s load%s(SnapshotReader in)" % ( className, className ))
+        writeLine("%s result = new %s();" % ( className, className ))
+        for field in fields:
+            value = "result." + field.name()
+            if field.isPrimitive() and not ( field.isRepeating() and field.isList() ):
+                typeName = "list(%s)" % field.typeName() if field.isRepeating() else field.typeName()
+                read = "in.read%s()" % self._snapshotReadSuffix(typeName)
+                if field.isRepeating() and self._isUnboxed(field.typeName()) and not field.isCountedRepetition():
+                    read = "new %s(%s)" % ( self._getTypeName(field), read )
+                writeLine("%s = %s;" % ( value, read ))
+            elif not field.isRepeating():
+                writeLine("%s = load%s(in);" % ( value, field.typeName() ))
+            else:
+                count = field.name() + "Count"
+                writeLine("int %s = in.readCount();" % count)
+                writeLine("%s = new %s(in.capacity(%s));" % ( value, self._getTypeName(field), count ))
+                self._beginBlock("for (int i = 0; i < %s; i++)" % count)
+                if field.isList():
+                    writeLine("%s.add(in.read%s());" % ( value, self._snapshotReadSuffix(field.typeName()) ))
+                else:
+                    writeLine("%s.add(load%s(in));" % ( value, field.typeName() ))
+                self._endBlock()
+        writeLine("return result;")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+    def generateClassParserFunctions(self):
+        """ For generating all the functions for parsing user defined classes, followed by those
+        streaming the records of the body. """
+        CodeGenerator.generateClassParserFunctions(self)
+        if self._streamsRecords():
+            self.generateRecordFunctions()
+
+    def generateClassParserFunction( self, className, lines, functionName = None ):
+        """ For generating a helper functions for parsing a user defined class. The first argument
+        is the class name and the second argument is a list of FormatLine's. Given a function
+        name, only the given lines of the class are parsed, by an uninstrumented private function
+        of that name. """
+        writeLine = self.currentFile.writeLine
+
+        def isSimplePrimitive(field):
+            return field.isInteger() or field.isFloat() or field.isString() or field.isBool()
+
+        def generateSetup():
+            # Helper to do some setup in every parser function
+            writeLine(className + " result = new " + className + "();")
+            didSplit = False
+            didRepeat = False
+            didRepeatPlus = False
+            didSeparateLookahead = False
+
+            for line in lines:
+                didRepeat = didRepeat or line.isRepeating()
+                didRepeatPlus = didRepeatPlus or  line.isOneOrMoreRepetition()
+                didSplit = didSplit or line.numFields() > 1 or (not line.isEmpty() and line.getField(0).isList())
+                didSeparateLookahead = didSeparateLookahead or ( not line.isEmpty() and
+                    line.lookahead() is not None and line.isSplitByNewline() )
+
+            if didSplit:
+                writeLine("Tokenizer tokens;")
+            if didRepeat:
+                writeLine("long prevFilePos = getFilePointer(f);")
+                writeLine("int prevLineNumber = lineNumber[0];")
+            if didRepeatPlus:
+                writeLine("boolean didRepeatOnce = false;")
+            if didSeparateLookahead:
+                writeLine("boolean isSeparated;")
+
+        def handleRollback():
+            if self.options.instrument:
+                writeLine("STATS_" + className + ".rollbacks += 1;")
+
+        def handleEmptyLine():
+            # Handle the empty line case
+            self._beginBlock("if (!readLine(f, \"" + className + "\").trim().equals(\"\"))")
+            writeLine("throw new RuntimeException(\"Parser Error on line \" + lineNumber[0] +" +
+                "\": Should be an empty line.\");")
+            self._endBlock()
+            writeLine("lineNumber[0] += 1;")
+
+        def handleSimpleLineOneField(field):
+            # Helper for handleSimpleLine
+            if isSimplePrimitive(field):
+                # Field is simple, just parse it
+                writeLine("result." + field.name() + " = "
+                    + self.typeNameToParseFuncName[field.typeName()] + "(readLine(f, \"" + className + "\"), lineNumber);")
+                writeLine("lineNumber[0] += 1;")
+            elif field.isPrimitive():
+                # Field is primitive list, split line
+                writeLine("tokens = f.tokenize(readLine(f, \"" + className + "\"));")
+                writeLine("result." + field.name() + " = "
+                    + self.typeNameToParseFuncName["list(%s)" % field.listType()] + "(tokens, lineNumber);")
+                writeLine("lineNumber[0] += 1;")
+            else:
+                # Field is a class, recurse
+                writeLine("result." + field.name() + " = "
+                    + self.typeNameToParseFuncName[field.typeName()] + "(f, lineNumber);")
+
+        def handleSimpleLineMultipleField(index, field):
+            # Helper for handleSimpleLine
+            if isSimplePrimitive(field):
+                writeLine("result." + field.name() + " = "
+                    + self.typeNameToParseFuncName[field.typeName()] + "(tokens, lineNumber);")
+            elif field.isPrimitive():
+                # Field is primitive list, use rest of tokens
+                writeLine("result." + field.name() + " = "
+                    + self.typeNameToParseFuncName["list(%s)" % field.listType()] + "(tokens, lineNumber);")
+            else:
+                # Field is a class? Cannot be!
+                raise Exception("This should never happen.")
+
+            writeLine("lineNumber[0] += 1;")
+
+        def handleSimpleLine(line):
+            if line.numFields() == 1:
+                # Only one field, no need to split unnecessarily
+                handleSimpleLineOneField(line.getField(0))
+            else:
+                # Multiple fields, split it
+                writeLine("tokens = f.tokenize(readLine(f, \"" + className + "\"));")
+                if (line.getField(-1).isList()):
+                    self._beginBlock("if (tokens.count() < " + str(line.numFields()) + ")")
+                else:
+                    self._beginBlock("if (tokens.count() != " + str(line.numFields()) + ")")
+                writeLine("throw new RuntimeException(\"Parser Error on line \" + lineNumber[0] + " +
+                    "\": Expecting " + str(line.numFields()) + " fields (\" + tokens.count() + \" found).\");")
+                self._endBlock()
+                for index, field in enumerate(line):
+                    handleSimpleLineMultipleField(index, field)
+
+        def handleRepeatingLineForField(field):
+            # Helper for handleRepeating
+            if self._isUnboxed(field.typeName()) and field.isCountedRepetition():
+                # Field is an array sized by the repetition, set its element
+                writeLine("result." + field.name() + "[i] = "
+                    + self.typeNameToParseFuncName[field.typeName()] + "(readLine(f, \"" + className + "\"), lineNumber);")
+                writeLine("lineNumber[0] += 1;")
+            elif isSimplePrimitive(field):
+                # Field is simple, just parse it
+                writeLine("result." + field.name() + ".add("
+                    + self.typeNameToParseFuncName[field.typeName()] + "(readLine(f, \"" + className + "\"), lineNumber));")
+                writeLine("lineNumber[0] += 1;")
+            elif field.isPrimitive():
+                # Field is primitive list, split line
+                writeLine("tokens = f.tokenize(readLine(f, \"" + className + "\"));")
+                writeLine("result." + field.name() + ".add("
+                    + self.typeNameToParseFuncName["list(%s)" % field.listType()] + "(tokens, lineNumber));")
+                writeLine("lineNumber[0] += 1;")
+            else:
+                # Field is a class, recurse
+                writeLine("result." + field.name() + ".add("
+                    + self.typeNameToParseFuncName[field.typeName()] + "(f, lineNumber));")
+            # Nothing before an instance of the body is revisited, so the cursor may discard it.
+            if className == self.bodyTypeName:
+                writeLine("f.release(getFilePointer(f));")
+
+        def handleLookaheadRepeatingLine(line):
+            # Repeat while the upcoming lines look like the start of another instance. If every
+            # instance is a single line, the lookahead decides the repetition on its own, otherwise
+            # the instance is still parsed on trial once the lookahead passes.
+            field = line.getField(0)
+            isDecisive = line.isLookaheadDecisive()
+            isSeparated = "false"
+            writeLine("result." + field.name() + " = new " + self._getTypeName(field) + "();")
+            if line.isSplitByNewline():
+                isSeparated = "isSeparated"
+                writeLine("isSeparated = false;")
+            if not isDecisive:
+                self._beginBlock("try")
+            self._beginBlock("while (hasNextInstance(f, " + self._signatureName( className, field ) + ", "
+                + isSeparated + "))")
+            if not isDecisive:
+                writeLine("prevFilePos = getFilePointer(f);")
+                writeLine("prevLineNumber = lineNumber[0];")
+            if line.isSplitByNewline():
+                self._beginBlock("if (isSeparated)")
+                handleEmptyLine()
+                self._endBlock()
+            handleRepeatingLineForField(field)
+            if line.isSplitByNewline():
+                writeLine("isSeparated = true;")
+            self._endBlock()
+            if not isDecisive:
+                self._endBlock()
+                # Catch any errors, reset line number and continue
+                self._beginBlock("catch (Exception e)")
+                writeLine("seek(f, prevFilePos);")
+                handleRollback()
+                writeLine("lineNumber[0] = prevLineNumber;")
+                self._endBlock()
+            if line.isOneOrMoreRepetition():
+                self._beginBlock("if (result." + field.name() + ".size() < 1)")
+                writeLine("throw new RuntimeException(\"Parser Error on line \" + lineNumber[0] +"
+                    + "\": Expecting at least 1 \\\"" + field.typeName()
+                    + "\\\" when parsing \\\"" + className + "." + field.name()
+                    + "\\\" (0 found).\");")
+                self._endBlock()
+
+        def handleRepeatingLine(line):
+            # Must be a primitive or class repeated
+            if line.lookahead() is not None:
+                handleLookaheadRepeatingLine(line)
+            elif line.isIntegerRepetition() or line.isVariableRepetition():
+                # Constant repetition amount
+                field = line.getField(0)
+                # Generate the repetition string
+                repetitionString = ""
+                if line.isIntegerRepetition():
+                    repetitionString = str(line.repetitionAmountString())
+                else:
+                    repetitionString =  "result." + line.repetitionAmountString()
+                # Initialize the arraylist, or the array of unboxed values
+                if self._isUnboxed(field.typeName()):
+                    # A negative number of repetitions repeats nothing
+                    size = repetitionString if line.isIntegerRepetition() else "Math.max(0, " + repetitionString + ")"
+                    writeLine("result." + field.name() + " = new " + self._primitiveTypeName(field.typeName())
+                        + "[" + size + "];")
+                else:
+                    writeLine("result." + field.name() + " = new " + self._getTypeName(field) + "();")
+                # Begin loop
+                self._beginBlock("for (int i = 0; i < " + repetitionString + "; i++)")
+                # Wrap with try
+                self._beginBlock("try")
+                # Main handler
+                handleRepeatingLineForField(field)
+                # Check for newline
+                if (line.isSplitByNewline()):
+                    self._beginBlock("if (i != " + repetitionString + " - 1)")
+                    handleEmptyLine()
+                    self._endBlock()
+                # End try
+                self._endBlock()
+                # Catch any error to throw appropriate error message
+                self._beginBlock("catch (Exception e)")
+                writeLine("throw new RuntimeException(\"Parser Error on line \" + lineNumber[0] +"
+                    + "\": Expecting exactly \" + " + repetitionString + " + \" \\\"" + field.typeName()
+                    + "\\\" when parsing \\\"" + className + "." + field.name()
+                    + "\\\" (\" + i + \" found).\");")
+                self._endBlock()
+                # End loop
+                self._endBlock()
+            elif line.isZeroOrMoreRepetition():
+                field = line.getField(0)
+                # Wrap with try block
+                self._beginBlock("try")
+                # Initialize object
+                writeLine("result." + field.name() + " = new " + self._getTypeName(field) + "();")
+                # Save initial position
+                writeLine("prevFilePos = getFilePointer(f);")
+                writeLine("prevLineNumber = lineNumber[0];")
+                # Begin infinite loop
+                self._beginBlock("while (true)")
+                # Main handler
+                handleRepeatingLineForField(field)
+                writeLine("prevFilePos = getFilePointer(f);")
+                writeLine("prevLineNumber = lineNumber[0];")
+                # Check for newline
+                if (line.isSplitByNewline()):
+                    handleEmptyLine()
+                # End infinite loop and try block
+                self._endBlock()
+                self._endBlock()
+                # Catch any errors, reset line number and continue
+                self._beginBlock("catch (Exception e)")
+                writeLine("seek(f, prevFilePos);")
+                handleRollback()
+                writeLine("lineNumber[0] = prevLineNumber;")
+                self._endBlock()
+            elif line.isOneOrMoreRepetition:
+                field = line.getField(0)
+                # Wrap with try block
+                self._beginBlock("try")
+                # Initialize object and checker to ensure at least one repetition
+                writeLine("didRepeatOnce = false;")
+                writeLine("result." + field.name() + " = new " + self._getTypeName(field) + "();")
+                # Begin infinite loop
+                self._beginBlock("while (true)")
+                # Main handler
+                handleRepeatingLineForField(field)
+                writeLine("prevFilePos = getFilePointer(f);")
+                writeLine("prevLineNumber = lineNumber[0];")
+                writeLine("didRepeatOnce = true;")
+                # Check for newline
+                if (line.isSplitByNewline()):
+                    handleEmptyLine()
+                # End infinite loop and try block
+                self._endBlock()
+                self._endBlock()
+                # Catch any errors, either (1) reset line number and continue (2) error if did not repeat once
+                self._beginBlock("catch (Exception e)")
+                self._beginBlock("if (!didRepeatOnce)")
+                writeLine("throw new RuntimeException(\"Parser Error on line \" + lineNumber[0] +"
+                    + "\": Expecting at least 1 \\\"" + field.typeName()
+                    + "\\\" when parsing \\\"" + className + "." + field.name()
+                    + "\\\" (0 found).\");")
+                self._endBlock()
+                writeLine("seek(f, prevFilePos);")
+                handleRollback()
+                writeLine("lineNumber[0] = prevLineNumber;")
+                self._endBlock()
+            else:
+                raise Exception("This should never happen.")
+
+
+        if functionName is not None:
+            # The signatures and counters belong to the parser of the whole class
+            self._beginBlock("private static " + className + " " + functionName + "(LineCursor f, int[] lineNumber)")
+        else:
+            # Lookahead signatures of the repetitions in this class
+            for line in lines:
+                if not line.isEmpty() and line.lookahead() is not None:
+                    writeLine("private static final LineSignature " + self._signatureName( className, line.getField(0) )
+                        + " = " + self._signatureLiteral(line.lookahead()) + ";")
+            if self.options.instrument:
+                writeLine("private static final ParserStats STATS_" + className + " = ParserStats.get(\"" + className + "\");")
+                self._beginBlock("private static " + className + " parse" + className
+                    + "Uninstrumented(LineCursor f, int[] lineNumber)")
+            else:
+                self._beginBlock("public static " + className + " parse" + className + "(LineCursor f, int[] lineNumber)")
+        generateSetup()
+
+        # Handle the three different cases, helpers are inner functions defined above
+        for line in lines:
+            if line.isEmpty():
+                handleEmptyLine()
+            elif line.isRepeating():
+                handleRepeatingLine(line)
+            else:
+                handleSimpleLine(line)
+
+        writeLine("return result;")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        if self.options.instrument and functionName is None:
+            self.generateInstrumentedParserFunction(className)
+
+    def generateInstrumentedParserFunction( self, className ):
+        """ For generating the parser of a class that updates its counters around the call of
+        the uninstrumented parser. Lines are only counted for successful calls. """
+        writeLine = self.currentFile.writeLine
+        self._beginBlock("public static " + className + " parse" + className + "(LineCursor f, int[] lineNumber)")
+        # The line numbers advance once per field, so the lines are counted with the cursor
+        writeLine("long firstFilePos = getFilePointer(f);")
+        writeLine("STATS_" + className + ".begin();")
+        self._beginBlock("try")
+        writeLine(className + " result = parse" + className + "Uninstrumented(f, lineNumber);")
+        writeLine("STATS_" + className + ".end();")
+        writeLine("STATS_" + className + ".lines += f.linesBetween(firstFilePos, getFilePointer(f));")
+        writeLine("return result;")
+        self._endBlock()
+        self._beginBlock("catch (RuntimeException e)")
+        writeLine("STATS_" + className + ".exceptions += 1;")
+        writeLine("STATS_" + className + ".end();")
+        writeLine("throw e;")
+        self._endBlock()
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+    def generateRecordFunctions(self):
+        """ For generating streamRecords, which streams the records of the body of an input file.
+        The lines of the body before its records are parsed first, then the mapped file is scanned
+        for the record starts, and the records are parsed on their own from their starts by a
+        parallel stream over a RecordSpliterator.
+
+        The scan cannot tell an empty line of a record from the one separating two records, so the
+        records are only streamed once each of them has been found to end where the next one
+        starts. Otherwise the file is parsed sequentially, and either its error is thrown or its
+        records are streamed, exactly as parse would have returned them. """
+        writeLine = self.currentFile.writeLine
+        recordLine, recordLines = self._parallelRecords()
+        recordField = recordLine.getField(0)
+        recordTypeName = recordField.typeName()
+        lines = self.classes[self.bodyTypeName]
+
+        self.generateClassParserFunction( self.bodyTypeName, lines[:-1], "parse" + self.bodyTypeName + "Prefix" )
+
+        # The parse of the whole file, for the records that cannot be parsed on their own
+        self._beginBlock("private static " + self.bodyTypeName + " parse" + self.bodyTypeName + "Whole(LineCursor f)")
+        writeLine("int[] lineNumber = {1};")
+        writeLine(self.bodyTypeName + " result = " + self.typeNameToParseFuncName[self.bodyTypeName] + "(f, lineNumber);")
+        writeLine("String line;")
+        self._beginBlock("while ((line = f.readLine()) != null)")
+        self._beginBlock("if (!line.equals(\"\"))")
+        writeLine("throw new RuntimeException(\"Parser Error on line \" + lineNumber[0] + \": Finished parsing but did not reach end of file.\");")
+        self._endBlock()
+        self._endBlock()
+        writeLine("return result;")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        # Returns null for a record that does not end where the next one starts
+        self._beginBlock("private static " + recordTypeName + " parse" + self.bodyTypeName
+            + "Record(MappedLineCursor f, RecordStarts starts, int index)")
+        writeLine("seek(f, starts.offsets[index]);")
+        writeLine("int[] lineNumber = {starts.lineNumbers[index]};")
+        writeLine(recordTypeName + " record;")
+        self._beginBlock("try")
+        parseRecord = self.typeNameToParseFuncName[recordTypeName] + "(f, lineNumber)"
+        if recordLine.lookahead() is not None:
+            # Like the sequential parse, the repetition ends at a record that does not start like one
+            parseRecord = "hasNextInstance(f, " + self._signatureName( self.bodyTypeName, recordField ) \
+                + ", false) ? " + parseRecord + " : null"
+        writeLine("record = " + parseRecord + ";")
+        self._endBlock()
+        self._beginBlock("catch (RuntimeException e)")
+        writeLine("return null;")
+        self._endBlock()
+        writeLine("return record != null && endsRecord(f, starts, index, "
+            + ( "true" if recordLine.isSplitByNewline() else "false" ) + ") ? record : null;")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        # Returns null unless every record ends where the next one starts
+        self._beginBlock("private static " + recordTypeName + "[] parse" + self.bodyTypeName
+            + "Records(MappedLineCursor f)")
+        writeLine("int[] lineNumber = {1};")
+        # The prefix is only kept for the field counting the records
+        parsePrefix = "parse" + self.bodyTypeName + "Prefix(f, lineNumber);"
+        if recordLine.isVariableRepetition():
+            writeLine(self.bodyTypeName + " prefix;")
+            parsePrefix = "prefix = " + parsePrefix
+        self._beginBlock("try")
+        writeLine(parsePrefix)
+        self._endBlock()
+        self._beginBlock("catch (RuntimeException e)")
+        writeLine("return null;")
+        self._endBlock()
+        if recordLine.isIntegerRepetition():
+            writeLine("int numRepetitions = " + str(recordLine.repetitionAmountString()) + ";")
+        elif recordLine.isVariableRepetition():
+            # A negative number of repetitions repeats nothing
+            writeLine("int numRepetitions = Math.max(0, prefix." + recordLine.repetitionAmountString() + ");")
+        else:
+            writeLine("int numRepetitions = Integer.MAX_VALUE;")
+        writeLine("long position = getFilePointer(f);")
+        writeLine("RecordStarts starts = findRecordStarts(f, position, lineNumber[0], %d, numRepetitions);"
+            % ( recordLines or 0 ))
+        # Without records, nothing but empty lines may follow the prefix
+        condition = "starts.count == 0 && starts.end > position"
+        if recordLine.lookahead() is None:
+            condition = "starts.count != numRepetitions || (" + condition + ")"
+        elif recordLine.isOneOrMoreRepetition():
+            condition = "starts.count == 0"
+        self._beginBlock("if (" + condition + ")")
+        writeLine("return null;")
+        self._endBlock()
+        writeLine("RecordSpliterator<" + recordTypeName + "> spliterator = new RecordSpliterator<" + recordTypeName
+            + ">(f, starts, 0, starts.count, " + CodeGenerator.UTIL_FILE_NAME + "::parse" + self.bodyTypeName + "Record);")
+        # The counters of the parsers are not safe to update from several threads
+        writeLine(recordTypeName + "[] records = StreamSupport.stream(spliterator, "
+            + ( "false" if self.options.instrument else "true" ) + ").toArray(" + recordTypeName + "[]::new);")
+        self._beginBlock("for (" + recordTypeName + " record : records)")
+        self._beginBlock("if (record == null)")
+        writeLine("return null;")
+        self._endBlock()
+        self._endBlock()
+        writeLine("return records;")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._beginBlock("public static Stream<" + recordTypeName + "> " + CodeGenerator.STREAM_RECORDS
+            + "(String filename) throws IOException")
+        writeLine("LineCursor cursor = MappedLineCursor.open(filename);")
+        # Compressed files cannot be split, so they are parsed whole
+        self._beginBlock("if (!(cursor instanceof MappedLineCursor))")
+        self._beginBlock("try")
+        writeLine("return parse" + self.bodyTypeName + "Whole(cursor)." + recordField.name() + ".stream();")
+        self._endBlock()
+        self._beginBlock("finally")
+        writeLine("cursor.close();")
+        self._endBlock()
+        self._endBlock()
+        writeLine("MappedLineCursor f = (MappedLineCursor) cursor;")
+        writeLine(recordTypeName + "[] records = parse" + self.bodyTypeName + "Records(f);")
+        self._beginBlock("if (records == null)")
+        writeLine("return parse" + self.bodyTypeName + "Whole(f.copy())." + recordField.name() + ".stream();")
+        self._endBlock()
+        writeLine("return Arrays.stream(records);")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+    ################################################################################
+    # Generate Main File
+    ################################################################################
+
+    def generateMainFile(self):
+        """ Generate main file where the main function resides. """
+        self.currentFile = self.main
+        self.generateMainFileHeader()
+        self._beginBlock("public class " + splitext(basename(self.currentFile.filename))[0])
+        self.generateMainFunction()
+        self.generateInputParserFunction()
+        self._endBlock()
+
+    def generateMainFileHeader(self):
+        """ For generating the main file header, such as the import statements. """
+        # Import library headers
+        self.currentFile.writeLine("import java.io.InputStream;")
+        self.currentFile.writeLine("import java.io.FileInputStream;")
+        self.currentFile.writeLine("import java.io.ByteArrayInputStream;")
+        self.currentFile.writeLine("import java.io.FileNotFoundException;")
+        self.currentFile.writeLine("import java.io.IOException;")
+        self.currentFile.writeLine("import java.io.EOFException;")
+        if self._streamsRecords():
+            self.currentFile.writeLine("import java.util.stream.Stream;")
+        self.currentFile.writeNewline()
+
+    def generateMainFunction(self):
+        """ For generating the empty main method that the user can fill in. """
+        self._beginBlock("public static void main(String[] args)")
+        self.currentFile.comment("Call " + CodeGenerator.PARSE_INPUT + "(filename) to parse the file of that name.")
+        self.currentFile.comment("Call " + CodeGenerator.PARSE_STREAM + "(input) to parse a stream such as System.in, or "
+            + CodeGenerator.PARSE_BUFFER + "(data) to parse")
+        self.currentFile.comment("an input held in memory.")
+        self.currentFile.comment("Call " + CodeGenerator.DUMP_SNAPSHOT + "(body, filename) to save a body as a binary snapshot, and "
+            + CodeGenerator.LOAD_SNAPSHOT + "(filename) to read it back.")
+        if self._streamsRecords():
+            self.currentFile.comment("Call " + CodeGenerator.STREAM_RECORDS + "(filename) to parse the "
+                + self._parallelRecords()[0].getField(0).name() + " of the body on every core and stream them")
+            self.currentFile.comment("in the order of the file.")
+        if self.options.instrument:
+            self.currentFile.comment("Call " + CodeGenerator.UTIL_FILE_NAME
+                + ".dumpStats(null) to print the counters of the parser of each class.")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+    def generateInputParserFunction(self):
+        """ For generating the functions to parse an input file, a stream and an input held in
+        memory. The stream is read through a LineCursor, so it does not need to support seeking.
+        With the mmap option, the input file is read through a MappedLineCursor instead. """
+        writeLine = self.currentFile.writeLine
+        if self.options.mmap:
+            self._generateCursorParserFunction("private static " + self.bodyTypeName + " "
+                + CodeGenerator.PARSE_INPUT + "(String filename)",
+                CodeGenerator.UTIL_FILE_NAME + ".MappedLineCursor.open(filename)", True)
+        else:
+            # Begin function declaration
+            self._beginBlock("private static " + self.bodyTypeName
+                + " " + CodeGenerator.PARSE_INPUT + "(String filename)")
+            self._beginBlock("try")
+            writeLine("return " + CodeGenerator.PARSE_STREAM + "(new FileInputStream(filename));")
+            self._endBlock()
+            # Catch file not found
+            self._beginBlock("catch (FileNotFoundException e)")
+            writeLine("System.err.println(\"Input file '\" + filename + \"' not found.\");")
+            writeLine("System.exit(1);")
+            self._endBlock()
+            writeLine("return null;")
+            self._endBlock()
+            self.currentFile.writeNewline()
+
+        self._beginBlock("private static " + self.bodyTypeName
+            + " " + CodeGenerator.PARSE_BUFFER + "(byte[] data)")
+        writeLine("return " + CodeGenerator.PARSE_STREAM + "(new ByteArrayInputStream(data));")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._generateCursorParserFunction("private static " + self.bodyTypeName + " "
+            + CodeGenerator.PARSE_STREAM + "(InputStream input)",
+            "new " + CodeGenerator.UTIL_FILE_NAME + ".LineCursor(input)", False)
+
+        # Binary snapshots, which are read back without parsing any text
+        self._beginBlock("private static void " + CodeGenerator.DUMP_SNAPSHOT + "(" + self.bodyTypeName + " body, String filename)")
+        self._beginBlock("try")
+        writeLine(CodeGenerator.UTIL_FILE_NAME + ".writeSnapshot(body, filename);")
+        self._endBlock()
+        self._beginBlock("catch (Exception e)")
+        writeLine("System.err.println(e.getMessage());")
+        writeLine("System.exit(1);")
+        self._endBlock()
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._beginBlock("private static " + self.bodyTypeName + " " + CodeGenerator.LOAD_SNAPSHOT + "(String filename)")
+        self._beginBlock("try")
+        writeLine("return " + CodeGenerator.UTIL_FILE_NAME + ".readSnapshot(filename);")
+        self._endBlock()
+        self._beginBlock("catch (Exception e)")
+        writeLine("System.err.println(e.getMessage());")
+        writeLine("System.exit(1);")
+        self._endBlock()
+        writeLine("return null;")
+        self._endBlock()
+
+        if self._streamsRecords():
+            recordTypeName = self._parallelRecords()[0].getField(0).typeName()
+            self.currentFile.writeNewline()
+            self._beginBlock("private static Stream<" + recordTypeName + "> " + CodeGenerator.STREAM_RECORDS
+                + "(String filename)")
+            self._beginBlock("try")
+            writeLine("return " + CodeGenerator.UTIL_FILE_NAME + "." + CodeGenerator.STREAM_RECORDS + "(filename);")
+            self._endBlock()
+            self._beginBlock("catch (FileNotFoundException e)")
+            writeLine("System.err.println(\"Input file '\" + filename + \"' not found.\");")
+            writeLine("System.exit(1);")
+            self._endBlock()
+            self._beginBlock("catch (Exception e)")
+            writeLine("System.err.println(e.getMessage());")
+            writeLine("System.exit(1);")
+            self._endBlock()
+            writeLine("return null;")
+            self._endBlock()
+
+    def _generateCursorParserFunction( self, declaration, cursor, isFile ):
+        """ For generating a function parsing the body from the LineCursor of the given
+        expression, and reporting the errors of the parse. """
+        writeLine = self.currentFile.writeLine
+        self._beginBlock(declaration)
+
+        # Main try block
+        self._beginBlock("try")
+        # Initial setup
+        writeLine(CodeGenerator.UTIL_FILE_NAME + ".LineCursor f = " + cursor + ";")
+        writeLine("int[] lineNumber = {1};")
+        # Begin parsing
+        writeLine(self.bodyTypeName + " result = "
+            + CodeGenerator.UTIL_FILE_NAME + "." + self.typeNameToParseFuncName[self.bodyTypeName] + "(f, lineNumber);")
+        # Handle trailing newlines
+        writeLine("String line;")
+        self._beginBlock("while ((line = f.readLine()) != null)")
+        self._beginBlock("if (!line.equals(\"\"))")
+        writeLine("throw new RuntimeException(\"Parser Error on line \" + lineNumber[0] + \": Finished parsing but did not reach end of file.\");")
+        self._endBlock()
+        self._endBlock()
+        # Finish up
+        writeLine("f.close();")
+        writeLine("return result;")
+        self._endBlock()
+
+        if isFile:
+            # Catch file not found
+            self._beginBlock("catch (FileNotFoundException e)")
+            writeLine("System.err.println(\"Input file '\" + filename + \"' not found.\");")
+            writeLine("System.exit(1);")
+            self._endBlock()
+        # All other exception catches (EOF exception caught here)
+        self._beginBlock("catch (Exception e)")
+        writeLine("System.err.println(e.getMessage());")
+        writeLine("System.exit(1);")
+        self._endBlock()
+
+        # Should never reach this line
+        writeLine("System.err.println(\"Unknown error occurred.\");")
+        writeLine("System.exit(1);")
+        writeLine("return null;")
+
+        # End function declaration
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+    ################################################################################
+    # Helper Functions
+    ################################################################################
+
+    def _getBasicTypeName( self, typeName ):
+        if isInteger(typeName):
+            return "Integer"
+        if isFloat(typeName):
+            return "Float"
+        elif isString(typeName):
+            return "String"
+        elif isBool(typeName):
+            return "Boolean"
+        elif isList(typeName):
+            if self._isUnboxed(listType(typeName)):
+                return self._primitiveTypeName(listType(typeName)) + "[]"
+            return "ArrayList<" + self._getBasicTypeName(listType(typeName)) + ">"
+        else:
+            return None
+
+
+    def _getTypeName( self, field ):
+        typeName = self._getBasicTypeName(field.typeName())
+        if typeName == None:
+            typeName = field.typeName()
+
+        if field.isRepeating() and self._isUnboxed(field.typeName()):
+            # The number of instances sizes an array when it is known before parsing them
+            if field.isCountedRepetition():
+                return self._primitiveTypeName(field.typeName()) + "[]"
+            return CodeGenerator.UTIL_FILE_NAME + "." + self._snapshotFunctionSuffix(field.typeName()) + "List"
+        elif field.isRepeating():
+            return "ArrayList<" + typeName + ">"
+        else:
+            return typeName
+
+    def _isUnboxed( self, typeName ):
+        """ Whether lists and repetitions of the given type hold unboxed values, which the
+        primitives option does for ints, floats and bools. """
+        return self.options.primitives and typeName in ( StringConstants.INTEGER_TYPE,
+            StringConstants.FLOAT_TYPE, StringConstants.BOOL_TYPE )
+
+    def _primitiveTypeName( self, typeName ):
+        """ The Java primitive type holding an unboxed value of the given type. """
+        return { StringConstants.INTEGER_TYPE: "int", StringConstants.FLOAT_TYPE: "float",
+            StringConstants.BOOL_TYPE: "boolean" }[typeName]
+
+    def _streamsRecords(self):
+        """ Whether the util file streams the records of the body, which are found by scanning the
+        file as for parsing them in parallel, and must be instances of a class. """
+        parallelRecords = self._parallelRecords()
+        return parallelRecords is not None and not parallelRecords[0].getField(0).isPrimitive()
+
+    def _signatureName( self, className, field ):
+        """ The name of the constant holding the lookahead signature of a repeated field. """
+        return "SIGNATURE_%s_%s" % ( className, field.name() )
+
+    def _signatureLiteral( self, signature ):
+        """ The expression constructing a LineSignature in the generated code. """
+        tokenTypes = ", ".join([ "\"%s\"" % tokenType for tokenType in signature.tokenTypes() ])
+        listType = "\"%s\"" % signature.listType() if signature.listType() else "null"
+        return "new LineSignature(new String[] { %s }, %s, %s)" % ( tokenTypes, listType,
+            "true" if signature.isSplit() else "false" )
+
+    def _beginBlock( self, line ):
+        self.currentFile.writeLine(line)
+        self.currentFile.writeLine("{")
+        self.currentFile.indent()
+
+    def _endBlock(self):
+        self.currentFile.dedent()
+        self.currentFile.writeLine("}")
+
+
+def pygenStaticHelpers():
+    helpers = """
+class LineCursor:
+\t\"\"\" Hands out the lines of an input file, which is read in large blocks. Positions are line
+\tindices into the buffered lines, so marking and resetting a position to look ahead never
+\ttouches the position of the underlying file. Lines before the most recently released position
+\tare discarded from the buffer. \"\"\"
+
+\tblockSize = 1 << 20
+
+\tdef __init__( self, inputFile ):
+\t\tself.inputFile = inputFile
+\t\tself.lines = []
+\t\t# The position of the first buffered line
+\t\tself.base = 0
+\t\tself.position = 0
+\t\tself.released = 0
+\t\tself.partialLine = ""
+\t\tself.isExhausted = False
+
+\tdef readline(self):
+\t\t\"\"\" Returns the next line without its line terminator, or None at the end of the file. \"\"\"
+\t\tindex = self.position - self.base
+\t\tif index >= len(self.lines):
+\t\t\tif not self.fill(self.position):
+\t\t\t\treturn None
+\t\t\tindex = self.position - self.base
+\t\tself.position += 1
+\t\treturn self.lines[index]
+
+\tdef peek( self, offset ):
+\t\t\"\"\" Returns the line the given number of lines after the next one without consuming
+\t\tanything, or None if the file ends before it. \"\"\"
+\t\tindex = self.position + offset - self.base
+\t\tif index >= len(self.lines):
+\t\t\tif not self.fill(self.position + offset):
+\t\t\t\treturn None
+\t\t\tindex = self.position + offset - self.base
+\t\treturn self.lines[index]
+
+\tdef mark(self):
+\t\treturn self.position
+
+\tdef reset( self, position ):
+\t\tself.position = position
+
+\tdef release( self, position ):
+\t\t\"\"\" Allows the lines before the given position to be discarded. \"\"\"
+\t\tself.released = position
+
+\tdef fill( self, position ):
+\t\t\"\"\" Reads blocks until there is a line at the given position. Returns False at the end of the file. \"\"\"
+\t\tdiscarded = min( self.released, self.position ) - self.base
+\t\tif discarded > 0:
+\t\t\tdel self.lines[:discarded]
+\t\t\tself.base += discarded
+\t\twhile position - self.base >= len(self.lines):
+\t\t\tif self.isExhausted:
+\t\t\t\treturn False
+\t\t\tblock = self.inputFile.read(self.blockSize)
+\t\t\tif block == "":
+\t\t\t\tself.isExhausted = True
+\t\t\t\tif self.partialLine != "":
+\t\t\t\t\tself.lines.append(self.partialLine)
+\t\t\t\t\tself.partialLine = ""
+\t\t\t\tcontinue
+\t\t\tnewLines = ( self.partialLine + block ).split("\\n")
+\t\t\tself.partialLine = newLines.pop()
+\t\t\tself.lines.extend(newLines)
+\t\treturn True
+
+\tdef close(self):
+\t\tself.inputFile.close()
+
+# Patterns of the first bytes of the compressed inputs that are decompressed while they are read
+COMPRESSION_PATTERNS = (
+\t( re.compile(br"\\x1f\\x8b"), "gzip" ),
+\t( re.compile(br"BZh[1-9](\\x31\\x41\\x59\\x26\\x53\\x59|\\x17\\x72\\x45\\x38\\x50\\x90)"), "bz2" ),
+\t( re.compile(br"\\xfd7zXZ\\x00"), "xz" ),
+)
+COMPRESSION_MAGIC_SIZE = 10
+
+def compressionOf(block):
+\t\"\"\" Returns the compression of an input starting with the given block, or None. \"\"\"
+\tif not isinstance( block, bytes ):
+\t\treturn None
+\tfor pattern, compression in COMPRESSION_PATTERNS:
+\t\tif pattern.match(block):
+\t\t\treturn compression
+\treturn None
+
+def newDecompressor(compression):
+\tif compression == "gzip":
+\t\treturn zlib.decompressobj( 16 + zlib.MAX_WBITS )
+\tif compression == "bz2":
+\t\treturn bz2.BZ2Decompressor()
+\tif lzma is None:
+\t\traise IOError("Reading xz compressed input requires the lzma module.")
+\treturn lzma.LZMADecompressor()
+
+class DecompressedStream:
+\t\"\"\" Reads a stream compressed with gzip, bzip2 or xz, as told by the bytes it starts with, and
+\tdecompresses it block by block. Other streams are read as they are. \"\"\"
+
+\tdef __init__( self, stream ):
+\t\tself.stream = stream
+\t\tself.compression = None
+\t\tself.decompressor = None
+\t\tself.isStarted = False
+
+\tdef read( self, size ):
+\t\tblock = self.stream.read(size)
+\t\tif not self.isStarted:
+\t\t\tself.isStarted = True
+\t\t\t# The first bytes may come in several reads from a pipe
+\t\t\twhile isinstance( block, bytes ) and 0 < len(block) < COMPRESSION_MAGIC_SIZE:
+\t\t\t\tmore = self.stream.read(size)
+\t\t\t\tif not more:
+\t\t\t\t\tbreak
+\t\t\t\tblock += more
+\t\t\tself.compression = compressionOf(block)
+\t\t\tif self.compression is not None:
+\t\t\t\tself.decompressor = newDecompressor(self.compression)
+\t\tif self.compression is None:
+\t\t\treturn block
+\t\t# A block may only complete the input of the decompressor without yielding anything yet
+\t\twhile block:
+\t\t\tdata = self.decompress(block)
+\t\t\tif data:
+\t\t\t\treturn data
+\t\t\tblock = self.stream.read(size)
+\t\tif not getattr( self.decompressor, "eof", True ):
+\t\t\traise IOError("Compressed input ended unexpectedly.")
+\t\treturn b""
+
+\tdef decompress( self, block ):
+\t\tdata = self.decompressor.decompress(block)
+\t\t# Concatenated inputs, such as those appended to a compressed file, each need a new decompressor
+\t\twhile self.decompressor.unused_data:
+\t\t\tunused = self.decompressor.unused_data
+\t\t\tself.decompressor = newDecompressor(self.compression)
+\t\t\tdata += self.decompressor.decompress(unused)
+\t\treturn data
+
+\tdef close(self):
+\t\tself.stream.close()
+
+def isCompressed(filename):
+\tinputFile = open( filename, 'rb' )
+\ttry:
+\t\treturn compressionOf(inputFile.read(COMPRESSION_MAGIC_SIZE)) is not None
+\tfinally:
+\t\tinputFile.close()
+
+class StreamInput:
+\t\"\"\" A stream for a LineCursor to read, such as standard input, a pipe or an in-memory buffer. It
+\tonly needs a read method, so it does not have to support seeking. Compressed streams are
+\tdecompressed and under Python 3 streams of bytes are decoded as UTF-8. \"\"\"
+
+\tdef __init__( self, stream ):
+\t\tself.stream = DecompressedStream(stream)
+\t\tself.decoder = codecs.getincrementaldecoder("utf-8")()
+
+\tdef read( self, size ):
+\t\tblock = self.stream.read(size)
+\t\t# Bytes and str are the same type before Python 3
+\t\tif isinstance( block, bytes ) and not isinstance( block, str ):
+\t\t\tblock = self.decoder.decode( block, len(block) == 0 )
+\t\treturn block
+
+\tdef close(self):
+\t\tself.stream.close()
+
+def openStream(stream):
+\t\"\"\" Returns the cursor over the input read from a stream. \"\"\"
+\treturn LineCursor(StreamInput(stream))
+
+def openFile(filename):
+\t\"\"\" Returns the cursor over the input file of the given name. \"\"\"
+\treturn openStream(open( filename, 'rb' ))
+
+def openBuffer(data):
+\t\"\"\" Returns the cursor over an input held in memory, as bytes or text. \"\"\"
+\tif isinstance( data, bytes ):
+\t\treturn openStream(io.BytesIO(data))
+\treturn openStream(io.StringIO(data))
+
+def readline(inputFile, className):
+\tline = inputFile.readline()
+\tif line is None:
+\t\traise ValueError("Parser Error: Reached end of file while parsing object \\"" + className + "\\".")
+\treturn line.strip()
+
+def checkEndOfFile( inputFile, currentLineNumber ):
+\tline = inputFile.readline()
+\twhile line is not None:
+\t\tif line.strip():
+\t\t\traise ValueError("Parser Error on line %d: Finished parsing but did not reach end of file." % currentLineNumber)
+\t\tcurrentLineNumber += 1
+\t\tline = inputFile.readline()
+
+# Patterns of the tokens that the primitive parsers below accept
+tokenPatterns = {
+\t"int": re.compile(r"\\s*[-+]?\\d+\\s*$"),
+\t"float": re.compile(r"\\s*[-+]?(\\d+\\.?\\d*([eE][-+]?\\d+)?|\\.\\d+([eE][-+]?\\d+)?|inf(inity)?|nan)\\s*$", re.I),
+\t"bool": re.compile(r"(1|0|true|false)$", re.I),
+\t"string": re.compile(r""),
+}
+
+# Sources of the token patterns above, to be joined into the pattern of a whole line
+tokenSources = {
+\t"int": r"\\s*[-+]?\\d+\\s*",
+\t"float": r"\\s*[-+]?(\\d+\\.?\\d*([eE][-+]?\\d+)?|\\.\\d+([eE][-+]?\\d+)?|inf(inity)?|nan)\\s*",
+\t"bool": r"(1|0|true|false)",
+}
+linePatterns = {}
+# Values of the tokens accepted by the bool parser, by lower case token
+BOOL_VALUES = { "1": True, "true": True, "0": False, "false": False }
+
+def linePattern(signature):
+\t\"\"\" Compiles a split lookahead signature into a single pattern matching the whole stripped line,
+\tso that a line is checked in one match. Returns None if a token could contain the delimiter, in
+\twhich case the line has to be split instead. \"\"\"
+\tif signature not in linePatterns:
+\t\ttokenTypes, listType, isSplit = signature
+\t\tisBytes = not isinstance( DELIMITER, type("") )
+\t\tdelimiter = DELIMITER.decode("latin-1") if isBytes else DELIMITER
+\t\tpattern = None
+\t\tif len(delimiter) == 1 and not delimiter.isalnum() and delimiter not in "+-." and ( tokenTypes or listType ):
+\t\t\tseparator = re.escape(delimiter)
+\t\t\ttokens = { "string": "[^%s]*" % separator }
+\t\t\tfor tokenType, source in tokenSources.items():
+\t\t\t\t# Whitespace around a token must not run into a whitespace delimiter
+\t\t\t\tif delimiter.isspace():
+\t\t\t\t\tsource = source.replace( r"\\s", r"[^\\S%s]" % separator )
+\t\t\t\ttokens[tokenType] = "(?:%s)" % source
+\t\t\tsource = separator.join([ tokens[tokenType] for tokenType in tokenTypes ])
+\t\t\tif listType is not None and tokenTypes:
+\t\t\t\tsource += "(?:%s%s)+" % ( separator, tokens[listType] )
+\t\t\telif listType is not None:
+\t\t\t\tsource = "%s(?:%s%s)*" % ( tokens[listType], separator, tokens[listType] )
+\t\t\tsource += "$"
+\t\t\tpattern = re.compile( source.encode("latin-1") if isBytes else source, re.I )
+\t\tlinePatterns[signature] = pattern
+\treturn linePatterns[signature]
+
+def lineMatches( line, signature ):
+\t\"\"\" Checks a line against a lookahead signature, a ( tokenTypes, listType, isSplit ) tuple. \"\"\"
+\ttokenTypes, listType, isSplit = signature
+\tline = line.strip()
+\tif not isSplit:
+\t\tif len(tokenTypes) == 0:
+\t\t\treturn not line
+\t\treturn tokenPatterns[tokenTypes[0]].match(line) is not None
+\tpattern = linePattern(signature)
+\tif pattern is not None:
+\t\treturn pattern.match(line) is not None
+\ttokens = line.split(DELIMITER)
+\tif listType is None and len(tokens) != len(tokenTypes):
+\t\treturn False
+\tif listType is not None and len(tokens) <= len(tokenTypes):
+\t\treturn False
+\tfor i, token in enumerate(tokens):
+\t\ttokenType = tokenTypes[i] if i < len(tokenTypes) else listType
+\t\tif tokenPatterns[tokenType].match(token) is None:
+\t\t\treturn False
+\treturn True
+
+def hasNextInstance( inputFile, signature, isSeparated ):
+\t\"\"\" Checks whether the upcoming lines could start another instance of a repetition, without
+\tconsuming them. If isSeparated, the instance has to be preceded by an empty line. \"\"\"
+\tline = inputFile.peek(0)
+\tif isSeparated:
+\t\tif line is None or line.strip():
+\t\t\treturn False
+\t\tline = inputFile.peek(1)
+\treturn line is not None and lineMatches( line, signature )
+
+def intParse( s, currentLineNumber ):
+\ttry:
+\t\treturn int(s)
+\texcept ValueError as e:
+\t\traise ValueError("Parser Error on line %d: Could not parse \\\"%s\\\" as int." % ( currentLineNumber, s ))
+
+def boolParse( s, currentLineNumber ):
+\tvalue = BOOL_VALUES.get(s.lower())
+\tif value is None:
+\t\traise ValueError("Parser Error on line %d: Could not parse \\\"%s\\\" as bool." % ( currentLineNumber, s ))
+\treturn value
+
+def stringParse( s, currentLineNumber ):
+\treturn s
+
+def floatParse( s, currentLineNumber ):
+\ttry:
+\t\treturn float(s)
+\texcept ValueError as e:
+\t\traise ValueError("Parser Error on line %d: Could not parse \\\"%s\\\" as float." % ( currentLineNumber, s ))
+
+# The list parsers convert the whole list with builtins and only parse the tokens one by one
+# to report the offending token.
+def intListParse( strings, currentLineNumber ):
+\tif len(strings) == 0:
+\t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
+\ttry:
+\t\treturn list(map( int, strings ))
+\texcept ValueError as e:
+\t\treturn [ intParse( s, currentLineNumber ) for s in strings ]
+
+def boolListParse( strings, currentLineNumber ):
+\tif len(strings) == 0:
+\t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
+\tboolList = [ BOOL_VALUES.get(s.lower()) for s in strings ]
+\tif None in boolList:
+\t\treturn [ boolParse( s, currentLineNumber ) for s in strings ]
+\treturn boolList
+
+def stringListParse( strings, currentLineNumber ):
+\tif len(strings) == 0:
+\t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
+\treturn list(strings)
+
+def floatListParse( strings, currentLineNumber ):
+\tif len(strings) == 0:
+\t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
+\ttry:
+\t\treturn list(map( float, strings ))
+\texcept ValueError as e:
+\t\treturn [ floatParse( s, currentLineNumber ) for s in strings ]
+
+"""
+    helpers = helpers.replace( "intParse", CodeGenerator.PARSE_INT )
+    helpers = helpers.replace( "boolParse", CodeGenerator.PARSE_BOOL )
+    helpers = helpers.replace( "stringParse", CodeGenerator.PARSE_STRING )
+    helpers = helpers.replace( "floatParse", CodeGenerator.PARSE_FLOAT )
+    helpers = helpers.replace( "intListParse", CodeGenerator.PARSE_INT_LIST )
+    helpers = helpers.replace( "boolListParse", CodeGenerator.PARSE_BOOL_LIST )
+    helpers = helpers.replace( "stringListParse", CodeGenerator.PARSE_STRING_LIST )
+    helpers = helpers.replace( "floatListParse", CodeGenerator.PARSE_FLOAT_LIST )
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenNumpyHelpers():
+    """ Replacements for the int and float list helpers that convert the whole list to a NumPy
+    array at once. They must be written after pygenStaticHelpers so that they take precedence. """
+    helpers = """
+def intListParse( strings, currentLineNumber ):
+\tif len(strings) == 0:
+\t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
+\ttry:
+\t\treturn numpy.array( strings, dtype = numpy.int64 )
+\texcept ( ValueError, OverflowError ) as e:
+\t\t# Re-scan token by token to report the offending token
+\t\tfor s in strings:
+\t\t\tintParse( s, currentLineNumber )
+\t\traise ValueError("Parser Error on line %d: Could not fit list(int) into a 64-bit array." % currentLineNumber)
+
+def floatListParse( strings, currentLineNumber ):
+\tif len(strings) == 0:
+\t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
+\ttry:
+\t\treturn numpy.array( strings, dtype = numpy.float64 )
+\texcept ValueError as e:
+\t\t# Re-scan token by token to report the offending token
+\t\tfor s in strings:
+\t\t\tfloatParse( s, currentLineNumber )
+\t\traise ValueError("Parser Error on line %d: Could not parse list(float) as an array." % currentLineNumber)
+
+"""
+    helpers = helpers.replace( "intParse", CodeGenerator.PARSE_INT )
+    helpers = helpers.replace( "floatParse", CodeGenerator.PARSE_FLOAT )
+    helpers = helpers.replace( "intListParse", CodeGenerator.PARSE_INT_LIST )
+    helpers = helpers.replace( "floatListParse", CodeGenerator.PARSE_FLOAT_LIST )
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenColumnarHelpers():
+    """ The ColumnTable used to store repeated scalar records column by column. """
+    helpers = """
+try:
+\tarray.array("q")
+\tINT_TYPE_CODE = "q"
+except ValueError as e:
+\t# Arrays of "q" only exist from Python 3.3 on, before which "l" holds 64 bits on most platforms
+\tINT_TYPE_CODE = "l"
+
+class ColumnTable:
+\t\"\"\" Stores the instances of a scalar record class as one column per field. Each field is an
+\tattribute holding its column, an array for int, float and bool fields and a list for string
+\tfields. Indexing and iterating creates the corresponding data objects on demand. \"\"\"
+\ttypeCodes = { "int": INT_TYPE_CODE, "float": "d", "bool": "b" }
+
+\tdef __init__( self, dataClass, fieldTypes ):
+\t\tself._dataClass = dataClass
+\t\tself._fieldTypes = fieldTypes
+\t\tfor name, typeName in fieldTypes:
+\t\t\tif typeName in ColumnTable.typeCodes:
+\t\t\t\tsetattr( self, name, array.array(ColumnTable.typeCodes[typeName]) )
+\t\t\telse:
+\t\t\t\tsetattr( self, name, [] )
+
+\tdef __len__(self):
+\t\treturn len(getattr( self, self._fieldTypes[0][0] ))
+
+\tdef __getitem__( self, index ):
+\t\tvalues = []
+\t\tfor name, typeName in self._fieldTypes:
+\t\t\tvalue = getattr( self, name )[index]
+\t\t\tvalues.append(bool(value) if typeName == "bool" else value)
+\t\treturn self._dataClass(*values)
+
+\tdef __iter__(self):
+\t\tfor index in xrange(len(self)):
+\t\t\tyield self[index]
+
+\tdef extend( self, other ):
+\t\t\"\"\" Appends the rows of another ColumnTable of the same class. \"\"\"
+\t\tfor name, typeName in self._fieldTypes:
+\t\t\tgetattr( self, name ).extend(getattr( other, name ))
+
+\tdef dropPartialRow(self):
+\t\t\"\"\" Drops the values of a row that could only be appended to some of the columns. \"\"\"
+\t\tnumRows = min([ len(getattr( self, name )) for name, typeName in self._fieldTypes ])
+\t\tfor name, typeName in self._fieldTypes:
+\t\t\tdel getattr( self, name )[numRows:]
+
+"""
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenMappedHelpers():
+    """ The MappedLineCursor, along with replacements for the helpers that compare tokens to str
+    literals or quote them in error messages, so that they accept the bytes it hands out. They
+    must be written after pygenStaticHelpers so that they take precedence. """
+    helpers = """
+class MappedLineCursor:
+\t\"\"\" Hands out the lines of an input file mapped into memory, as bytes. Lines are found by
+\tscanning the mapping for newlines, so the file is neither copied into a buffer nor decoded;
+\tonly string fields are decoded, by stringParse. Positions are byte offsets into the mapping. \"\"\"
+
+\tdef __init__( self, inputFile, data = None ):
+\t\tself.inputFile = inputFile
+\t\tif data is not None:
+\t\t\t# An input that cannot be mapped, already held in memory
+\t\t\tself.data = data if isinstance( data, bytes ) else data.encode("utf-8")
+\t\t\tself.position = 0
+\t\t\treturn
+\t\ttry:
+\t\t\tself.data = mmap.mmap( inputFile.fileno(), 0, access = mmap.ACCESS_READ )
+\t\texcept ValueError as e:
+\t\t\t# Empty files cannot be mapped
+\t\t\tself.data = b""
+\t\tself.position = 0
+
+\tdef lineAt( self, position ):
+\t\t\"\"\" Returns the line starting at the given position without its line terminator, or None
+\t\tat the end of the file, along with the position of the following line. \"\"\"
+\t\tif position >= len(self.data):
+\t\t\treturn None, position
+\t\tend = self.data.find( b"\\n", position )
+\t\tif end == -1:
+\t\t\tend = len(self.data)
+\t\treturn self.data[position:end], end + 1
+
+\tdef readline(self):
+\t\tline, self.position = self.lineAt(self.position)
+\t\treturn line
+
+\tdef peek( self, offset ):
+\t\tposition = self.position
+\t\tfor _index in xrange(offset):
+\t\t\tline, position = self.lineAt(position)
+\t\t\tif line is None:
+\t\t\t\treturn None
+\t\treturn self.lineAt(position)[0]
+
+\tdef mark(self):
+\t\treturn self.position
+
+\tdef reset( self, position ):
+\t\tself.position = position
+
+\tdef release( self, position ):
+\t\t# The operating system pages the mapping in and out, there is nothing to discard.
+\t\tpass
+
+\tdef close(self):
+\t\tif isinstance( self.data, mmap.mmap ):
+\t\t\tself.data.close()
+\t\tif self.inputFile is not None:
+\t\t\tself.inputFile.close()
+
+def openStream(stream):
+\t\"\"\" Returns the cursor over the input read from a stream, which is read whole as it cannot be
+\tmapped. \"\"\"
+\tstream = DecompressedStream(stream)
+\tblocks = []
+\tblock = stream.read(LineCursor.blockSize)
+\twhile block:
+\t\tblocks.append(block)
+\t\tblock = stream.read(LineCursor.blockSize)
+\t# The empty block is of the type of the others, bytes or text
+\treturn MappedLineCursor( stream, block.join(blocks) )
+
+def openFile(filename):
+\t\"\"\" Returns the cursor over the input file of the given name, mapped unless it is compressed. \"\"\"
+\tif isCompressed(filename):
+\t\treturn openStream(open( filename, 'rb' ))
+\treturn MappedLineCursor(open( filename, 'rb' ))
+
+def openBuffer(data):
+\t\"\"\" Returns the cursor over an input held in memory, as bytes or text. \"\"\"
+\tif compressionOf(data) is not None:
+\t\treturn openStream(io.BytesIO(data))
+\treturn MappedLineCursor( None, data )
+
+tokenPatterns = {
+\t"int": re.compile(br"\\s*[-+]?\\d+\\s*$"),
+\t"float": re.compile(br"\\s*[-+]?(\\d+\\.?\\d*([eE][-+]?\\d+)?|\\.\\d+([eE][-+]?\\d+)?|inf(inity)?|nan)\\s*$", re.I),
+\t"bool": re.compile(br"(1|0|true|false)$", re.I),
+\t"string": re.compile(br""),
+}
+BOOL_VALUES = { b"1": True, b"true": True, b"0": False, b"false": False }
+
+def tokenText(s):
+\t\"\"\" The text of a token, decoded for the error messages. \"\"\"
+\tif bytes is str:
+\t\treturn s
+\treturn s.decode( "utf-8", "replace" )
+
+def intParse( s, currentLineNumber ):
+\ttry:
+\t\treturn int(s)
+\texcept ValueError as e:
+\t\traise ValueError("Parser Error on line %d: Could not parse \\\"%s\\\" as int." % ( currentLineNumber, tokenText(s) ))
+
+def boolParse( s, currentLineNumber ):
+\tvalue = BOOL_VALUES.get(s.lower())
+\tif value is None:
+\t\traise ValueError("Parser Error on line %d: Could not parse \\\"%s\\\" as bool." % ( currentLineNumber, tokenText(s) ))
+\treturn value
+
+def floatParse( s, currentLineNumber ):
+\ttry:
+\t\treturn float(s)
+\texcept ValueError as e:
+\t\traise ValueError("Parser Error on line %d: Could not parse \\\"%s\\\" as float." % ( currentLineNumber, tokenText(s) ))
+
+def stringParse( s, currentLineNumber ):
+\t# Bytes and str are the same type before Python 3
+\tif bytes is str:
+\t\treturn s
+\treturn s.decode("utf-8")
+
+def stringListParse( strings, currentLineNumber ):
+\tif len(strings) == 0:
+\t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
+\tif bytes is str:
+\t\treturn list(strings)
+\treturn [ s.decode("utf-8") for s in strings ]
+
+"""
+    helpers = helpers.replace( "intParse", CodeGenerator.PARSE_INT )
+    helpers = helpers.replace( "boolParse", CodeGenerator.PARSE_BOOL )
+    helpers = helpers.replace( "stringParse", CodeGenerator.PARSE_STRING )
+    helpers = helpers.replace( "floatParse", CodeGenerator.PARSE_FLOAT )
+    helpers = helpers.replace( "stringListParse", CodeGenerator.PARSE_STRING_LIST )
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenParallelHelpers():
+    """ The helpers that find the records of an input file, parse chunks of them in a pool of
+    worker processes and hold the records of the chunks. The chunks are parsed by parseChunk,
+    which is generated for each format. """
+    helpers = """
+def findRecordStarts( filename, lineNumber, recordLines, maxRecords ):
+\t\"\"\" Scans the input file from the given line number on for the lines that may start a record,
+\teither every recordLines lines or, if recordLines is None, the lines following an empty line.
+\tReturns the byte offset and line number of at most maxRecords of them (all if None), always
+\tincluding the first line scanned. \"\"\"
+\tstarts = []
+\tinputFile = open( filename, 'rb' )
+\toffset = 0
+\tfirstOffset = None
+\tcurrentLineNumber = 1
+\tisAfterEmptyLine = False
+\tfor line in inputFile:
+\t\tif currentLineNumber == lineNumber:
+\t\t\tfirstOffset = offset
+\t\tif maxRecords is not None and len(starts) == maxRecords:
+\t\t\tbreak
+\t\tif currentLineNumber >= lineNumber:
+\t\t\tif recordLines is not None:
+\t\t\t\tisStart = ( currentLineNumber - lineNumber ) % recordLines == 0
+\t\t\telse:
+\t\t\t\tisStart = currentLineNumber == lineNumber or ( isAfterEmptyLine and line.strip() )
+\t\t\tif isStart:
+\t\t\t\tstarts.append(( offset, currentLineNumber ))
+\t\tisAfterEmptyLine = not line.strip()
+\t\toffset += len(line)
+\t\tcurrentLineNumber += 1
+\tinputFile.close()
+\tif len(starts) == 0:
+\t\tstarts.append(( offset if firstOffset is None else firstOffset, lineNumber ))
+\treturn starts
+
+def splitChunks( filename, starts, workers, numRepetitions ):
+\t\"\"\" Groups the record starts into the chunks handed to parseChunk, several per worker so that
+\tthe workers even out. The last chunk parses all remaining records and checks the end of file. \"\"\"
+\tnumChunks = workers * 4
+\trecordsPerChunk = max( 1, ( len(starts) + numChunks - 1 ) // numChunks )
+\tchunks = []
+\tfor firstIndex in xrange( 0, len(starts), recordsPerChunk ):
+\t\toffset, lineNumber = starts[firstIndex]
+\t\tnumRecords = min( recordsPerChunk, len(starts) - firstIndex )
+\t\tchunks.append([ filename, offset, lineNumber, firstIndex, numRecords, numRepetitions, False ])
+\tlastChunk = chunks[-1]
+\tlastChunk[4] = None if numRepetitions is None else numRepetitions - lastChunk[3]
+\tlastChunk[6] = True
+\treturn chunks
+
+def parseChunks( chunks, workers, addChunk ):
+\t\"\"\" Parses the chunks in a pool of worker processes and hands the snapshot and number of records
+\tof each to addChunk in order, as soon as it arrives, while the workers parse the following chunks.
+\tReturns False if any chunk failed to parse or ended anywhere else than where the next one starts. \"\"\"
+\tpool = multiprocessing.Pool(workers)
+\ttry:
+\t\tfor index, ( data, numRecords, lineNumber ) in enumerate(pool.imap( parseChunk, chunks )):
+\t\t\tif index + 1 < len(chunks) and lineNumber != chunks[index + 1][2]:
+\t\t\t\treturn False
+\t\t\taddChunk( data, numRecords )
+\t\treturn True
+\texcept ( ValueError, EOFError ) as e:
+\t\treturn False
+\tfinally:
+\t\tpool.terminate()
+
+class RecordChunks:
+\t\"\"\" The records of a body parsed in parallel, kept as the binary snapshot of each chunk until they
+\tare first used, so that the parent process does not create them all as the chunks arrive. Like the
+\tlist of the records, it supports len, indexing and iteration, which load the records of a whole
+\tchunk at once with loadRecords. \"\"\"
+
+\tdef __init__( self, loadRecords ):
+\t\tself._loadRecords = loadRecords
+\t\tself._chunks = []
+\t\t# The number of records up to the end of each chunk
+\t\tself._ends = []
+
+\tdef append( self, data, numRecords ):
+\t\t\"\"\" Appends the snapshot of the records of the next chunk. \"\"\"
+\t\tself._ends.append(len(self) + numRecords)
+\t\tself._chunks.append(data)
+
+\tdef chunk( self, index ):
+\t\t\"\"\" Returns the records of the chunk of the given index, loading them on first use. \"\"\"
+\t\trecords = self._chunks[index]
+\t\tif isinstance( records, bytes ):
+\t\t\t# The collector would scan the records over and over as they are created
+\t\t\tisCollecting = gc.isenabled()
+\t\t\tgc.disable()
+\t\t\ttry:
+\t\t\t\trecords, offset = self._loadRecords( records, 0 )
+\t\t\tfinally:
+\t\t\t\tif isCollecting:
+\t\t\t\t\tgc.enable()
+\t\t\tself._chunks[index] = records
+\t\treturn records
+
+\tdef __len__(self):
+\t\treturn self._ends[-1] if len(self._ends) > 0 else 0
+
+\tdef __getitem__( self, index ):
+\t\tif isinstance( index, slice ):
+\t\t\treturn [ self[i] for i in xrange(*index.indices(len(self))) ]
+\t\tif index < 0:
+\t\t\tindex += len(self)
+\t\tif index < 0 or index >= len(self):
+\t\t\traise IndexError("record index out of range")
+\t\tchunkIndex = bisect.bisect_right( self._ends, index )
+\t\tstart = self._ends[chunkIndex - 1] if chunkIndex > 0 else 0
+\t\treturn self.chunk(chunkIndex)[index - start]
+
+\tdef __iter__(self):
+\t\tfor index in xrange(len(self._chunks)):
+\t\t\tfor record in self.chunk(index):
+\t\t\t\tyield record
+
+"""
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenIndexHelpers():
+    """ The helpers that save the byte offset and line number of the records of an input file to
+    its index file and look them up again. The records are found by indexXRecords, which is
+    generated for each format. """
+    helpers = """
+INDEX_EXTENSION = ".idx"
+INDEX_MAGIC = b"IPINDEX1"
+# Magic, size and modification time of the indexed input file, and number of records
+INDEX_HEADER = struct.Struct("<8sqdq")
+INDEX_ENTRY = struct.Struct("<q")
+
+def findLineOffsets( filename, lineNumbers ):
+\t\"\"\" Finds the byte offset of each of the increasing line numbers, read from any iterable, by
+\tscanning the input file alongside it. \"\"\"
+\toffsets = []
+\tfoundLineNumbers = []
+\tinputFile = open( filename, 'rb' )
+\ttry:
+\t\toffset = 0
+\t\tcurrentLineNumber = 1
+\t\tfor lineNumber in lineNumbers:
+\t\t\twhile currentLineNumber < lineNumber:
+\t\t\t\toffset += len(inputFile.readline())
+\t\t\t\tcurrentLineNumber += 1
+\t\t\toffsets.append(offset)
+\t\t\tfoundLineNumbers.append(lineNumber)
+\tfinally:
+\t\tinputFile.close()
+\treturn offsets, foundLineNumbers
+
+def saveIndex( filename, indexFilename, offsets, lineNumbers ):
+\t\"\"\" Saves the index of the input file: a header identifying the version of the input file
+\tit was built for, followed by the offsets and then the line numbers of the records. \"\"\"
+\tstat = os.stat(filename)
+\tindexFile = open( indexFilename, 'wb' )
+\ttry:
+\t\tindexFile.write(INDEX_HEADER.pack( INDEX_MAGIC, stat.st_size, stat.st_mtime, len(offsets) ))
+\t\tfor values in ( offsets, lineNumbers ):
+\t\t\tfor start in xrange( 0, len(values), 4096 ):
+\t\t\t\tblock = values[start:start + 4096]
+\t\t\t\tindexFile.write(struct.pack( "<%dq" % len(block), *block ))
+\tfinally:
+\t\tindexFile.close()
+
+def readIndexEntry( filename, indexFilename, index ):
+\t\"\"\" Reads the byte offset and line number of the record of the given index, or returns None if
+\tthe index file is missing or was built for another version of the input file. \"\"\"
+\tstat = os.stat(filename)
+\ttry:
+\t\tindexFile = open( indexFilename, 'rb' )
+\texcept IOError as e:
+\t\treturn None
+\ttry:
+\t\theader = indexFile.read(INDEX_HEADER.size)
+\t\tif len(header) < INDEX_HEADER.size:
+\t\t\treturn None
+\t\tmagic, size, mtime, numRecords = INDEX_HEADER.unpack(header)
+\t\tif magic != INDEX_MAGIC or size != stat.st_size or mtime != stat.st_mtime:
+\t\t\treturn None
+\t\tif index < 0:
+\t\t\tindex += numRecords
+\t\tif index < 0 or index >= numRecords:
+\t\t\traise IndexError("Record index out of range (%d records)." % numRecords)
+\t\tindexFile.seek(INDEX_HEADER.size + index * INDEX_ENTRY.size)
+\t\toffset, = INDEX_ENTRY.unpack(indexFile.read(INDEX_ENTRY.size))
+\t\tindexFile.seek(INDEX_HEADER.size + ( numRecords + index ) * INDEX_ENTRY.size)
+\t\tlineNumber, = INDEX_ENTRY.unpack(indexFile.read(INDEX_ENTRY.size))
+\t\treturn offset, lineNumber
+\tfinally:
+\t\tindexFile.close()
+
+"""
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenCacheHelpers(numpy):
+    """ The cache of parsed bodies, keyed by the content of the input file and the fingerprint of
+    the format. With numpy, the arrays of the body are saved next to it and mapped when loaded. """
+    helpers = """
+CACHE_DIR = os.path.join( tempfile.gettempdir(), "instaparse-cache" )
+CACHE_MAX_BYTES = 10 << 30
+# Holds the content hash of each input file along with its size and modification time
+CACHE_INPUTS_DIR = "inputs"
+CACHE_BODY_FILE = "body.pickle"
+HASH_BLOCK_SIZE = 1 << 20
+
+def asBytes(text):
+\treturn text if isinstance( text, bytes ) else text.encode("utf-8")
+
+def hashFile(filename):
+\tdigest = hashlib.sha1()
+\tinputFile = open( filename, 'rb' )
+\ttry:
+\t\tblock = inputFile.read(HASH_BLOCK_SIZE)
+\t\twhile len(block) > 0:
+\t\t\tdigest.update(block)
+\t\t\tblock = inputFile.read(HASH_BLOCK_SIZE)
+\tfinally:
+\t\tinputFile.close()
+\treturn digest.hexdigest()
+
+def replaceDirectory( directory, tempDirectory ):
+\t\"\"\" Moves the finished temporary directory into place, unless another process got there first. \"\"\"
+\ttry:
+\t\tos.rename( tempDirectory, directory )
+\texcept OSError as e:
+\t\tshutil.rmtree( tempDirectory, True )
+
+class ParseCache:
+\t\"\"\" The bodies parsed from input files, one directory per entry, named after the hash of the
+\tcontent of the input file and of FORMAT_FINGERPRINT. The entries used least recently are removed
+\tonce they take more than maxBytes. \"\"\"
+
+\tdef __init__( self, cacheDir, maxBytes ):
+\t\tself.cacheDir = cacheDir
+\t\tself.maxBytes = maxBytes
+
+\tdef key( self, filename ):
+\t\t\"\"\" The key of the entry of the input file. The content of the file is only hashed again
+\t\twhen its size or modification time changed since it was last hashed. \"\"\"
+\t\tstat = os.stat(filename)
+\t\tversion = "%d %r" % ( stat.st_size, stat.st_mtime )
+\t\tinputsDir = os.path.join( self.cacheDir, CACHE_INPUTS_DIR )
+\t\tinputFilename = os.path.join( inputsDir, hashlib.sha1(asBytes(os.path.abspath(filename))).hexdigest() )
+\t\ttry:
+\t\t\tinputFile = open(inputFilename)
+\t\t\ttry:
+\t\t\t\tsavedVersion, contentHash = inputFile.read().rsplit( " ", 1 )
+\t\t\tfinally:
+\t\t\t\tinputFile.close()
+\t\texcept ( IOError, ValueError ) as e:
+\t\t\tsavedVersion = None
+\t\tif savedVersion != version:
+\t\t\tcontentHash = hashFile(filename)
+\t\t\ttry:
+\t\t\t\tif not os.path.isdir(inputsDir):
+\t\t\t\t\tos.makedirs(inputsDir)
+\t\t\t\ttempFilename = "%s.%d" % ( inputFilename, os.getpid() )
+\t\t\t\tinputFile = open( tempFilename, "w" )
+\t\t\t\ttry:
+\t\t\t\t\tinputFile.write("%s %s" % ( version, contentHash ))
+\t\t\t\tfinally:
+\t\t\t\t\tinputFile.close()
+\t\t\t\tos.rename( tempFilename, inputFilename )
+\t\t\texcept ( IOError, OSError ) as e:
+\t\t\t\tpass
+\t\treturn hashlib.sha1(asBytes(FORMAT_FINGERPRINT + contentHash)).hexdigest()
+
+\tdef load( self, key ):
+\t\t\"\"\" The body of the entry of the given key, or None if there is no such entry. \"\"\"
+\t\tentryDir = os.path.join( self.cacheDir, key )
+\t\tif not os.path.isdir(entryDir):
+\t\t\treturn None
+\t\ttry:
+\t\t\tbodyFile = open( os.path.join( entryDir, CACHE_BODY_FILE ), 'rb' )
+\t\t\ttry:
+\t\t\t\tunpickler = pickle.Unpickler(bodyFile)
+%(persistentLoad)s\t\t\t\t# The collector would scan the objects over and over as they are created
+\t\t\t\tisCollecting = gc.isenabled()
+\t\t\t\tgc.disable()
+\t\t\t\ttry:
+\t\t\t\t\tbody = unpickler.load()
+\t\t\t\tfinally:
+\t\t\t\t\tif isCollecting:
+\t\t\t\t\t\tgc.enable()
+\t\t\tfinally:
+\t\t\t\tbodyFile.close()
+\t\t\t# Marks the entry as used, for the eviction of the least recently used entries
+\t\t\tos.utime( entryDir, None )
+\t\t\treturn body
+\t\texcept Exception as e:
+\t\t\t# A damaged entry is parsed again
+\t\t\tshutil.rmtree( entryDir, True )
+\t\t\treturn None
+
+\tdef store( self, key, body ):
+\t\t\"\"\" Saves the body as the entry of the given key, then removes the entries used least
+\t\trecently beyond maxBytes. Failing to save it is not an error, the body is parsed next time. \"\"\"
+\t\ttry:
+\t\t\tif not os.path.isdir(self.cacheDir):
+\t\t\t\tos.makedirs(self.cacheDir)
+\t\t\ttempDir = tempfile.mkdtemp( prefix = ".", dir = self.cacheDir )
+\t\t\ttry:
+\t\t\t\tbodyFile = open( os.path.join( tempDir, CACHE_BODY_FILE ), 'wb' )
+\t\t\t\ttry:
+\t\t\t\t\tpickler = pickle.Pickler( bodyFile, pickle.HIGHEST_PROTOCOL )
+%(persistentId)s\t\t\t\t\tpickler.dump(body)
+\t\t\t\tfinally:
+\t\t\t\t\tbodyFile.close()
+\t\t\texcept Exception as e:
+\t\t\t\tshutil.rmtree( tempDir, True )
+\t\t\t\treturn
+\t\t\treplaceDirectory( os.path.join( self.cacheDir, key ), tempDir )
+\t\t\tself.evict()
+\t\texcept ( IOError, OSError ) as e:
+\t\t\tpass
+
+\tdef evict(self):
+\t\tentries = []
+\t\tfor name in os.listdir(self.cacheDir):
+\t\t\tentryDir = os.path.join( self.cacheDir, name )
+\t\t\tif name == CACHE_INPUTS_DIR or name.startswith(".") or not os.path.isdir(entryDir):
+\t\t\t\tcontinue
+\t\t\tsize = sum([ os.path.getsize(os.path.join( entryDir, f )) for f in os.listdir(entryDir) ])
+\t\t\tentries.append(( os.path.getmtime(entryDir), size, entryDir ))
+\t\tentries.sort()
+\t\ttotalBytes = sum([ size for used, size, entryDir in entries ])
+\t\tfor used, size, entryDir in entries:
+\t\t\tif totalBytes <= self.maxBytes:
+\t\t\t\tbreak
+\t\t\tshutil.rmtree( entryDir, True )
+\t\t\ttotalBytes -= size
+
+def parseCached( filename, cacheDir, maxBytes, parseFile ):
+\t\"\"\" Loads the body of the input file from the cache, or parses it with parseFile and saves it. \"\"\"
+\tcache = ParseCache( cacheDir, maxBytes )
+\tkey = cache.key(filename)
+\tbody = cache.load(key)
+\tif body is None:
+\t\tbody = parseFile()
+\t\tcache.store( key, body )
+\treturn body
+
+"""
+    persistentLoad = ""
+    persistentId = ""
+    if numpy:
+        # The arrays are saved as .npy files and mapped copy-on-write, so loading them reads nothing
+        persistentLoad = "\t\t\t\tunpickler.persistent_load = lambda name: numpy.load( os.path.join( entryDir, name ), mmap_mode = 'c' )\n"
+        persistentId = "\t\t\t\t\tpickler.persistent_id = ArraySaver(tempDir)\n"
+        helpers += """class ArraySaver:
+\t\"\"\" Saves each numeric NumPy array met while pickling to a file of its own in directory, which the
+\tpickle refers to by name. \"\"\"
+
+\tdef __init__( self, directory ):
+\t\tself.directory = directory
+\t\tself.numArrays = 0
+
+\tdef __call__( self, obj ):
+\t\tif not isinstance( obj, numpy.ndarray ) or obj.dtype.hasobject:
+\t\t\treturn None
+\t\tname = "array%d.npy" % self.numArrays
+\t\tself.numArrays += 1
+\t\tnumpy.save( os.path.join( self.directory, name ), obj )
+\t\treturn name
+
+"""
+    helpers = helpers.replace( "%(persistentLoad)s", persistentLoad ).replace( "%(persistentId)s", persistentId )
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenLazyHelpers():
+    """ The descriptor through which the lazily parsed objects convert their fields. """
+    helpers = """
+class LazyField(object):
+\t\"\"\" A field of a lazily parsed object. On first access, all the fields of its span are converted
+\tand cached in the slots of the data class, except those already assigned. \"\"\"
+\t__slots__ = ( "slots", "position", "spanIndex", "convert" )
+
+\tdef __init__( self, slots, position, spanIndex, convert ):
+\t\tself.slots = slots
+\t\tself.position = position
+\t\tself.spanIndex = spanIndex
+\t\tself.convert = convert
+
+\tdef __get__( self, obj, objType = None ):
+\t\tif obj is None:
+\t\t\treturn self
+\t\ttry:
+\t\t\treturn self.slots[self.position].__get__( obj, objType )
+\t\texcept AttributeError as e:
+\t\t\tpass
+\t\tvalues = self.convert(obj._spans[self.spanIndex])
+\t\tfor slot, value in zip( self.slots, values ):
+\t\t\ttry:
+\t\t\t\tslot.__get__( obj, objType )
+\t\t\texcept AttributeError as e:
+\t\t\t\tslot.__set__( obj, value )
+\t\treturn self.slots[self.position].__get__( obj, objType )
+
+\tdef __set__( self, obj, value ):
+\t\tself.slots[self.position].__set__( obj, value )
+
+"""
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenStatsHelpers():
+    """ The counters of the parser of each class, which instrumented wraps around it, and
+    dumpStats, which reports them. """
+    helpers = """
+class ParserStats:
+\t\"\"\" The counters of the parser of a class. Lines only count those of successful calls. The
+\texclusive time leaves out the time spent in the instrumented parsers it called. \"\"\"
+
+\tdef __init__(self):
+\t\tself.calls = 0
+\t\tself.lines = 0
+\t\tself.inclusiveTime = 0.0
+\t\tself.exclusiveTime = 0.0
+\t\tself.rollbacks = 0
+\t\tself.exceptions = 0
+
+# The counters by class name, and the time spent in nested calls by each call in progress
+parserStats = collections.OrderedDict()
+nestedTimes = [ 0.0 ]
+
+def statsOf(className):
+\tif className not in parserStats:
+\t\tparserStats[className] = ParserStats()
+\treturn parserStats[className]
+
+def instrumented( className, parseFunction ):
+\t\"\"\" Wraps the parser of a class with the updates of its counters. \"\"\"
+\tstats = statsOf(className)
+\tdef instrumentedParse( inputFile, currentLineNumber, currentLinePos ):
+\t\tstats.calls += 1
+\t\tnestedTimes.append(0.0)
+\t\tstart = timeit.default_timer()
+\t\ttry:
+\t\t\tresult = parseFunction( inputFile, currentLineNumber, currentLinePos )
+\t\texcept Exception as e:
+\t\t\tstats.exceptions += 1
+\t\t\traise
+\t\tfinally:
+\t\t\telapsed = timeit.default_timer() - start
+\t\t\tstats.inclusiveTime += elapsed
+\t\t\tstats.exclusiveTime += elapsed - nestedTimes.pop()
+\t\t\tnestedTimes[-1] += elapsed
+\t\tstats.lines += result[1] - currentLineNumber
+\t\treturn result
+\treturn instrumentedParse
+
+def countRollback(className):
+\tstatsOf(className).rollbacks += 1
+
+def dumpStats( filename = None ):
+\t\"\"\" Prints the counters of each class as JSON, or writes them to the file of the given name. \"\"\"
+\tstats = collections.OrderedDict()
+\tfor className, classStats in parserStats.items():
+\t\tstats[className] = collections.OrderedDict([ ( "calls", classStats.calls ), ( "lines", classStats.lines ),
+\t\t\t( "inclusiveSeconds", classStats.inclusiveTime ), ( "exclusiveSeconds", classStats.exclusiveTime ),
+\t\t\t( "rollbacks", classStats.rollbacks ), ( "exceptions", classStats.exceptions ) ])
+\ttext = json.dumps( stats, indent = 2, separators = ( ",", ": " ) ) + "\\n"
+\tif filename is None:
+\t\tsys.stdout.write(text)
+\t\treturn
+\toutputFile = open( filename, 'w' )
+\ttry:
+\t\toutputFile.write(text)
+\tfinally:
+\t\toutputFile.close()
+
+"""
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenPushHelpers():
+    """ The helpers through which a PushParser, which is generated for each format, reads the
+    blocks pushed to it. """
+    helpers = """
+class NeedMoreData(Exception):
+\t\"\"\" Raised when the pushed input runs out before it has been closed. \"\"\"
+
+class PushedInput:
+\t\"\"\" The blocks pushed to a PushParser, read by its cursor. Reading past them raises NeedMoreData
+\tuntil the input has been finished. Under Python 3 the blocks are decoded as UTF-8. \"\"\"
+
+\tdef __init__(self):
+\t\tself.blocks = []
+\t\tself.isFinished = False
+\t\t# Bytes and str are the same type before Python 3
+\t\tself.decoder = None if bytes is str else codecs.getincrementaldecoder("utf-8")()
+
+\tdef push( self, data ):
+\t\tif self.decoder is not None:
+\t\t\tdata = self.decoder.decode(data)
+\t\tif data:
+\t\t\tself.blocks.append(data)
+
+\tdef finish(self):
+\t\t# Raises a UnicodeDecodeError if the input ends within a character
+\t\tif self.decoder is not None:
+\t\t\tself.decoder.decode( b"", True )
+\t\tself.isFinished = True
+
+\tdef read( self, size ):
+\t\tif self.blocks:
+\t\t\tdata = "".join(self.blocks)
+\t\t\tself.blocks = []
+\t\t\treturn data
+\t\tif self.isFinished:
+\t\t\treturn ""
+\t\traise NeedMoreData()
+
+\tdef close(self):
+\t\tpass
+
+class PushCursor(LineCursor):
+\t\"\"\" A LineCursor over pushed blocks. A parse step that runs out of input is retried from where
+\tit started, so only the PushParser discards lines, once a step has been parsed completely. \"\"\"
+
+\tdef release( self, position ):
+\t\tpass
+
+\tdef commit( self, position ):
+\t\tLineCursor.release( self, position )
+
+\tdef numLines(self):
+\t\t\"\"\" The number of complete lines buffered so far, counting discarded ones. \"\"\"
+\t\treturn self.base + len(self.lines)
+
+"""
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenSnapshotHelpers(numpy):
+    """ The helpers that write the fields of the body to a binary snapshot and read them back, used
+    by the dumpX and loadX functions generated for each class. The loaders take the whole snapshot
+    and the offset to read from, and return the value read along with the offset following it.
+    With numpy, list(int) and list(float) fields are written and read as whole arrays. """
+    helpers = """
+SNAPSHOT_MAGIC = b"%(magic)s"
+SNAPSHOT_BUFFER_SIZE = 1 << 20
+# Written before every string, list and repeated field
+COUNT = struct.Struct("<I")
+NUMBER_SIZES = { "q": 8, "d": 8, "?": 1 }
+# Number of fixed width rows packed at once
+ROWS_PER_BLOCK = 4096
+
+# Strings are bytes under Python 2, as they are when parsed
+if str is bytes:
+\tdef decodeString(raw):
+\t\treturn raw
+else:
+\tdef decodeString(raw):
+\t\treturn raw.decode("utf-8")
+
+def checkSize( data, end ):
+\tif end > len(data):
+\t\traise struct.error("snapshot ends at byte %%d, before byte %%d" %% ( len(data), end ))
+
+def dumpString( write, s ):
+\traw = s if isinstance( s, bytes ) else s.encode("utf-8")
+\twrite(COUNT.pack(len(raw)))
+\twrite(raw)
+
+def loadString( data, offset ):
+\tlength, = COUNT.unpack_from( data, offset )
+\toffset += COUNT.size
+\tcheckSize( data, offset + length )
+\treturn decodeString(data[offset:offset + length]), offset + length
+
+def dumpStrings( write, strings ):
+\twrite(COUNT.pack(len(strings)))
+\tfor s in strings:
+\t\tdumpString( write, s )
+
+def loadStrings( data, offset ):
+\tcount, = COUNT.unpack_from( data, offset )
+\toffset += COUNT.size
+\tstrings = []
+\tfor i in xrange(count):
+\t\ts, offset = loadString( data, offset )
+\t\tstrings.append(s)
+\treturn strings, offset
+
+def dumpNumbers( write, numbers, typeCode ):
+\twrite(struct.pack( "<I%%d%%s" %% ( len(numbers), typeCode ), len(numbers), *numbers ))
+
+def loadNumbers( data, offset, typeCode ):
+\tcount, = COUNT.unpack_from( data, offset )
+\toffset += COUNT.size
+\tnumbers = list(struct.unpack_from( "<%%d%%s" %% ( count, typeCode ), data, offset ))
+\treturn numbers, offset + count * NUMBER_SIZES[typeCode]
+
+def dumpRows( write, rowFormat, count, rows ):
+\t\"\"\" Writes the number of rows followed by the rows, tuples of ints, floats and bools packed
+\twith rowFormat, block by block. \"\"\"
+\twrite(COUNT.pack(count))
+\tvalues = []
+\tnumRows = 0
+\tfor row in rows:
+\t\tvalues.extend(row)
+\t\tnumRows += 1
+\t\tif numRows == ROWS_PER_BLOCK:
+\t\t\twrite(struct.pack( "<" + rowFormat * numRows, *values ))
+\t\t\tvalues = []
+\t\t\tnumRows = 0
+\twrite(struct.pack( "<" + rowFormat * numRows, *values ))
+
+def loadRows( data, offset, rowFormat ):
+\t\"\"\" Reads rows written by dumpRows with a single unpack. Returns them as one tuple per field. \"\"\"
+\tcount, = COUNT.unpack_from( data, offset )
+\toffset += COUNT.size
+\tend = offset + count * struct.calcsize( "<" + rowFormat )
+\tcheckSize( data, end )
+\tvalues = struct.unpack_from( "<" + rowFormat * count, data, offset )
+\treturn [ values[i::len(rowFormat)] for i in xrange(len(rowFormat)) ], end
+
+"""
+    if numpy:
+        helpers += """def dumpArray( write, array, typeCode ):
+\twrite(COUNT.pack(len(array)))
+\twrite(numpy.asarray(array).astype( "<i8" if typeCode == "q" else "<f8" ).tobytes())
+
+def loadArray( data, offset, typeCode ):
+\tcount, = COUNT.unpack_from( data, offset )
+\toffset += COUNT.size
+\tend = offset + count * NUMBER_SIZES[typeCode]
+\tcheckSize( data, end )
+\tdtype = numpy.int64 if typeCode == "q" else numpy.float64
+\t# Copied out of the snapshot, converting to the byte order of the machine
+\treturn numpy.frombuffer( data, numpy.dtype(dtype).newbyteorder("<"), count, offset ).astype(dtype), end
+
+"""
+    helpers = helpers % { "magic": CodeGenerator.SNAPSHOT_MAGIC }
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+    pygenParallelHelpers, pygenIndexHelpers, pygenLazyHelpers, pygenPushHelpers, pygenStatsHelpers, \
+    pygenCacheHelpers, pygenSnapshotHelpers
+
+class PythonGenerator(CodeGenerator):
+
+    # Parts of the body parsed separately when parsing in parallel
+    PREFIX_PART = "Prefix"
+    RECORDS_PART = "Records"
+    # Part of the body scanned when indexing its records
+    INDEX_PART = "Index"
+    # Structural pass of the lazy mode, see generateLazyClass
+    LAZY_PART = "Lazy"
+
+    # Python 3 only module holding aparse, see generateAsyncFile
+    ASYNC_FILE_NAME = CodeGenerator.PARSER_NAME + "Async"
+
+    def write( self, line ):
+        self.currentFile.write(line)
+
+    def writeLine( self, line ):
+        self.currentFile.writeLine(line)
+
+    def writeNewline(self):
         self.currentFile.writeNewline()
 
-    def generateClassParserFunction( self, className, lines ):
-        """ For generating a helper functions for parsing a user defined class. The first argument
-        is the class name and the second argument is a list of FormatLine's. """
-        writeLine = self.currentFile.writeLine
-        write = self.currentFile.write
+    def comment( self, line ):
+        self.currentFile.comment(line)
+
+    def writeImportLine( self, line ):
+        self.currentFile.writeImportLine(line)
+
+    def beginBlock( self, line ):
+        self.writeLine(line)
+        self.currentFile.indent()
+
+    def endBlock(self):
+        self.currentFile.dedent()
+
+    def initialize(self):
+        """ Perform additional initialization if required. """
+        InstaParseFile.commentString = "#"
+        self.main.setExtension("py")
+        self.util.setExtension("py")
+        self.data.setExtension("py")
+        self.asyncFile = InstaParseFile(join(self.foldername, PythonGenerator.ASYNC_FILE_NAME))
+        self.asyncFile.setExtension("py")
+
+    def codeGen(self):
+        """ This method is called to generate and write the parser to the specified file. """
+        CodeGenerator.codeGen(self)
+        if not self.options.mmap:
+            self.generateAsyncFile()
+            self.asyncFile.save()
+
+    ################################################################################
+    # Generate Async File
+    ################################################################################
+
+    def generateAsyncFile(self):
+        """ For generating aparse, which parses the input read from an asyncio stream by feeding
+        PushParser. It lives in its own file as it only compiles under Python 3. """
+        self.currentFile = self.asyncFile
+        self.writeLine("#!/usr/bin/env python3")
+        self.writeNewline()
+        self.writeLine("import collections")
+        self.writeNewline()
+        self.writeLine("import " + CodeGenerator.UTIL_FILE_NAME)
+        self.writeNewline()
+        self.beginBlock("async def aparse( reader, blockSize = 1 << 16 ):")
+        if self._recordLine() is not None:
+            self.comment("Yields every record of the body as soon as it has been parsed from the blocks read")
+            self.comment("from reader, an asyncio.StreamReader or anything with an awaitable read(size).")
+            self.writeLine("records = collections.deque()")
+            self.writeLine("parser = %s.PushParser(records.append)" % CodeGenerator.UTIL_FILE_NAME)
+        else:
+            self.comment("Yields the body once it has been parsed from the blocks read from reader, an")
+            self.comment("asyncio.StreamReader or anything with an awaitable read(size).")
+            self.writeLine("parser = %s.PushParser()" % CodeGenerator.UTIL_FILE_NAME)
+        self.writeLine("data = await reader.read(blockSize)")
+        self.beginBlock("while len(data) > 0:")
+        self.writeLine("parser.feed(data)")
+        if self._recordLine() is not None:
+            self.beginBlock("while len(records) > 0:")
+            self.writeLine("yield records.popleft()")
+            self.endBlock()
+        self.writeLine("data = await reader.read(blockSize)")
+        self.endBlock()
+        if self._recordLine() is not None:
+            self.writeLine("parser.close()")
+            self.beginBlock("while len(records) > 0:")
+            self.writeLine("yield records.popleft()")
+            self.endBlock()
+        else:
+            self.writeLine("yield parser.close()")
+        self.endBlock()
+
+    ################################################################################
+    # Generate Data File
+    ################################################################################
+
+    def generateDataFileHeader(self):
+        """ For generating the data file header, such as the import statements. """
+        self.writeLine("#!/usr/bin/env python")
+        self.writeNewline()
+        if self.options.namedtuples:
+            self.writeLine("import collections")
+            self.writeNewline()
+
+    def generateClass( self, className, fields ):
+        """ Helper function for generating the code segement defining a class (or the corresponding
+        data structure). The first argument is the class name and the second argument is a list of
+        fields (in order) of that class. """
+        fieldNames = "".join([ "\"%s\", " % f.name() for f in fields ])
+        if self.options.namedtuples:
+            self.writeLine("%s = collections.namedtuple( \"%s\", ( %s) )" % ( className, className, fieldNames ))
+            self.writeNewline()
+            return
+        # Slotted class without a per-instance dict, constructed with all its fields in order
+        self.beginBlock("class %s(object):" % className)
+        self.writeLine("__slots__ = ( %s)" % fieldNames)
+        self.writeNewline()
+        self.beginBlock("def __init__(%s):" % self._argumentList([ "self" ] +
+            [ "%s = None" % f.name() for f in fields ]))
+        for f in fields:
+            self.writeLine("self.%s = %s" % ( f.name(), f.name() ))
+        self.endBlock()
+        if self.options.cache:
+            # Pickled as a call of the positional constructor, much faster to load than slot states
+            self.writeNewline()
+            self.beginBlock("def __reduce__(self):")
+            self.writeLine("return ( %s, ( %s) )" % ( className, "".join([ "self.%s, " % f.name() for f in fields ]) ))
+            self.endBlock()
+        self.endBlock()
+        self.writeNewline()
+
+    ################################################################################
+    # Generate Util File
+    ################################################################################
+
+    def generateUtilFileHeader(self):
+        """ For generating the util file header, such as the import statements. """
+        self.writeLine("#!/usr/bin/env python")
+        self.writeNewline()
+        self.writeLine("import " + CodeGenerator.DATA_FILE_NAME)
+        self.writeLine("import codecs")
+        self.writeLine("import bz2")
+        self.writeLine("import gc")
+        self.writeLine("import io")
+        self.writeLine("import re")
+        self.writeLine("import zlib")
+        if self.options.numpy:
+            self.writeLine("import numpy")
+        if self.options.columnar:
+            self.writeLine("import array")
+        if self.options.mmap:
+            self.writeLine("import mmap")
+        if self._parallelRecords() is not None:
+            self.writeLine("import bisect")
+            self.writeLine("import multiprocessing")
+        if self._recordLine() is not None or self.options.cache:
+            self.writeLine("import os")
+        self.writeLine("import struct")
+        if self.options.cache:
+            self.writeLine("import hashlib")
+            self.writeLine("import shutil")
+            self.writeLine("import tempfile")
+            self.beginBlock("try:")
+            self.writeLine("import cPickle as pickle")
+            self.endBlock()
+            self.beginBlock("except ImportError:")
+            self.writeLine("import pickle")
+            self.endBlock()
+        if self.options.instrument:
+            self.writeLine("import collections")
+            self.writeLine("import json")
+            self.writeLine("import sys")
+            self.writeLine("import timeit")
+        self.writeNewline()
+        # The generated code also runs under Python 3, where only the push parser is asynchronous
+        self.beginBlock("try:")
+        self.writeLine("xrange")
+        self.endBlock()
+        self.beginBlock("except NameError:")
+        self.writeLine("xrange = range")
+        self.endBlock()
+        # Only needed to read xz compressed inputs, which Python 2 cannot decompress
+        self.beginBlock("try:")
+        self.writeLine("import lzma")
+        self.endBlock()
+        self.beginBlock("except ImportError:")
+        self.writeLine("lzma = None")
+        self.endBlock()
+
+    def generateHelperFunctions(self):
+        """ For generating the helper functions that will be useful when parsing in the util file. """
+        # The mapped input hands out lines as bytes, so the delimiter is a bytes literal
+        self.writeLine("DELIMITER = %s%s" % ( "b" if self.options.mmap else "", repr(self.format.lineDelimiter()) ))
+        helpers =  pygenStaticHelpers()
+        self.write(helpers)
+        if self.options.mmap:
+            self.write(pygenMappedHelpers())
+        if self.options.numpy:
+            self.write(pygenNumpyHelpers())
+        if self.options.columnar:
+            self.write(pygenColumnarHelpers())
+        if self.options.lazy:
+            self.write(pygenLazyHelpers())
+        if self.options.instrument:
+            self.write(pygenStatsHelpers())
+        if self.options.cache:
+            self.comment("Tells the cached bodies of this format apart from those of other formats")
+            self.writeLine("FORMAT_FINGERPRINT = \"%s\"" % self._formatFingerprint())
+            self.write(pygenCacheHelpers(self.options.numpy))
+        if not self.options.mmap:
+            self.write(pygenPushHelpers())
+        self.comment("Tells the binary snapshots of formats of this layout apart from those of other formats")
+        self.writeLine("SCHEMA_HASH = b\"%s\"" % self.schemaHash())
+        self.write(pygenSnapshotHelpers(self.options.numpy))
+        if self._recordLine() is not None:
+            self.write(pygenIndexHelpers())
+        if self._parallelRecords() is not None:
+            self.write(pygenParallelHelpers())
+        self.writeNewline()
+
+    def _formatFingerprint(self):
+        """ A hash of the format and of the options that change the classes of the parsed objects,
+        so that a cache entry is only loaded by a parser of the same format. """
+        description = [ repr(self.format.lineDelimiter()), self.bodyTypeName ]
+        for className, lines in self.classes.items():
+            description.append("%s: %s" % ( className, " | ".join([ str(line) for line in lines ]) ))
+        description.append(repr(( self.options.numpy, self.options.columnar, self.options.namedtuples )))
+        return hashlib.sha1("\n".join(description)).hexdigest()
+
+    def _openInput( self, isUtilFile = False ):
+        """ The expression opening the input file named filename, in the main file unless
+        isUtilFile is True. """
+        module = "" if isUtilFile else CodeGenerator.UTIL_FILE_NAME + "."
+        return "%sopenFile(filename)" % module
+
+    def _localName( self, fieldName ):
+        """ The name of the local variable holding a field while its class is being parsed. The
+        suffix keeps it apart from the other locals of the generated parser functions. """
+        return "%sValue" % fieldName
+
+    def _argumentList( self, arguments ):
+        """ Format the arguments of a generated call, matching the spacing of the generated code. """
+        if len(arguments) == 0:
+            return ""
+        if len(arguments) == 1:
+            return arguments[0]
+        return " %s " % ", ".join(arguments)
+
+    def _signatureName( self, className, field ):
+        """ The name of the constant holding the lookahead signature of a repeated field. """
+        return "SIGNATURE_%s_%s" % ( className, field.name() )
+
+    def _signatureLiteral( self, signature ):
+        """ A LineSignature as the ( tokenTypes, listType, isSplit ) tuple used by the runtime. """
+        tokenTypes = "".join([ "\"%s\", " % tokenType for tokenType in signature.tokenTypes() ])
+        listType = "\"%s\"" % signature.listType() if signature.listType() else "None"
+        return "( (%s), %s, %s )" % ( tokenTypes, listType, signature.isSplit() )
+
+    def _fieldConversions( self, line ):
+        """ The conversions of the fields of a line of primitive fields, split into fields. Each fails
+        exactly when the parser of its field does, raising a ValueError or, for bools, a KeyError.
+        A trailing list is converted by its list parser, which converts it with builtins. """
+        conversions = []
+        for i, field in enumerate(line):
+            token = "fields[%d]" % i
+            if field.isList():
+                conversions.append("%s( fields[%d:], currentLineNumber )" % ( self.typeNameToParseFuncName[field.typeName()], i ))
+            elif field.typeName() == StringConstants.INTEGER_TYPE:
+                conversions.append("int(%s)" % token)
+            elif field.typeName() == StringConstants.FLOAT_TYPE:
+                conversions.append("float(%s)" % token)
+            elif field.typeName() == StringConstants.BOOL_TYPE:
+                conversions.append("BOOL_VALUES[%s.lower()]" % token)
+            # Mapped strings still have to be decoded
+            elif self.options.mmap:
+                conversions.append("%s( %s, currentLineNumber )" % ( CodeGenerator.PARSE_STRING, token ))
+            else:
+                conversions.append(token)
+        return ", ".join(conversions)
+
+    def _isColumnar( self, field ):
+        """ Whether the instances of a repeated field are stored in a ColumnTable. """
+        return self.options.columnar and not field.isPrimitive() and self.format.isScalarRecord(field.typeName())
+
+    def _columnTableLiteral( self, typeName ):
+        """ The expression creating an empty ColumnTable for the given scalar record type. """
+        fieldTypes = "".join([ "( \"%s\", \"%s\" ), " % ( field.name(), field.typeName() )
+            for field in self.classes[typeName][0] ])
+        return "ColumnTable( %s.%s, ( %s) )" % ( CodeGenerator.DATA_FILE_NAME, typeName, fieldTypes )
+
+    def _countFields( self, lines ):
+        """ The names of the fields holding the number of repetitions of a later line. """
+        return set([ line.repetitionAmountString() for line in lines
+            if not line.isEmpty() and line.isRepeating() and line.isVariableRepetition() ])
+
+    def _isScannedLine( self, line ):
+        """ Whether the lazy structural pass finds the instances of a repeated line without parsing
+        them, because they either repeat a known number of times or are found by a lookahead. """
+        return line.lookahead() is not None or line.isIntegerRepetition() or line.isVariableRepetition()
+
+    def _isLazyUnit( self, line, countFields ):
+        """ Whether the lazy structural pass keeps a line, or the lines of a repeated primitive
+        field, as spans converted on first access. Lines holding an object are scanned in turn
+        and lines holding the number of repetitions of a later line are converted right away. """
+        if line.isEmpty():
+            return False
+        if line.isRepeating():
+            return line.getField(0).isPrimitive() and self._isScannedLine(line)
+        fieldNames = [ field.name() for field in line ]
+        if len(fieldNames) == 1 and not line.getField(0).isPrimitive():
+            return False
+        return len(countFields.intersection(fieldNames)) == 0
+
+    def _spanName( self, line ):
+        """ The name of the local variable holding the span of a line kept by the lazy structural pass. """
+        return "%sSpan" % line.getField(0).name()
+
+    def generateClassParserFunctions(self):
+        """ For generating all the functions for parsing user defined classes, followed by the
+        streaming parser of the body and the functions for indexing its records and parsing them
+        in parallel. """
+        CodeGenerator.generateClassParserFunctions(self)
+        if self.options.columnar:
+            for className, lines in self.classes.items():
+                if self.format.isScalarRecord(className):
+                    self.generateColumnAppendFunction( className, lines[0] )
+        self.generateClassParserFunction( self.bodyTypeName, self.classes[self.bodyTypeName], True )
+        if self.options.lazy:
+            for className, lines in self.classes.items():
+                self.generateLazyClass( className, lines )
+        if self._recordLine() is not None:
+            self.generateRecordFunctions()
+            self.generateIndexFunctions()
+        if self._parallelRecords() is not None:
+            self.generateParallelParserFunctions()
+        # The push parser works on text, which the mapped parsers do not accept
+        if not self.options.mmap:
+            self.generatePushParser()
+
+    def generatePushParser(self):
+        """ For generating PushParser, which parses an input pushed to it in blocks by feed. It parses
+        the body in steps, each parsed from the lines buffered so far: the lines before the records
+        of the body, then one record at a time, or the whole body if it does not end in records.
+        Its state between steps is the position the next step starts at, the prefix and records
+        parsed so far and the number of records. A step that runs out of input raises NeedMoreData
+        and is retried from its start once the input has grown by as many lines as the step
+        already spans, so that retrying long steps costs linear time overall. """
+        recordLine = self._recordLine()
+
+        self.beginBlock("class PushParser(object):")
+        self.writeLine("\"\"\" Parses an input pushed to it in blocks. Records are handed to the callback, if any, as")
+        self.writeLine("soon as they have been parsed instead of being collected into the body. \"\"\"")
+        self.writeNewline()
+        self.beginBlock("def __init__( self, callback = None ):")
+        self.writeLine("self.callback = callback")
+        self.writeLine("self.input = PushedInput()")
+        self.writeLine("self.cursor = PushCursor(self.input)")
+        self.writeLine("self.lineNumber = 1")
+        self.writeLine("self.position = 0")
+        self.writeLine("self.body = None")
+        self.writeLine("self.prefix = None")
+        self.writeLine("self.records = []")
+        self.writeLine("self.numRecords = 0")
+        self.writeLine("self.numRepetitions = None")
+        self.writeLine("self.isDone = False")
+        self.writeLine("self.numLinesPushed = 0")
+        self.writeLine("self.retryAt = 0")
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def feed( self, data ):")
+        self.writeLine("\"\"\" Pushes the next block of the input, as bytes, and parses what it completes. \"\"\"")
+        self.writeLine("self.input.push(data)")
+        self.writeLine("self.numLinesPushed += data.count(b\"\\n\")")
+        self.beginBlock("if self.numLinesPushed >= self.retryAt:")
+        self.writeLine("self.parseAvailable()")
+        self.endBlock()
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def close(self):")
+        self.writeLine("\"\"\" Ends the input, parses the rest of it and returns the body. \"\"\"")
+        self.writeLine("self.input.finish()")
+        self.writeLine("self.parseAvailable()")
+        self.writeLine("checkEndOfFile( self.cursor, self.lineNumber )")
+        if recordLine is not None:
+            self.writeLine("self.body = %s.%s(*( self.prefix + ( self.records, ) ))" % \
+                ( CodeGenerator.DATA_FILE_NAME, self.bodyTypeName ))
+        self.writeLine("return self.body")
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def parseAvailable(self):")
+        self.beginBlock("try:")
+        self.beginBlock("while not self.isDone:")
+        self.writeLine("self.step()")
+        self.writeLine("self.cursor.commit(self.position)")
+        self.endBlock()
+        self.endBlock()
+        self.beginBlock("except NeedMoreData as e:")
+        self.writeLine("self.cursor.reset(self.position)")
+        self.writeLine("numLines = self.cursor.numLines()")
+        self.writeLine("self.retryAt = max( numLines + 1, 2 * numLines - self.position )")
+        self.endBlock()
+        self.endBlock()
+        self.writeNewline()
+
+        # A step only changes the state once it has been parsed completely
+        self.beginBlock("def step(self):")
+        if recordLine is None:
+            self.writeLine("self.body, self.lineNumber, self.position = %s( self.cursor, self.lineNumber, self.position )" % \
+                self.typeNameToParseFuncName[self.bodyTypeName])
+            self.writeLine("self.isDone = True")
+        else:
+            self.beginBlock("if self.prefix is None:")
+            self.writeLine("prefix, self.lineNumber, self.position = parse%s%s( self.cursor, self.lineNumber, self.position )" % \
+                ( self.bodyTypeName, PythonGenerator.PREFIX_PART ))
+            self.writeLine("self.numRepetitions = %s" % self._numRecordsExpression())
+            self.writeLine("self.prefix = prefix")
+            self.writeLine("return")
+            self.endBlock()
+            self.writeLine("lineNumber = self.lineNumber")
+            self.writeLine("position = self.position")
+            if recordLine.lookahead() is None:
+                self.beginBlock("if self.numRecords == self.numRepetitions:")
+                self.writeLine("self.isDone = True")
+                self.writeLine("return")
+                self.endBlock()
+            elif recordLine.isSplitByNewline():
+                # The empty line separating records found by a lookahead precedes every record but the first
+                self.beginBlock("if self.numRecords > 0:")
+                self.beginBlock("if not hasNextInstance( self.cursor, %s, True ):" % \
+                    self._signatureName( self.bodyTypeName, recordLine.getField(0) ))
+                self.writeLine("self.isDone = True")
+                self.writeLine("return")
+                self.endBlock()
+                self.writeLine("readline(self.cursor, \"%s\")" % self.bodyTypeName)
+                self.writeLine("lineNumber += 1")
+                self.writeLine("position = self.cursor.mark()")
+                self.endBlock()
+            self.writeLine("records, lineNumber, position = parse%s%s( self.cursor, lineNumber, position, self.numRecords, 1, "
+                "self.numRepetitions )" % ( self.bodyTypeName, PythonGenerator.RECORDS_PART ))
+            if recordLine.lookahead() is not None:
+                self.beginBlock("if len(records) == 0:")
+                # Like the sequential loop, the separator is read again by the end of file check
+                self.writeLine("self.cursor.reset(self.position)")
+                self.writeLine("self.isDone = True")
+                self.writeLine("return")
+                self.endBlock()
+            self.beginBlock("if self.callback is not None:")
+            self.beginBlock("for record in records:")
+            self.writeLine("self.callback(record)")
+            self.endBlock()
+            self.endBlock()
+            self.beginBlock("elif self.numRecords == 0:")
+            self.writeLine("self.records = records")
+            self.endBlock()
+            self.beginBlock("else:")
+            self.writeLine("self.records.extend(records)")
+            self.endBlock()
+            self.writeLine("self.numRecords += 1")
+            self.writeLine("self.lineNumber = lineNumber")
+            self.writeLine("self.position = position")
+        self.endBlock()
+        self.endBlock()
+        self.writeNewline()
+
+    def _numRecordsExpression(self):
+        """ The expression for the total number of records given the tuple of fields parsed before
+        them, named prefix. It is None if the records repeat until the lookahead fails. """
+        recordLine = self._recordLine()
+        prefixFieldNames = [ field.name() for line in self.classes[self.bodyTypeName][:-1] for field in line ]
+        if recordLine.isIntegerRepetition():
+            return recordLine.repetitionAmountString()
+        elif recordLine.isVariableRepetition():
+            return "prefix[%d]" % prefixFieldNames.index(recordLine.repetitionAmountString())
+        return "None"
+
+    def generateRecordFunctions(self):
+        """ For generating the functions shared by everything that parses the records of the body
+        on their own: the parsers of the lines before them, "parseXPrefix", and of the records,
+        "parseXRecords", and openAt. """
+        lines = self.classes[self.bodyTypeName]
+        self.generateClassParserFunction( self.bodyTypeName, lines[:-1], part = PythonGenerator.PREFIX_PART )
+        self.generateClassParserFunction( self.bodyTypeName, lines[-1:], part = PythonGenerator.RECORDS_PART )
+
+        self.beginBlock("def openAt( filename, offset ):")
+        self.writeLine("\"\"\" Opens the input file with the given byte offset as its first line. \"\"\"")
+        if self.options.mmap:
+            self.writeLine("inputFile = MappedLineCursor(open(filename, 'rb'))")
+            self.writeLine("inputFile.reset(offset)")
+        else:
+            self.writeLine("inputFile = open(filename, 'r')")
+            self.writeLine("inputFile.seek(offset)")
+            self.writeLine("inputFile = LineCursor(inputFile)")
+        self.writeLine("return inputFile")
+        self.endBlock()
+        self.writeNewline()
+
+    def generateIndexFunctions(self):
+        """ For generating buildIndex and getRecord. buildIndex parses the whole body once and saves
+        the byte offset and line number of every record to an index file. getRecord then parses a
+        single record by seeking straight to it, rebuilding the index first if it is missing or
+        was built for another version of the input file. """
+        recordLine = self._recordLine()
+        recordField = recordLine.getField(0)
+        self.generateClassParserFunction( self.bodyTypeName, [ recordLine ], part = PythonGenerator.INDEX_PART )
+
+        self.beginBlock("def buildIndex( filename, indexFilename = None ):")
+        self.writeLine("\"\"\" Indexes the records of the input file and returns their number. \"\"\"")
+        # Offsets into a compressed file do not tell where its records start
+        self.beginBlock("if isCompressed(filename):")
+        self.writeLine("raise ValueError(\"Parser Error: Compressed input files cannot be indexed.\")")
+        self.endBlock()
+        self.writeLine("inputFile = %s" % self._openInput(True))
+        self.beginBlock("try:")
+        self.writeLine("prefix, currentLineNumber, currentLinePos = parse%s%s( inputFile, 1, 0 )" % \
+            ( self.bodyTypeName, PythonGenerator.PREFIX_PART ))
+        self.writeLine("numRepetitions = %s" % self._numRecordsExpression())
+        self.writeLine("offsets, lineNumbers = findLineOffsets( filename, index%sRecords( inputFile, "
+            "currentLineNumber, currentLinePos, numRepetitions ) )" % self.bodyTypeName)
+        self.endBlock()
+        self.beginBlock("finally:")
+        self.writeLine("inputFile.close()")
+        self.endBlock()
+        self.writeLine("saveIndex( filename, indexFilename or filename + INDEX_EXTENSION, offsets, lineNumbers )")
+        self.writeLine("return len(offsets)")
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def getRecord( filename, index, indexFilename = None ):")
+        self.writeLine("\"\"\" Parses the record of the given index, negative indices counting from the end. \"\"\"")
+        self.writeLine("indexFilename = indexFilename or filename + INDEX_EXTENSION")
+        self.writeLine("entry = readIndexEntry( filename, indexFilename, index )")
+        self.beginBlock("if entry is None:")
+        self.writeLine("buildIndex( filename, indexFilename )")
+        self.writeLine("entry = readIndexEntry( filename, indexFilename, index )")
+        self.endBlock()
+        self.writeLine("offset, currentLineNumber = entry")
+        self.writeLine("inputFile = openAt( filename, offset )")
+        self.beginBlock("try:")
+        # Parse the record as one instance of the repeated field
+        if not recordField.isPrimitive():
+            self.writeLine("record, currentLineNumber, currentLinePos = %s( inputFile, currentLineNumber, "
+                "inputFile.mark() )" % self.typeNameToParseFuncName[recordField.typeName()])
+        elif not recordField.isList():
+            self.writeLine("record = %s( readline(inputFile, \"%s\"), currentLineNumber )" % \
+                ( self.typeNameToParseFuncName[recordField.typeName()], self.bodyTypeName ))
+        else:
+            self.writeLine("fields = readline(inputFile, \"%s\").split(DELIMITER)" % self.bodyTypeName)
+            self.writeLine("record = %s( fields, currentLineNumber )" % \
+                self.typeNameToParseFuncName["list(%s)" % recordField.listType()])
+        self.endBlock()
+        self.beginBlock("finally:")
+        self.writeLine("inputFile.close()")
+        self.endBlock()
+        self.writeLine("return record")
+        self.endBlock()
+        self.writeNewline()
+
+    def generateParallelParserFunctions(self):
+        """ For generating parseInParallel, which parses the body of an input file with a pool of
+        worker processes. The lines of the body before its records are parsed first, then the
+        records are split into chunks at the record starts found by scanning the file, and the
+        chunks are parsed by the workers and merged in order as they arrive.
+
+        The workers send the records of their chunk back as a binary snapshot, written by
+        "dumpXRecords", rather than pickled objects, which the parent process would have to create
+        one by one. The parent keeps the snapshots in a RecordChunks, which only loads the records
+        of a chunk once they are first used, unless the records are stored in a ColumnTable, whose
+        columns are extended with each chunk right away.
+
+        Should a chunk fail to parse, end anywhere else than where the next chunk starts, or be
+        followed by anything but an empty line when the records are separated by one,
+        parseInParallel returns None so the caller parses the file sequentially, which reports
+        any error exactly as it would have without workers. """
+        recordLine, recordLines = self._parallelRecords()
+        recordField = recordLine.getField(0)
+
+        self.beginBlock("def dump%s%s( write, records ):" % ( self.bodyTypeName, PythonGenerator.RECORDS_PART ))
+        self._generateFieldDump( recordField, "records" )
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def load%s%s( data, offset ):" % ( self.bodyTypeName, PythonGenerator.RECORDS_PART ))
+        self._generateFieldLoad( recordField, "records" )
+        self.writeLine("return records, offset")
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def parseChunk(chunk):")
+        self.writeLine("filename, offset, currentLineNumber, firstIndex, numRecords, numRepetitions, isLast = chunk")
+        self.writeLine("inputFile = openAt( filename, offset )")
+        self.beginBlock("try:")
+        self.writeLine("records, currentLineNumber, currentLinePos = parse%s%s( inputFile, currentLineNumber, "
+            "inputFile.mark(), firstIndex, numRecords, numRepetitions )" % ( self.bodyTypeName, PythonGenerator.RECORDS_PART ))
+        self.beginBlock("if isLast:")
+        self.writeLine("checkEndOfFile( inputFile, currentLineNumber )")
+        self.endBlock()
+        if recordLine.isSplitByNewline() and recordLine.lookahead() is not None:
+            # The records of the next chunk start past the empty line separating them from these,
+            # unless the separators are parsed along with the counted records
+            self.beginBlock("else:")
+            self.writeLine("separator = inputFile.readline()")
+            self.beginBlock("if separator is None or separator.strip():")
+            self.writeLine("raise ValueError(\"Parser Error on line %d: Should be an empty line.\" % currentLineNumber)")
+            self.endBlock()
+            self.writeLine("currentLineNumber += 1")
+            self.endBlock()
+        self.endBlock()
+        self.beginBlock("finally:")
+        self.writeLine("inputFile.close()")
+        self.endBlock()
+        self.writeLine("parts = []")
+        self.writeLine("dump%s%s( parts.append, records )" % ( self.bodyTypeName, PythonGenerator.RECORDS_PART ))
+        self.writeLine("return b\"\".join(parts), len(records), currentLineNumber")
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def parseInParallel( filename, workers ):")
+        # Compressed files cannot be split into chunks, so they are parsed sequentially
+        self.beginBlock("if isCompressed(filename):")
+        self.writeLine("return None")
+        self.endBlock()
+        self.writeLine("inputFile = %s" % self._openInput(True))
+        self.beginBlock("try:")
+        self.writeLine("prefix, currentLineNumber, currentLinePos = parse%s%s( inputFile, 1, 0 )" % \
+            ( self.bodyTypeName, PythonGenerator.PREFIX_PART ))
+        self.endBlock()
+        self.beginBlock("finally:")
+        self.writeLine("inputFile.close()")
+        self.endBlock()
+        self.writeLine("numRepetitions = %s" % self._numRecordsExpression())
+        self.writeLine("starts = findRecordStarts( filename, currentLineNumber, %s, numRepetitions )" % recordLines)
+        self.writeLine("chunks = splitChunks( filename, starts, workers, numRepetitions )")
+        loadRecords = "load%s%s" % ( self.bodyTypeName, PythonGenerator.RECORDS_PART )
+        if self._isColumnar(recordField):
+            self.writeLine("records = %s" % self._columnTableLiteral(recordField.typeName()))
+            self.writeLine("addChunk = lambda data, numRecords: records.extend(%s( data, 0 )[0])" % loadRecords)
+        else:
+            self.writeLine("records = RecordChunks(%s)" % loadRecords)
+            self.writeLine("addChunk = records.append")
+        self.beginBlock("if not parseChunks( chunks, workers, addChunk ):")
+        self.writeLine("return None")
+        self.endBlock()
+        self.writeLine("return %s.%s(*( prefix + ( records, ) ))" % ( CodeGenerator.DATA_FILE_NAME, self.bodyTypeName ))
+        self.endBlock()
+        self.writeNewline()
 
-        def isSimplePrimitive(field):
-            return field.isInteger() or field.isFloat() or field.isString() or field.isBool()
+    def _snapshotTypeCode( self, typeName ):
+        """ The struct type code of an int, float or bool in a binary snapshot, or None for other types. """
+        return { StringConstants.INTEGER_TYPE: "q", StringConstants.FLOAT_TYPE: "d",
+            StringConstants.BOOL_TYPE: "?" }.get(typeName)
 
-        def generateSetup():
-            # Helper to do some setup in every parser function
-            writeLine(className + " result = new " + className + "();")
-            didSplit = False
-            didRepeat = False
-            didRepeatPlus = False
+    def _snapshotRowFormat( self, typeName ):
+        """ The struct format of the instances of a scalar record class made only of ints, floats
+        and bools, which are written to binary snapshots as fixed width rows, or None for other types. """
+        if not self.format.isScalarRecord(typeName):
+            return None
+        typeCodes = [ self._snapshotTypeCode(field.typeName()) for field in self.classes[typeName][0] ]
+        if None in typeCodes:
+            return None
+        return "".join(typeCodes)
 
-            for line in lines:
-                didRepeat = didRepeat or line.isRepeating()
-                didRepeatPlus = didRepeatPlus or  line.isOneOrMoreRepetition()
-                didSplit = didSplit or line.numFields() > 1 or (not line.isEmpty() and line.getField(0).isList())
+    def generateClassSnapshotFunctions(self):
+        """ For generating the functions writing every user defined class to a binary snapshot and
+        reading it back, followed by those writing and reading the snapshot file of a body. """
+        CodeGenerator.generateClassSnapshotFunctions(self)
 
-            if didSplit:
-                writeLine("String[] fields;")
-            if didRepeat:
-                writeLine("long prevFilePos = getFilePointer(f);")
-                writeLine("int prevLineNumber = lineNumber[0];")
-            if didRepeatPlus:
-                writeLine("boolean didRepeatOnce = false;")
+        self.beginBlock("def writeSnapshot( body, filename ):")
+        self.writeLine("outputFile = open( filename, 'wb', SNAPSHOT_BUFFER_SIZE )")
+        self.beginBlock("try:")
+        self.writeLine("outputFile.write(SNAPSHOT_MAGIC + SCHEMA_HASH)")
+        self.writeLine("dump%s( outputFile.write, body )" % self.bodyTypeName)
+        self.endBlock()
+        self.beginBlock("except struct.error as e:")
+        self.writeLine("raise ValueError(\"Parser Error: Could not write the binary snapshot %s: %s\" % ( filename, e ))")
+        self.endBlock()
+        self.beginBlock("finally:")
+        self.writeLine("outputFile.close()")
+        self.endBlock()
+        self.endBlock()
+        self.writeNewline()
 
-        def handleEmptyLine():
-            # Handle the empty line case
-            self._beginBlock("if (!readLine(f, \"" + className + "\").trim().equals(\"\"))")
-            writeLine("throw new RuntimeException(\"Parser Error on line \" + lineNumber[0] +" +
-                "\": Should be an empty line.\");")
-            self._endBlock()
-            writeLine("lineNumber[0] += 1;")
+        self.beginBlock("def readSnapshot(filename):")
+        self.writeLine("inputFile = open( filename, 'rb' )")
+        self.beginBlock("try:")
+        self.writeLine("data = inputFile.read()")
+        self.endBlock()
+        self.beginBlock("finally:")
+        self.writeLine("inputFile.close()")
+        self.endBlock()
+        self.writeLine("header = SNAPSHOT_MAGIC + SCHEMA_HASH")
+        self.beginBlock("if data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:")
+        self.writeLine("raise ValueError(\"Parser Error: %s is not a binary snapshot.\" % filename)")
+        self.endBlock()
+        self.beginBlock("if data[:len(header)] != header:")
+        self.writeLine("raise ValueError(\"Parser Error: The binary snapshot %s was written for a format of another layout.\" % filename)")
+        self.endBlock()
+        # The collector would scan the objects over and over as they are created
+        self.writeLine("isCollecting = gc.isenabled()")
+        self.writeLine("gc.disable()")
+        self.beginBlock("try:")
+        self.writeLine("body, offset = load%s( data, len(header) )" % self.bodyTypeName)
+        self.endBlock()
+        self.beginBlock("except struct.error as e:")
+        self.writeLine("raise ValueError(\"Parser Error: The binary snapshot %s is truncated.\" % filename)")
+        self.endBlock()
+        self.beginBlock("finally:")
+        self.beginBlock("if isCollecting:")
+        self.writeLine("gc.enable()")
+        self.endBlock()
+        self.endBlock()
+        self.beginBlock("if offset != len(data):")
+        self.writeLine("raise ValueError(\"Parser Error: The binary snapshot %s continues after its body.\" % filename)")
+        self.endBlock()
+        self.writeLine("return body")
+        self.endBlock()
+        self.writeNewline()
 
-        def handleSimpleLineOneField(field):
-            # Helper for handleSimpleLine
-            if isSimplePrimitive(field):
-                # Field is simple, just parse it
-                writeLine("result." + field.name() + " = "
-                    + self.typeNameToParseFuncName[field.typeName()] + "(readLine(f, \"" + className + "\"), lineNumber);")
-                writeLine("lineNumber[0] += 1;")
-            elif field.isPrimitive():
-                # Field is primitive list, split line
-                writeLine("fields = readLine(f, \"" + className + "\").split(\"" + self.format.lineDelimiter() + "\");")
-                write("result." + field.name() + " = "
-                    + self.typeNameToParseFuncName["list(%s)" % field.listType()] + "(fields, lineNumber);")
-                writeLine("lineNumber[0] += 1;")
+    def generateClassSnapshotFunction( self, className, lines ):
+        """ For generating "dumpX", which writes an instance of the class X to a binary snapshot
+        through the function write, and "loadX", which reads one from the bytes of a snapshot at
+        offset and returns it along with the offset following it. Consecutive int, float and bool
+        fields are packed with one Struct, lists of numbers with one pack, and the instances of
+        repeated scalar records of numbers as rows. """
+        fields = [ field for line in lines if not line.isEmpty() for field in line ]
+        local = self._localName
+        # Runs of fixed width fields, each packed by the Struct of the same index
+        groups = []
+        for field in fields:
+            if self._snapshotTypeCode(field.typeName()) is None or field.isRepeating():
+                groups.append(field)
+            elif len(groups) > 0 and isinstance( groups[-1], list ):
+                groups[-1].append(field)
             else:
-                # Field is a class, recurse
-                writeLine("result." + field.name() + " = "
-                    + self.typeNameToParseFuncName[field.typeName()] + "(f, lineNumber);")
+                groups.append([ field ])
+        runs = [ group for group in groups if isinstance( group, list ) ]
+        for index, run in enumerate(runs):
+            self.writeLine("SNAPSHOT_%s_%d = struct.Struct(\"<%s\")" % ( className, index,
+                "".join([ self._snapshotTypeCode(field.typeName()) for field in run ]) ))
+        if len(runs) > 0:
+            self.writeNewline()
 
-        def handleSimpleLineMultipleField(index, field):
-            # Helper for handleSimpleLine
-            if isSimplePrimitive(field):
-                writeLine("result." + field.name() + " = "
-                    + self.typeNameToParseFuncName[field.typeName()]
-                    + "(fields[" + str(index) + "], lineNumber);")
-            elif field.isPrimitive():
-                # Field is primitive list, use rest of fields)
-                writeLine("result." + field.name() + " = "
-                    + self.typeNameToParseFuncName["list(%s)" % field.listType()]
-                    + "(Arrays.copyOfRange(fields, " + str(index) + ", fields.length), lineNumber);")
-            else:
-                # Field is a class? Cannot be!
-                raise Exception("This should never happen.")
+        self.beginBlock("def dump%s( write, obj ):" % className)
+        runIndex = 0
+        for group in groups:
+            if isinstance( group, list ):
+                self.writeLine("write(SNAPSHOT_%s_%d.pack(%s))" % ( className, runIndex,
+                    self._argumentList([ "obj." + field.name() for field in group ]) ))
+                runIndex += 1
+                continue
+            self._generateFieldDump( group, "obj." + group.name() )
+        if len(fields) == 0:
+            self.writeLine("pass")
+        self.endBlock()
+        self.writeNewline()
 
-            writeLine("lineNumber[0] += 1;")
+        self.beginBlock("def load%s( data, offset ):" % className)
+        runIndex = 0
+        for group in groups:
+            if isinstance( group, list ):
+                self.writeLine("%s = SNAPSHOT_%s_%d.unpack_from( data, offset )" % (
+                    "".join([ "%s, " % local(field.name()) for field in group ]).rstrip( " " if len(group) == 1 else ", " ),
+                    className, runIndex ))
+                self.writeLine("offset += SNAPSHOT_%s_%d.size" % ( className, runIndex ))
+                runIndex += 1
+                continue
+            self._generateFieldLoad( group, local(group.name()) )
+        self.writeLine("return %s.%s(%s), offset" % ( CodeGenerator.DATA_FILE_NAME, className,
+            self._argumentList([ local(field.name()) for field in fields ]) ))
+        self.endBlock()
+        self.writeNewline()
 
-        def handleSimpleLine(line):
-            if line.numFields() == 1:
-                # Only one field, no need to split unnecessarily
-                handleSimpleLineOneField(line.getField(0))
+    def _snapshotListCall( self, typeName, isDump ):
+        """ The call writing or reading a list of the given element type to a binary snapshot. """
+        prefix = "dump" if isDump else "load"
+        if isString(typeName):
+            return prefix + "Strings( %s )"
+        if self.options.numpy and not isBool(typeName):
+            return prefix + "Array( %%s, \"%s\" )" % self._snapshotTypeCode(typeName)
+        return prefix + "Numbers( %%s, \"%s\" )" % self._snapshotTypeCode(typeName)
+
+    def _generateFieldDump( self, field, value ):
+        """ For generating the code writing the field of the given value expression to a binary
+        snapshot through the function write. """
+        typeName = field.typeName()
+        if not field.isRepeating():
+            if isString(typeName):
+                self.writeLine("dumpString( write, %s )" % value)
+            elif field.isList():
+                self.writeLine(self._snapshotListCall( listType(typeName), True ) % ( "write, " + value ))
             else:
-                # Multiple fields, split it
-                writeLine("fields = readLine(f, \"" + className + "\").split(\"" + self.format.lineDelimiter() + "\");")
-                if (line.getField(-1).isList()):
-                    self._beginBlock("if (fields.length < " + str(line.numFields()) + ")")
-                else:
-                    self._beginBlock("if (fields.length != " + str(line.numFields()) + ")")
-                writeLine("throw new RuntimeException(\"Parser Error on line \" + lineNumber[0] + " +
-                    "\": Expecting " + str(line.numFields()) + " fields (\" + fields.length + \" found).\");")
-                self._endBlock()
-                for index, field in enumerate(line):
-                    handleSimpleLineMultipleField(index, field)
-
-        def handleRepeatingLineForField(field):
-            # Helper for handleRepeating
-            if isSimplePrimitive(field):
-                # Field is simple, just parse it
-                writeLine("result." + field.name() + ".add("
-                    + self.typeNameToParseFuncName[field.typeName()] + "(readLine(f, \"" + className + "\"), lineNumber));")
-                writeLine("lineNumber[0] += 1;")
-            elif field.isPrimitive():
-                # Field is primitive list, split line
-                writeLine("fields = readLine(f, \"" + className + "\").split(\"" + self.format.lineDelimiter() + "\");")
-                writeLine("result." + field.name() + ".add("
-                    + self.typeNameToParseFuncName["list(%s)" % field.listType()] + "(fields, lineNumber));")
-                writeLine("lineNumber[0] += 1;")
+                self.writeLine("dump%s( write, %s )" % ( typeName, value ))
+        elif field.isPrimitive() and not field.isList():
+            self.writeLine(( "dumpStrings( %s )" if isString(typeName) else
+                "dumpNumbers( %%s, \"%s\" )" % self._snapshotTypeCode(typeName) ) % ( "write, " + value ))
+        elif self._snapshotRowFormat(typeName) is not None:
+            rowFields = [ rowField.name() for rowField in self.classes[typeName][0] ]
+            if self._isColumnar(field):
+                rows = "zip(%s)" % self._argumentList([ "%s.%s" % ( value, name ) for name in rowFields ])
             else:
-                # Field is a class, recurse
-                writeLine("result." + field.name() + ".add("
-                    + self.typeNameToParseFuncName[field.typeName()] + "(f, lineNumber));")
+                rows = "( ( %s) for instance in %s )" % ( "".join([ "instance.%s, " % name for name in rowFields ]), value )
+            self.writeLine("dumpRows( write, \"%s\", len(%s), %s )" % ( self._snapshotRowFormat(typeName), value, rows ))
+        else:
+            self.writeLine("write(COUNT.pack(len(%s)))" % value)
+            self.beginBlock("for instance in %s:" % value)
+            if field.isList():
+                self.writeLine(self._snapshotListCall( listType(typeName), True ) % "write, instance")
+            else:
+                self.writeLine("dump%s( write, instance )" % typeName)
+            self.endBlock()
 
-        def handleRepeatingLine(line):
-            # Must be a primitive or class repeated
-            if line.isIntegerRepetition() or line.isVariableRepetition():
-                # Constant repetition amount
-                field = line.getField(0)
-                # Generate the repetition string
-                repetitionString = ""
-                if line.isIntegerRepetition():
-                    repetitionString = str(line.repetitionAmountString())
-                else:
-                    repetitionString =  "result." + line.repetitionAmountString()
-                # Initialize the arraylist
-                writeLine("result." + field.name() + " = new " + self._getTypeName(field) + "();")
-                # Begin loop
-                self._beginBlock("for (int i = 0; i < " + repetitionString + "; i++)")
-                # Wrap with try
-                self._beginBlock("try")
-                # Main handler
-                handleRepeatingLineForField(field)
-                # Check for newline
-                if (line.isSplitByNewline()):
-                    self._beginBlock("if (i != " + repetitionString + " - 1)")
-                    handleEmptyLine()
-                    self._endBlock()
-                # End try
-                self._endBlock()
-                # Catch any error to throw appropriate error message
-                self._beginBlock("catch (Exception e)")
-                writeLine("throw new RuntimeException(\"Parser Error on line \" + lineNumber[0] +"
-                    + "\": Expecting exactly \" + " + repetitionString + " + \" \\\"" + field.typeName()
-                    + "\\\" when parsing \\\"" + className + "." + field.name()
-                    + "\\\" (\" + i + \" found).\");")
-                self._endBlock()
-                # End loop
-                self._endBlock()
-            elif line.isZeroOrMoreRepetition():
-                field = line.getField(0)
-                # Wrap with try block
-                self._beginBlock("try")
-                # Initialize object
-                writeLine("result." + field.name() + " = new " + self._getTypeName(field) + "();")
-                # Save initial position
-                writeLine("prevFilePos = getFilePointer(f);")
-                writeLine("prevLineNumber = lineNumber[0];")
-                # Begin infinite loop
-                self._beginBlock("while (true)")
-                # Main handler
-                handleRepeatingLineForField(field)
-                writeLine("prevFilePos = getFilePointer(f);")
-                writeLine("prevLineNumber = lineNumber[0];")
-                # Check for newline
-                if (line.isSplitByNewline()):
-                    handleEmptyLine()
-                # End infinite loop and try block
-                self._endBlock()
-                self._endBlock()
-                # Catch any errors, reset line number and continue
-                self._beginBlock("catch (Exception e)")
-                writeLine("seek(f, prevFilePos);")
-                writeLine("lineNumber[0] = prevLineNumber;")
-                self._endBlock()
-            elif line.isOneOrMoreRepetition:
+    def _generateFieldLoad( self, field, value ):
+        """ For generating the code reading the field from the bytes of a binary snapshot at offset
+        into the local of the given name, advancing offset past it. """
+        typeName = field.typeName()
+        if not field.isRepeating():
+            if isString(typeName):
+                self.writeLine("%s, offset = loadString( data, offset )" % value)
+            elif field.isList():
+                self.writeLine("%s, offset = %s" % ( value, self._snapshotListCall( listType(typeName), False ) % "data, offset" ))
+            else:
+                self.writeLine("%s, offset = load%s( data, offset )" % ( value, typeName ))
+        elif field.isPrimitive() and not field.isList():
+            self.writeLine("%s, offset = %s" % ( value, ( "loadStrings( %s )" if isString(typeName) else
+                "loadNumbers( %%s, \"%s\" )" % self._snapshotTypeCode(typeName) ) % "data, offset" ))
+        elif self._snapshotRowFormat(typeName) is not None:
+            self.writeLine("columns, offset = loadRows( data, offset, \"%s\" )" % self._snapshotRowFormat(typeName))
+            if self._isColumnar(field):
+                self.writeLine("%s = %s" % ( value, self._columnTableLiteral(typeName) ))
+                for index, rowField in enumerate(self.classes[typeName][0]):
+                    self.writeLine("%s.%s.extend(columns[%d])" % ( value, rowField.name(), index ))
+            else:
+                self.writeLine("%s = list(map( %s.%s, *columns ))" % ( value, CodeGenerator.DATA_FILE_NAME, typeName ))
+        else:
+            self.writeLine("count, = COUNT.unpack_from( data, offset )")
+            self.writeLine("offset += COUNT.size")
+            instances = "instances" if self._isColumnar(field) else value
+            self.writeLine("%s = []" % instances)
+            self.beginBlock("for i in xrange(count):")
+            if field.isList():
+                self.writeLine("instance, offset = %s" % ( self._snapshotListCall( listType(typeName), False ) % "data, offset" ))
+            else:
+                self.writeLine("instance, offset = load%s( data, offset )" % typeName)
+            self.writeLine("%s.append(instance)" % instances)
+            self.endBlock()
+            if self._isColumnar(field):
+                # Scalar records holding strings, whose rows do not have a fixed width
+                self.writeLine("%s = %s" % ( value, self._columnTableLiteral(typeName) ))
+                for rowField in self.classes[typeName][0]:
+                    self.writeLine("%s.%s.extend([ instance.%s for instance in instances ])" % (
+                        value, rowField.name(), rowField.name() ))
+
+    def generateLazyClass( self, className, lines ):
+        """ For generating the lazy subclass "LazyX" of the data class X and its structural parser
+        "scanX". The structural pass only reads the lines of an object, keeping the line and line
+        number, its span, of every line of primitive fields, and scans nested objects in turn. The
+        fields of a span are converted together by "convertX_field" when any of them is first read
+        through its LazyField, and cached in the slots of X. Conversion errors are raised then,
+        with the line number of the span. """
+        countFields = self._countFields(lines)
+        units = [ line for line in lines if self._isLazyUnit( line, countFields ) ]
+        local = self._localName
+
+        for line in units:
+            convertFunction = "convert%s_%s" % ( className, line.getField(0).name() )
+            if line.isRepeating():
                 field = line.getField(0)
-                # Wrap with try block
-                self._beginBlock("try")
-                # Initialize object and checker to ensure at least one repetition
-                writeLine("didRepeatOnce = false;")
-                writeLine("result." + field.name() + " = new " + self._getTypeName(field) + "();")
-                # Begin infinite loop
-                self._beginBlock("while (true)")
-                # Main handler
-                handleRepeatingLineForField(field)
-                writeLine("prevFilePos = getFilePointer(f);")
-                writeLine("prevLineNumber = lineNumber[0];")
-                writeLine("didRepeatOnce = true;")
-                # Check for newline
-                if (line.isSplitByNewline()):
-                    handleEmptyLine()
-                # End infinite loop and try block
-                self._endBlock()
-                self._endBlock()
-                # Catch any errors, either (1) reset line number and continue (2) error if did not repeat once
-                self._beginBlock("catch (Exception e)")
-                self._beginBlock("if (!didRepeatOnce)")
-                writeLine("throw new RuntimeException(\"Parser Error on line \" + lineNumber[0] +"
-                    + "\": Expecting at least 1 \\\"" + field.typeName()
-                    + "\\\" when parsing \\\"" + className + "." + field.name()
-                    + "\\\" (0 found).\");")
-                self._endBlock()
-                writeLine("seek(f, prevFilePos);")
-                writeLine("lineNumber[0] = prevLineNumber;")
-                self._endBlock()
+                self.beginBlock("def %s(spans):" % convertFunction)
+                self.writeLine("values = []")
+                self.beginBlock("for line, currentLineNumber in spans:")
+                self.generateLineConversion( className, line, "line" )
+                self.writeLine("values.append(%s)" % local(field.name()))
+                self.endBlock()
+                self.writeLine("return ( values, )")
+            else:
+                self.beginBlock("def %s(span):" % convertFunction)
+                self.writeLine("line, currentLineNumber = span")
+                self.generateLineConversion( className, line, "line" )
+                self.writeLine("return ( %s)" % "".join([ "%s, " % local(field.name()) for field in line ]))
+            self.endBlock()
+            self.writeNewline()
+
+        eagerFieldNames = [ field.name() for line in lines
+            if not line.isEmpty() and not self._isLazyUnit( line, countFields ) for field in line ]
+        self.beginBlock("class Lazy%s(%s.%s):" % ( className, CodeGenerator.DATA_FILE_NAME, className ))
+        self.writeLine("__slots__ = ( \"_spans\", )")
+        for spanIndex, line in enumerate(units):
+            fieldNames = [ field.name() for field in line ]
+            slots = "".join([ "%s.%s.%s, " % ( CodeGenerator.DATA_FILE_NAME, className, fieldName ) for fieldName in fieldNames ])
+            for position, fieldName in enumerate(fieldNames):
+                self.writeLine("%s = LazyField( ( %s), %d, %d, convert%s_%s )" % ( fieldName, slots, position,
+                    spanIndex, className, fieldNames[0] ))
+        self.writeNewline()
+        self.beginBlock("def __init__(%s):" % self._argumentList([ "self", "_spans" ] + eagerFieldNames))
+        self.writeLine("self._spans = _spans")
+        for fieldName in eagerFieldNames:
+            self.writeLine("self.%s = %s" % ( fieldName, fieldName ))
+        self.endBlock()
+        self.endBlock()
+        self.writeNewline()
+
+        self.generateClassParserFunction( className, lines, part = PythonGenerator.LAZY_PART )
+
+    def generateColumnAppendFunction( self, className, line ):
+        """ For generating the function "appendX" which parses one instance of the scalar record
+        class X and appends its fields to the columns of a ColumnTable instead of creating an
+        object. The fields are only appended once the whole line has been parsed, and the row is
+        dropped again should an int not fit in its column, so the columns stay aligned when the
+        line fails to parse. """
+        self.beginBlock("def append%s( inputFile, currentLineNumber, currentLinePos, columns ):" % className)
+        if line.numFields() == 1:
+            field = line.getField(0)
+            self.writeLine("values = ( %s( readline(inputFile, \"%s\"), currentLineNumber ), )" % \
+                ( self.typeNameToParseFuncName[field.typeName()], className ))
+        else:
+            self.writeLine("fields = readline(inputFile, \"%s\").split(DELIMITER)" % className)
+            self.beginBlock("if len(fields) != %d:" % line.numFields())
+            self.writeLine("raise ValueError('Parser Error on line %d: Expecting " + \
+                str(line.numFields()) + " fields (%d found).' % ( currentLineNumber, len(fields) ))")
+            self.endBlock()
+            # The parsers only run to report the field that failed to parse
+            self.beginBlock("try:")
+            self.writeLine("values = ( %s, )" % self._fieldConversions(line))
+            self.endBlock()
+            self.beginBlock("except ( ValueError, KeyError ) as e:")
+            self.writeLine("values = ( %s)" % "".join([ "%s( fields[%d], currentLineNumber ), " % \
+                ( self.typeNameToParseFuncName[field.typeName()], i ) for i, field in enumerate(line) ]))
+            self.endBlock()
+        hasIntColumns = any([ field.typeName() == StringConstants.INTEGER_TYPE for field in line ])
+        if hasIntColumns:
+            self.beginBlock("try:")
+        for i, field in enumerate(line):
+            self.writeLine("columns.%s.append(values[%d])" % ( field.name(), i ))
+        if hasIntColumns:
+            self.endBlock()
+            self.beginBlock("except OverflowError as e:")
+            self.writeLine("columns.dropPartialRow()")
+            self.writeLine("raise ValueError(\"Parser Error on line %d: Could not store an int of more than 64 bits.\" % currentLineNumber)")
+            self.endBlock()
+        self.writeLine("currentLineNumber += 1")
+        self.writeLine("currentLinePos = inputFile.mark()")
+        self.writeLine("return currentLineNumber, currentLinePos")
+        self.endBlock()
+        self.writeNewline()
+
+    def generateLineConversion( self, className, line, source ):
+        """ For generating the code converting the fields of a line of primitive fields into their
+        locals. The line is the value of the source expression and currentLineNumber its number. """
+        local = self._localName
+        # The case where there is only one primitve field that is not a list.
+        if line.numFields() == 1 and not line.getField(0).isList():
+            field = line.getField(0)
+            self.writeLine("%s = %s( %s, currentLineNumber )" % \
+                ( local(field.name()), self.typeNameToParseFuncName[field.typeName()], source ))
+        # The case where ther is only one list primitive field.
+        elif line.numFields() == 1:
+            field = line.getField(0)
+            listType = "list(%s)" % field.listType()
+            self.writeLine("fields = %s.split(DELIMITER)" % source)
+            self.writeLine("%s = %s( fields, currentLineNumber )" % ( local(field.name()), self.typeNameToParseFuncName[listType] ))
+        # The case where there is multiple fields on a line. The fields are all primitives.
+        else:
+            self.writeLine("fields = %s.split(DELIMITER)" % source)
+            # If the last field is not a list, then the number of fields should match exactly
+            if not line.getField(-1).isList():
+                self.beginBlock("if len(fields) != %d:" % line.numFields())
+                self.writeLine("raise ValueError('Parser Error on line %d: Expecting " + \
+                    str(line.numFields()) + " fields (%d found).' % ( currentLineNumber, len(fields) ))")
+                self.endBlock()
+            # Else there should be at least X fields on the line, where X is the number of fields
+            # on the line in the format file
+            else:
+                self.beginBlock("if len(fields) < %d:" % (line.numFields()))
+                self.writeLine("raise ValueError('Parser Error on line %d: Expecting " + \
+                    str(line.numFields()) + " fields (%d found).' % ( currentLineNumber, len(fields) ))")
+                self.endBlock()
+            # The fields are converted by a single expression, the parsers below only run to report
+            # the field that failed to parse.
+            self.beginBlock("try:")
+            self.writeLine("%s = %s" % ( ", ".join([ local(field.name()) for field in line ]), self._fieldConversions(line) ))
+            self.endBlock()
+            self.beginBlock("except ( ValueError, KeyError ) as e:")
+            for i, field in enumerate(line):
+                if field.isList():
+                    self.writeLine("%s = %s( fields[%d:], currentLineNumber )" % ( \
+                        local(field.name()), self.typeNameToParseFuncName[field.typeName()], i ))
+                else:
+                    self.writeLine("%s = %s( fields[%d], currentLineNumber )" % ( \
+                        local(field.name()), self.typeNameToParseFuncName[field.typeName()], i ))
+            self.endBlock()
+
+    def generateClassParserFunction( self, className, lines, isStreaming = False, part = None ):
+        """ For generating the helper functions for parsing a user defined class. The first argument
+        is the class name and the second argument is a list of FormatLine's.
+
+        If isStreaming is True, a generator named "iterparseX" is generated instead. Rather than
+        collecting repeated fields into lists, it yields a (fieldName, value) pair for every field
+        as soon as it has been parsed (once per instance for repeated fields), and it checks that
+        only empty lines follow once the class has been parsed.
+
+        If part is PREFIX_PART, "parseXPrefix" parses the given lines and returns their fields as a
+        tuple instead of an object. If part is RECORDS_PART, "parseXRecords" parses a chunk of the
+        instances of the single repeated line given, starting with the instance firstIndex and
+        parsing at most numRecords of them (all that follow if None). numRepetitions replaces the
+        number of repetitions of a counted line. It returns the instances of the chunk. If part is
+        INDEX_PART, "indexXRecords" parses all the instances of the single repeated line given like
+        a streaming parser, but yields the line number each instance starts on instead. """
+        # The name of the class parser should be "parseX" where X is the class name.
+        # The argument to the parser should be the LineCursor of the input file to be parsed, the
+        # current line number and the cursor position of the current line.
+        # If parsed successfully, the parser should return a X object, the new line number and position.
+        if isStreaming:
+            self.beginBlock("def iterparse%s( inputFile, currentLineNumber, currentLinePos ):" % className)
+        elif part == PythonGenerator.PREFIX_PART:
+            self.beginBlock("def parse%s%s( inputFile, currentLineNumber, currentLinePos ):" % ( className, part ))
+        elif part == PythonGenerator.RECORDS_PART:
+            self.beginBlock("def parse%s%s( inputFile, currentLineNumber, currentLinePos, firstIndex, numRecords, "
+                "numRepetitions ):" % ( className, part ))
+        elif part == PythonGenerator.INDEX_PART:
+            self.beginBlock("def index%sRecords( inputFile, currentLineNumber, currentLinePos, numRepetitions ):" % className)
+        elif part == PythonGenerator.LAZY_PART:
+            self.beginBlock("def scan%s( inputFile, currentLineNumber, currentLinePos ):" % className)
+        else:
+            # Lookahead signatures of the repetitions in this class
+            for line in lines:
+                if not line.isEmpty() and line.lookahead() is not None:
+                    self.writeLine("%s = %s" % ( self._signatureName( className, line.getField(0) ),
+                        self._signatureLiteral(line.lookahead()) ))
+            self.beginBlock("def parse%s( inputFile, currentLineNumber, currentLinePos ):" % className)
+        # The fields are parsed into locals and the object is constructed once all are parsed.
+        local = self._localName
+        # Whether instances are handed to the caller one by one instead of being collected
+        isYielding = isStreaming or part == PythonGenerator.INDEX_PART
+        # Whether only the structure is parsed, leaving the conversion of the fields to LazyField
+        isLazy = part == PythonGenerator.LAZY_PART
+        countFields = self._countFields(lines)
+
+        def handleParsedFields(line):
+            # Streaming parsers hand every non-repeated field to the caller as soon as it is parsed.
+            if isStreaming:
+                for field in line:
+                    self.writeLine("yield \"%s\", %s" % ( field.name(), local(field.name()) ))
+
+        def isColumnar(field):
+            return not isYielding and self._isColumnar(field)
+
+        def handleParsedInstance(field):
+            # Either collect the parsed instance or hand it to the caller right away. Columnar
+            # instances were already appended to their columns while being parsed.
+            if isStreaming:
+                self.writeLine("yield \"%s\", retObj" % field.name())
+                self.writeLine("numInstances += 1")
+            elif part == PythonGenerator.INDEX_PART:
+                self.writeLine("yield recordLineNumber")
+                self.writeLine("numInstances += 1")
+            elif isColumnar(field):
+                pass
             else:
-                raise Exception("This should never happen.")
+                self.writeLine("%s.append(retObj)" % local(field.name()))
+            # Nothing before an instance of the body is revisited, so the cursor may discard it.
+            if className == self.bodyTypeName:
+                self.writeLine("inputFile.release(currentLinePos)")
 
+        def handleRollback():
+            if self.options.instrument:
+                self.writeLine("countRollback(\"%s\")" % className)
 
-        self._beginBlock("public static " + className + " parse" + className + "(RandomAccessFile f, int[] lineNumber)")
-        generateSetup()
+        def handleEmptyLine():
+            self.comment("Parsing empty line")
+            self.writeLine("fields = readline(inputFile, \"%s\").split()" % className)
+            self.beginBlock("if len(fields) > 0:")
+            self.writeLine("raise ValueError(\"Parser Error on line %d: Should be an empty line.\"" + \
+                " % (currentLineNumber))")
+            self.endBlock()
+            self.writeLine("currentLineNumber += 1")
+            self.writeLine("currentLinePos = inputFile.mark()")
 
-        # Handle the three different cases, helpers are inner functions defined above
-        for line in lines:
+        def handleSimpleLine(line):
+            # The case where there is only one non-primitive field.
+            if line.numFields() == 1 and not line.getField(0).isPrimitive():
+                field = line.getField(0)
+                parseFunction = self.typeNameToParseFuncName[field.typeName()]
+                if isLazy:
+                    parseFunction = "scan%s" % field.typeName()
+                self.writeLine("%s, currentLineNumber, currentLinePos = %s( inputFile, currentLineNumber, currentLinePos )" % ( local(field.name()), parseFunction ))
+            # The lazy structural pass only keeps the line, converted on first access.
+            elif isLazy and self._isLazyUnit( line, countFields ):
+                self.writeLine("%s = ( readline(inputFile, \"%s\"), currentLineNumber )" % \
+                    ( self._spanName(line), className ))
+                self.writeLine("currentLineNumber += 1")
+                self.writeLine("currentLinePos = inputFile.mark()")
+            else:
+                self.generateLineConversion( className, line, "readline(inputFile, \"%s\")" % className )
+                self.writeLine("currentLineNumber += 1")
+                self.writeLine("currentLinePos = inputFile.mark()")
+            handleParsedFields(line)
+
+        def handleInstance( field, isScanned = False ):
+            # Parse one instance of a repeated field into retObj. Scanned instances are parsed by
+            # the lazy structural pass, primitives being kept as the span of their line.
+            if part == PythonGenerator.INDEX_PART:
+                self.writeLine("recordLineNumber = currentLineNumber")
+            if isScanned and not field.isPrimitive():
+                self.writeLine("retObj, currentLineNumber, currentLinePos = scan%s( inputFile, currentLineNumber, currentLinePos )" % field.typeName())
+            elif isScanned:
+                self.writeLine("retObj = ( readline(inputFile, \"%s\"), currentLineNumber )" % className)
+                self.writeLine("currentLineNumber += 1")
+                self.writeLine("currentLinePos = inputFile.mark()")
+            # Field is a scalar record stored in columns.
+            elif isColumnar(field):
+                self.writeLine("currentLineNumber, currentLinePos = append%s( inputFile, currentLineNumber, currentLinePos, %s )" % \
+                    ( field.typeName(), local(field.name()) ))
+            # Field is an user defined class.
+            elif not field.isPrimitive():
+                self.writeLine("retObj, currentLineNumber, currentLinePos = %s( inputFile, currentLineNumber, currentLinePos )" % self.typeNameToParseFuncName[field.typeName()])
+            # Field is a non-list primitive.
+            elif field.isPrimitive() and not field.isList():
+                self.writeLine("retObj = %s( readline(inputFile, \"%s\"), currentLineNumber )" % \
+                    (self.typeNameToParseFuncName[field.typeName()], className))
+                self.writeLine("currentLineNumber += 1")
+                self.writeLine("currentLinePos = inputFile.mark()")
+            # Field is a list primitive.
+            else:
+                listType = "list(%s)" % field.listType()
+                self.writeLine("fields = readline(inputFile, \"%s\").split(DELIMITER)" % className)
+                self.writeLine("retObj = %s( fields, currentLineNumber )" % \
+                    self.typeNameToParseFuncName[listType])
+                self.writeLine("currentLineNumber += 1")
+                self.writeLine("currentLinePos = inputFile.mark()")
+
+        def handleOneOrMoreCheck(line):
+            field = line.getField(0)
+            if isYielding:
+                self.beginBlock("if numInstances < 1:")
+            elif part == PythonGenerator.RECORDS_PART:
+                self.beginBlock("if firstIndex == 0 and len(%s) < 1:" % local(field.name()))
+            else:
+                self.beginBlock("if len(%s) < 1:" % local(field.name()))
+            self.writeLine("raise ValueError(\"Parser Error on line %d: Expecting at least 1 \\\"" + \
+                field.typeName() + "\\\" when parsing \\\"" + className + "." + field.name() + \
+                "\\\" (0 found).\" % currentLineNumber)")
+            self.endBlock()
+
+        def handleLookaheadRepeatingLine(line):
+            # Repeat while the upcoming lines look like the start of another instance. If every
+            # instance is a single line, the lookahead decides the repetition on its own. Otherwise
+            # the instance is still parsed on trial, but the repetition usually ends without an
+            # exception, once the lookahead fails.
+            field = line.getField(0)
+            isSeparated = "False"
+            if line.isSplitByNewline():
+                isSeparated = "isSeparated"
+                self.writeLine("isSeparated = False")
+            hasNextInstance = "hasNextInstance( inputFile, %s, %s )" % \
+                ( self._signatureName( className, field ), isSeparated )
+
+            if part == PythonGenerator.RECORDS_PART:
+                hasNextInstance = "( numRecords is None or len(%s) < numRecords ) and %s" % \
+                    ( local(field.name()), hasNextInstance )
+
+            if not line.isLookaheadDecisive():
+                self.beginBlock("try:")
+            self.beginBlock("while %s:" % hasNextInstance)
+            if not line.isLookaheadDecisive():
+                self.writeLine("prevLineNumber = currentLineNumber")
+                self.writeLine("prevLinePos = currentLinePos")
+            if line.isSplitByNewline():
+                self.beginBlock("if isSeparated:")
+                handleEmptyLine()
+                self.endBlock()
+            handleInstance( field, isLazy )
+            handleParsedInstance(field)
+            if line.isSplitByNewline():
+                self.writeLine("isSeparated = True")
+            self.endBlock()
+            if not line.isLookaheadDecisive():
+                self.endBlock()
+                self.beginBlock("except ( ValueError, EOFError ) as e:")
+                self.writeLine("currentLineNumber = prevLineNumber")
+                self.writeLine("currentLinePos = prevLinePos")
+                self.writeLine("inputFile.reset(currentLinePos)")
+                handleRollback()
+                self.endBlock()
+
+            if line.isOneOrMoreRepetition():
+                handleOneOrMoreCheck(line)
+
+        def handleRepeatingLine(line):
+            field = line.getField(0)
+            if isYielding:
+                self.writeLine("numInstances = 0")
+            elif isColumnar(field):
+                self.writeLine("%s = %s" % ( local(field.name()), self._columnTableLiteral(field.typeName()) ))
+            else:
+                self.writeLine("%s = []" % local(field.name()))
+
+            if line.lookahead() is not None:
+                handleLookaheadRepeatingLine(line)
+
+            elif line.isZeroOrMoreRepetition() or line.isOneOrMoreRepetition():
+                self.writeLine("prevLineNumber = currentLineNumber")
+                self.writeLine("prevLinePos = currentLinePos")
+                self.beginBlock("try:")
+                self.beginBlock("while True:")
+                handleInstance(field)
+                handleParsedInstance(field)
+                if line.isSplitByNewline():
+                    self.writeLine("prevLineNumber = currentLineNumber")
+                    self.writeLine("prevLinePos = currentLinePos")
+                    handleEmptyLine()
+                self.endBlock()
+                self.endBlock()
+
+                self.beginBlock("except ( ValueError, EOFError ) as e:")
+                if line.isOneOrMoreRepetition():
+                    handleOneOrMoreCheck(line)
+                if line.isSplitByNewline():
+                    self.writeLine("currentLineNumber = prevLineNumber")
+                    self.writeLine("currentLinePos = prevLinePos")
+                self.writeLine("inputFile.reset(currentLinePos)")
+                handleRollback()
+                self.endBlock()
+
+            elif line.isIntegerRepetition() or line.isVariableRepetition():
+                numRepetition = line.repetitionAmountString()
+                if line.isVariableRepetition():
+                    numRepetition = local(numRepetition)
+                if part in ( PythonGenerator.RECORDS_PART, PythonGenerator.INDEX_PART ):
+                    numRepetition = "numRepetitions"
+                indices = numRepetition
+                if part == PythonGenerator.RECORDS_PART:
+                    indices = "firstIndex, firstIndex + numRecords"
+
+                self.beginBlock("try:")
+                self.beginBlock("for _index in xrange(%s):" % indices)
+                handleInstance( field, isLazy )
+                handleParsedInstance(field)
+                if line.isSplitByNewline():
+                    self.beginBlock("if _index + 1 < %s:" % numRepetition)
+                    handleEmptyLine()
+                    self.endBlock()
+                self.endBlock()
+                self.endBlock()
+
+                self.beginBlock("except ValueError as e:")
+                self.writeLine("raise ValueError('Parser Error on line %d: Expecting exactly %d \\\"" + \
+                    field.typeName() + "\\\" when parsing \\\"" + className + "." + field.name() + \
+                    "\\\" (%d found)' % ( currentLineNumber, " + numRepetition + ", _index ))")
+                self.endBlock()
+
+        def handleLine(line):
             if line.isEmpty():
                 handleEmptyLine()
             elif line.isRepeating():
@@ -1182,735 +5700,949 @@ class JavaGenerator(CodeGenerator):
             else:
                 handleSimpleLine(line)
 
-        writeLine("return result;")
-        self._endBlock()
-        self.currentFile.writeNewline()
+        for line in lines:
+            handleLine(line)
+            self.writeNewline()
+
+        if isYielding:
+            self.writeLine("checkEndOfFile( inputFile, currentLineNumber )")
+        elif part == PythonGenerator.PREFIX_PART:
+            fieldNames = [ field.name() for line in lines for field in line ]
+            self.writeLine("return ( %s), currentLineNumber, currentLinePos" % \
+                "".join([ "%s, " % local(fieldName) for fieldName in fieldNames ]))
+        elif part == PythonGenerator.RECORDS_PART:
+            self.writeLine("return %s, currentLineNumber, currentLinePos" % local(lines[0].getField(0).name()))
+        elif isLazy:
+            spans = [ self._spanName(line) if not line.isRepeating() else local(line.getField(0).name())
+                for line in lines if self._isLazyUnit( line, countFields ) ]
+            eagerFieldNames = [ field.name() for line in lines
+                if not line.isEmpty() and not self._isLazyUnit( line, countFields ) for field in line ]
+            self.writeLine("return Lazy%s(%s), currentLineNumber, currentLinePos" % ( className,
+                self._argumentList([ "( %s)" % "".join([ "%s, " % span for span in spans ]) ] +
+                [ local(fieldName) for fieldName in eagerFieldNames ]) ))
+        else:
+            fieldNames = [ field.name() for line in lines for field in line ]
+            self.writeLine("return %s.%s(%s), currentLineNumber, currentLinePos" % ( CodeGenerator.DATA_FILE_NAME,
+                className, self._argumentList([ local(fieldName) for fieldName in fieldNames ]) ))
+        self.endBlock()
+        self.writeNewline()
+
+        # The wrapped parser replaces the original, so calls from the parsers of other classes are counted
+        if self.options.instrument and not isStreaming and part in ( None, PythonGenerator.LAZY_PART ):
+            parseFunction = "scan%s" % className if isLazy else "parse%s" % className
+            self.writeLine("%s = instrumented( \"%s\", %s )" % ( parseFunction, className, parseFunction ))
+            self.writeNewline()
 
     ################################################################################
     # Generate Main File
     ################################################################################
 
-    def generateMainFile(self):
-        """ Generate main file where the main function resides. """
-        self.currentFile = self.main
-        self.generateMainFileHeader()
-        self._beginBlock("public class " + splitext(basename(self.currentFile.filename))[0])
-        self.generateMainFunction()
-        self.generateInputParserFunction()
-        self._endBlock()
-
     def generateMainFileHeader(self):
         """ For generating the main file header, such as the import statements. """
-        # Import library headers
-        self.currentFile.writeLine("import java.io.RandomAccessFile;")
-        self.currentFile.writeLine("import java.io.FileNotFoundException;")
-        self.currentFile.writeLine("import java.io.IOException;")
-        self.currentFile.writeLine("import java.io.EOFException;")
-        self.currentFile.writeNewline()
-
-    def generateMainFunction(self):
-        """ For generating the empty main method that the user can fill in. """
-        self._beginBlock("public static void main(String[] args)")
-        self.currentFile.comment("Call " + CodeGenerator.PARSE_INPUT + "(filename) to parse the file of that name.")
-        self._endBlock()
-        self.currentFile.writeNewline()
+        self.writeLine("#!/usr/bin/env python")
+        self.writeNewline()
+        self.writeLine("import " + CodeGenerator.UTIL_FILE_NAME)
+        self.writeLine("import sys")
+        self.writeNewline()
 
     def generateInputParserFunction(self):
-        """ For generating the function to parse an input file. """
-        writeLine = self.currentFile.writeLine
-        # Begin function declaration
-        self._beginBlock("private static " + self.bodyTypeName
-            + " " + CodeGenerator.PARSE_INPUT + "(String filename)")
+        """ For generating the function to parse an input file, as well as the generator that
+        streams the fields of the body of an input file and, if the body ends in records, the
+        functions indexing them. """
+        if self.options.cache:
+            self.beginBlock("def %s( filename, workers = 1, cacheDir = %s.CACHE_DIR, maxCacheBytes = %s.CACHE_MAX_BYTES ):"
+                % ( CodeGenerator.PARSE_INPUT, CodeGenerator.UTIL_FILE_NAME, CodeGenerator.UTIL_FILE_NAME ))
+        else:
+            self.beginBlock("def %s( filename, workers = 1 ):" % CodeGenerator.PARSE_INPUT)
+        if self._parallelRecords() is not None:
+            self.comment("With more than one worker, the records of the body are parsed by a pool of that many")
+            self.comment("processes. Errors are reported by parsing the file again sequentially.")
+        else:
+            self.comment("The body of this format cannot be split into records, so workers is ignored.")
+        if self.options.cache:
+            self.comment("Unless cacheDir is None, a file whose content was parsed before is loaded from the cache")
+            self.comment("in cacheDir, which is otherwise given its body. The entries used least recently are removed")
+            self.comment("once they take more than maxCacheBytes.")
 
-        # Main try block
-        self._beginBlock("try")
-        # Initial setup
-        writeLine("RandomAccessFile f = new RandomAccessFile(filename, \"r\");")
-        writeLine("int[] lineNumber = {1};")
-        # Begin parsing
-        writeLine(self.bodyTypeName + " result = "
-            + CodeGenerator.UTIL_FILE_NAME + "." + self.typeNameToParseFuncName[self.bodyTypeName] + "(f, lineNumber);")
-        # Handle trailing newlines
-        writeLine("String line;")
-        self._beginBlock("while ((line = f.readLine()) != null)")
-        self._beginBlock("if (!line.equals(\"\"))")
-        writeLine("throw new RuntimeException(\"Parser Error on line \" + lineNumber[0] + \": Finished parsing but did not reach end of file.\");")
-        self._endBlock()
-        self._endBlock()
-        # Finish up
-        writeLine("f.close();")
-        writeLine("return result;")
-        self._endBlock()
+        self.beginBlock("try:")
+        if self.options.cache:
+            self.beginBlock("if cacheDir is not None:")
+            self.writeLine("return %s.parseCached( filename, cacheDir, maxCacheBytes," % CodeGenerator.UTIL_FILE_NAME)
+            self.writeLine("    lambda: %s( filename, workers, None ) )" % CodeGenerator.PARSE_INPUT)
+            self.endBlock()
+        if self._parallelRecords() is not None:
+            self.beginBlock("if workers > 1:")
+            self.writeLine("body = %s.parseInParallel( filename, workers )" % CodeGenerator.UTIL_FILE_NAME)
+            self.beginBlock("if body is not None:")
+            self.writeLine("return body")
+            self.endBlock()
+            self.endBlock()
+        # Open file
+        self.writeLine("inputFile = %s" % self._openInput())
+        self.generateParseBody()
+        self.endBlock()
+        self.generateParserErrorHandlers()
 
-        # Catch file not found
-        self._beginBlock("catch (FileNotFoundException e)")
-        writeLine("System.err.println(\"Input file '\" + filename + \"' not found.\");")
-        writeLine("System.exit(1);")
-        self._endBlock()
-        # Catch random IOExceptions
-        self._beginBlock("catch (IOException e)")
-        writeLine("System.err.println(\"Could not open \\\"\" + filename + \"\\\".\");")
-        self._endBlock()
-        # All other exception catches (EOF exception caught here)
-        self._beginBlock("catch (Exception e)")
-        writeLine("System.err.println(e.getMessage());")
-        writeLine("System.exit(1);")
-        self._endBlock()
+        self.endBlock()
+        self.writeNewline()
 
-        # Should never reach this line
-        writeLine("System.err.println(\"Unknown error occurred.\");")
-        writeLine("System.exit(1);")
-        writeLine("return null;")
+        # Inputs that are not files are read through the same cursors, which never seek
+        self.beginBlock("def %s(stream):" % CodeGenerator.PARSE_STREAM)
+        self.comment("Parses the input read from a file object, such as sys.stdin or a pipe, which does not")
+        self.comment("need to support seeking.")
+        self.beginBlock("try:")
+        self.writeLine("inputFile = %s.openStream(stream)" % CodeGenerator.UTIL_FILE_NAME)
+        self.generateParseBody()
+        self.endBlock()
+        self.generateParserErrorHandlers()
 
-        # End function declaration
-        self._endBlock()
+        self.endBlock()
+        self.writeNewline()
 
-    ################################################################################
-    # Helper Functions
-    ################################################################################
+        self.beginBlock("def %s(data):" % CodeGenerator.PARSE_BUFFER)
+        self.comment("Parses an input held in memory, as bytes or text.")
+        self.beginBlock("try:")
+        self.writeLine("inputFile = %s.openBuffer(data)" % CodeGenerator.UTIL_FILE_NAME)
+        self.generateParseBody()
+        self.endBlock()
+        self.generateParserErrorHandlers()
 
-    def _getBasicTypeName( self, typeName ):
-        if isInteger(typeName):
-            return "Integer"
-        if isFloat(typeName):
-            return "Float"
-        elif isString(typeName):
-            return "String"
-        elif isBool(typeName):
-            return "Boolean"
-        elif isList(typeName):
-            return "ArrayList<" + self._getBasicTypeName(listType(typeName)) + ">"
-        else:
-            return None
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def %s( filename ):" % CodeGenerator.ITERPARSE_INPUT)
+        self.comment("Yields a (fieldName, value) pair for every field of the body in file order, repeated")
+        self.comment("fields yielding one pair per instance as soon as it has been parsed.")
+
+        self.beginBlock("try:")
+        self.writeLine("inputFile = %s" % self._openInput())
+        # The consumer may stop early, which closes the generator at the yield
+        self.beginBlock("try:")
+        self.beginBlock("for fieldName, value in %s.iterparse%s( inputFile, 1, 0 ):"
+            % ( CodeGenerator.UTIL_FILE_NAME, self.bodyTypeName ))
+        self.writeLine("yield fieldName, value")
+        self.endBlock()
+        self.endBlock()
+        self.beginBlock("finally:")
+        self.writeLine("inputFile.close()")
+        self.endBlock()
+        self.endBlock()
+        self.generateParserErrorHandlers()
+
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def %s( body, filename ):" % CodeGenerator.DUMP_SNAPSHOT)
+        self.comment("Writes the body to a binary snapshot, which %s reads back without parsing any text. The" % CodeGenerator.LOAD_SNAPSHOT)
+        self.comment("snapshots of a format are read by its parsers in every language.")
+        self.beginBlock("try:")
+        self.writeLine("%s.writeSnapshot( body, filename )" % CodeGenerator.UTIL_FILE_NAME)
+        self.endBlock()
+        self.generateParserErrorHandlers()
+
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def %s(filename):" % CodeGenerator.LOAD_SNAPSHOT)
+        self.comment("Reads the body from a binary snapshot written by %s." % CodeGenerator.DUMP_SNAPSHOT)
+        self.beginBlock("try:")
+        self.writeLine("return %s.readSnapshot(filename)" % CodeGenerator.UTIL_FILE_NAME)
+        self.endBlock()
+        self.generateParserErrorHandlers()
+
+        self.endBlock()
+        self.writeNewline()
+
+        if self.options.instrument:
+            self.beginBlock("def dumpStats( filename = None ):")
+            self.comment("Prints the calls, lines, time, rollbacks and exceptions of the parser of each class as")
+            self.comment("JSON, or writes them to the file of the given name.")
+            self.writeLine("%s.dumpStats(filename)" % CodeGenerator.UTIL_FILE_NAME)
+            self.endBlock()
+            self.writeNewline()
+
+        if self._recordLine() is None:
+            return
+
+        self.beginBlock("def buildIndex( filename, indexFilename = None ):")
+        self.comment("Saves the byte offset of every record of the body to filename + \".idx\", unless another")
+        self.comment("index file is given, and returns the number of records.")
+        self.beginBlock("try:")
+        self.writeLine("return %s.buildIndex( filename, indexFilename )" % CodeGenerator.UTIL_FILE_NAME)
+        self.endBlock()
+        self.generateParserErrorHandlers()
+
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def getRecord( filename, index, indexFilename = None ):")
+        self.comment("Parses only the record of the given index, building the index first if it is missing or")
+        self.comment("the file has changed since.")
+        self.beginBlock("try:")
+        self.writeLine("return %s.getRecord( filename, index, indexFilename )" % CodeGenerator.UTIL_FILE_NAME)
+        self.endBlock()
+        self.generateParserErrorHandlers()
+
+        self.endBlock()
+        self.writeNewline()
+
+    def generateParseBody(self):
+        """ For generating the statements parsing the body from the cursor named inputFile and
+        returning it. """
+        # Parse file, only its structure in lazy mode
+        parseFunction = self.typeNameToParseFuncName[self.bodyTypeName]
+        if self.options.lazy:
+            parseFunction = "scan%s" % self.bodyTypeName
+        self.writeLine("body, lineNumber, linePos = %s.%s( inputFile, 1, 0 )"
+            % ( CodeGenerator.UTIL_FILE_NAME, parseFunction ))
+        # Handle trailing newlines
+        self.writeLine("%s.checkEndOfFile( inputFile, lineNumber )" % CodeGenerator.UTIL_FILE_NAME)
+        self.writeLine("return body")
 
+    def generateParserErrorHandlers(self):
+        """ For generating the except clauses shared by the functions that parse an input file. """
+        # Catch File IO errors
+        self.beginBlock("except IOError as e:")
+        self.writeLine("sys.stderr.write('Parser Error: Problem opening file, %s' % e)" )
+        self.writeLine("exit(1)")
+        self.endBlock()
+        # Catch parser errors
+        self.beginBlock("except ValueError as e:")
+        self.writeLine("sys.stderr.write(str(e) + \"\\n\")")
+        self.writeLine("exit(1)")
+        self.endBlock()
+        # Catch all other errors
+        self.beginBlock("except Exception as e:")
+        self.writeLine("sys.stderr.write('Parser Error: %s\\n' % e)")
+        self.writeLine("import traceback")
+        self.writeLine("traceback.print_exc()")
+        self.writeLine("exit(1)")
+        self.endBlock()
 
-    def _getTypeName( self, field ):
-        typeName = self._getBasicTypeName(field.typeName())
-        if typeName == None:
-            typeName = field.typeName()
+    def generateMainFunction(self):
+        """ For generating the empty main method that the user can fill in. """
+        self.beginBlock("if __name__ == '__main__':")
+        self.currentFile.comment("Call " + CodeGenerator.PARSE_INPUT + "(filename) to parse the file of that name.")
+        self.currentFile.comment("Call " + CodeGenerator.PARSE_STREAM + "(stream) or " + CodeGenerator.PARSE_BUFFER
+            + "(data) to parse a file object or an input held in memory.")
+        self.currentFile.comment("Call " + CodeGenerator.ITERPARSE_INPUT + "(filename) to stream the fields of its body instead.")
+        self.currentFile.comment("Call " + CodeGenerator.DUMP_SNAPSHOT + "(body, filename) to save a body as a binary snapshot, and "
+            + CodeGenerator.LOAD_SNAPSHOT + "(filename) to read it back.")
+        if self._recordLine() is not None:
+            self.currentFile.comment("Call getRecord(filename, index) to parse a single record of its body.")
+        if self.options.instrument:
+            self.currentFile.comment("Call dumpStats() to print the counters of the parser of each class.")
+        if self.options.cache:
+            self.currentFile.comment(CodeGenerator.PARSE_INPUT + "(filename) loads a file parsed before from the cache, unless given cacheDir = None.")
+        if not self.options.mmap:
+            self.currentFile.comment("Feed the blocks of an input to %s.PushParser to parse it as it arrives, or call" % \
+                CodeGenerator.UTIL_FILE_NAME)
+            self.currentFile.comment("%s.aparse(reader) under Python 3 to parse an asyncio stream." % \
+                PythonGenerator.ASYNC_FILE_NAME)
+        self.writeLine("pass")
+        self.endBlock()
 
-        if field.isRepeating():
-            return "ArrayList<" + typeName + ">"
-        else:
-            return typeName
 
-    def _beginBlock( self, line ):
-        self.currentFile.writeLine(line)
-        self.currentFile.writeLine("{")
-        self.currentFile.indent()
 
-    def _endBlock(self):
-        self.currentFile.dedent()
-        self.currentFile.writeLine("}")
+def cppgenStaticHelpers():
+    helpers = """
+static const std::string ws = " \\t\\n\\r\\f\\v";
 
+inline std::string rtrim(std::string s, std::string t = ws)
+{
+\ts.erase(s.find_last_not_of(t) + 1);
+\treturn s;
+}
 
-def pygenStaticHelpers():
-    helpers = """
-def readline(inputFile, className):
-\tline = inputFile.readline()
-\tif line == "":
-\t\traise ValueError("Parser Error: Reached end of file while parsing object \\"" + className + "\\".")
-\treturn line.strip()
+inline std::string ltrim(std::string s, std::string t = ws)
+{
+\ts.erase(0, s.find_first_not_of(t));
+\treturn s;
+}
 
-def intParse( s, currentLineNumber ):
-\ttry:
-\t\treturn int(s)
-\texcept ValueError as e:
-\t\traise ValueError("Parser Error on line %d: Could not parse \\\"%s\\\" as int." % ( currentLineNumber, s ))
+inline std::string trim(std::string s, std::string t = ws)
+{
+\treturn ltrim(rtrim(s, t), t);
+}
 
-def boolParse( s, currentLineNumber ):
-\tif s == "1" or s.lower() == "true":
-\t\treturn True
-\telif s == "0" or s.lower() == "false":
-\t\treturn False
-\traise ValueError("Parser Error on line %d: Could not parse \\\"%s\\\" as bool." % ( currentLineNumber, s ))
+std::vector<std::string> copyRange(std::vector<std::string> v, int begin, int end)
+{
+\tusing namespace std;
+\tvector<string>::const_iterator first = v.begin() + begin;
+\tvector<string>::const_iterator last = v.begin() + end;
+\treturn vector<string>(first, last);
+}
 
-def stringParse( s, currentLineNumber ):
-\treturn s
+std::vector<std::string> split(std::string s, std::string delim) {
+\tusing namespace std;
+\tvector<string> result;
 
-def floatParse( s, currentLineNumber ):
-\ttry:
-\t\treturn float(s)
-\texcept ValueError as e:
-\t\traise ValueError("Parser Error on line %d: Could not parse \\\"%s\\\" as float." % ( currentLineNumber, s ))
+\tsize_t delimLength = delim.length();
+\tsize_t start = 0, end = 0;
+\twhile ((end = s.find(delim, start)) != string::npos) {
+\t\tresult.push_back(s.substr(start, end - start));
+\t\tstart = end + delimLength;
+\t}
+\tresult.push_back(s.substr(start, s.length() - start));
 
-def intListParse( strings, currentLineNumber ):
-\tintList = []
-\tif len(strings) == 0:
-\t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
-\tfor s in strings:
-\t\tintList.append(intParse( s, currentLineNumber ))
-\treturn intList
+\treturn result;
+}
 
-def boolListParse( strings, currentLineNumber ):
-\tboolList = []
-\tif len(strings) == 0:
-\t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
-\tfor s in strings:
-\t\tboolList.append(boolParse( s, currentLineNumber ))
-\treturn boolList
+std::string lowercase(std::string &s)
+{
+\tusing namespace std;
+\tchar result[s.length() + 1];
+\tfor (unsigned int i = 0; i < s.length(); i++)
+\t{
+\t\tresult[i] = tolower(s[i]);
+\t}
+\tresult[s.length()] = '\0';
+\treturn string(result);
+}
 
-def stringListParse( strings, currentLineNumber ):
-\tstringList = []
-\tif len(strings) == 0:
-\t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
-\tfor s in strings:
-\t\tstringList.append(stringParse( s, currentLineNumber ))
-\treturn stringList
+int cppgenParseInt(std::string s, int& lineNumber)
+{
+\tusing namespace std;
+\tstringstream ss(s);
+\tint result;
+\tss >> result;
+\tif (!ss.eof() || ss.fail())
+\t{
+\t\tstringstream err;
+\t\terr << "Parser Error on line " << lineNumber << ": Could not parse \\"" << s << "\\" as int.";
+\t\tthrow invalid_argument(err.str());
+\t}
+\treturn result;
+}
 
-def floatListParse( strings, currentLineNumber ):
-\tfloatList = []
-\tif len(strings) == 0:
-\t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
-\tfor s in strings:
-\t\tfloatList.append(floatParse( s, currentLineNumber ))
-\treturn floatList
+bool cppgenParseBool(std::string s, int& lineNumber)
+{
+\tusing namespace std;
+\tif (s.compare("1") == 0 || lowercase(s).compare("true") == 0)
+\t{
+\t\treturn true;
+\t}
+\telse if (s.compare("0") == 0 || lowercase(s).compare("false") == 0)
+\t{
+\t\treturn false;
+\t}
 
+\tstringstream err;
+\terr << "Parser Error on line " << lineNumber << ": Could not parse \\"" << s << "\\" as bool.";
+\tthrow invalid_argument(err.str());
+}
 
-"""
-    helpers = helpers.replace( "intParse", CodeGenerator.PARSE_INT )
-    helpers = helpers.replace( "boolParse", CodeGenerator.PARSE_BOOL )
-    helpers = helpers.replace( "stringParse", CodeGenerator.PARSE_STRING )
-    helpers = helpers.replace( "floatParse", CodeGenerator.PARSE_FLOAT )
-    helpers = helpers.replace( "intListParse", CodeGenerator.PARSE_INT_LIST )
-    helpers = helpers.replace( "boolListParse", CodeGenerator.PARSE_BOOL_LIST )
-    helpers = helpers.replace( "stringListParse", CodeGenerator.PARSE_STRING_LIST )
-    helpers = helpers.replace( "floatListParse", CodeGenerator.PARSE_FLOAT_LIST )
+std::string cppgenParseString(std::string s, int& lineNumber)
+{
+\treturn s;
+}
 
-    # Replace the tabs with the appropriate amount of indent spaces
-    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+float cppgenParseFloat(std::string s, int& lineNumber)
+{
+\tusing namespace std;
+\tstringstream ss(s);
+\tfloat result;
+\tss >> result;
+\tif (!ss.eof() || ss.fail())
+\t{
+\t\tstringstream err;
+\t\terr << "Parser Error on line " << lineNumber << ": Could not parse \\"" << s << "\\" as float.";
+\t\tthrow invalid_argument(err.str());
+\t}
+\treturn result;
+}
 
-    return helpers
+std::vector<int> cppgenParseIntList(std::vector<std::string> strings, int& lineNumber)
+{
+\tusing namespace std;
+\tif (strings.size() == 0)
+\t{
+\t\tstringstream err;
+\t\terr << "Parser Error on line " << lineNumber << ": Could not parse empty string as list.";
+\t\tthrow invalid_argument(err.str());
+\t}
+\tvector<int> resval;
+\tfor (unsigned int i = 0; i < strings.size(); i++)
+\t{
+\t\tresval.push_back(cppgenParseInt(strings[i], lineNumber));
+\t}
+\treturn resval;
+}
 
+std::vector<bool> cppgenParseBoolList(std::vector<std::string> strings, int& lineNumber)
+{
+\tusing namespace std;
+\tif (strings.size() == 0)
+\t{
+\t\tstringstream err;
+\t\terr << "Parser Error on line " << lineNumber << ": Could not parse empty string as list.";
+\t\tthrow invalid_argument(err.str());
+\t}
+\tvector<bool> resval;
+\tfor (unsigned int i = 0; i < strings.size(); i++)
+\t{
+\t\tresval.push_back(cppgenParseBool(strings[i], lineNumber));
+\t}
+\treturn resval;
+}
 
-class PythonGenerator(CodeGenerator):
+std::vector<std::string> cppgenParseStringList(std::vector<std::string> strings, int& lineNumber)
+{
+\tusing namespace std;
+\tif (strings.size() == 0)
+\t{
+\t\tstringstream err;
+\t\terr << "Parser Error on line " << lineNumber << ": Could not parse empty string as list.";
+\t\tthrow invalid_argument(err.str());
+\t}
+\tvector<string> resval;
+\tfor (unsigned int i = 0; i < strings.size(); i++)
+\t{
+\t\tresval.push_back(cppgenParseString(strings[i], lineNumber));
+\t}
+\treturn resval;
+}
 
-    def write( self, line ):
-        self.currentFile.write(line)
+std::vector<float> cppgenParseFloatList(std::vector<std::string> strings, int& lineNumber)
+{
+\tusing namespace std;
+\tif (strings.size() == 0)
+\t{
+\t\tstringstream err;
+\t\terr << "Parser Error on line " << lineNumber << ": Could not parse empty string as list.";
+\t\tthrow invalid_argument(err.str());
+\t}
+\tvector<float> resval;
+\tfor (unsigned int i = 0; i < strings.size(); i++)
+\t{
+\t\tresval.push_back(cppgenParseFloat(strings[i], lineNumber));
+\t}
+\treturn resval;
+}
 
-    def writeLine( self, line ):
-        self.currentFile.writeLine(line)
+class LineCursor
+{
+\t// Hands out the lines of an input stream, which need not support seeking. Positions are line
+\t// indices, and the lines from the most recently released position on are kept in a buffer so
+\t// that the parser can return to them. Lines before it are discarded.
+public:
+\tLineCursor(std::istream &input) : input(input), base(0), position(0), released(0) {}
 
-    def writeNewline(self):
-        self.currentFile.writeNewline()
+\tbool readLine(std::string &line)
+\t{
+\t\tif (!fill(position))
+\t\t\treturn false;
+\t\tline = lines[position - base];
+\t\tposition += 1;
+\t\treturn true;
+\t}
 
-    def comment( self, line ):
-        self.currentFile.comment(line)
+\tbool peekLine(size_t offset, std::string &line)
+\t{
+\t\tif (!fill(position + offset))
+\t\t\treturn false;
+\t\tline = lines[position + offset - base];
+\t\treturn true;
+\t}
 
-    def writeImportLine( self, line ):
-        self.currentFile.writeImportLine(line)
+\tsize_t mark() const
+\t{
+\t\treturn position;
+\t}
 
-    def beginBlock( self, line ):
-        self.writeLine(line)
-        self.currentFile.indent()
+\tvoid reset(size_t pos)
+\t{
+\t\tposition = pos;
+\t}
 
-    def endBlock(self):
-        self.currentFile.dedent()
+\tvoid release(size_t pos)
+\t{
+\t\treleased = pos;
+\t}
 
-    def initialize(self):
-        """ Perform additional initialization if required. """
-        InstaParseFile.commentString = "#"
-        self.main.setExtension("py")
-        self.util.setExtension("py")
-        self.data.setExtension("py")
+private:
+\t// Reads lines until there is one at the given position. Returns false at the end of the input.
+\tbool fill(size_t pos)
+\t{
+\t\tusing namespace std;
+\t\twhile (base < released && base < position && !lines.empty())
+\t\t{
+\t\t\tlines.pop_front();
+\t\t\tbase += 1;
+\t\t}
+\t\twhile (pos - base >= lines.size())
+\t\t{
+\t\t\tstring line;
+\t\t\tif (!getline(input, line))
+\t\t\t{
+\t\t\t\tif (input.bad())
+\t\t\t\t\tthrow runtime_error("IO Error: Unknown problem when reading input file.");
+\t\t\t\treturn false;
+\t\t\t}
+\t\t\tlines.push_back(line);
+\t\t}
+\t\treturn true;
+\t}
 
-    ################################################################################
-    # Generate Data File
-    ################################################################################
+\tstd::istream &input;
+\tstd::deque<std::string> lines;
+\t// The position of the first buffered line
+\tsize_t base;
+\tsize_t position;
+\tsize_t released;
+};
 
-    def generateDataFileHeader(self):
-        """ For generating the data file header, such as the import statements. """
-        self.writeLine("#!/usr/bin/env python")
-        self.writeNewline()
+std::string readLine(LineCursor &f, std::string className)
+{
+\tusing namespace std;
+\tstring result;
+\tif (!f.readLine(result))
+\t{
+\t\tstringstream err;
+\t\terr << "Parser Error: Reached end of file while parsing object \\"" << className << "\\".";
+\t\tthrow runtime_error(err.str());
+\t}
+\treturn result;
+}
 
-    def generateClass( self, className, fields ):
-        """ Helper function for generating the code segement defining a class (or the corresponding
-        data structure). The first argument is the class name and the second argument is a list of
-        fields (in order) of that class. """
-        self.beginBlock("class %s:" % className)
-        self.beginBlock("def __init__(self):")
-        # Initialize each field to be None
-        for f in fields:
-            self.writeLine("self.%s = None" % f.name())
-        self.endBlock()
-        self.endBlock()
-        self.writeNewline()
+void seek(LineCursor &f, size_t pos)
+{
+\tf.reset(pos);
+}
 
-    ################################################################################
-    # Generate Util File
-    ################################################################################
+size_t getFilePointer(LineCursor &f)
+{
+\treturn f.mark();
+}
 
-    def generateUtilFileHeader(self):
-        """ For generating the util file header, such as the import statements. """
-        self.writeLine("#!/usr/bin/env python")
-        self.writeNewline()
-        self.writeLine("import " + CodeGenerator.DATA_FILE_NAME)
+struct LineSignature
+{
+\tstd::vector<std::string> tokenTypes;
+\tstd::string listType;
+\tbool isSplit;
+};
 
-    def generateHelperFunctions(self):
-        """ For generating the helper functions that will be useful when parsing in the util file. """
-        helpers =  pygenStaticHelpers()
-        self.write(helpers)
-        self.writeNewline()
+LineSignature makeSignature(std::string tokenTypes, std::string listType, bool isSplit)
+{
+\tusing namespace std;
+\tLineSignature signature;
+\tstringstream ss(tokenTypes);
+\tstring tokenType;
+\twhile (ss >> tokenType)
+\t{
+\t\tsignature.tokenTypes.push_back(tokenType);
+\t}
+\tsignature.listType = listType;
+\tsignature.isSplit = isSplit;
+\treturn signature;
+}
 
-    def generateClassParserFunction( self, className, lines ):
-        """ For generating the helper functions for parsing a user defined class. The first argument
-        is the class name and the second argument is a list of FormatLine's. """
-        # The name of the class parser should be "parseX" where X is the class name.
-        # The argument to the parser should be the input file to be parsed ,the current
-        # line number and the position of the current line in the input file.
-        # If parsed successfully, the parser should return a X object, the new line number and position.
-        self.beginBlock("def parse%s( inputFile, currentLineNumber, currentLinePos ):" % className)
-        self.writeLine("userClass = %s.%s()" % ( CodeGenerator.DATA_FILE_NAME, className ))
-        self.writeNewline()
+bool tokenMatches(std::string token, std::string tokenType)
+{
+\tusing namespace std;
+\tstringstream ss(token);
+\tif (tokenType.compare("int") == 0)
+\t{
+\t\tint result;
+\t\tss >> result;
+\t\treturn ss.eof() && !ss.fail();
+\t}
+\telse if (tokenType.compare("float") == 0)
+\t{
+\t\tfloat result;
+\t\tss >> result;
+\t\treturn ss.eof() && !ss.fail();
+\t}
+\telse if (tokenType.compare("bool") == 0)
+\t{
+\t\treturn token.compare("1") == 0 || token.compare("0") == 0
+\t\t\t|| lowercase(token).compare("true") == 0 || lowercase(token).compare("false") == 0;
+\t}
+\treturn true;
+}
 
-        def handleEmptyLine():
-            self.comment("Parsing empty line")
-            self.writeLine("fields = readline(inputFile, \"%s\").split()" % className)
-            self.beginBlock("if len(fields) > 0:")
-            self.writeLine("raise ValueError(\"Parser Error on line %d: Should be an empty line.\"" + \
-                " % (currentLineNumber))")
-            self.endBlock()
-            self.writeLine("currentLineNumber += 1")
-            self.writeLine("currentLinePos = inputFile.tell()")
+bool lineMatches(std::string line, const LineSignature &signature)
+{
+\tusing namespace std;
+\tif (!signature.isSplit)
+\t{
+\t\tif (signature.tokenTypes.size() == 0)
+\t\t\treturn trim(line).compare("") == 0;
+\t\treturn tokenMatches(line, signature.tokenTypes[0]);
+\t}
+\tvector<string> tokens = split(line, DELIMITER);
+\tsize_t numTokenTypes = signature.tokenTypes.size();
+\tif (signature.listType.empty() ? tokens.size() != numTokenTypes : tokens.size() <= numTokenTypes)
+\t\treturn false;
+\tfor (size_t i = 0; i < tokens.size(); i++)
+\t{
+\t\tstring tokenType = i < numTokenTypes ? signature.tokenTypes[i] : signature.listType;
+\t\tif (!tokenMatches(tokens[i], tokenType))
+\t\t\treturn false;
+\t}
+\treturn true;
+}
 
-        def handleSimpleLine(line):
-            # The case where there is only one primitve field that is not a list.
-            if line.numFields() == 1 and line.getField(0).isPrimitive() and not line.getField(0).isList():
-                field = line.getField(0)
-                self.writeLine("userClass.%s = %s( readline(inputFile, \"%s\"), currentLineNumber )" % \
-                    ( field.name(), self.typeNameToParseFuncName[field.typeName()], className ))
-                self.writeLine("currentLineNumber += 1")
-                self.writeLine("currentLinePos = inputFile.tell()")
-            # The case where ther is only one list primitive field.
-            elif line.numFields() == 1 and line.getField(0).isPrimitive() and line.getField(0).isList():
-                field = line.getField(0)
-                listType = "list(%s)" % field.listType()
-                self.writeLine("fields = readline(inputFile, \"%s\").split('%s')" % (className, self.format.lineDelimiter()))
-                self.writeLine("userClass.%s = %s( fields, currentLineNumber )" % ( field.name(), self.typeNameToParseFuncName[listType] ))
-                self.writeLine("currentLineNumber += 1")
-                self.writeLine("currentLinePos = inputFile.tell()")
-            # The case where there is only one non-primitive field.
-            elif line.numFields() == 1 and not line.getField(0).isPrimitive():
-                field = line.getField(0)
-                self.writeLine("userClass.%s, currentLineNumber, currentLinePos = %s( inputFile, currentLineNumber, currentLinePos )" % ( field.name(), self.typeNameToParseFuncName[field.typeName()] ))
-            # The case where there is multiple fields on a line. The fields are all primitives.
-            else:
-                self.writeLine("fields = readline(inputFile, \"%s\").split('%s')" % (className, self.format.lineDelimiter()))
-                # If the last field is not a list, then the number of fields should match exactly
-                if not line.getField(-1).isList():
-                    self.beginBlock("if len(fields) != %d:" % line.numFields())
-                    self.writeLine("raise ValueError('Parser Error on line %d: Expecting " + \
-                        str(line.numFields()) + " fields (%d found).' % ( currentLineNumber, len(fields) ))")
-                    self.endBlock()
-                # Else there should be at least X fields on the line, where X is the number of fields
-                # on the line in the format file
-                else:
-                    self.beginBlock("if len(fields) < %d:" % (line.numFields()))
-                    self.writeLine("raise ValueError('Parser Error on line %d: Expecting " + \
-                        str(line.numFields()) + " fields (%d found).' % ( currentLineNumber, len(fields) ))")
-                    self.endBlock()
-                for i, field in enumerate(line):
-                    if field.isList():
-                        listType = "list(%s)" % field.listType()
-                        self.writeLine("userClass.%s = %s( fields[%d:], currentLineNumber )" % ( \
-                            field.name(), self.typeNameToParseFuncName[field.typeName()], i ))
-                    else:
-                        self.writeLine("userClass.%s = %s( fields[%d], currentLineNumber )" % ( \
-                            field.name(), self.typeNameToParseFuncName[field.typeName()], i ))
-                self.writeLine("currentLineNumber += 1")
-                self.writeLine("currentLinePos = inputFile.tell()")
+bool hasNextInstance(LineCursor &f, const LineSignature &signature, bool isSeparated)
+{
+\tusing namespace std;
+\tstring line;
+\tint offset = 0;
+\tif (isSeparated)
+\t{
+\t\tif (!f.peekLine(offset, line) || trim(line).compare("") != 0)
+\t\t\treturn false;
+\t\toffset += 1;
+\t}
+\treturn f.peekLine(offset, line) && lineMatches(line, signature);
+}
+"""
 
-        def handleRepeatingLine(line):
-            field = line.getField(0)
-            self.writeLine("userClass.%s = []" % field.name())
+    helpers = helpers.replace("cppgenParseIntList", CodeGenerator.PARSE_INT_LIST)
+    helpers = helpers.replace("cppgenParseBoolList", CodeGenerator.PARSE_BOOL_LIST)
+    helpers = helpers.replace("cppgenParseStringList", CodeGenerator.PARSE_STRING_LIST)
+    helpers = helpers.replace("cppgenParseFloatList", CodeGenerator.PARSE_FLOAT_LIST)
+    helpers = helpers.replace("cppgenParseInt", CodeGenerator.PARSE_INT)
+    helpers = helpers.replace("cppgenParseBool", CodeGenerator.PARSE_BOOL)
+    helpers = helpers.replace("cppgenParseString", CodeGenerator.PARSE_STRING)
+    helpers = helpers.replace("cppgenParseFloat", CodeGenerator.PARSE_FLOAT)
 
-            if line.isZeroOrMoreRepetition() or line.isOneOrMoreRepetition():
-                self.writeLine("prevLineNumber = currentLineNumber")
-                self.writeLine("prevLinePos = currentLinePos")
-                self.beginBlock("try:")
-                self.beginBlock("while True:")
-                # Field is an user defined class.
-                if not field.isPrimitive():
-                    self.writeLine("retObj, currentLineNumber, currentLinePos = %s( inputFile, currentLineNumber, currentLinePos )" % self.typeNameToParseFuncName[field.typeName()])
-                # Field is a non-list primitive.
-                elif field.isPrimitive() and not field.isList():
-                    self.writeLine("retObj = %s( readline(inputFile, \"%s\"), currentLineNumber )" % \
-                        (self.typeNameToParseFuncName[field.typeName()], className))
-                    self.writeLine("currentLineNumber += 1")
-                    self.writeLine("currentLinePos = inputFile.tell()")
-                # Field is a list primitive.
-                else:
-                    listType = "list(%s)" % field.listType()
-                    self.writeLine("fields = readline(inputFile, \"%s\").split(%s)" % (className, self.format.lineDelimiter()))
-                    self.writeLine("retObj = %s( fields, currentLineNumber )" % \
-                        self.typeNameToParseFuncName[listType])
-                    self.writeLine("currentLineNumber += 1")
-                    self.writeLine("currentLinePos = inputFile.tell()")
-                self.writeLine("userClass.%s.append(retObj)" % field.name())
-                if line.isSplitByNewline():
-                    self.writeLine("prevLineNumber = currentLineNumber")
-                    self.writeLine("prevLinePos = currentLinePos")
-                    handleEmptyLine()
-                self.endBlock()
-                self.endBlock()
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "    ", InstaParseFile.indentString )
 
-                self.beginBlock("except ( ValueError, EOFError ) as e:")
-                if line.isOneOrMoreRepetition():
-                    self.beginBlock("if len(userClass.%s) < 1:" % field.name())
-                    self.writeLine("raise ValueError(\"Parser Error on line %d: Expecting at least 1 \\\"" + \
-                        field.typeName() + "\\\" when parsing \\\"" + className + "." + field.name() + \
-                        "\\\" (0 found).\" % currentLineNumber)")
-                    self.endBlock()
-                if line.isSplitByNewline():
-                    self.writeLine("currentLineNumber = prevLineNumber")
-                    self.writeLine("currentLinePos = prevLinePos")
-                self.writeLine("inputFile.seek(currentLinePos)")
-                self.endBlock()
+    return helpers
 
-            elif line.isIntegerRepetition() or line.isVariableRepetition():
-                numRepetition = line.repetitionAmountString()
-                if line.isVariableRepetition():
-                    numRepetition = "userClass." + numRepetition
+def cppgenStatsHelpers():
+    """ The counters of the parser of each class, updated by the instrumented parsers, and
+    dumpStats, which reports them. """
+    helpers = """
+struct ParserStats
+{
+\t// The counters of the parser of a class. Lines only count those of successful calls. The
+\t// exclusive time leaves out the time spent in the instrumented parsers it called.
+\tstd::string className;
+\tlong calls;
+\tlong lines;
+\tdouble inclusiveSeconds;
+\tdouble exclusiveSeconds;
+\tlong rollbacks;
+\tlong exceptions;
+
+\tstatic std::vector<ParserStats*> &all()
+\t{
+\t\tstatic std::vector<ParserStats*> stats;
+\t\treturn stats;
+\t}
 
-                self.beginBlock("try:")
-                self.beginBlock("for _index in xrange(%s):" % numRepetition)
-                # Field is an user defined class.
-                if not field.isPrimitive():
-                    self.writeLine("retObj, currentLineNumber, currentLinePos = %s( inputFile, currentLineNumber, currentLinePos )" % self.typeNameToParseFuncName[field.typeName()])
-                # Field is a non-list primitive.
-                elif field.isPrimitive() and not field.isList():
-                    self.writeLine("retObj = %s( readline(inputFile, \"%s\"), currentLineNumber )" % \
-                        (self.typeNameToParseFuncName[field.typeName()], className))
-                    self.writeLine("currentLineNumber += 1")
-                    self.writeLine("currentLinePos = inputFile.tell()")
-                # Field is a list primitive.
-                else:
-                    listType = "list(%s)" % field.listType()
-                    self.writeLine("fields = readline(inputFile, \"%s\").split(%s)" % (className, self.format.lineDelimiter()))
-                    self.writeLine("retObj = %s( fields, currentLineNumber )" % \
-                        self.typeNameToParseFuncName[listType])
-                    self.writeLine("currentLineNumber += 1")
-                self.writeLine("userClass.%s.append(retObj)" % field.name())
-                if line.isSplitByNewline():
-                    self.beginBlock("if _index + 1 < %s:" % numRepetition)
-                    handleEmptyLine()
-                    self.endBlock()
-                self.endBlock()
-                self.endBlock()
+\t// The start of each call in progress and the time spent in the calls nested in it
+\tstatic std::vector<std::pair<std::chrono::steady_clock::time_point, double> > &callStack()
+\t{
+\t\tstatic std::vector<std::pair<std::chrono::steady_clock::time_point, double> > calls;
+\t\treturn calls;
+\t}
 
-                self.beginBlock("except ValueError as e:")
-                self.writeLine("raise ValueError('Parser Error on line %d: Expecting exactly %d \\\"" + \
-                    field.typeName() + "\\\" when parsing \\\"" + className + "." + field.name() + \
-                    "\\\" (%d found)' % ( currentLineNumber, " + numRepetition + ", _index ))")
-                self.endBlock()
+\tstatic ParserStats &get(const std::string &className)
+\t{
+\t\tstd::vector<ParserStats*> &stats = all();
+\t\tfor (size_t i = 0; i < stats.size(); i++)
+\t\t{
+\t\t\tif (stats[i]->className == className)
+\t\t\t\treturn *stats[i];
+\t\t}
+\t\tParserStats *classStats = new ParserStats();
+\t\tclassStats->className = className;
+\t\tclassStats->calls = 0;
+\t\tclassStats->lines = 0;
+\t\tclassStats->inclusiveSeconds = 0;
+\t\tclassStats->exclusiveSeconds = 0;
+\t\tclassStats->rollbacks = 0;
+\t\tclassStats->exceptions = 0;
+\t\tstats.push_back(classStats);
+\t\treturn *classStats;
+\t}
 
-        def handleLine(line):
-            if line.isEmpty():
-                handleEmptyLine()
-            elif line.isRepeating():
-                handleRepeatingLine(line)
-            else:
-                handleSimpleLine(line)
+\tvoid begin()
+\t{
+\t\tcalls += 1;
+\t\tcallStack().push_back(std::make_pair(std::chrono::steady_clock::now(), 0.0));
+\t}
 
-        for line in lines:
-            handleLine(line)
-            self.writeNewline()
+\tvoid end()
+\t{
+\t\tusing namespace std;
+\t\tpair<chrono::steady_clock::time_point, double> call = callStack().back();
+\t\tcallStack().pop_back();
+\t\tdouble elapsed = chrono::duration<double>(chrono::steady_clock::now() - call.first).count();
+\t\tinclusiveSeconds += elapsed;
+\t\texclusiveSeconds += elapsed - call.second;
+\t\tif (!callStack().empty())
+\t\t\tcallStack().back().second += elapsed;
+\t}
+};
 
-        self.writeLine("return userClass, currentLineNumber, currentLinePos")
-        self.endBlock()
-        self.writeNewline()
+// Prints the counters of each class as JSON, or writes them to the file of the given name.
+void dumpStats(const std::string &filename = "")
+{
+\tusing namespace std;
+\tvector<ParserStats*> &stats = ParserStats::all();
+\tostringstream json;
+\tjson << "{" << endl;
+\tfor (size_t i = 0; i < stats.size(); i++)
+\t{
+\t\tjson << "  \\"" << stats[i]->className << "\\": {\\"calls\\": " << stats[i]->calls
+\t\t\t<< ", \\"lines\\": " << stats[i]->lines
+\t\t\t<< ", \\"inclusiveSeconds\\": " << stats[i]->inclusiveSeconds
+\t\t\t<< ", \\"exclusiveSeconds\\": " << stats[i]->exclusiveSeconds
+\t\t\t<< ", \\"rollbacks\\": " << stats[i]->rollbacks
+\t\t\t<< ", \\"exceptions\\": " << stats[i]->exceptions << "}"
+\t\t\t<< (i + 1 < stats.size() ? "," : "") << endl;
+\t}
+\tjson << "}" << endl;
+\tif (filename.empty())
+\t{
+\t\tcout << json.str();
+\t\treturn;
+\t}
+\tofstream output(filename.c_str());
+\toutput << json.str();
+}
+"""
 
-    ################################################################################
-    # Generate Main File
-    ################################################################################
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "    ", InstaParseFile.indentString )
 
-    def generateMainFileHeader(self):
-        """ For generating the main file header, such as the import statements. """
-        self.writeLine("#!/usr/bin/env python")
-        self.writeNewline()
-        self.writeLine("import " + CodeGenerator.UTIL_FILE_NAME)
-        self.writeLine("import sys")
-        self.writeNewline()
+    return helpers
 
-    def generateInputParserFunction(self):
-        """ For generating the function to parse an input file. """
-        self.beginBlock("def %s( filename ):" % CodeGenerator.PARSE_INPUT)
+def cppgenSnapshotHelpers():
+    """ The helpers that write the primitive fields of the body to a binary snapshot and read them
+    back. Every field is written by an overload of writeValue and read by one of readValue, so
+    that the functions of each class only have to call them for each of its fields. """
+    helpers = """
+static const std::string SNAPSHOT_MAGIC = "%(magic)s";
 
-        self.beginBlock("try:")
-        # Open file
-        self.writeLine("inputFile = open(filename, 'r')")
-        # Parse file
-        self.writeLine("body, lineNumber, linePos = %s.%s( inputFile, 1, 0 )"
-            % ( CodeGenerator.UTIL_FILE_NAME, self.typeNameToParseFuncName[self.bodyTypeName] ))
-        # Handle trailing newlines
-        self.writeLine("line = inputFile.readline()")
-        self.beginBlock("while line != '':")
-        self.beginBlock("if line.strip() != '':")
-        self.writeLine("sys.stderr.write(\"Parser Error on line %d: Finished parsing but did not reach end of file.\" % lineNumber)")
-        self.writeLine("exit(1)")
-        self.endBlock()
-        self.writeLine("lineNumber += 1")
-        self.writeLine("line = inputFile.readline()")
-        self.endBlock()
+// Hands out the bytes of a snapshot held in memory, failing once it runs out of them.
+class SnapshotReader
+{
+public:
+\tSnapshotReader(const std::string &filename, const char *begin, const char *end)
+\t\t: filename(filename), position(begin), end(end)
+\t{
+\t}
 
-        self.writeLine("return body")
-        self.endBlock()
+\tconst char *read(size_t size)
+\t{
+\t\tif (size > remaining())
+\t\t\tthrow std::runtime_error("Parser Error: The binary snapshot " + filename + " is truncated.");
+\t\tconst char *start = position;
+\t\tposition += size;
+\t\treturn start;
+\t}
 
-        # Catch File IO errors
-        self.beginBlock("except IOError as e:")
-        self.writeLine("sys.stderr.write('Parser Error: Problem opening file, %s' % e)" )
-        self.writeLine("exit(1)")
-        self.endBlock()
-        # Catch parser errors
-        self.beginBlock("except ValueError as e:")
-        self.writeLine("sys.stderr.write(str(e) + \"\\n\")")
-        self.writeLine("exit(1)")
-        self.endBlock()
-        # Catch all other errors
-        self.beginBlock("except Exception as e:")
-        self.writeLine("sys.stderr.write('Parser Error: %s\\n' % e)")
-        self.writeLine("import traceback")
-        self.writeLine("traceback.print_exc()")
-        self.writeLine("exit(1)")
-        self.endBlock()
+\tsize_t remaining() const
+\t{
+\t\treturn end - position;
+\t}
 
-        self.endBlock()
-        self.writeNewline()
+\tconst std::string filename;
 
-    def generateMainFunction(self):
-        """ For generating the empty main method that the user can fill in. """
-        self.beginBlock("if __name__ == '__main__':")
-        self.currentFile.comment("Call " + CodeGenerator.PARSE_INPUT + "(filename) to parse the file of that name.")
-        self.writeLine("pass")
-        self.endBlock()
+private:
+\tconst char *position;
+\tconst char *end;
+};
 
+// Fields are little-endian whatever the byte order of the machine
+inline void encodeUInt64(uint64_t value, char *bytes)
+{
+\tfor (int i = 0; i < 8; i++)
+\t\tbytes[i] = (char)(value >> (8 * i));
+}
 
+inline uint64_t decodeUInt64(const char *bytes)
+{
+\tuint64_t value = 0;
+\tfor (int i = 7; i >= 0; i--)
+\t\tvalue = (value << 8) | (unsigned char)bytes[i];
+\treturn value;
+}
 
-def cppgenStaticHelpers():
-    helpers = """
-static const std::string ws = " \\t\\n\\r\\f\\v";
+inline void writeCount(std::ostream &out, size_t count)
+{
+\tif (count > 0xFFFFFFFFu)
+\t\tthrow std::runtime_error("Parser Error: Could not write a list of more than 4294967295 elements to a binary snapshot.");
+\tchar bytes[4];
+\tfor (int i = 0; i < 4; i++)
+\t\tbytes[i] = (char)(count >> (8 * i));
+\tout.write(bytes, 4);
+}
 
-inline std::string rtrim(std::string s, std::string t = ws)
+inline size_t readCount(SnapshotReader &in)
 {
-\ts.erase(s.find_last_not_of(t) + 1);
-\treturn s;
+\tconst char *bytes = in.read(4);
+\tuint32_t count = 0;
+\tfor (int i = 3; i >= 0; i--)
+\t\tcount = (count << 8) | (unsigned char)bytes[i];
+\treturn count;
 }
 
-inline std::string ltrim(std::string s, std::string t = ws)
+// Ints are written as 64 bits and floats as doubles, which the other languages parse them into
+inline int toInt(const SnapshotReader &in, uint64_t bits)
 {
-\ts.erase(0, s.find_first_not_of(t));
-\treturn s;
+\tint64_t value = (int64_t)bits;
+\tif (value < INT_MIN || value > INT_MAX)
+\t\tthrow std::runtime_error("Parser Error: An int of the binary snapshot " + in.filename + " does not fit in an int.");
+\treturn (int)value;
 }
 
-inline std::string trim(std::string s, std::string t = ws)
+inline float toFloat(uint64_t bits)
 {
-\treturn ltrim(rtrim(s, t), t);
+\tdouble value;
+\tmemcpy(&value, &bits, 8);
+\treturn (float)value;
 }
 
-std::vector<std::string> copyRange(std::vector<std::string> v, int begin, int end)
+inline uint64_t fromFloat(float value)
 {
-\tusing namespace std;
-\tvector<string>::const_iterator first = v.begin() + begin;
-\tvector<string>::const_iterator last = v.begin() + end;
-\treturn vector<string>(first, last);
+\tdouble wide = value;
+\tuint64_t bits;
+\tmemcpy(&bits, &wide, 8);
+\treturn bits;
 }
 
-std::vector<std::string> split(std::string s, std::string delim) {
-\tusing namespace std;
-\tvector<string> result;
+inline void writeValue(std::ostream &out, int value)
+{
+\tchar bytes[8];
+\tencodeUInt64((uint64_t)(int64_t)value, bytes);
+\tout.write(bytes, 8);
+}
 
-\tsize_t delimLength = delim.length();
-\tsize_t start = 0, end = 0;
-\twhile ((end = s.find(delim, start)) != string::npos) {
-\t\tresult.push_back(s.substr(start, end - start));
-\t\tstart = end + delimLength;
-\t}
-\tresult.push_back(s.substr(start, s.length() - start));
+inline void readValue(SnapshotReader &in, int &value)
+{
+\tvalue = toInt(in, decodeUInt64(in.read(8)));
+}
 
-\treturn result;
+inline void writeValue(std::ostream &out, float value)
+{
+\tchar bytes[8];
+\tencodeUInt64(fromFloat(value), bytes);
+\tout.write(bytes, 8);
 }
 
-std::string lowercase(std::string &s)
+inline void readValue(SnapshotReader &in, float &value)
 {
-\tusing namespace std;
-\tchar result[s.length() + 1];
-\tfor (unsigned int i = 0; i < s.length(); i++)
-\t{
-\t\tresult[i] = tolower(s[i]);
-\t}
-\tresult[s.length()] = '\0';
-\treturn string(result);
+\tvalue = toFloat(decodeUInt64(in.read(8)));
 }
 
-int cppgenParseInt(std::string s, int& lineNumber)
+inline void writeValue(std::ostream &out, bool value)
 {
-\tusing namespace std;
-\tstringstream ss(s);
-\tint result;
-\tss >> result;
-\tif (!ss.eof() || ss.fail())
-\t{
-\t\tstringstream err;
-\t\terr << "Parser Error on line " << lineNumber << ": Could not parse \\"" << s << "\\" as int.";
-\t\tthrow invalid_argument(err.str());
-\t}
-\treturn result;
+\tout.put(value ? 1 : 0);
 }
 
-bool cppgenParseBool(std::string s, int& lineNumber)
+inline void readValue(SnapshotReader &in, bool &value)
 {
-\tusing namespace std;
-\tif (s.compare("1") == 0 || lowercase(s).compare("true") == 0)
-\t{
-\t\treturn true;
-\t}
-\telse if (s.compare("0") == 0 || lowercase(s).compare("false") == 0)
-\t{
-\t\treturn false;
-\t}
+\tvalue = *in.read(1) != 0;
+}
 
-\tstringstream err;
-\terr << "Parser Error on line " << lineNumber << ": Could not parse \\"" << s << "\\" as bool.";
-\tthrow invalid_argument(err.str());
+inline void writeValue(std::ostream &out, const std::string &value)
+{
+\twriteCount(out, value.size());
+\tout.write(value.data(), value.size());
 }
 
-std::string cppgenParseString(std::string s, int& lineNumber)
+inline void readValue(SnapshotReader &in, std::string &value)
 {
-\treturn s;
+\tsize_t length = readCount(in);
+\tvalue.assign(in.read(length), length);
 }
 
-float cppgenParseFloat(std::string s, int& lineNumber)
+// Lists of numbers are encoded in one buffer and decoded from one range of the snapshot
+inline void writeValue(std::ostream &out, const std::vector<int> &values)
 {
-\tusing namespace std;
-\tstringstream ss(s);
-\tfloat result;
-\tss >> result;
-\tif (!ss.eof() || ss.fail())
-\t{
-\t\tstringstream err;
-\t\terr << "Parser Error on line " << lineNumber << ": Could not parse \\"" << s << "\\" as float.";
-\t\tthrow invalid_argument(err.str());
-\t}
-\treturn result;
+\twriteCount(out, values.size());
+\tstd::vector<char> bytes(values.size() * 8);
+\tfor (size_t i = 0; i < values.size(); i++)
+\t\tencodeUInt64((uint64_t)(int64_t)values[i], &bytes[i * 8]);
+\tif (!bytes.empty())
+\t\tout.write(&bytes[0], bytes.size());
 }
 
-std::vector<int> cppgenParseIntList(std::vector<std::string> strings, int& lineNumber)
+inline void readValue(SnapshotReader &in, std::vector<int> &values)
 {
-\tusing namespace std;
-\tif (strings.size() == 0)
-\t{
-\t\tstringstream err;
-\t\terr << "Parser Error on line " << lineNumber << ": Could not parse empty string as list.";
-\t\tthrow invalid_argument(err.str());
-\t}
-\tvector<int> resval;
-\tfor (unsigned int i = 0; i < strings.size(); i++)
-\t{
-\t\tresval.push_back(cppgenParseInt(strings[i], lineNumber));
-\t}
-\treturn resval;
+\tsize_t count = readCount(in);
+\tconst char *bytes = in.read(count * 8);
+\tvalues.resize(count);
+\tfor (size_t i = 0; i < count; i++)
+\t\tvalues[i] = toInt(in, decodeUInt64(bytes + i * 8));
 }
 
-std::vector<bool> cppgenParseBoolList(std::vector<std::string> strings, int& lineNumber)
+inline void writeValue(std::ostream &out, const std::vector<float> &values)
 {
-\tusing namespace std;
-\tif (strings.size() == 0)
-\t{
-\t\tstringstream err;
-\t\terr << "Parser Error on line " << lineNumber << ": Could not parse empty string as list.";
-\t\tthrow invalid_argument(err.str());
-\t}
-\tvector<bool> resval;
-\tfor (unsigned int i = 0; i < strings.size(); i++)
-\t{
-\t\tresval.push_back(cppgenParseBool(strings[i], lineNumber));
-\t}
-\treturn resval;
+\twriteCount(out, values.size());
+\tstd::vector<char> bytes(values.size() * 8);
+\tfor (size_t i = 0; i < values.size(); i++)
+\t\tencodeUInt64(fromFloat(values[i]), &bytes[i * 8]);
+\tif (!bytes.empty())
+\t\tout.write(&bytes[0], bytes.size());
 }
 
-std::vector<std::string> cppgenParseStringList(std::vector<std::string> strings, int& lineNumber)
+inline void readValue(SnapshotReader &in, std::vector<float> &values)
 {
-\tusing namespace std;
-\tif (strings.size() == 0)
-\t{
-\t\tstringstream err;
-\t\terr << "Parser Error on line " << lineNumber << ": Could not parse empty string as list.";
-\t\tthrow invalid_argument(err.str());
-\t}
-\tvector<string> resval;
-\tfor (unsigned int i = 0; i < strings.size(); i++)
-\t{
-\t\tresval.push_back(cppgenParseString(strings[i], lineNumber));
-\t}
-\treturn resval;
+\tsize_t count = readCount(in);
+\tconst char *bytes = in.read(count * 8);
+\tvalues.resize(count);
+\tfor (size_t i = 0; i < count; i++)
+\t\tvalues[i] = toFloat(decodeUInt64(bytes + i * 8));
 }
 
-std::vector<float> cppgenParseFloatList(std::vector<std::string> strings, int& lineNumber)
+inline void writeValue(std::ostream &out, const std::vector<bool> &values)
 {
-\tusing namespace std;
-\tif (strings.size() == 0)
-\t{
-\t\tstringstream err;
-\t\terr << "Parser Error on line " << lineNumber << ": Could not parse empty string as list.";
-\t\tthrow invalid_argument(err.str());
-\t}
-\tvector<float> resval;
-\tfor (unsigned int i = 0; i < strings.size(); i++)
-\t{
-\t\tresval.push_back(cppgenParseFloat(strings[i], lineNumber));
-\t}
-\treturn resval;
+\twriteCount(out, values.size());
+\tfor (size_t i = 0; i < values.size(); i++)
+\t\tout.put(values[i] ? 1 : 0);
 }
 
-std::string readLine(std::ifstream &f, std::string className)
+inline void readValue(SnapshotReader &in, std::vector<bool> &values)
 {
-\tusing namespace std;
-\tif (f.eof())
-\t{
-\t\tstringstream err;
-\t\terr << "Parser Error: Reached end of file while parsing object \\"" << className << "\\".";
-\t\tthrow runtime_error(err.str());
-\t}
-\tstring result;
-\tgetline(f, result);
-\tif (f.bad())
-\t{
-\t\tthrow runtime_error("IO Error: Unknown problem when reading input file.");
-\t}
-\treturn result;
+\tsize_t count = readCount(in);
+\tconst char *bytes = in.read(count);
+\tvalues.resize(count);
+\tfor (size_t i = 0; i < count; i++)
+\t\tvalues[i] = bytes[i] != 0;
 }
+"""
+    helpers = helpers % { "magic": CodeGenerator.SNAPSHOT_MAGIC }
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "    ", InstaParseFile.indentString )
+
+    return helpers
 
-void seek(std::ifstream &f, std::streampos pos)
+def cppgenSnapshotListHelpers():
+    """ The overloads writing and reading the other lists, of strings, lists and objects. They
+    must follow the declarations of the overloads of every class. """
+    helpers = """
+template <class T>
+void writeValue(std::ostream &out, const std::vector<T> &values)
 {
-\tusing namespace std;
-\tf.seekg(pos);
-\tif (f.bad())
-\t{
-\t\tthrow runtime_error("IO Error: Unknown problem when reading input file.");
-\t}
+\twriteCount(out, values.size());
+\tfor (size_t i = 0; i < values.size(); i++)
+\t\twriteValue(out, values[i]);
 }
 
-std::streampos getFilePointer(std::ifstream &f)
+template <class T>
+void readValue(SnapshotReader &in, std::vector<T> &values)
 {
-\tusing namespace std;
-\tstreampos pos = f.tellg();
-\tif (pos == -1)
+\tsize_t count = readCount(in);
+\tvalues.clear();
+\t// A count read from a corrupt snapshot must not reserve more than it can hold
+\tvalues.reserve(std::min(count, in.remaining()));
+\tfor (size_t i = 0; i < count; i++)
 \t{
-\t\tthrow runtime_error("IO Error: Unknown problem when reading input file.");
+\t\tvalues.resize(values.size() + 1);
+\t\treadValue(in, values.back());
 \t}
-\treturn pos;
 }
 """
 
-    helpers = helpers.replace("cppgenParseIntList", CodeGenerator.PARSE_INT_LIST)
-    helpers = helpers.replace("cppgenParseBoolList", CodeGenerator.PARSE_BOOL_LIST)
-    helpers = helpers.replace("cppgenParseStringList", CodeGenerator.PARSE_STRING_LIST)
-    helpers = helpers.replace("cppgenParseFloatList", CodeGenerator.PARSE_FLOAT_LIST)
-    helpers = helpers.replace("cppgenParseInt", CodeGenerator.PARSE_INT)
-    helpers = helpers.replace("cppgenParseBool", CodeGenerator.PARSE_BOOL)
-    helpers = helpers.replace("cppgenParseString", CodeGenerator.PARSE_STRING)
-    helpers = helpers.replace("cppgenParseFloat", CodeGenerator.PARSE_FLOAT)
-
     # Replace the tabs with the appropriate amount of indent spaces
     helpers = helpers.replace( "    ", InstaParseFile.indentString )
 
@@ -1972,6 +6704,7 @@ class CPPGenerator(CodeGenerator):
         self._beginBlock("namespace " + CodeGenerator.PARSER_NAME)
         self.generateHelperFunctions()
         self.generateClassParserFunctions()
+        self.generateClassSnapshotFunctions()
         self._endBlock()
         self.currentFile.writeLine("#endif")
 
@@ -1983,7 +6716,18 @@ class CPPGenerator(CodeGenerator):
         self.currentFile.writeLine("#include <string>")
         self.currentFile.writeLine("#include <cctype>")
         self.currentFile.writeLine("#include <stdexcept>")
+        self.currentFile.writeLine("#include <istream>")
+        self.currentFile.writeLine("#include <deque>")
+        self.currentFile.writeLine("#include <ostream>")
         self.currentFile.writeLine("#include <fstream>")
+        self.currentFile.writeLine("#include <algorithm>")
+        self.currentFile.writeLine("#include <climits>")
+        self.currentFile.writeLine("#include <cstring>")
+        self.currentFile.writeLine("#include <stdint.h>")
+        if self.options.instrument:
+            self.currentFile.writeLine("#include <chrono>")
+            self.currentFile.writeLine("#include <utility>")
+            self.currentFile.writeLine("#include <iostream>")
         self.currentFile.writeNewline()
 
         # Import data header
@@ -1991,9 +6735,87 @@ class CPPGenerator(CodeGenerator):
 
     def generateHelperFunctions(self):
         """ For generating the helper functions that will be useful when parsing in the util file. """
+        self.currentFile.writeLine("static const std::string DELIMITER = \"" + self.format.lineDelimiter() + "\";")
         # Static helpers for primitives
         helpers = cppgenStaticHelpers()
         map(lambda s: self.currentFile.writeLine(s), helpers.splitlines())
+        if self.options.instrument:
+            map(lambda s: self.currentFile.writeLine(s), cppgenStatsHelpers().splitlines())
+        self.currentFile.writeLine("// Tells the binary snapshots of formats of this layout apart from those of other formats")
+        self.currentFile.writeLine("static const std::string SCHEMA_HASH = \"%s\";" % self.schemaHash())
+        map(lambda s: self.currentFile.writeLine(s), cppgenSnapshotHelpers().splitlines())
+        self.currentFile.writeNewline()
+
+    def generateClassSnapshotFunctions(self):
+        """ For generating the overloads writing every user defined class to a binary snapshot and
+        reading it back, followed by the functions writing and reading the snapshot file of a body.
+        The overloads of the classes are declared first, as the list overloads call them. """
+        writeLine = self.currentFile.writeLine
+        for className in self.classes.keys():
+            writeLine("void writeValue(std::ostream &out, const %s &value);" % className)
+            writeLine("void readValue(SnapshotReader &in, %s &value);" % className)
+        map(lambda s: writeLine(s), cppgenSnapshotListHelpers().splitlines())
+        self.currentFile.writeNewline()
+        CodeGenerator.generateClassSnapshotFunctions(self)
+
+        self._beginBlock("void writeSnapshot(const %s &body, const std::string &filename)" % self.bodyTypeName)
+        writeLine("using namespace std;")
+        writeLine("ofstream out(filename.c_str(), ios_base::out | ios_base::binary);")
+        self._beginBlock("if (out.fail())")
+        writeLine("throw runtime_error(\"Could not open \\\"\" + filename + \"\\\".\");")
+        self._endBlock()
+        writeLine("out << SNAPSHOT_MAGIC << SCHEMA_HASH;")
+        writeLine("writeValue(out, body);")
+        writeLine("out.close();")
+        self._beginBlock("if (out.fail())")
+        writeLine("throw runtime_error(\"Could not write the binary snapshot \\\"\" + filename + \"\\\".\");")
+        self._endBlock()
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._beginBlock("%s readSnapshot(const std::string &filename)" % self.bodyTypeName)
+        writeLine("using namespace std;")
+        writeLine("ifstream input(filename.c_str(), ios_base::in | ios_base::binary);")
+        self._beginBlock("if (input.fail())")
+        writeLine("throw runtime_error(\"Could not open \\\"\" + filename + \"\\\".\");")
+        self._endBlock()
+        # Read the whole snapshot at once
+        writeLine("input.seekg(0, ios_base::end);")
+        writeLine("string data(input.tellg(), '\\0');")
+        writeLine("input.seekg(0, ios_base::beg);")
+        self._beginBlock("if (!data.empty())")
+        writeLine("input.read(&data[0], data.size());")
+        self._endBlock()
+        writeLine("string header = SNAPSHOT_MAGIC + SCHEMA_HASH;")
+        self._beginBlock("if (data.compare(0, SNAPSHOT_MAGIC.size(), SNAPSHOT_MAGIC) != 0)")
+        writeLine("throw runtime_error(\"Parser Error: \" + filename + \" is not a binary snapshot.\");")
+        self._endBlock()
+        self._beginBlock("if (data.compare(0, header.size(), header) != 0)")
+        writeLine("throw runtime_error(\"Parser Error: The binary snapshot \" + filename + \" was written for a format of another layout.\");")
+        self._endBlock()
+        writeLine("SnapshotReader in(filename, data.data() + header.size(), data.data() + data.size());")
+        writeLine("%s body;" % self.bodyTypeName)
+        writeLine("readValue(in, body);")
+        self._beginBlock("if (in.remaining() != 0)")
+        writeLine("throw runtime_error(\"Parser Error: The binary snapshot \" + filename + \" continues after its body.\");")
+        self._endBlock()
+        writeLine("return body;")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+    def generateClassSnapshotFunction( self, className, lines ):
+        """ For generating the overloads of writeValue and readValue for a user defined class, which
+        write and read each of its fields in turn. """
+        fields = [ field for line in lines if not line.isEmpty() for field in line ]
+        self._beginBlock("void writeValue(std::ostream &out, const %s &value)" % className)
+        for field in fields:
+            self.currentFile.writeLine("writeValue(out, value.%s);" % field.name())
+        self._endBlock()
+        self.currentFile.writeNewline()
+        self._beginBlock("void readValue(SnapshotReader &in, %s &value)" % className)
+        for field in fields:
+            self.currentFile.writeLine("readValue(in, value.%s);" % field.name())
+        self._endBlock()
         self.currentFile.writeNewline()
 
     def generateClassParserFunction( self, className, lines ):
@@ -2014,19 +6836,28 @@ class CPPGenerator(CodeGenerator):
             didSplit = False
             didRepeat = False
             didRepeatPlus = False
+            didSeparateLookahead = False
 
             for line in lines:
                 didRepeat = didRepeat or line.isRepeating()
                 didRepeatPlus = didRepeatPlus or  line.isOneOrMoreRepetition()
                 didSplit = didSplit or line.numFields() > 1 or (not line.isEmpty() and line.getField(0).isList())
+                didSeparateLookahead = didSeparateLookahead or ( not line.isEmpty() and
+                    line.lookahead() is not None and line.isSplitByNewline() )
 
             if didSplit:
                 writeLine("vector<string> fields;")
             if didRepeat:
-                writeLine("streampos prevFilePos = getFilePointer(f);")
+                writeLine("size_t prevFilePos = getFilePointer(f);")
                 writeLine("int prevLineNumber = lineNumber;")
             if didRepeatPlus:
                 writeLine("bool didRepeatOnce = false;")
+            if didSeparateLookahead:
+                writeLine("bool isSeparated;")
+
+        def handleRollback():
+            if self.options.instrument:
+                writeLine("STATS_" + className + ".rollbacks += 1;")
 
         def handleEmptyLine():
             # Handle the empty line case
@@ -2110,10 +6941,58 @@ class CPPGenerator(CodeGenerator):
                 # Field is a class, recurse
                 writeLine("result." + field.name() + ".push_back("
                     + self.typeNameToParseFuncName[field.typeName()] + "(f, lineNumber));")
+            # Nothing before an instance of the body is revisited, so the cursor may discard it.
+            if className == self.bodyTypeName:
+                writeLine("f.release(getFilePointer(f));")
+
+        def handleLookaheadRepeatingLine(line):
+            # Repeat while the upcoming lines look like the start of another instance. If every
+            # instance is a single line, the lookahead decides the repetition on its own, otherwise
+            # the instance is still parsed on trial once the lookahead passes.
+            field = line.getField(0)
+            isDecisive = line.isLookaheadDecisive()
+            isSeparated = "false"
+            if line.isSplitByNewline():
+                isSeparated = "isSeparated"
+                writeLine("isSeparated = false;")
+            if not isDecisive:
+                self._beginBlock("try")
+            self._beginBlock("while (hasNextInstance(f, " + self._signatureName( className, field ) + ", "
+                + isSeparated + "))")
+            if not isDecisive:
+                writeLine("prevFilePos = getFilePointer(f);")
+                writeLine("prevLineNumber = lineNumber;")
+            if line.isSplitByNewline():
+                self._beginBlock("if (isSeparated)")
+                handleEmptyLine()
+                self._endBlock()
+            handleRepeatingLineForField(field)
+            if line.isSplitByNewline():
+                writeLine("isSeparated = true;")
+            self._endBlock()
+            if not isDecisive:
+                self._endBlock()
+                # Catch any errors, reset line number and continue
+                self._beginBlock("catch (...)")
+                writeLine("seek(f, prevFilePos);")
+                handleRollback()
+                writeLine("lineNumber = prevLineNumber;")
+                self._endBlock()
+            if line.isOneOrMoreRepetition():
+                self._beginBlock("if (result." + field.name() + ".size() < 1)")
+                writeLine("stringstream err;")
+                writeLine("err << \"Parser Error on line \" << lineNumber << "
+                    + "\": Expecting at least 1 \\\"" + field.typeName()
+                    + "\\\" when parsing \\\"" + className + "." + field.name()
+                    + "\\\" (0 found).\";")
+                writeLine("throw invalid_argument(err.str());")
+                self._endBlock()
 
         def handleRepeatingLine(line):
             # Must be a primitive or class repeated
-            if line.isIntegerRepetition() or line.isVariableRepetition():
+            if line.lookahead() is not None:
+                handleLookaheadRepeatingLine(line)
+            elif line.isIntegerRepetition() or line.isVariableRepetition():
                 # Constant repetition amount
                 field = line.getField(0)
                 # Generate the repetition string
@@ -2168,6 +7047,7 @@ class CPPGenerator(CodeGenerator):
                 # Catch any errors, reset line number and continue
                 self._beginBlock("catch (...)")
                 writeLine("seek(f, prevFilePos);")
+                handleRollback()
                 writeLine("lineNumber = prevLineNumber;")
                 self._endBlock()
             elif line.isOneOrMoreRepetition:
@@ -2200,13 +7080,23 @@ class CPPGenerator(CodeGenerator):
                 writeLine("throw invalid_argument(err.str());")
                 self._endBlock()
                 writeLine("seek(f, prevFilePos);")
+                handleRollback()
                 writeLine("lineNumber = prevLineNumber;")
                 self._endBlock()
             else:
                 raise Exception("This should never happen.")
 
 
-        self._beginBlock(className + " parse" + className + "(std::ifstream& f, int& lineNumber)")
+        # Lookahead signatures of the repetitions in this class
+        for line in lines:
+            if not line.isEmpty() and line.lookahead() is not None:
+                writeLine("static const LineSignature " + self._signatureName( className, line.getField(0) )
+                    + " = " + self._signatureLiteral(line.lookahead()) + ";")
+        if self.options.instrument:
+            writeLine("static ParserStats &STATS_" + className + " = ParserStats::get(\"" + className + "\");")
+            self._beginBlock(className + " parse" + className + "Uninstrumented(LineCursor& f, int& lineNumber)")
+        else:
+            self._beginBlock(className + " parse" + className + "(LineCursor& f, int& lineNumber)")
         generateSetup()
 
         # Handle the three different cases, helpers are inner functions defined above
@@ -2222,6 +7112,31 @@ class CPPGenerator(CodeGenerator):
         self._endBlock()
         self.currentFile.writeNewline()
 
+        if self.options.instrument:
+            self.generateInstrumentedParserFunction(className)
+
+    def generateInstrumentedParserFunction( self, className ):
+        """ For generating the parser of a class that updates its counters around the call of
+        the uninstrumented parser. Lines are only counted for successful calls. """
+        writeLine = self.currentFile.writeLine
+        self._beginBlock(className + " parse" + className + "(LineCursor& f, int& lineNumber)")
+        # The line numbers advance once per field, so the lines are counted with the cursor
+        writeLine("size_t firstFilePos = getFilePointer(f);")
+        writeLine("STATS_" + className + ".begin();")
+        self._beginBlock("try")
+        writeLine(className + " result = parse" + className + "Uninstrumented(f, lineNumber);")
+        writeLine("STATS_" + className + ".end();")
+        writeLine("STATS_" + className + ".lines += getFilePointer(f) - firstFilePos;")
+        writeLine("return result;")
+        self._endBlock()
+        self._beginBlock("catch (...)")
+        writeLine("STATS_" + className + ".exceptions += 1;")
+        writeLine("STATS_" + className + ".end();")
+        writeLine("throw;")
+        self._endBlock()
+        self._endBlock()
+        self.currentFile.writeNewline()
+
     ################################################################################
     # Generate Main File
     ################################################################################
@@ -2241,6 +7156,7 @@ class CPPGenerator(CodeGenerator):
         self.currentFile.writeLine("#include <string>")
         self.currentFile.writeLine("#include <stdexcept>")
         self.currentFile.writeLine("#include <fstream>")
+        self.currentFile.writeLine("#include <sstream>")
         self.currentFile.writeLine("#include <iostream>")
         self.currentFile.writeNewline()
         # Import data and util headers
@@ -2250,38 +7166,64 @@ class CPPGenerator(CodeGenerator):
 
     def generateForwardDeclarations(self):
         self.currentFile.writeLine(self.bodyTypeName + " " + CodeGenerator.PARSE_INPUT + "(const std::string &filename);")
+        self.currentFile.writeLine(self.bodyTypeName + " " + CodeGenerator.PARSE_STREAM + "(std::istream &input);")
+        self.currentFile.writeLine(self.bodyTypeName + " " + CodeGenerator.PARSE_BUFFER + "(const std::string &data);")
+        self.currentFile.writeLine("void " + CodeGenerator.DUMP_SNAPSHOT + "(const " + self.bodyTypeName + " &body, const std::string &filename);")
+        self.currentFile.writeLine(self.bodyTypeName + " " + CodeGenerator.LOAD_SNAPSHOT + "(const std::string &filename);")
         self.currentFile.writeNewline()
 
     def generateMainFunction(self):
         """ For generating the empty main method that the user can fill in. """
         self._beginBlock("int main(int argc, char** argv)")
         self.currentFile.comment("Call " + CodeGenerator.PARSE_INPUT + "(filename) to parse the file of that name.")
+        self.currentFile.comment("Call " + CodeGenerator.PARSE_STREAM + "(input) to parse a stream such as std::cin, or "
+            + CodeGenerator.PARSE_BUFFER + "(data) to parse")
+        self.currentFile.comment("an input held in memory.")
+        self.currentFile.comment("Call " + CodeGenerator.DUMP_SNAPSHOT + "(body, filename) to save a body as a binary snapshot, and "
+            + CodeGenerator.LOAD_SNAPSHOT + "(filename) to read it back.")
+        if self.options.instrument:
+            self.currentFile.comment("Call " + CodeGenerator.PARSER_NAME
+                + "::dumpStats() to print the counters of the parser of each class.")
         self._endBlock()
         self.currentFile.writeNewline()
 
     def generateInputParserFunction(self):
-        """ For generating the function to parse an input file. """
+        """ For generating the functions to parse an input file, a stream and an input held in
+        memory. The stream is read through a LineCursor, so it does not need to support seeking. """
         writeLine = self.currentFile.writeLine
         # Begin function declaration
         self._beginBlock(self.bodyTypeName + " " + CodeGenerator.PARSE_INPUT + "(const std::string &filename)")
         writeLine("using namespace std;")
 
         # Open file
-        writeLine("ifstream f(filename.c_str(), ios_base::in);")
-        self._beginBlock("if (f.fail())")
+        writeLine("ifstream input(filename.c_str(), ios_base::in);")
+        self._beginBlock("if (input.fail())")
         writeLine("cerr << \"Could not open \\\"\" + filename + \"\\\".\" << endl;")
         writeLine("exit(1);")
         self._endBlock()
+        writeLine("return " + CodeGenerator.PARSE_STREAM + "(input);")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._beginBlock(self.bodyTypeName + " " + CodeGenerator.PARSE_BUFFER + "(const std::string &data)")
+        writeLine("std::istringstream input(data);")
+        writeLine("return " + CodeGenerator.PARSE_STREAM + "(input);")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._beginBlock(self.bodyTypeName + " " + CodeGenerator.PARSE_STREAM + "(std::istream &input)")
+        writeLine("using namespace std;")
 
         # Main try block
         self._beginBlock("try")
         # Initial setup
+        writeLine(CodeGenerator.PARSER_NAME + "::LineCursor f(input);")
         writeLine("int lineNumber = 1;")
         writeLine(self.bodyTypeName + " result = "
             + CodeGenerator.PARSER_NAME + "::" + self.typeNameToParseFuncName[self.bodyTypeName] + "(f, lineNumber);")
         # Handle trailing newlines
         writeLine("string line;")
-        self._beginBlock("while (getline(f, line))")
+        self._beginBlock("while (f.readLine(line))")
         self._beginBlock("if (!" + CodeGenerator.PARSER_NAME + "::trim(line).compare(\"\") == 0)")
         writeLine("stringstream err;");
         writeLine("err << \"Parser Error on line\" << lineNumber << \": Finished parsing but did not reach end of file.\";")
@@ -2313,6 +7255,29 @@ class CPPGenerator(CodeGenerator):
 
         # End function declaration
         self._endBlock()
+        self.currentFile.writeNewline()
+
+        # Binary snapshots, which are read back without parsing any text
+        self._beginBlock("void " + CodeGenerator.DUMP_SNAPSHOT + "(const " + self.bodyTypeName + " &body, const std::string &filename)")
+        self._beginBlock("try")
+        writeLine(CodeGenerator.PARSER_NAME + "::writeSnapshot(body, filename);")
+        self._endBlock()
+        self._beginBlock("catch (std::runtime_error& re)")
+        writeLine("std::cerr << re.what() << std::endl;")
+        writeLine("exit(1);")
+        self._endBlock()
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._beginBlock(self.bodyTypeName + " " + CodeGenerator.LOAD_SNAPSHOT + "(const std::string &filename)")
+        self._beginBlock("try")
+        writeLine("return " + CodeGenerator.PARSER_NAME + "::readSnapshot(filename);")
+        self._endBlock()
+        self._beginBlock("catch (std::runtime_error& re)")
+        writeLine("std::cerr << re.what() << std::endl;")
+        writeLine("exit(1);")
+        self._endBlock()
+        self._endBlock()
 
     ################################################################################
     # Helper Functions
@@ -2346,6 +7311,15 @@ class CPPGenerator(CodeGenerator):
         else:
             return typeName
 
+    def _signatureName( self, className, field ):
+        """ The name of the constant holding the lookahead signature of a repeated field. """
+        return "SIGNATURE_%s_%s" % ( className, field.name() )
+
+    def _signatureLiteral( self, signature ):
+        """ The expression constructing a LineSignature in the generated code. """
+        return "makeSignature(\"%s\", \"%s\", %s)" % ( " ".join(signature.tokenTypes()),
+            signature.listType() or "", "true" if signature.isSplit() else "false" )
+
     def _beginBlock( self, line ):
         self.currentFile.writeLine(line)
         self.currentFile.writeLine("{")
@@ -2368,6 +7342,28 @@ if __name__ == "__main__":
                    "Accepts 'python', 'java', or 'c++'." )
     optParser.add_option( "-o", "--output", action = "store", dest = "outputName", default = "out",
             help = "specifies the output file name" )
+    optParser.add_option( "--numpy", action = "store_true", dest = "numpy", default = False,
+            help = "converts list(int) and list(float) fields to NumPy arrays. Python only." )
+    optParser.add_option( "--columnar", action = "store_true", dest = "columnar", default = False,
+            help = "stores repeated objects made of a single line of scalar fields as one array per field. "
+                   "Python only." )
+    optParser.add_option( "--namedtuples", action = "store_true", dest = "namedtuples", default = False,
+            help = "generates read-only namedtuples instead of classes for the parsed objects. Python only." )
+    optParser.add_option( "--mmap", action = "store_true", dest = "mmap", default = False,
+            help = "reads the input file through a memory mapping, in Python as bytes, only decoding string "
+                   "fields. Python and Java." )
+    optParser.add_option( "--lazy", action = "store_true", dest = "lazy", default = False,
+            help = "only parses the structure of the input file, converting the fields of each object when "
+                   "they are first read. Python only." )
+    optParser.add_option( "--instrument", action = "store_true", dest = "instrument", default = False,
+            help = "counts the calls, lines, time, rollbacks and exceptions of the parser of each object, "
+                   "reported as JSON by dumpStats." )
+    optParser.add_option( "--cache", action = "store_true", dest = "cache", default = False,
+            help = "makes parse load the files it parsed before from a cache on disk, keyed by their content. "
+                   "Python only." )
+    optParser.add_option( "--primitives", action = "store_true", dest = "primitives", default = False,
+            help = "stores list and repeated int, float and bool fields in primitive arrays instead of "
+                   "ArrayLists of boxed values. Java only." )
     (options, args) = optParser.parse_args()
 
     # Clean up provided flags
@@ -2384,6 +7380,13 @@ if __name__ == "__main__":
             elif extension in [ "c", "cc", "cpp" ]:
                 options.language = "c++"
 
+    # Lazy objects cache their fields in the slots of mutable classes
+    if options.lazy and ( options.columnar or options.namedtuples ):
+        optParser.error("--lazy cannot be combined with --columnar or --namedtuples")
+    # Lazy objects hold the lines of the input they have yet to convert
+    if options.lazy and options.cache:
+        optParser.error("--lazy cannot be combined with --cache")
+
     # Check that a format file is provided
     if len(args) != 1:
         optParser.print_help()
@@ -2398,14 +7401,19 @@ if __name__ == "__main__":
     # Generate a format object from the object model
     formatObject = InstaParseFormat(parser.objectModel)
 
+    # Collect the flags that change the generated code
+    generatorOptions = GeneratorOptions( numpy = options.numpy, columnar = options.columnar,
+        namedtuples = options.namedtuples, mmap = options.mmap, lazy = options.lazy,
+        instrument = options.instrument, cache = options.cache, primitives = options.primitives )
+
     # Depending on output language, call the associated code generator
     generator = None
     if options.language == "python":
-        generator = PythonGenerator(options.outputName, formatObject)
+        generator = PythonGenerator( options.outputName, formatObject, generatorOptions )
     elif options.language == "java":
-        generator = JavaGenerator(options.outputName, formatObject)
+        generator = JavaGenerator( options.outputName, formatObject, generatorOptions )
     elif options.language == "c++":
-        generator = CPPGenerator(options.outputName, formatObject)
+        generator = CPPGenerator( options.outputName, formatObject, generatorOptions )
     else:
         print "language not supported."
         exit(1)
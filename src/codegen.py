@@ -1,5 +1,29 @@
 from util import InstaParseFile, StringConstants
 from os.path import dirname, basename, join
+import hashlib
+
+class GeneratorOptions:
+    """ Options changing the code a CodeGenerator produces. Every option defaults to off, which
+    generates the standard parser. Options that do not apply to a language are ignored by its
+    generator. """
+
+    def __init__( self, **kwargs ):
+        # Python only, convert list(int) and list(float) fields to NumPy arrays
+        self.numpy = kwargs.get( "numpy", False )
+        # Python only, store repeated scalar records as one typed column per field
+        self.columnar = kwargs.get( "columnar", False )
+        # Python only, generate namedtuples instead of slotted classes for read-only consumers
+        self.namedtuples = kwargs.get( "namedtuples", False )
+        # Python and Java, read the input file through a memory mapping
+        self.mmap = kwargs.get( "mmap", False )
+        # Python only, parse the structure of the input and convert fields on first access
+        self.lazy = kwargs.get( "lazy", False )
+        # Count the calls, lines, time, rollbacks and exceptions of the parser of each class
+        self.instrument = kwargs.get( "instrument", False )
+        # Python only, load the bodies of files parsed before from a cache on disk
+        self.cache = kwargs.get( "cache", False )
+        # Java only, store lists and repetitions of ints, floats and bools unboxed
+        self.primitives = kwargs.get( "primitives", False )
 
 class CodeGenerator:
     """ Base class for generating the parser code. Subclass this for every language supported by InstaParse. """
@@ -26,14 +50,24 @@ class CodeGenerator:
     PARSE_FLOAT_LIST = "parseFloatList"
     PARSE_NEWLINE = "parseNewline"
     PARSE_INPUT = "parse"
+    PARSE_STREAM = "parseStream"
+    PARSE_BUFFER = "parseBuffer"
+    ITERPARSE_INPUT = "iterparse"
+    STREAM_RECORDS = "streamRecords"
+    DUMP_SNAPSHOT = "dump"
+    LOAD_SNAPSHOT = "load"
 
-    def __init__( self, filename, format ):
+    # Starts every binary snapshot, followed by the schema hash
+    SNAPSHOT_MAGIC = "IPSNAP01"
+
+    def __init__( self, filename, format, options = None ):
         self.foldername = dirname(filename)
         self.filename = basename(filename)
         self.main = InstaParseFile(filename)
         self.util = InstaParseFile(join(self.foldername, CodeGenerator.UTIL_FILE_NAME))
         self.data = InstaParseFile(join(self.foldername, CodeGenerator.DATA_FILE_NAME))
         self.format = format
+        self.options = options if options is not None else GeneratorOptions()
         self.classes = format.classes()
         self.bodyTypeName = format.bodyTypeName()
         self.currentFile = None
@@ -104,6 +138,7 @@ class CodeGenerator:
         self.generateUtilFileHeader()
         self.generateHelperFunctions()
         self.generateClassParserFunctions()
+        self.generateClassSnapshotFunctions()
 
     def generateUtilFileHeader(self):
         """ For generating the util file header, such as the import statements. """
@@ -123,6 +158,65 @@ class CodeGenerator:
         is the class name and the second argument is a list of FormatLine's. """
         raise NotImplementedError
 
+    def generateClassSnapshotFunctions(self):
+        """ For generating the functions writing every user defined class to a binary snapshot and
+        reading it back. """
+        for className, lines in self.classes.items():
+            self.generateClassSnapshotFunction( className, lines )
+
+    def generateClassSnapshotFunction( self, className, lines ):
+        """ For generating the functions writing an instance of a user defined class to a binary
+        snapshot and reading it back. The first argument is the class name and the second argument
+        is a list of FormatLine's.
+
+        Every language writes the same layout, so that a snapshot written by one parser can be read
+        by the others. The fields are written in order, little-endian and unaligned: an int as 8
+        bytes, a float as an 8 byte double, a bool as 1 byte and a string as its 4 byte length
+        followed by its UTF-8 bytes. Lists and repeated fields are their 4 byte number of elements
+        followed by the elements, and objects are their fields. """
+        raise NotImplementedError
+
+    def _recordLine(self):
+        """ The last line of the body if it repeats a type, either a known number of times or with
+        a lookahead, so that its instances, called records, can be parsed on their own. """
+        lines = self.classes[self.bodyTypeName]
+        if len(lines) == 0 or lines[-1].isEmpty() or not lines[-1].isRepeating():
+            return None
+        line = lines[-1]
+        if line.lookahead() is None and not ( line.isIntegerRepetition() or line.isVariableRepetition() ):
+            return None
+        return line
+
+    def _parallelRecords(self):
+        """ Find how the body can be split into chunks parsed in parallel. The body qualifies if it
+        ends in records, see _recordLine, that can be found without parsing them. Either every
+        record has the same number of lines, or records never contain empty lines and are
+        separated by one.
+
+        Returns the repeated line and the number of lines from one record to the next, which is
+        None for records found by their separating empty lines, or None if the body does not
+        qualify. """
+        line = self._recordLine()
+        if line is None:
+            return None
+        typeName = line.getField(0).typeName()
+        numLines = self.format.fixedLineCount(typeName)
+        if numLines is not None and numLines > 0:
+            return line, numLines + ( 1 if line.isSplitByNewline() else 0 )
+        if line.isSplitByNewline() and not self.format.containsEmptyLines(typeName):
+            return line, None
+        return None
+
+    def schemaHash(self):
+        """ The hex SHA-1 of the classes and fields of the format, which decide the layout of its
+        binary snapshots. It follows the magic number at the start of every snapshot, so that a
+        snapshot is only read by the parsers of formats of the same layout. """
+        description = [ self.bodyTypeName ]
+        for className in sorted(self.classes.keys()):
+            lines = self.classes[className]
+            description.append("%s: %s" % ( className, " | ".join([ str(line).strip() for line in lines ]) ))
+        return hashlib.sha1("\n".join(description)).hexdigest()
+
     ################################################################################
     # Generate Main File
     ################################################################################
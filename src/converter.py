@@ -18,6 +18,13 @@ class InstaParseFormat:
         for className in self._userClasses:
             self._classes[className] = _generateFormatLines( className, self._userClasses )
         self._bodyTypeName = self._model.body.typeName
+        # Repetitions that repeat until an instance fails to parse are given a lookahead check.
+        for lines in self._classes.values():
+            for line in lines:
+                if line.isZeroOrMoreRepetition() or line.isOneOrMoreRepetition():
+                    typeName = line.getField(0).typeName()
+                    line._lookahead = self._firstLineSignature(typeName)
+                    line._isLookaheadDecisive = line._lookahead is not None and self._isSingleLine(typeName)
 
     def lineDelimiter(self):
         return self._model.lineDelimiter
@@ -30,6 +37,131 @@ class InstaParseFormat:
     def bodyTypeName(self):
         return self._bodyTypeName
 
+    def isScalarRecord( self, typeName ):
+        """ Whether the given type is a user class made of exactly one line of non-list primitive
+        fields, so that all of its instances share the same fixed shape. """
+        if isPrimitive(typeName):
+            return False
+        lines = self._classes[typeName]
+        if len(lines) != 1 or lines[0].isEmpty() or lines[0].isRepeating():
+            return False
+        # Index the fields, leaving the line part way through a for loop would break its iteration
+        for i in range(lines[0].numFields()):
+            field = lines[0].getField(i)
+            if not field.isPrimitive() or field.isList():
+                return False
+        return True
+
+    def fixedLineCount( self, typeName ):
+        """ Return the number of lines every instance of the given type consists of, or None if
+        it depends on the input. """
+        if isPrimitive(typeName):
+            return 1
+        numLines = 0
+        for line in self._classes[typeName]:
+            if line.isEmpty():
+                numLines += 1
+                continue
+            field = line.getField(0)
+            if not line.isRepeating():
+                numLines += self.fixedLineCount(field.typeName()) if not field.isPrimitive() else 1
+                continue
+            if not line.isIntegerRepetition():
+                return None
+            instanceLines = self.fixedLineCount(field.typeName())
+            if instanceLines is None:
+                return None
+            numInstances = int(line.repetitionAmountString())
+            numLines += numInstances * instanceLines
+            if line.isSplitByNewline() and numInstances > 0:
+                numLines += numInstances - 1
+        return numLines
+
+    def containsEmptyLines( self, typeName ):
+        """ Whether an instance of the given type may contain an empty line, either from the
+        format or from separating repeated instances. """
+        if isPrimitive(typeName):
+            return False
+        for line in self._classes[typeName]:
+            if line.isEmpty():
+                return True
+            field = line.getField(0)
+            if line.isRepeating() and line.isSplitByNewline():
+                return True
+            if not field.isPrimitive() and self.containsEmptyLines(field.typeName()):
+                return True
+        return False
+
+    def _firstLineSignature( self, typeName ):
+        """ Return the LineSignature of the first line consumed when parsing an instance of the
+        given type, or None if it cannot be determined without parsing. """
+        if isPrimitive(typeName):
+            if isList(typeName):
+                return LineSignature( [], listType(typeName), True )
+            return LineSignature( [typeName], None, False )
+        lines = self._classes[typeName]
+        if len(lines) == 0:
+            return None
+        line = lines[0]
+        if line.isEmpty():
+            return LineSignature( [], None, False )
+        field = line.getField(0)
+        if line.isRepeating():
+            # Only repetitions that consume at least one instance have a known first line.
+            if line.isOneOrMoreRepetition() or ( line.isIntegerRepetition() and
+                    int(line.repetitionAmountString()) > 0 ):
+                return self._firstLineSignature(field.typeName())
+            return None
+        if line.numFields() == 1 and not field.isPrimitive():
+            return self._firstLineSignature(field.typeName())
+        if line.numFields() == 1 and not field.isList():
+            return LineSignature( [field.typeName()], None, False )
+        tokenTypes = [ f.typeName() for f in line if not f.isList() ]
+        return LineSignature( tokenTypes, line.getField(-1).listType(), True )
+
+    def _isSingleLine( self, typeName ):
+        """ Whether an instance of the given type always consists of exactly one non-empty line. """
+        if isPrimitive(typeName):
+            return True
+        lines = self._classes[typeName]
+        if len(lines) != 1 or lines[0].isEmpty() or lines[0].isRepeating():
+            return False
+        field = lines[0].getField(0)
+        return field.isPrimitive() or self._isSingleLine(field.typeName())
+
+class LineSignature:
+    """ The shape of the first line of an instance, used as a cheap lookahead check before parsing
+    an instance of a repetition. The line is either empty, a single token spanning the whole line,
+    or split by the delimiter into tokens of the given primitive types, optionally followed by one
+    or more tokens of a list type. """
+    def __init__( self, tokenTypes, listType, isSplit ):
+        self._tokenTypes = tokenTypes
+        self._listType = listType
+        self._isSplit = isSplit
+
+    def isEmptyLine(self):
+        return len(self._tokenTypes) == 0 and self._listType is None
+
+    def tokenTypes(self):
+        """ The primitive types of the leading tokens of the line, in order. """
+        return self._tokenTypes
+
+    def listType(self):
+        """ The primitive type of the trailing list tokens, or None if the line has no list. """
+        return self._listType
+
+    def isSplit(self):
+        """ Whether the line is split by the delimiter, rather than being a single token. """
+        return self._isSplit
+
+    def __str__(self):
+        if self.isEmptyLine():
+            return "<empty line>"
+        s = " ".join(self._tokenTypes)
+        if self._listType:
+            s += " %s..." % self._listType
+        return s
+
 class FormatField:
     def __init__( self, field, userClasses, parent=None ):
         self._field = field
@@ -52,6 +184,12 @@ class FormatField:
     def isRepeating(self):
         return self._instanceRepetitionModeString() != ""
 
+    def isCountedRepetition(self):
+        """ Whether the number of instances of this repeated field is known before they are
+        parsed, given either as an integer or by an earlier field. """
+        return self.isRepeating() and self._instanceRepetitionModeString() not in \
+            ( StringConstants.LINE_ZERO_OR_MORE, StringConstants.LINE_ONE_OR_MORE )
+
     def _instanceRepetitionModeString(self):
         mode = self._field.instanceRepetitionModeString
         try:
@@ -108,6 +246,9 @@ class FormatLine:
         self._repetitionString = fields[0]._instanceRepetitionModeString() if len(fields) == 1 else ""
         self._isSplitByNewline = fields[0]._shouldSeparateInstancesByAdditionalNewline() if \
             len(fields) == 1 else ""
+        # Set by InstaParseFormat for '*' and '+' repetitions
+        self._lookahead = None
+        self._isLookaheadDecisive = False
 
     def container(self):
         return self._container
@@ -149,6 +290,17 @@ class FormatLine:
     def isSplitByNewline(self):
         return self._isSplitByNewline
 
+    def lookahead(self):
+        """ The LineSignature that the first line of every instance of a '*' or '+' repetition
+        matches, or None if there is no such signature. """
+        return self._lookahead
+
+    def isLookaheadDecisive(self):
+        """ Whether an upcoming line matching the lookahead signature is enough to know that the
+        next instance of the repetition is present, i.e. every instance is a single line. When it
+        is not, the instance still has to be parsed on trial after the lookahead check passes. """
+        return self._isLookaheadDecisive
+
     def __iter__(self):
         return self
 
@@ -59,6 +59,7 @@ class CPPGenerator(CodeGenerator):
         self._beginBlock("namespace " + CodeGenerator.PARSER_NAME)
         self.generateHelperFunctions()
         self.generateClassParserFunctions()
+        self.generateClassSnapshotFunctions()
         self._endBlock()
         self.currentFile.writeLine("#endif")
 
@@ -70,7 +71,18 @@ class CPPGenerator(CodeGenerator):
         self.currentFile.writeLine("#include <string>")
         self.currentFile.writeLine("#include <cctype>")
         self.currentFile.writeLine("#include <stdexcept>")
+        self.currentFile.writeLine("#include <istream>")
+        self.currentFile.writeLine("#include <deque>")
+        self.currentFile.writeLine("#include <ostream>")
         self.currentFile.writeLine("#include <fstream>")
+        self.currentFile.writeLine("#include <algorithm>")
+        self.currentFile.writeLine("#include <climits>")
+        self.currentFile.writeLine("#include <cstring>")
+        self.currentFile.writeLine("#include <stdint.h>")
+        if self.options.instrument:
+            self.currentFile.writeLine("#include <chrono>")
+            self.currentFile.writeLine("#include <utility>")
+            self.currentFile.writeLine("#include <iostream>")
         self.currentFile.writeNewline()
 
         # Import data header
@@ -78,9 +90,87 @@ class CPPGenerator(CodeGenerator):
 
     def generateHelperFunctions(self):
         """ For generating the helper functions that will be useful when parsing in the util file. """
+        self.currentFile.writeLine("static const std::string DELIMITER = \"" + self.format.lineDelimiter() + "\";")
         # Static helpers for primitives
         helpers = cppgenStaticHelpers()
         map(lambda s: self.currentFile.writeLine(s), helpers.splitlines())
+        if self.options.instrument:
+            map(lambda s: self.currentFile.writeLine(s), cppgenStatsHelpers().splitlines())
+        self.currentFile.writeLine("// Tells the binary snapshots of formats of this layout apart from those of other formats")
+        self.currentFile.writeLine("static const std::string SCHEMA_HASH = \"%s\";" % self.schemaHash())
+        map(lambda s: self.currentFile.writeLine(s), cppgenSnapshotHelpers().splitlines())
+        self.currentFile.writeNewline()
+
+    def generateClassSnapshotFunctions(self):
+        """ For generating the overloads writing every user defined class to a binary snapshot and
+        reading it back, followed by the functions writing and reading the snapshot file of a body.
+        The overloads of the classes are declared first, as the list overloads call them. """
+        writeLine = self.currentFile.writeLine
+        for className in self.classes.keys():
+            writeLine("void writeValue(std::ostream &out, const %s &value);" % className)
+            writeLine("void readValue(SnapshotReader &in, %s &value);" % className)
+        map(lambda s: writeLine(s), cppgenSnapshotListHelpers().splitlines())
+        self.currentFile.writeNewline()
+        CodeGenerator.generateClassSnapshotFunctions(self)
+
+        self._beginBlock("void writeSnapshot(const %s &body, const std::string &filename)" % self.bodyTypeName)
+        writeLine("using namespace std;")
+        writeLine("ofstream out(filename.c_str(), ios_base::out | ios_base::binary);")
+        self._beginBlock("if (out.fail())")
+        writeLine("throw runtime_error(\"Could not open \\\"\" + filename + \"\\\".\");")
+        self._endBlock()
+        writeLine("out << SNAPSHOT_MAGIC << SCHEMA_HASH;")
+        writeLine("writeValue(out, body);")
+        writeLine("out.close();")
+        self._beginBlock("if (out.fail())")
+        writeLine("throw runtime_error(\"Could not write the binary snapshot \\\"\" + filename + \"\\\".\");")
+        self._endBlock()
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._beginBlock("%s readSnapshot(const std::string &filename)" % self.bodyTypeName)
+        writeLine("using namespace std;")
+        writeLine("ifstream input(filename.c_str(), ios_base::in | ios_base::binary);")
+        self._beginBlock("if (input.fail())")
+        writeLine("throw runtime_error(\"Could not open \\\"\" + filename + \"\\\".\");")
+        self._endBlock()
+        # Read the whole snapshot at once
+        writeLine("input.seekg(0, ios_base::end);")
+        writeLine("string data(input.tellg(), '\\0');")
+        writeLine("input.seekg(0, ios_base::beg);")
+        self._beginBlock("if (!data.empty())")
+        writeLine("input.read(&data[0], data.size());")
+        self._endBlock()
+        writeLine("string header = SNAPSHOT_MAGIC + SCHEMA_HASH;")
+        self._beginBlock("if (data.compare(0, SNAPSHOT_MAGIC.size(), SNAPSHOT_MAGIC) != 0)")
+        writeLine("throw runtime_error(\"Parser Error: \" + filename + \" is not a binary snapshot.\");")
+        self._endBlock()
+        self._beginBlock("if (data.compare(0, header.size(), header) != 0)")
+        writeLine("throw runtime_error(\"Parser Error: The binary snapshot \" + filename + \" was written for a format of another layout.\");")
+        self._endBlock()
+        writeLine("SnapshotReader in(filename, data.data() + header.size(), data.data() + data.size());")
+        writeLine("%s body;" % self.bodyTypeName)
+        writeLine("readValue(in, body);")
+        self._beginBlock("if (in.remaining() != 0)")
+        writeLine("throw runtime_error(\"Parser Error: The binary snapshot \" + filename + \" continues after its body.\");")
+        self._endBlock()
+        writeLine("return body;")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+    def generateClassSnapshotFunction( self, className, lines ):
+        """ For generating the overloads of writeValue and readValue for a user defined class, which
+        write and read each of its fields in turn. """
+        fields = [ field for line in lines if not line.isEmpty() for field in line ]
+        self._beginBlock("void writeValue(std::ostream &out, const %s &value)" % className)
+        for field in fields:
+            self.currentFile.writeLine("writeValue(out, value.%s);" % field.name())
+        self._endBlock()
+        self.currentFile.writeNewline()
+        self._beginBlock("void readValue(SnapshotReader &in, %s &value)" % className)
+        for field in fields:
+            self.currentFile.writeLine("readValue(in, value.%s);" % field.name())
+        self._endBlock()
         self.currentFile.writeNewline()
 
     def generateClassParserFunction( self, className, lines ):
@@ -101,19 +191,28 @@ class CPPGenerator(CodeGenerator):
             didSplit = False
             didRepeat = False
             didRepeatPlus = False
+            didSeparateLookahead = False
 
             for line in lines:
                 didRepeat = didRepeat or line.isRepeating()
                 didRepeatPlus = didRepeatPlus or  line.isOneOrMoreRepetition()
                 didSplit = didSplit or line.numFields() > 1 or (not line.isEmpty() and line.getField(0).isList())
+                didSeparateLookahead = didSeparateLookahead or ( not line.isEmpty() and
+                    line.lookahead() is not None and line.isSplitByNewline() )
 
             if didSplit:
                 writeLine("vector<string> fields;")
             if didRepeat:
-                writeLine("streampos prevFilePos = getFilePointer(f);")
+                writeLine("size_t prevFilePos = getFilePointer(f);")
                 writeLine("int prevLineNumber = lineNumber;")
             if didRepeatPlus:
                 writeLine("bool didRepeatOnce = false;")
+            if didSeparateLookahead:
+                writeLine("bool isSeparated;")
+
+        def handleRollback():
+            if self.options.instrument:
+                writeLine("STATS_" + className + ".rollbacks += 1;")
 
         def handleEmptyLine():
             # Handle the empty line case
@@ -197,10 +296,58 @@ class CPPGenerator(CodeGenerator):
                 # Field is a class, recurse
                 writeLine("result." + field.name() + ".push_back("
                     + self.typeNameToParseFuncName[field.typeName()] + "(f, lineNumber));")
+            # Nothing before an instance of the body is revisited, so the cursor may discard it.
+            if className == self.bodyTypeName:
+                writeLine("f.release(getFilePointer(f));")
+
+        def handleLookaheadRepeatingLine(line):
+            # Repeat while the upcoming lines look like the start of another instance. If every
+            # instance is a single line, the lookahead decides the repetition on its own, otherwise
+            # the instance is still parsed on trial once the lookahead passes.
+            field = line.getField(0)
+            isDecisive = line.isLookaheadDecisive()
+            isSeparated = "false"
+            if line.isSplitByNewline():
+                isSeparated = "isSeparated"
+                writeLine("isSeparated = false;")
+            if not isDecisive:
+                self._beginBlock("try")
+            self._beginBlock("while (hasNextInstance(f, " + self._signatureName( className, field ) + ", "
+                + isSeparated + "))")
+            if not isDecisive:
+                writeLine("prevFilePos = getFilePointer(f);")
+                writeLine("prevLineNumber = lineNumber;")
+            if line.isSplitByNewline():
+                self._beginBlock("if (isSeparated)")
+                handleEmptyLine()
+                self._endBlock()
+            handleRepeatingLineForField(field)
+            if line.isSplitByNewline():
+                writeLine("isSeparated = true;")
+            self._endBlock()
+            if not isDecisive:
+                self._endBlock()
+                # Catch any errors, reset line number and continue
+                self._beginBlock("catch (...)")
+                writeLine("seek(f, prevFilePos);")
+                handleRollback()
+                writeLine("lineNumber = prevLineNumber;")
+                self._endBlock()
+            if line.isOneOrMoreRepetition():
+                self._beginBlock("if (result." + field.name() + ".size() < 1)")
+                writeLine("stringstream err;")
+                writeLine("err << \"Parser Error on line \" << lineNumber << "
+                    + "\": Expecting at least 1 \\\"" + field.typeName()
+                    + "\\\" when parsing \\\"" + className + "." + field.name()
+                    + "\\\" (0 found).\";")
+                writeLine("throw invalid_argument(err.str());")
+                self._endBlock()
 
         def handleRepeatingLine(line):
             # Must be a primitive or class repeated
-            if line.isIntegerRepetition() or line.isVariableRepetition():
+            if line.lookahead() is not None:
+                handleLookaheadRepeatingLine(line)
+            elif line.isIntegerRepetition() or line.isVariableRepetition():
                 # Constant repetition amount
                 field = line.getField(0)
                 # Generate the repetition string
@@ -255,6 +402,7 @@ class CPPGenerator(CodeGenerator):
                 # Catch any errors, reset line number and continue
                 self._beginBlock("catch (...)")
                 writeLine("seek(f, prevFilePos);")
+                handleRollback()
                 writeLine("lineNumber = prevLineNumber;")
                 self._endBlock()
             elif line.isOneOrMoreRepetition:
@@ -287,13 +435,23 @@ class CPPGenerator(CodeGenerator):
                 writeLine("throw invalid_argument(err.str());")
                 self._endBlock()
                 writeLine("seek(f, prevFilePos);")
+                handleRollback()
                 writeLine("lineNumber = prevLineNumber;")
                 self._endBlock()
             else:
                 raise Exception("This should never happen.")
 
 
-        self._beginBlock(className + " parse" + className + "(std::ifstream& f, int& lineNumber)")
+        # Lookahead signatures of the repetitions in this class
+        for line in lines:
+            if not line.isEmpty() and line.lookahead() is not None:
+                writeLine("static const LineSignature " + self._signatureName( className, line.getField(0) )
+                    + " = " + self._signatureLiteral(line.lookahead()) + ";")
+        if self.options.instrument:
+            writeLine("static ParserStats &STATS_" + className + " = ParserStats::get(\"" + className + "\");")
+            self._beginBlock(className + " parse" + className + "Uninstrumented(LineCursor& f, int& lineNumber)")
+        else:
+            self._beginBlock(className + " parse" + className + "(LineCursor& f, int& lineNumber)")
         generateSetup()
 
         # Handle the three different cases, helpers are inner functions defined above
@@ -309,6 +467,31 @@ class CPPGenerator(CodeGenerator):
         self._endBlock()
         self.currentFile.writeNewline()
 
+        if self.options.instrument:
+            self.generateInstrumentedParserFunction(className)
+
+    def generateInstrumentedParserFunction( self, className ):
+        """ For generating the parser of a class that updates its counters around the call of
+        the uninstrumented parser. Lines are only counted for successful calls. """
+        writeLine = self.currentFile.writeLine
+        self._beginBlock(className + " parse" + className + "(LineCursor& f, int& lineNumber)")
+        # The line numbers advance once per field, so the lines are counted with the cursor
+        writeLine("size_t firstFilePos = getFilePointer(f);")
+        writeLine("STATS_" + className + ".begin();")
+        self._beginBlock("try")
+        writeLine(className + " result = parse" + className + "Uninstrumented(f, lineNumber);")
+        writeLine("STATS_" + className + ".end();")
+        writeLine("STATS_" + className + ".lines += getFilePointer(f) - firstFilePos;")
+        writeLine("return result;")
+        self._endBlock()
+        self._beginBlock("catch (...)")
+        writeLine("STATS_" + className + ".exceptions += 1;")
+        writeLine("STATS_" + className + ".end();")
+        writeLine("throw;")
+        self._endBlock()
+        self._endBlock()
+        self.currentFile.writeNewline()
+
     ################################################################################
     # Generate Main File
     ################################################################################
@@ -328,6 +511,7 @@ class CPPGenerator(CodeGenerator):
         self.currentFile.writeLine("#include <string>")
         self.currentFile.writeLine("#include <stdexcept>")
         self.currentFile.writeLine("#include <fstream>")
+        self.currentFile.writeLine("#include <sstream>")
         self.currentFile.writeLine("#include <iostream>")
         self.currentFile.writeNewline()
         # Import data and util headers
@@ -337,38 +521,64 @@ class CPPGenerator(CodeGenerator):
 
     def generateForwardDeclarations(self):
         self.currentFile.writeLine(self.bodyTypeName + " " + CodeGenerator.PARSE_INPUT + "(const std::string &filename);")
+        self.currentFile.writeLine(self.bodyTypeName + " " + CodeGenerator.PARSE_STREAM + "(std::istream &input);")
+        self.currentFile.writeLine(self.bodyTypeName + " " + CodeGenerator.PARSE_BUFFER + "(const std::string &data);")
+        self.currentFile.writeLine("void " + CodeGenerator.DUMP_SNAPSHOT + "(const " + self.bodyTypeName + " &body, const std::string &filename);")
+        self.currentFile.writeLine(self.bodyTypeName + " " + CodeGenerator.LOAD_SNAPSHOT + "(const std::string &filename);")
         self.currentFile.writeNewline()
 
     def generateMainFunction(self):
         """ For generating the empty main method that the user can fill in. """
         self._beginBlock("int main(int argc, char** argv)")
         self.currentFile.comment("Call " + CodeGenerator.PARSE_INPUT + "(filename) to parse the file of that name.")
+        self.currentFile.comment("Call " + CodeGenerator.PARSE_STREAM + "(input) to parse a stream such as std::cin, or "
+            + CodeGenerator.PARSE_BUFFER + "(data) to parse")
+        self.currentFile.comment("an input held in memory.")
+        self.currentFile.comment("Call " + CodeGenerator.DUMP_SNAPSHOT + "(body, filename) to save a body as a binary snapshot, and "
+            + CodeGenerator.LOAD_SNAPSHOT + "(filename) to read it back.")
+        if self.options.instrument:
+            self.currentFile.comment("Call " + CodeGenerator.PARSER_NAME
+                + "::dumpStats() to print the counters of the parser of each class.")
         self._endBlock()
         self.currentFile.writeNewline()
 
     def generateInputParserFunction(self):
-        """ For generating the function to parse an input file. """
+        """ For generating the functions to parse an input file, a stream and an input held in
+        memory. The stream is read through a LineCursor, so it does not need to support seeking. """
         writeLine = self.currentFile.writeLine
         # Begin function declaration
         self._beginBlock(self.bodyTypeName + " " + CodeGenerator.PARSE_INPUT + "(const std::string &filename)")
         writeLine("using namespace std;")
 
         # Open file
-        writeLine("ifstream f(filename.c_str(), ios_base::in);")
-        self._beginBlock("if (f.fail())")
+        writeLine("ifstream input(filename.c_str(), ios_base::in);")
+        self._beginBlock("if (input.fail())")
         writeLine("cerr << \"Could not open \\\"\" + filename + \"\\\".\" << endl;")
         writeLine("exit(1);")
         self._endBlock()
+        writeLine("return " + CodeGenerator.PARSE_STREAM + "(input);")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._beginBlock(self.bodyTypeName + " " + CodeGenerator.PARSE_BUFFER + "(const std::string &data)")
+        writeLine("std::istringstream input(data);")
+        writeLine("return " + CodeGenerator.PARSE_STREAM + "(input);")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._beginBlock(self.bodyTypeName + " " + CodeGenerator.PARSE_STREAM + "(std::istream &input)")
+        writeLine("using namespace std;")
 
         # Main try block
         self._beginBlock("try")
         # Initial setup
+        writeLine(CodeGenerator.PARSER_NAME + "::LineCursor f(input);")
         writeLine("int lineNumber = 1;")
         writeLine(self.bodyTypeName + " result = "
             + CodeGenerator.PARSER_NAME + "::" + self.typeNameToParseFuncName[self.bodyTypeName] + "(f, lineNumber);")
         # Handle trailing newlines
         writeLine("string line;")
-        self._beginBlock("while (getline(f, line))")
+        self._beginBlock("while (f.readLine(line))")
         self._beginBlock("if (!" + CodeGenerator.PARSER_NAME + "::trim(line).compare(\"\") == 0)")
         writeLine("stringstream err;");
         writeLine("err << \"Parser Error on line\" << lineNumber << \": Finished parsing but did not reach end of file.\";")
@@ -400,6 +610,29 @@ class CPPGenerator(CodeGenerator):
 
         # End function declaration
         self._endBlock()
+        self.currentFile.writeNewline()
+
+        # Binary snapshots, which are read back without parsing any text
+        self._beginBlock("void " + CodeGenerator.DUMP_SNAPSHOT + "(const " + self.bodyTypeName + " &body, const std::string &filename)")
+        self._beginBlock("try")
+        writeLine(CodeGenerator.PARSER_NAME + "::writeSnapshot(body, filename);")
+        self._endBlock()
+        self._beginBlock("catch (std::runtime_error& re)")
+        writeLine("std::cerr << re.what() << std::endl;")
+        writeLine("exit(1);")
+        self._endBlock()
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._beginBlock(self.bodyTypeName + " " + CodeGenerator.LOAD_SNAPSHOT + "(const std::string &filename)")
+        self._beginBlock("try")
+        writeLine("return " + CodeGenerator.PARSER_NAME + "::readSnapshot(filename);")
+        self._endBlock()
+        self._beginBlock("catch (std::runtime_error& re)")
+        writeLine("std::cerr << re.what() << std::endl;")
+        writeLine("exit(1);")
+        self._endBlock()
+        self._endBlock()
 
     ################################################################################
     # Helper Functions
@@ -433,6 +666,15 @@ class CPPGenerator(CodeGenerator):
         else:
             return typeName
 
+    def _signatureName( self, className, field ):
+        """ The name of the constant holding the lookahead signature of a repeated field. """
+        return "SIGNATURE_%s_%s" % ( className, field.name() )
+
+    def _signatureLiteral( self, signature ):
+        """ The expression constructing a LineSignature in the generated code. """
+        return "makeSignature(\"%s\", \"%s\", %s)" % ( " ".join(signature.tokenTypes()),
+            signature.listType() or "", "true" if signature.isSplit() else "false" )
+
     def _beginBlock( self, line ):
         self.currentFile.writeLine(line)
         self.currentFile.writeLine("{")
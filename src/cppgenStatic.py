@@ -177,43 +177,181 @@ std::vector<float> cppgenParseFloatList(std::vector<std::string> strings, int& l
 \treturn resval;
 }
 
-std::string readLine(std::ifstream &f, std::string className)
+class LineCursor
+{
+\t// Hands out the lines of an input stream, which need not support seeking. Positions are line
+\t// indices, and the lines from the most recently released position on are kept in a buffer so
+\t// that the parser can return to them. Lines before it are discarded.
+public:
+\tLineCursor(std::istream &input) : input(input), base(0), position(0), released(0) {}
+
+\tbool readLine(std::string &line)
+\t{
+\t\tif (!fill(position))
+\t\t\treturn false;
+\t\tline = lines[position - base];
+\t\tposition += 1;
+\t\treturn true;
+\t}
+
+\tbool peekLine(size_t offset, std::string &line)
+\t{
+\t\tif (!fill(position + offset))
+\t\t\treturn false;
+\t\tline = lines[position + offset - base];
+\t\treturn true;
+\t}
+
+\tsize_t mark() const
+\t{
+\t\treturn position;
+\t}
+
+\tvoid reset(size_t pos)
+\t{
+\t\tposition = pos;
+\t}
+
+\tvoid release(size_t pos)
+\t{
+\t\treleased = pos;
+\t}
+
+private:
+\t// Reads lines until there is one at the given position. Returns false at the end of the input.
+\tbool fill(size_t pos)
+\t{
+\t\tusing namespace std;
+\t\twhile (base < released && base < position && !lines.empty())
+\t\t{
+\t\t\tlines.pop_front();
+\t\t\tbase += 1;
+\t\t}
+\t\twhile (pos - base >= lines.size())
+\t\t{
+\t\t\tstring line;
+\t\t\tif (!getline(input, line))
+\t\t\t{
+\t\t\t\tif (input.bad())
+\t\t\t\t\tthrow runtime_error("IO Error: Unknown problem when reading input file.");
+\t\t\t\treturn false;
+\t\t\t}
+\t\t\tlines.push_back(line);
+\t\t}
+\t\treturn true;
+\t}
+
+\tstd::istream &input;
+\tstd::deque<std::string> lines;
+\t// The position of the first buffered line
+\tsize_t base;
+\tsize_t position;
+\tsize_t released;
+};
+
+std::string readLine(LineCursor &f, std::string className)
 {
 \tusing namespace std;
-\tif (f.eof())
+\tstring result;
+\tif (!f.readLine(result))
 \t{
 \t\tstringstream err;
 \t\terr << "Parser Error: Reached end of file while parsing object \\"" << className << "\\".";
 \t\tthrow runtime_error(err.str());
 \t}
-\tstring result;
-\tgetline(f, result);
-\tif (f.bad())
+\treturn result;
+}
+
+void seek(LineCursor &f, size_t pos)
+{
+\tf.reset(pos);
+}
+
+size_t getFilePointer(LineCursor &f)
+{
+\treturn f.mark();
+}
+
+struct LineSignature
+{
+\tstd::vector<std::string> tokenTypes;
+\tstd::string listType;
+\tbool isSplit;
+};
+
+LineSignature makeSignature(std::string tokenTypes, std::string listType, bool isSplit)
+{
+\tusing namespace std;
+\tLineSignature signature;
+\tstringstream ss(tokenTypes);
+\tstring tokenType;
+\twhile (ss >> tokenType)
 \t{
-\t\tthrow runtime_error("IO Error: Unknown problem when reading input file.");
+\t\tsignature.tokenTypes.push_back(tokenType);
 \t}
-\treturn result;
+\tsignature.listType = listType;
+\tsignature.isSplit = isSplit;
+\treturn signature;
+}
+
+bool tokenMatches(std::string token, std::string tokenType)
+{
+\tusing namespace std;
+\tstringstream ss(token);
+\tif (tokenType.compare("int") == 0)
+\t{
+\t\tint result;
+\t\tss >> result;
+\t\treturn ss.eof() && !ss.fail();
+\t}
+\telse if (tokenType.compare("float") == 0)
+\t{
+\t\tfloat result;
+\t\tss >> result;
+\t\treturn ss.eof() && !ss.fail();
+\t}
+\telse if (tokenType.compare("bool") == 0)
+\t{
+\t\treturn token.compare("1") == 0 || token.compare("0") == 0
+\t\t\t|| lowercase(token).compare("true") == 0 || lowercase(token).compare("false") == 0;
+\t}
+\treturn true;
 }
 
-void seek(std::ifstream &f, std::streampos pos)
+bool lineMatches(std::string line, const LineSignature &signature)
 {
 \tusing namespace std;
-\tf.seekg(pos);
-\tif (f.bad())
+\tif (!signature.isSplit)
+\t{
+\t\tif (signature.tokenTypes.size() == 0)
+\t\t\treturn trim(line).compare("") == 0;
+\t\treturn tokenMatches(line, signature.tokenTypes[0]);
+\t}
+\tvector<string> tokens = split(line, DELIMITER);
+\tsize_t numTokenTypes = signature.tokenTypes.size();
+\tif (signature.listType.empty() ? tokens.size() != numTokenTypes : tokens.size() <= numTokenTypes)
+\t\treturn false;
+\tfor (size_t i = 0; i < tokens.size(); i++)
 \t{
-\t\tthrow runtime_error("IO Error: Unknown problem when reading input file.");
+\t\tstring tokenType = i < numTokenTypes ? signature.tokenTypes[i] : signature.listType;
+\t\tif (!tokenMatches(tokens[i], tokenType))
+\t\t\treturn false;
 \t}
+\treturn true;
 }
 
-std::streampos getFilePointer(std::ifstream &f)
+bool hasNextInstance(LineCursor &f, const LineSignature &signature, bool isSeparated)
 {
 \tusing namespace std;
-\tstreampos pos = f.tellg();
-\tif (pos == -1)
+\tstring line;
+\tint offset = 0;
+\tif (isSeparated)
 \t{
-\t\tthrow runtime_error("IO Error: Unknown problem when reading input file.");
+\t\tif (!f.peekLine(offset, line) || trim(line).compare("") != 0)
+\t\t\treturn false;
+\t\toffset += 1;
 \t}
-\treturn pos;
+\treturn f.peekLine(offset, line) && lineMatches(line, signature);
 }
 """
 
@@ -230,3 +368,339 @@ std::streampos getFilePointer(std::ifstream &f)
     helpers = helpers.replace( "    ", InstaParseFile.indentString )
 
     return helpers
+
+def cppgenStatsHelpers():
+    """ The counters of the parser of each class, updated by the instrumented parsers, and
+    dumpStats, which reports them. """
+    helpers = """
+struct ParserStats
+{
+\t// The counters of the parser of a class. Lines only count those of successful calls. The
+\t// exclusive time leaves out the time spent in the instrumented parsers it called.
+\tstd::string className;
+\tlong calls;
+\tlong lines;
+\tdouble inclusiveSeconds;
+\tdouble exclusiveSeconds;
+\tlong rollbacks;
+\tlong exceptions;
+
+\tstatic std::vector<ParserStats*> &all()
+\t{
+\t\tstatic std::vector<ParserStats*> stats;
+\t\treturn stats;
+\t}
+
+\t// The start of each call in progress and the time spent in the calls nested in it
+\tstatic std::vector<std::pair<std::chrono::steady_clock::time_point, double> > &callStack()
+\t{
+\t\tstatic std::vector<std::pair<std::chrono::steady_clock::time_point, double> > calls;
+\t\treturn calls;
+\t}
+
+\tstatic ParserStats &get(const std::string &className)
+\t{
+\t\tstd::vector<ParserStats*> &stats = all();
+\t\tfor (size_t i = 0; i < stats.size(); i++)
+\t\t{
+\t\t\tif (stats[i]->className == className)
+\t\t\t\treturn *stats[i];
+\t\t}
+\t\tParserStats *classStats = new ParserStats();
+\t\tclassStats->className = className;
+\t\tclassStats->calls = 0;
+\t\tclassStats->lines = 0;
+\t\tclassStats->inclusiveSeconds = 0;
+\t\tclassStats->exclusiveSeconds = 0;
+\t\tclassStats->rollbacks = 0;
+\t\tclassStats->exceptions = 0;
+\t\tstats.push_back(classStats);
+\t\treturn *classStats;
+\t}
+
+\tvoid begin()
+\t{
+\t\tcalls += 1;
+\t\tcallStack().push_back(std::make_pair(std::chrono::steady_clock::now(), 0.0));
+\t}
+
+\tvoid end()
+\t{
+\t\tusing namespace std;
+\t\tpair<chrono::steady_clock::time_point, double> call = callStack().back();
+\t\tcallStack().pop_back();
+\t\tdouble elapsed = chrono::duration<double>(chrono::steady_clock::now() - call.first).count();
+\t\tinclusiveSeconds += elapsed;
+\t\texclusiveSeconds += elapsed - call.second;
+\t\tif (!callStack().empty())
+\t\t\tcallStack().back().second += elapsed;
+\t}
+};
+
+// Prints the counters of each class as JSON, or writes them to the file of the given name.
+void dumpStats(const std::string &filename = "")
+{
+\tusing namespace std;
+\tvector<ParserStats*> &stats = ParserStats::all();
+\tostringstream json;
+\tjson << "{" << endl;
+\tfor (size_t i = 0; i < stats.size(); i++)
+\t{
+\t\tjson << "  \\"" << stats[i]->className << "\\": {\\"calls\\": " << stats[i]->calls
+\t\t\t<< ", \\"lines\\": " << stats[i]->lines
+\t\t\t<< ", \\"inclusiveSeconds\\": " << stats[i]->inclusiveSeconds
+\t\t\t<< ", \\"exclusiveSeconds\\": " << stats[i]->exclusiveSeconds
+\t\t\t<< ", \\"rollbacks\\": " << stats[i]->rollbacks
+\t\t\t<< ", \\"exceptions\\": " << stats[i]->exceptions << "}"
+\t\t\t<< (i + 1 < stats.size() ? "," : "") << endl;
+\t}
+\tjson << "}" << endl;
+\tif (filename.empty())
+\t{
+\t\tcout << json.str();
+\t\treturn;
+\t}
+\tofstream output(filename.c_str());
+\toutput << json.str();
+}
+"""
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "    ", InstaParseFile.indentString )
+
+    return helpers
+
+def cppgenSnapshotHelpers():
+    """ The helpers that write the primitive fields of the body to a binary snapshot and read them
+    back. Every field is written by an overload of writeValue and read by one of readValue, so
+    that the functions of each class only have to call them for each of its fields. """
+    helpers = """
+static const std::string SNAPSHOT_MAGIC = "%(magic)s";
+
+// Hands out the bytes of a snapshot held in memory, failing once it runs out of them.
+class SnapshotReader
+{
+public:
+\tSnapshotReader(const std::string &filename, const char *begin, const char *end)
+\t\t: filename(filename), position(begin), end(end)
+\t{
+\t}
+
+\tconst char *read(size_t size)
+\t{
+\t\tif (size > remaining())
+\t\t\tthrow std::runtime_error("Parser Error: The binary snapshot " + filename + " is truncated.");
+\t\tconst char *start = position;
+\t\tposition += size;
+\t\treturn start;
+\t}
+
+\tsize_t remaining() const
+\t{
+\t\treturn end - position;
+\t}
+
+\tconst std::string filename;
+
+private:
+\tconst char *position;
+\tconst char *end;
+};
+
+// Fields are little-endian whatever the byte order of the machine
+inline void encodeUInt64(uint64_t value, char *bytes)
+{
+\tfor (int i = 0; i < 8; i++)
+\t\tbytes[i] = (char)(value >> (8 * i));
+}
+
+inline uint64_t decodeUInt64(const char *bytes)
+{
+\tuint64_t value = 0;
+\tfor (int i = 7; i >= 0; i--)
+\t\tvalue = (value << 8) | (unsigned char)bytes[i];
+\treturn value;
+}
+
+inline void writeCount(std::ostream &out, size_t count)
+{
+\tif (count > 0xFFFFFFFFu)
+\t\tthrow std::runtime_error("Parser Error: Could not write a list of more than 4294967295 elements to a binary snapshot.");
+\tchar bytes[4];
+\tfor (int i = 0; i < 4; i++)
+\t\tbytes[i] = (char)(count >> (8 * i));
+\tout.write(bytes, 4);
+}
+
+inline size_t readCount(SnapshotReader &in)
+{
+\tconst char *bytes = in.read(4);
+\tuint32_t count = 0;
+\tfor (int i = 3; i >= 0; i--)
+\t\tcount = (count << 8) | (unsigned char)bytes[i];
+\treturn count;
+}
+
+// Ints are written as 64 bits and floats as doubles, which the other languages parse them into
+inline int toInt(const SnapshotReader &in, uint64_t bits)
+{
+\tint64_t value = (int64_t)bits;
+\tif (value < INT_MIN || value > INT_MAX)
+\t\tthrow std::runtime_error("Parser Error: An int of the binary snapshot " + in.filename + " does not fit in an int.");
+\treturn (int)value;
+}
+
+inline float toFloat(uint64_t bits)
+{
+\tdouble value;
+\tmemcpy(&value, &bits, 8);
+\treturn (float)value;
+}
+
+inline uint64_t fromFloat(float value)
+{
+\tdouble wide = value;
+\tuint64_t bits;
+\tmemcpy(&bits, &wide, 8);
+\treturn bits;
+}
+
+inline void writeValue(std::ostream &out, int value)
+{
+\tchar bytes[8];
+\tencodeUInt64((uint64_t)(int64_t)value, bytes);
+\tout.write(bytes, 8);
+}
+
+inline void readValue(SnapshotReader &in, int &value)
+{
+\tvalue = toInt(in, decodeUInt64(in.read(8)));
+}
+
+inline void writeValue(std::ostream &out, float value)
+{
+\tchar bytes[8];
+\tencodeUInt64(fromFloat(value), bytes);
+\tout.write(bytes, 8);
+}
+
+inline void readValue(SnapshotReader &in, float &value)
+{
+\tvalue = toFloat(decodeUInt64(in.read(8)));
+}
+
+inline void writeValue(std::ostream &out, bool value)
+{
+\tout.put(value ? 1 : 0);
+}
+
+inline void readValue(SnapshotReader &in, bool &value)
+{
+\tvalue = *in.read(1) != 0;
+}
+
+inline void writeValue(std::ostream &out, const std::string &value)
+{
+\twriteCount(out, value.size());
+\tout.write(value.data(), value.size());
+}
+
+inline void readValue(SnapshotReader &in, std::string &value)
+{
+\tsize_t length = readCount(in);
+\tvalue.assign(in.read(length), length);
+}
+
+// Lists of numbers are encoded in one buffer and decoded from one range of the snapshot
+inline void writeValue(std::ostream &out, const std::vector<int> &values)
+{
+\twriteCount(out, values.size());
+\tstd::vector<char> bytes(values.size() * 8);
+\tfor (size_t i = 0; i < values.size(); i++)
+\t\tencodeUInt64((uint64_t)(int64_t)values[i], &bytes[i * 8]);
+\tif (!bytes.empty())
+\t\tout.write(&bytes[0], bytes.size());
+}
+
+inline void readValue(SnapshotReader &in, std::vector<int> &values)
+{
+\tsize_t count = readCount(in);
+\tconst char *bytes = in.read(count * 8);
+\tvalues.resize(count);
+\tfor (size_t i = 0; i < count; i++)
+\t\tvalues[i] = toInt(in, decodeUInt64(bytes + i * 8));
+}
+
+inline void writeValue(std::ostream &out, const std::vector<float> &values)
+{
+\twriteCount(out, values.size());
+\tstd::vector<char> bytes(values.size() * 8);
+\tfor (size_t i = 0; i < values.size(); i++)
+\t\tencodeUInt64(fromFloat(values[i]), &bytes[i * 8]);
+\tif (!bytes.empty())
+\t\tout.write(&bytes[0], bytes.size());
+}
+
+inline void readValue(SnapshotReader &in, std::vector<float> &values)
+{
+\tsize_t count = readCount(in);
+\tconst char *bytes = in.read(count * 8);
+\tvalues.resize(count);
+\tfor (size_t i = 0; i < count; i++)
+\t\tvalues[i] = toFloat(decodeUInt64(bytes + i * 8));
+}
+
+inline void writeValue(std::ostream &out, const std::vector<bool> &values)
+{
+\twriteCount(out, values.size());
+\tfor (size_t i = 0; i < values.size(); i++)
+\t\tout.put(values[i] ? 1 : 0);
+}
+
+inline void readValue(SnapshotReader &in, std::vector<bool> &values)
+{
+\tsize_t count = readCount(in);
+\tconst char *bytes = in.read(count);
+\tvalues.resize(count);
+\tfor (size_t i = 0; i < count; i++)
+\t\tvalues[i] = bytes[i] != 0;
+}
+"""
+    helpers = helpers % { "magic": CodeGenerator.SNAPSHOT_MAGIC }
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "    ", InstaParseFile.indentString )
+
+    return helpers
+
+def cppgenSnapshotListHelpers():
+    """ The overloads writing and reading the other lists, of strings, lists and objects. They
+    must follow the declarations of the overloads of every class. """
+    helpers = """
+template <class T>
+void writeValue(std::ostream &out, const std::vector<T> &values)
+{
+\twriteCount(out, values.size());
+\tfor (size_t i = 0; i < values.size(); i++)
+\t\twriteValue(out, values[i]);
+}
+
+template <class T>
+void readValue(SnapshotReader &in, std::vector<T> &values)
+{
+\tsize_t count = readCount(in);
+\tvalues.clear();
+\t// A count read from a corrupt snapshot must not reserve more than it can hold
+\tvalues.reserve(std::min(count, in.remaining()));
+\tfor (size_t i = 0; i < count; i++)
+\t{
+\t\tvalues.resize(values.size() + 1);
+\t\treadValue(in, values.back());
+\t}
+}
+"""
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "    ", InstaParseFile.indentString )
+
+    return helpers
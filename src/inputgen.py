@@ -0,0 +1,255 @@
+from parser import InstaParseFormatFileParser
+from converter import InstaParseFormat
+from util import *
+
+from sys import exit, stdout
+from optparse import OptionParser
+import random
+import string
+
+USAGE = "usage: %prog [options] format_file_name"
+
+# Multipliers of the size suffixes accepted by --size
+SIZE_SUFFIXES = { "k": 1 << 10, "m": 1 << 20, "g": 1 << 30, "t": 1 << 40 }
+
+# Number of records generated to estimate the size of one, when the number of records has to be
+# written before them
+SAMPLE_RECORDS = 64
+
+class InputGenerator:
+    """ Generates random input files that follow a format. Every value is drawn uniformly from the
+    range given for its type, as is the number of instances of '*' and '+' repetitions and the
+    value of the int fields that give the number of instances of a later line. Lines are written
+    out as they are generated, so the size of the input is not limited by memory.
+
+    Repetitions with '*' and '+' are parsed greedily, so a line following one that also looks like
+    an instance of it is parsed as such, just as it would be in a handwritten input. """
+
+    def __init__( self, format, seed = None, intRange = ( 0, 1000 ), floatRange = ( 0.0, 1000.0 ),
+            stringLength = ( 1, 10 ), listLength = ( 1, 10 ), repetitions = ( 0, 10 ) ):
+        """ Create an InputGenerator for the given InstaParseFormat. The ranges are inclusive
+        pairs of ( minimum, maximum ). Lists hold at least one token, and '+' repetitions at least
+        one instance, whatever the ranges. The same seed always generates the same input. """
+        self.format = format
+        self.classes = format.classes()
+        self.bodyTypeName = format.bodyTypeName()
+        self.delimiter = format.lineDelimiter()
+        self.random = random.Random(seed)
+        self.intRange = intRange
+        self.floatRange = floatRange
+        self.stringLength = stringLength
+        self.listLength = ( max( 1, listLength[0] ), max( 1, listLength[1] ) )
+        self.repetitions = repetitions
+        # Strings are made of letters, so that they never contain the delimiter or look like a number
+        self.letters = string.ascii_letters.replace( self.delimiter, "" )
+        # The names of the int fields of each class that give the number of instances of a later line
+        self.countFields = dict()
+        for className, lines in self.classes.items():
+            self.countFields[className] = set([ line.repetitionAmountString() for line in lines
+                if not line.isEmpty() and line.isVariableRepetition() ])
+
+    def generate( self, output, numRecords = None, size = None ):
+        """ Write an input to the file object output. The number of records, the instances of the
+        last line of the body, can be set with numRecords, or they can be generated until about
+        size bytes have been written. When neither is given, the records are counted like the
+        instances of any other repetition.
+
+        Returns the number of bytes written. """
+        self.output = output
+        self.written = 0
+        self.recordSize = None
+        recordLine = self._recordLine()
+        if numRecords is None and size is None:
+            self._writeClass( self.bodyTypeName, dict() )
+            return self.written
+        if recordLine is None:
+            raise ValueError("The number of records of the body cannot be chosen: its last line does not "
+                "repeat a type with '*', '+' or the value of an int field.")
+        counts = dict()
+        if numRecords is None and recordLine.isVariableRepetition():
+            # The count precedes the records, so their number is estimated from sample records
+            numRecords = max( 0, int(round( size / self._sampleRecordSize(recordLine) )) )
+        if numRecords is not None:
+            if recordLine.isOneOrMoreRepetition():
+                numRecords = max( 1, numRecords )
+            counts[recordLine.repetitionAmountString()] = numRecords
+        else:
+            self.recordSize = size
+        self._writeClass( self.bodyTypeName, counts, numRecords )
+        return self.written
+
+    ################################################################################
+    # Writing Classes
+    ################################################################################
+
+    def _writeClass( self, className, counts, numRecords = None ):
+        """ Write an instance of the given class. counts holds the values to use for the count
+        fields of the class, and numRecords is the number of instances of the record line of the
+        body, or None to draw it at random. """
+        values = dict()
+        lines = self.classes[className]
+        for index, line in enumerate(lines):
+            if line.isEmpty():
+                self._writeLine("")
+            elif line.isRepeating():
+                isRecordLine = className == self.bodyTypeName and index == len(lines) - 1
+                self._writeRepetition( line, values, numRecords if isRecordLine else None,
+                    isRecordLine and self.recordSize is not None )
+            elif line.numFields() == 1 and not line.getField(0).isPrimitive():
+                self._writeClass( line.getField(0).typeName(), dict() )
+            else:
+                tokens = []
+                for i in range(line.numFields()):
+                    field = line.getField(i)
+                    if field.name() in self.countFields[className]:
+                        values[field.name()] = counts.get( field.name(), self._drawRepetitions() )
+                        tokens.append(str(values[field.name()]))
+                    else:
+                        tokens.append(self._value(field.typeName()))
+                self._writeLine(self.delimiter.join(tokens))
+
+    def _writeRepetition( self, line, values, numInstances, isSized ):
+        """ Write the instances of a repeated line. Unless it is given, the number of instances is
+        fixed by the line, taken from the count field it refers to, or drawn at random. A sized
+        repetition is written until the input reaches the target size instead. """
+        field = line.getField(0)
+        if numInstances is None:
+            if line.isIntegerRepetition():
+                numInstances = int(line.repetitionAmountString())
+            elif line.isVariableRepetition():
+                numInstances = values[line.repetitionAmountString()]
+            else:
+                numInstances = self._drawRepetitions()
+        if line.isOneOrMoreRepetition():
+            numInstances = max( 1, numInstances )
+        def hasNextInstance(i):
+            if isSized:
+                return self.written < self.recordSize or ( i == 0 and line.isOneOrMoreRepetition() )
+            return i < numInstances
+
+        i = 0
+        while hasNextInstance(i):
+            if i > 0 and line.isSplitByNewline():
+                self._writeLine("")
+            if field.isPrimitive():
+                self._writeLine(self._value(field.typeName()))
+            else:
+                self._writeClass( field.typeName(), dict() )
+            i += 1
+
+    def _sampleRecordSize( self, recordLine ):
+        """ The mean number of bytes taken by a record, measured on records written to memory. """
+        output, written = self.output, self.written
+        self.output = _SizeCounter()
+        self.written = 0
+        field = recordLine.getField(0)
+        for i in range(SAMPLE_RECORDS):
+            if recordLine.isSplitByNewline():
+                self._writeLine("")
+            if field.isPrimitive():
+                self._writeLine(self._value(field.typeName()))
+            else:
+                self._writeClass( field.typeName(), dict() )
+        recordSize = float(self.written) / SAMPLE_RECORDS
+        self.output, self.written = output, written
+        return recordSize
+
+    def _recordLine(self):
+        """ The last line of the body if its number of instances, the records, can be chosen. """
+        lines = self.classes[self.bodyTypeName]
+        if len(lines) == 0 or lines[-1].isEmpty() or not lines[-1].isRepeating() or \
+                lines[-1].isIntegerRepetition():
+            return None
+        return lines[-1]
+
+    def _writeLine( self, line ):
+        self.output.write(line + "\n")
+        self.written += len(line) + 1
+
+    ################################################################################
+    # Drawing Values
+    ################################################################################
+
+    def _drawRepetitions(self):
+        return self.random.randint( *self.repetitions )
+
+    def _value( self, typeName ):
+        """ A random value of the given primitive type, written as it appears in the input. """
+        if isList(typeName):
+            numTokens = self.random.randint( *self.listLength )
+            return self.delimiter.join([ self._value(listType(typeName)) for i in range(numTokens) ])
+        elif isInteger(typeName):
+            return str(self.random.randint( *self.intRange ))
+        elif isFloat(typeName):
+            return repr(round( self.random.uniform( *self.floatRange ), 4 ))
+        elif isBool(typeName):
+            return self.random.choice([ "true", "false" ])
+        length = self.random.randint( *self.stringLength )
+        return "".join([ self.random.choice(self.letters) for i in range(max( 1, length )) ])
+
+class _SizeCounter:
+    """ A file object that discards what is written to it. """
+    def write( self, data ):
+        pass
+
+def parseSize(size):
+    """ Convert a size such as "512", "64K" or "10G" to a number of bytes. """
+    suffix = size[-1:].lower()
+    if suffix in SIZE_SUFFIXES:
+        return int(float(size[:-1]) * SIZE_SUFFIXES[suffix])
+    return int(size)
+
+if __name__ == "__main__":
+    # Option parser
+    optParser = OptionParser(usage = USAGE)
+    optParser.add_option( "-o", "--output", action = "store", dest = "outputName", default = None,
+            help = "specifies the output file name. Defaults to the standard output." )
+    optParser.add_option( "-n", "--records", action = "store", type = "int", dest = "numRecords", default = None,
+            help = "specifies the number of instances of the last line of the body." )
+    optParser.add_option( "-s", "--size", action = "store", dest = "size", default = None,
+            help = "generates records until the output reaches about this size, such as 512K or 10G." )
+    optParser.add_option( "--seed", action = "store", type = "int", dest = "seed", default = None,
+            help = "seeds the random values, so that the same input is generated again." )
+    optParser.add_option( "--int-range", action = "store", type = "int", nargs = 2, dest = "intRange",
+            default = ( 0, 1000 ), metavar = "MIN MAX", help = "specifies the range of int values." )
+    optParser.add_option( "--float-range", action = "store", type = "float", nargs = 2, dest = "floatRange",
+            default = ( 0.0, 1000.0 ), metavar = "MIN MAX", help = "specifies the range of float values." )
+    optParser.add_option( "--string-length", action = "store", type = "int", nargs = 2, dest = "stringLength",
+            default = ( 1, 10 ), metavar = "MIN MAX", help = "specifies the range of string lengths." )
+    optParser.add_option( "--list-length", action = "store", type = "int", nargs = 2, dest = "listLength",
+            default = ( 1, 10 ), metavar = "MIN MAX", help = "specifies the range of the number of list tokens." )
+    optParser.add_option( "--repetitions", action = "store", type = "int", nargs = 2, dest = "repetitions",
+            default = ( 0, 10 ), metavar = "MIN MAX",
+            help = "specifies the range of the number of instances of '*' and '+' repetitions and of the "
+                   "int fields that give the number of instances of a later line." )
+    (options, args) = optParser.parse_args()
+
+    if options.numRecords is not None and options.size is not None:
+        optParser.error("--records cannot be combined with --size")
+
+    # Check that a format file is provided
+    if len(args) != 1:
+        optParser.print_help()
+        exit(1)
+
+    # Parser format file into a object model
+    parser = InstaParseFormatFileParser(args[0])
+    if parser.parseFailed():
+        parser.printFailures()
+        exit(1)
+
+    # Generate a format object from the object model
+    formatObject = InstaParseFormat(parser.objectModel)
+
+    generator = InputGenerator( formatObject, options.seed, options.intRange, options.floatRange,
+        options.stringLength, options.listLength, options.repetitions )
+    output = stdout if options.outputName is None else open( options.outputName, "w", 1 << 20 )
+    try:
+        generator.generate( output, options.numRecords,
+            parseSize(options.size) if options.size is not None else None )
+    except ValueError as e:
+        print e
+        exit(1)
+    finally:
+        if output is not stdout:
+            output.close()
@@ -14,6 +14,10 @@ class JavaGenerator(CodeGenerator):
         self.main.setExtension("java")
         self.util.setExtension("java")
         self.classFiles = []
+        if self.options.primitives:
+            # List fields of unboxed values are parsed straight into arrays
+            for primitive in PRIMITIVE_LISTS:
+                self.typeNameToParseFuncName["list(%s)" % primitive["typeName"]] = primitive["parse"] + "Array"
 
     def codeGen(self):
         """ This method is called to generate and write the parser to the specified file. """
@@ -42,9 +46,10 @@ class JavaGenerator(CodeGenerator):
         self._beginBlock("public class " + className )
 
         for field in fields:
-            if field.isRepeating() or field.isList():
+            typeName = self._getTypeName(field)
+            if typeName.startswith("ArrayList"):
                 shouldImportArrayList = True
-            classFile.writeLine("public " + self._getTypeName(field) + " " + field.name() + ";")
+            classFile.writeLine("public " + typeName + " " + field.name() + ";")
 
         if shouldImportArrayList:
             classFile.writeImportLine("")
@@ -62,6 +67,7 @@ class JavaGenerator(CodeGenerator):
         self._beginBlock("public class " + CodeGenerator.UTIL_FILE_NAME)
         self.generateHelperFunctions()
         self.generateClassParserFunctions()
+        self.generateClassSnapshotFunctions()
         self._endBlock()
 
     def generateUtilFileHeader(self):
@@ -69,24 +75,192 @@ class JavaGenerator(CodeGenerator):
         # Import library headers
         self.currentFile.writeLine("import java.util.ArrayList;")
         self.currentFile.writeLine("import java.util.Arrays;")
-        self.currentFile.writeLine("import java.io.RandomAccessFile;")
+        self.currentFile.writeLine("import java.io.BufferedInputStream;")
+        self.currentFile.writeLine("import java.io.BufferedReader;")
+        self.currentFile.writeLine("import java.io.InputStream;")
+        self.currentFile.writeLine("import java.io.InputStreamReader;")
         self.currentFile.writeLine("import java.io.EOFException;")
         self.currentFile.writeLine("import java.io.IOException;")
+        self.currentFile.writeLine("import java.io.OutputStream;")
+        self.currentFile.writeLine("import java.io.FileOutputStream;")
+        self.currentFile.writeLine("import java.io.RandomAccessFile;")
+        self.currentFile.writeLine("import java.nio.BufferUnderflowException;")
+        self.currentFile.writeLine("import java.nio.ByteBuffer;")
+        self.currentFile.writeLine("import java.nio.ByteOrder;")
+        self.currentFile.writeLine("import java.nio.channels.FileChannel;")
+        self.currentFile.writeLine("import java.nio.charset.StandardCharsets;")
+        self.currentFile.writeLine("import java.util.zip.GZIPInputStream;")
+        self.currentFile.writeLine("import java.util.regex.Matcher;")
+        self.currentFile.writeLine("import java.util.regex.Pattern;")
+        if self.options.instrument:
+            self.currentFile.writeLine("import java.io.FileWriter;")
+        if self.options.mmap or self._streamsRecords():
+            self.currentFile.writeLine("import java.io.FileInputStream;")
+            self.currentFile.writeLine("import java.nio.MappedByteBuffer;")
+        if self._streamsRecords():
+            self.currentFile.writeLine("import java.util.Spliterator;")
+            self.currentFile.writeLine("import java.util.function.Consumer;")
+            self.currentFile.writeLine("import java.util.stream.Stream;")
+            self.currentFile.writeLine("import java.util.stream.StreamSupport;")
 
         self.currentFile.writeNewline()
 
     def generateHelperFunctions(self):
         """ For generating the helper functions that will be useful when parsing in the util file. """
+        self.currentFile.writeLine("private static final String DELIMITER = \"" + self.format.lineDelimiter() + "\";")
         # Static helpers for primitives
         helpers = javagenStaticHelpers()
         map(lambda s: self.currentFile.writeLine(s), helpers.splitlines())
+        if self.options.primitives:
+            map(lambda s: self.currentFile.writeLine(s), javagenPrimitiveHelpers().splitlines())
+        if self.options.mmap or self._streamsRecords():
+            map(lambda s: self.currentFile.writeLine(s), javagenMappedHelpers().splitlines())
+        if self._streamsRecords():
+            map(lambda s: self.currentFile.writeLine(s), javagenRecordHelpers().splitlines())
+        if self.options.instrument:
+            map(lambda s: self.currentFile.writeLine(s), javagenStatsHelpers().splitlines())
+        self.currentFile.writeLine("// Tells the binary snapshots of formats of this layout apart from those of other formats")
+        self.currentFile.writeLine("private static final byte[] SCHEMA_HASH = \"%s\".getBytes(StandardCharsets.US_ASCII);"
+            % self.schemaHash())
+        map(lambda s: self.currentFile.writeLine(s), javagenSnapshotHelpers(self.options.primitives).splitlines())
         self.currentFile.writeNewline()
 
-    def generateClassParserFunction( self, className, lines ):
+    def generateClassSnapshotFunctions(self):
+        """ For generating the methods writing every user defined class to a binary snapshot and
+        reading it back, followed by those writing and reading the snapshot file of a body. """
+        writeLine = self.currentFile.writeLine
+        CodeGenerator.generateClassSnapshotFunctions(self)
+
+        self._beginBlock("public static void writeSnapshot(%s body, String filename) throws IOException" % self.bodyTypeName)
+        writeLine("OutputStream output = new FileOutputStream(filename);")
+        self._beginBlock("try")
+        writeLine("SnapshotWriter out = new SnapshotWriter(output);")
+        writeLine("out.writeBytes(SNAPSHOT_MAGIC);")
+        writeLine("out.writeBytes(SCHEMA_HASH);")
+        writeLine("dump%s(out, body);" % self.bodyTypeName)
+        writeLine("out.flush();")
+        self._endBlock()
+        self._beginBlock("finally")
+        writeLine("output.close();")
+        self._endBlock()
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._beginBlock("public static %s readSnapshot(String filename) throws IOException" % self.bodyTypeName)
+        # The mapping stays valid once the file is closed
+        writeLine("ByteBuffer buffer;")
+        writeLine("RandomAccessFile file = new RandomAccessFile(filename, \"r\");")
+        self._beginBlock("try")
+        writeLine("FileChannel channel = file.getChannel();")
+        self._beginBlock("if (channel.size() > Integer.MAX_VALUE)")
+        writeLine("throw new RuntimeException(\"Parser Error: The binary snapshot \" + filename + \" is too large to be mapped.\");")
+        self._endBlock()
+        writeLine("buffer = channel.map(FileChannel.MapMode.READ_ONLY, 0, channel.size());")
+        self._endBlock()
+        self._beginBlock("finally")
+        writeLine("file.close();")
+        self._endBlock()
+        writeLine("SnapshotReader in = new SnapshotReader(buffer);")
+        self._beginBlock("if (!in.readPrefix(SNAPSHOT_MAGIC))")
+        writeLine("throw new RuntimeException(\"Parser Error: \" + filename + \" is not a binary snapshot.\");")
+        self._endBlock()
+        self._beginBlock("if (!in.readPrefix(SCHEMA_HASH))")
+        writeLine("throw new RuntimeException(\"Parser Error: The binary snapshot \" + filename + \" was written for a format of another layout.\");")
+        self._endBlock()
+        writeLine("%s body;" % self.bodyTypeName)
+        self._beginBlock("try")
+        writeLine("body = load%s(in);" % self.bodyTypeName)
+        self._endBlock()
+        self._beginBlock("catch (BufferUnderflowException e)")
+        writeLine("throw new RuntimeException(\"Parser Error: The binary snapshot \" + filename + \" is truncated.\");")
+        self._endBlock()
+        self._beginBlock("if (in.hasRemaining())")
+        writeLine("throw new RuntimeException(\"Parser Error: The binary snapshot \" + filename + \" continues after its body.\");")
+        self._endBlock()
+        writeLine("return body;")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+    def _snapshotFunctionSuffix( self, typeName ):
+        """ The suffix of the SnapshotWriter and SnapshotReader methods of a primitive type. """
+        if isList(typeName):
+            return self._snapshotFunctionSuffix(listType(typeName)) + "List"
+        return { StringConstants.INTEGER_TYPE: "Int", StringConstants.FLOAT_TYPE: "Float",
+            StringConstants.BOOL_TYPE: "Bool", StringConstants.STRING_TYPE: "String" }[typeName]
+
+    def _snapshotReadSuffix( self, typeName ):
+        """ The suffix of the SnapshotReader method reading a value of a primitive type, which
+        reads lists of unboxed values as arrays with the primitives option. """
+        if isList(typeName) and self._isUnboxed(listType(typeName)):
+            return self._snapshotFunctionSuffix(listType(typeName)) + "Array"
+        return self._snapshotFunctionSuffix(typeName)
+
+    def generateClassSnapshotFunction( self, className, lines ):
+        """ For generating "dumpX", which writes an instance of the class X to a binary snapshot,
+        and "loadX", which reads one back. Repeated fields of a primitive type share the layout of
+        lists, and are written and read as such. With the primitives option, lists of unboxed values
+        are read back as arrays. """
+        writeLine = self.currentFile.writeLine
+        fields = [ field for line in lines if not line.isEmpty() for field in line ]
+
+        self._beginBlock("public static void dump%s(SnapshotWriter out, %s value) throws IOException" % ( className, className ))
+        for field in fields:
+            value = "value." + field.name()
+            if field.isPrimitive() and not ( field.isRepeating() and field.isList() ):
+                suffix = self._snapshotFunctionSuffix(field.typeName())
+                writeLine("out.write%s%s(%s);" % ( suffix, "List" if field.isRepeating() else "", value ))
+            elif not field.isRepeating():
+                writeLine("dump%s(out, %s);" % ( field.typeName(), value ))
+            else:
+                writeLine("out.writeCount(%s.size());" % value)
+                self._beginBlock("for (%s instance : %s)" % ( self._getBasicTypeName(field.typeName()) or field.typeName(), value ))
+                if field.isList():
+                    writeLine("out.write%s(instance);" % self._snapshotFunctionSuffix(field.typeName()))
+                else:
+                    writeLine("dump%s(out, instance);" % field.typeName())
+                self._endBlock()
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._beginBlock("public static %s load%s(SnapshotReader in)" % ( className, className ))
+        writeLine("%s result = new %s();" % ( className, className ))
+        for field in fields:
+            value = "result." + field.name()
+            if field.isPrimitive() and not ( field.isRepeating() and field.isList() ):
+                typeName = "list(%s)" % field.typeName() if field.isRepeating() else field.typeName()
+                read = "in.read%s()" % self._snapshotReadSuffix(typeName)
+                if field.isRepeating() and self._isUnboxed(field.typeName()) and not field.isCountedRepetition():
+                    read = "new %s(%s)" % ( self._getTypeName(field), read )
+                writeLine("%s = %s;" % ( value, read ))
+            elif not field.isRepeating():
+                writeLine("%s = load%s(in);" % ( value, field.typeName() ))
+            else:
+                count = field.name() + "Count"
+                writeLine("int %s = in.readCount();" % count)
+                writeLine("%s = new %s(in.capacity(%s));" % ( value, self._getTypeName(field), count ))
+                self._beginBlock("for (int i = 0; i < %s; i++)" % count)
+                if field.isList():
+                    writeLine("%s.add(in.read%s());" % ( value, self._snapshotReadSuffix(field.typeName()) ))
+                else:
+                    writeLine("%s.add(load%s(in));" % ( value, field.typeName() ))
+                self._endBlock()
+        writeLine("return result;")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+    def generateClassParserFunctions(self):
+        """ For generating all the functions for parsing user defined classes, followed by those
+        streaming the records of the body. """
+        CodeGenerator.generateClassParserFunctions(self)
+        if self._streamsRecords():
+            self.generateRecordFunctions()
+
+    def generateClassParserFunction( self, className, lines, functionName = None ):
         """ For generating a helper functions for parsing a user defined class. The first argument
-        is the class name and the second argument is a list of FormatLine's. """
+        is the class name and the second argument is a list of FormatLine's. Given a function
+        name, only the given lines of the class are parsed, by an uninstrumented private function
+        of that name. """
         writeLine = self.currentFile.writeLine
-        write = self.currentFile.write
 
         def isSimplePrimitive(field):
             return field.isInteger() or field.isFloat() or field.isString() or field.isBool()
@@ -97,19 +271,28 @@ class JavaGenerator(CodeGenerator):
             didSplit = False
             didRepeat = False
             didRepeatPlus = False
+            didSeparateLookahead = False
 
             for line in lines:
                 didRepeat = didRepeat or line.isRepeating()
                 didRepeatPlus = didRepeatPlus or  line.isOneOrMoreRepetition()
                 didSplit = didSplit or line.numFields() > 1 or (not line.isEmpty() and line.getField(0).isList())
+                didSeparateLookahead = didSeparateLookahead or ( not line.isEmpty() and
+                    line.lookahead() is not None and line.isSplitByNewline() )
 
             if didSplit:
-                writeLine("String[] fields;")
+                writeLine("Tokenizer tokens;")
             if didRepeat:
                 writeLine("long prevFilePos = getFilePointer(f);")
                 writeLine("int prevLineNumber = lineNumber[0];")
             if didRepeatPlus:
                 writeLine("boolean didRepeatOnce = false;")
+            if didSeparateLookahead:
+                writeLine("boolean isSeparated;")
+
+        def handleRollback():
+            if self.options.instrument:
+                writeLine("STATS_" + className + ".rollbacks += 1;")
 
         def handleEmptyLine():
             # Handle the empty line case
@@ -128,9 +311,9 @@ class JavaGenerator(CodeGenerator):
                 writeLine("lineNumber[0] += 1;")
             elif field.isPrimitive():
                 # Field is primitive list, split line
-                writeLine("fields = readLine(f, \"" + className + "\").split(\"" + self.format.lineDelimiter() + "\");")
-                write("result." + field.name() + " = "
-                    + self.typeNameToParseFuncName["list(%s)" % field.listType()] + "(fields, lineNumber);")
+                writeLine("tokens = f.tokenize(readLine(f, \"" + className + "\"));")
+                writeLine("result." + field.name() + " = "
+                    + self.typeNameToParseFuncName["list(%s)" % field.listType()] + "(tokens, lineNumber);")
                 writeLine("lineNumber[0] += 1;")
             else:
                 # Field is a class, recurse
@@ -141,13 +324,11 @@ class JavaGenerator(CodeGenerator):
             # Helper for handleSimpleLine
             if isSimplePrimitive(field):
                 writeLine("result." + field.name() + " = "
-                    + self.typeNameToParseFuncName[field.typeName()]
-                    + "(fields[" + str(index) + "], lineNumber);")
+                    + self.typeNameToParseFuncName[field.typeName()] + "(tokens, lineNumber);")
             elif field.isPrimitive():
-                # Field is primitive list, use rest of fields)
+                # Field is primitive list, use rest of tokens
                 writeLine("result." + field.name() + " = "
-                    + self.typeNameToParseFuncName["list(%s)" % field.listType()]
-                    + "(Arrays.copyOfRange(fields, " + str(index) + ", fields.length), lineNumber);")
+                    + self.typeNameToParseFuncName["list(%s)" % field.listType()] + "(tokens, lineNumber);")
             else:
                 # Field is a class? Cannot be!
                 raise Exception("This should never happen.")
@@ -160,38 +341,90 @@ class JavaGenerator(CodeGenerator):
                 handleSimpleLineOneField(line.getField(0))
             else:
                 # Multiple fields, split it
-                writeLine("fields = readLine(f, \"" + className + "\").split(\"" + self.format.lineDelimiter() + "\");")
+                writeLine("tokens = f.tokenize(readLine(f, \"" + className + "\"));")
                 if (line.getField(-1).isList()):
-                    self._beginBlock("if (fields.length < " + str(line.numFields()) + ")")
+                    self._beginBlock("if (tokens.count() < " + str(line.numFields()) + ")")
                 else:
-                    self._beginBlock("if (fields.length != " + str(line.numFields()) + ")")
+                    self._beginBlock("if (tokens.count() != " + str(line.numFields()) + ")")
                 writeLine("throw new RuntimeException(\"Parser Error on line \" + lineNumber[0] + " +
-                    "\": Expecting " + str(line.numFields()) + " fields (\" + fields.length + \" found).\");")
+                    "\": Expecting " + str(line.numFields()) + " fields (\" + tokens.count() + \" found).\");")
                 self._endBlock()
                 for index, field in enumerate(line):
                     handleSimpleLineMultipleField(index, field)
 
         def handleRepeatingLineForField(field):
             # Helper for handleRepeating
-            if isSimplePrimitive(field):
+            if self._isUnboxed(field.typeName()) and field.isCountedRepetition():
+                # Field is an array sized by the repetition, set its element
+                writeLine("result." + field.name() + "[i] = "
+                    + self.typeNameToParseFuncName[field.typeName()] + "(readLine(f, \"" + className + "\"), lineNumber);")
+                writeLine("lineNumber[0] += 1;")
+            elif isSimplePrimitive(field):
                 # Field is simple, just parse it
                 writeLine("result." + field.name() + ".add("
                     + self.typeNameToParseFuncName[field.typeName()] + "(readLine(f, \"" + className + "\"), lineNumber));")
                 writeLine("lineNumber[0] += 1;")
             elif field.isPrimitive():
                 # Field is primitive list, split line
-                writeLine("fields = readLine(f, \"" + className + "\").split(\"" + self.format.lineDelimiter() + "\");")
+                writeLine("tokens = f.tokenize(readLine(f, \"" + className + "\"));")
                 writeLine("result." + field.name() + ".add("
-                    + self.typeNameToParseFuncName["list(%s)" % field.listType()] + "(fields, lineNumber));")
+                    + self.typeNameToParseFuncName["list(%s)" % field.listType()] + "(tokens, lineNumber));")
                 writeLine("lineNumber[0] += 1;")
             else:
                 # Field is a class, recurse
                 writeLine("result." + field.name() + ".add("
                     + self.typeNameToParseFuncName[field.typeName()] + "(f, lineNumber));")
+            # Nothing before an instance of the body is revisited, so the cursor may discard it.
+            if className == self.bodyTypeName:
+                writeLine("f.release(getFilePointer(f));")
+
+        def handleLookaheadRepeatingLine(line):
+            # Repeat while the upcoming lines look like the start of another instance. If every
+            # instance is a single line, the lookahead decides the repetition on its own, otherwise
+            # the instance is still parsed on trial once the lookahead passes.
+            field = line.getField(0)
+            isDecisive = line.isLookaheadDecisive()
+            isSeparated = "false"
+            writeLine("result." + field.name() + " = new " + self._getTypeName(field) + "();")
+            if line.isSplitByNewline():
+                isSeparated = "isSeparated"
+                writeLine("isSeparated = false;")
+            if not isDecisive:
+                self._beginBlock("try")
+            self._beginBlock("while (hasNextInstance(f, " + self._signatureName( className, field ) + ", "
+                + isSeparated + "))")
+            if not isDecisive:
+                writeLine("prevFilePos = getFilePointer(f);")
+                writeLine("prevLineNumber = lineNumber[0];")
+            if line.isSplitByNewline():
+                self._beginBlock("if (isSeparated)")
+                handleEmptyLine()
+                self._endBlock()
+            handleRepeatingLineForField(field)
+            if line.isSplitByNewline():
+                writeLine("isSeparated = true;")
+            self._endBlock()
+            if not isDecisive:
+                self._endBlock()
+                # Catch any errors, reset line number and continue
+                self._beginBlock("catch (Exception e)")
+                writeLine("seek(f, prevFilePos);")
+                handleRollback()
+                writeLine("lineNumber[0] = prevLineNumber;")
+                self._endBlock()
+            if line.isOneOrMoreRepetition():
+                self._beginBlock("if (result." + field.name() + ".size() < 1)")
+                writeLine("throw new RuntimeException(\"Parser Error on line \" + lineNumber[0] +"
+                    + "\": Expecting at least 1 \\\"" + field.typeName()
+                    + "\\\" when parsing \\\"" + className + "." + field.name()
+                    + "\\\" (0 found).\");")
+                self._endBlock()
 
         def handleRepeatingLine(line):
             # Must be a primitive or class repeated
-            if line.isIntegerRepetition() or line.isVariableRepetition():
+            if line.lookahead() is not None:
+                handleLookaheadRepeatingLine(line)
+            elif line.isIntegerRepetition() or line.isVariableRepetition():
                 # Constant repetition amount
                 field = line.getField(0)
                 # Generate the repetition string
@@ -200,8 +433,14 @@ class JavaGenerator(CodeGenerator):
                     repetitionString = str(line.repetitionAmountString())
                 else:
                     repetitionString =  "result." + line.repetitionAmountString()
-                # Initialize the arraylist
-                writeLine("result." + field.name() + " = new " + self._getTypeName(field) + "();")
+                # Initialize the arraylist, or the array of unboxed values
+                if self._isUnboxed(field.typeName()):
+                    # A negative number of repetitions repeats nothing
+                    size = repetitionString if line.isIntegerRepetition() else "Math.max(0, " + repetitionString + ")"
+                    writeLine("result." + field.name() + " = new " + self._primitiveTypeName(field.typeName())
+                        + "[" + size + "];")
+                else:
+                    writeLine("result." + field.name() + " = new " + self._getTypeName(field) + "();")
                 # Begin loop
                 self._beginBlock("for (int i = 0; i < " + repetitionString + "; i++)")
                 # Wrap with try
@@ -248,6 +487,7 @@ class JavaGenerator(CodeGenerator):
                 # Catch any errors, reset line number and continue
                 self._beginBlock("catch (Exception e)")
                 writeLine("seek(f, prevFilePos);")
+                handleRollback()
                 writeLine("lineNumber[0] = prevLineNumber;")
                 self._endBlock()
             elif line.isOneOrMoreRepetition:
@@ -279,13 +519,28 @@ class JavaGenerator(CodeGenerator):
                     + "\\\" (0 found).\");")
                 self._endBlock()
                 writeLine("seek(f, prevFilePos);")
+                handleRollback()
                 writeLine("lineNumber[0] = prevLineNumber;")
                 self._endBlock()
             else:
                 raise Exception("This should never happen.")
 
 
-        self._beginBlock("public static " + className + " parse" + className + "(RandomAccessFile f, int[] lineNumber)")
+        if functionName is not None:
+            # The signatures and counters belong to the parser of the whole class
+            self._beginBlock("private static " + className + " " + functionName + "(LineCursor f, int[] lineNumber)")
+        else:
+            # Lookahead signatures of the repetitions in this class
+            for line in lines:
+                if not line.isEmpty() and line.lookahead() is not None:
+                    writeLine("private static final LineSignature " + self._signatureName( className, line.getField(0) )
+                        + " = " + self._signatureLiteral(line.lookahead()) + ";")
+            if self.options.instrument:
+                writeLine("private static final ParserStats STATS_" + className + " = ParserStats.get(\"" + className + "\");")
+                self._beginBlock("private static " + className + " parse" + className
+                    + "Uninstrumented(LineCursor f, int[] lineNumber)")
+            else:
+                self._beginBlock("public static " + className + " parse" + className + "(LineCursor f, int[] lineNumber)")
         generateSetup()
 
         # Handle the three different cases, helpers are inner functions defined above
@@ -301,6 +556,154 @@ class JavaGenerator(CodeGenerator):
         self._endBlock()
         self.currentFile.writeNewline()
 
+        if self.options.instrument and functionName is None:
+            self.generateInstrumentedParserFunction(className)
+
+    def generateInstrumentedParserFunction( self, className ):
+        """ For generating the parser of a class that updates its counters around the call of
+        the uninstrumented parser. Lines are only counted for successful calls. """
+        writeLine = self.currentFile.writeLine
+        self._beginBlock("public static " + className + " parse" + className + "(LineCursor f, int[] lineNumber)")
+        # The line numbers advance once per field, so the lines are counted with the cursor
+        writeLine("long firstFilePos = getFilePointer(f);")
+        writeLine("STATS_" + className + ".begin();")
+        self._beginBlock("try")
+        writeLine(className + " result = parse" + className + "Uninstrumented(f, lineNumber);")
+        writeLine("STATS_" + className + ".end();")
+        writeLine("STATS_" + className + ".lines += f.linesBetween(firstFilePos, getFilePointer(f));")
+        writeLine("return result;")
+        self._endBlock()
+        self._beginBlock("catch (RuntimeException e)")
+        writeLine("STATS_" + className + ".exceptions += 1;")
+        writeLine("STATS_" + className + ".end();")
+        writeLine("throw e;")
+        self._endBlock()
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+    def generateRecordFunctions(self):
+        """ For generating streamRecords, which streams the records of the body of an input file.
+        The lines of the body before its records are parsed first, then the mapped file is scanned
+        for the record starts, and the records are parsed on their own from their starts by a
+        parallel stream over a RecordSpliterator.
+
+        The scan cannot tell an empty line of a record from the one separating two records, so the
+        records are only streamed once each of them has been found to end where the next one
+        starts. Otherwise the file is parsed sequentially, and either its error is thrown or its
+        records are streamed, exactly as parse would have returned them. """
+        writeLine = self.currentFile.writeLine
+        recordLine, recordLines = self._parallelRecords()
+        recordField = recordLine.getField(0)
+        recordTypeName = recordField.typeName()
+        lines = self.classes[self.bodyTypeName]
+
+        self.generateClassParserFunction( self.bodyTypeName, lines[:-1], "parse" + self.bodyTypeName + "Prefix" )
+
+        # The parse of the whole file, for the records that cannot be parsed on their own
+        self._beginBlock("private static " + self.bodyTypeName + " parse" + self.bodyTypeName + "Whole(LineCursor f)")
+        writeLine("int[] lineNumber = {1};")
+        writeLine(self.bodyTypeName + " result = " + self.typeNameToParseFuncName[self.bodyTypeName] + "(f, lineNumber);")
+        writeLine("String line;")
+        self._beginBlock("while ((line = f.readLine()) != null)")
+        self._beginBlock("if (!line.equals(\"\"))")
+        writeLine("throw new RuntimeException(\"Parser Error on line \" + lineNumber[0] + \": Finished parsing but did not reach end of file.\");")
+        self._endBlock()
+        self._endBlock()
+        writeLine("return result;")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        # Returns null for a record that does not end where the next one starts
+        self._beginBlock("private static " + recordTypeName + " parse" + self.bodyTypeName
+            + "Record(MappedLineCursor f, RecordStarts starts, int index)")
+        writeLine("seek(f, starts.offsets[index]);")
+        writeLine("int[] lineNumber = {starts.lineNumbers[index]};")
+        writeLine(recordTypeName + " record;")
+        self._beginBlock("try")
+        parseRecord = self.typeNameToParseFuncName[recordTypeName] + "(f, lineNumber)"
+        if recordLine.lookahead() is not None:
+            # Like the sequential parse, the repetition ends at a record that does not start like one
+            parseRecord = "hasNextInstance(f, " + self._signatureName( self.bodyTypeName, recordField ) \
+                + ", false) ? " + parseRecord + " : null"
+        writeLine("record = " + parseRecord + ";")
+        self._endBlock()
+        self._beginBlock("catch (RuntimeException e)")
+        writeLine("return null;")
+        self._endBlock()
+        writeLine("return record != null && endsRecord(f, starts, index, "
+            + ( "true" if recordLine.isSplitByNewline() else "false" ) + ") ? record : null;")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        # Returns null unless every record ends where the next one starts
+        self._beginBlock("private static " + recordTypeName + "[] parse" + self.bodyTypeName
+            + "Records(MappedLineCursor f)")
+        writeLine("int[] lineNumber = {1};")
+        # The prefix is only kept for the field counting the records
+        parsePrefix = "parse" + self.bodyTypeName + "Prefix(f, lineNumber);"
+        if recordLine.isVariableRepetition():
+            writeLine(self.bodyTypeName + " prefix;")
+            parsePrefix = "prefix = " + parsePrefix
+        self._beginBlock("try")
+        writeLine(parsePrefix)
+        self._endBlock()
+        self._beginBlock("catch (RuntimeException e)")
+        writeLine("return null;")
+        self._endBlock()
+        if recordLine.isIntegerRepetition():
+            writeLine("int numRepetitions = " + str(recordLine.repetitionAmountString()) + ";")
+        elif recordLine.isVariableRepetition():
+            # A negative number of repetitions repeats nothing
+            writeLine("int numRepetitions = Math.max(0, prefix." + recordLine.repetitionAmountString() + ");")
+        else:
+            writeLine("int numRepetitions = Integer.MAX_VALUE;")
+        writeLine("long position = getFilePointer(f);")
+        writeLine("RecordStarts starts = findRecordStarts(f, position, lineNumber[0], %d, numRepetitions);"
+            % ( recordLines or 0 ))
+        # Without records, nothing but empty lines may follow the prefix
+        condition = "starts.count == 0 && starts.end > position"
+        if recordLine.lookahead() is None:
+            condition = "starts.count != numRepetitions || (" + condition + ")"
+        elif recordLine.isOneOrMoreRepetition():
+            condition = "starts.count == 0"
+        self._beginBlock("if (" + condition + ")")
+        writeLine("return null;")
+        self._endBlock()
+        writeLine("RecordSpliterator<" + recordTypeName + "> spliterator = new RecordSpliterator<" + recordTypeName
+            + ">(f, starts, 0, starts.count, " + CodeGenerator.UTIL_FILE_NAME + "::parse" + self.bodyTypeName + "Record);")
+        # The counters of the parsers are not safe to update from several threads
+        writeLine(recordTypeName + "[] records = StreamSupport.stream(spliterator, "
+            + ( "false" if self.options.instrument else "true" ) + ").toArray(" + recordTypeName + "[]::new);")
+        self._beginBlock("for (" + recordTypeName + " record : records)")
+        self._beginBlock("if (record == null)")
+        writeLine("return null;")
+        self._endBlock()
+        self._endBlock()
+        writeLine("return records;")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._beginBlock("public static Stream<" + recordTypeName + "> " + CodeGenerator.STREAM_RECORDS
+            + "(String filename) throws IOException")
+        writeLine("LineCursor cursor = MappedLineCursor.open(filename);")
+        # Compressed files cannot be split, so they are parsed whole
+        self._beginBlock("if (!(cursor instanceof MappedLineCursor))")
+        self._beginBlock("try")
+        writeLine("return parse" + self.bodyTypeName + "Whole(cursor)." + recordField.name() + ".stream();")
+        self._endBlock()
+        self._beginBlock("finally")
+        writeLine("cursor.close();")
+        self._endBlock()
+        self._endBlock()
+        writeLine("MappedLineCursor f = (MappedLineCursor) cursor;")
+        writeLine(recordTypeName + "[] records = parse" + self.bodyTypeName + "Records(f);")
+        self._beginBlock("if (records == null)")
+        writeLine("return parse" + self.bodyTypeName + "Whole(f.copy())." + recordField.name() + ".stream();")
+        self._endBlock()
+        writeLine("return Arrays.stream(records);")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
     ################################################################################
     # Generate Main File
     ################################################################################
@@ -317,30 +720,122 @@ class JavaGenerator(CodeGenerator):
     def generateMainFileHeader(self):
         """ For generating the main file header, such as the import statements. """
         # Import library headers
-        self.currentFile.writeLine("import java.io.RandomAccessFile;")
+        self.currentFile.writeLine("import java.io.InputStream;")
+        self.currentFile.writeLine("import java.io.FileInputStream;")
+        self.currentFile.writeLine("import java.io.ByteArrayInputStream;")
         self.currentFile.writeLine("import java.io.FileNotFoundException;")
         self.currentFile.writeLine("import java.io.IOException;")
         self.currentFile.writeLine("import java.io.EOFException;")
+        if self._streamsRecords():
+            self.currentFile.writeLine("import java.util.stream.Stream;")
         self.currentFile.writeNewline()
 
     def generateMainFunction(self):
         """ For generating the empty main method that the user can fill in. """
         self._beginBlock("public static void main(String[] args)")
         self.currentFile.comment("Call " + CodeGenerator.PARSE_INPUT + "(filename) to parse the file of that name.")
+        self.currentFile.comment("Call " + CodeGenerator.PARSE_STREAM + "(input) to parse a stream such as System.in, or "
+            + CodeGenerator.PARSE_BUFFER + "(data) to parse")
+        self.currentFile.comment("an input held in memory.")
+        self.currentFile.comment("Call " + CodeGenerator.DUMP_SNAPSHOT + "(body, filename) to save a body as a binary snapshot, and "
+            + CodeGenerator.LOAD_SNAPSHOT + "(filename) to read it back.")
+        if self._streamsRecords():
+            self.currentFile.comment("Call " + CodeGenerator.STREAM_RECORDS + "(filename) to parse the "
+                + self._parallelRecords()[0].getField(0).name() + " of the body on every core and stream them")
+            self.currentFile.comment("in the order of the file.")
+        if self.options.instrument:
+            self.currentFile.comment("Call " + CodeGenerator.UTIL_FILE_NAME
+                + ".dumpStats(null) to print the counters of the parser of each class.")
         self._endBlock()
         self.currentFile.writeNewline()
 
     def generateInputParserFunction(self):
-        """ For generating the function to parse an input file. """
+        """ For generating the functions to parse an input file, a stream and an input held in
+        memory. The stream is read through a LineCursor, so it does not need to support seeking.
+        With the mmap option, the input file is read through a MappedLineCursor instead. """
         writeLine = self.currentFile.writeLine
-        # Begin function declaration
+        if self.options.mmap:
+            self._generateCursorParserFunction("private static " + self.bodyTypeName + " "
+                + CodeGenerator.PARSE_INPUT + "(String filename)",
+                CodeGenerator.UTIL_FILE_NAME + ".MappedLineCursor.open(filename)", True)
+        else:
+            # Begin function declaration
+            self._beginBlock("private static " + self.bodyTypeName
+                + " " + CodeGenerator.PARSE_INPUT + "(String filename)")
+            self._beginBlock("try")
+            writeLine("return " + CodeGenerator.PARSE_STREAM + "(new FileInputStream(filename));")
+            self._endBlock()
+            # Catch file not found
+            self._beginBlock("catch (FileNotFoundException e)")
+            writeLine("System.err.println(\"Input file '\" + filename + \"' not found.\");")
+            writeLine("System.exit(1);")
+            self._endBlock()
+            writeLine("return null;")
+            self._endBlock()
+            self.currentFile.writeNewline()
+
         self._beginBlock("private static " + self.bodyTypeName
-            + " " + CodeGenerator.PARSE_INPUT + "(String filename)")
+            + " " + CodeGenerator.PARSE_BUFFER + "(byte[] data)")
+        writeLine("return " + CodeGenerator.PARSE_STREAM + "(new ByteArrayInputStream(data));")
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._generateCursorParserFunction("private static " + self.bodyTypeName + " "
+            + CodeGenerator.PARSE_STREAM + "(InputStream input)",
+            "new " + CodeGenerator.UTIL_FILE_NAME + ".LineCursor(input)", False)
+
+        # Binary snapshots, which are read back without parsing any text
+        self._beginBlock("private static void " + CodeGenerator.DUMP_SNAPSHOT + "(" + self.bodyTypeName + " body, String filename)")
+        self._beginBlock("try")
+        writeLine(CodeGenerator.UTIL_FILE_NAME + ".writeSnapshot(body, filename);")
+        self._endBlock()
+        self._beginBlock("catch (Exception e)")
+        writeLine("System.err.println(e.getMessage());")
+        writeLine("System.exit(1);")
+        self._endBlock()
+        self._endBlock()
+        self.currentFile.writeNewline()
+
+        self._beginBlock("private static " + self.bodyTypeName + " " + CodeGenerator.LOAD_SNAPSHOT + "(String filename)")
+        self._beginBlock("try")
+        writeLine("return " + CodeGenerator.UTIL_FILE_NAME + ".readSnapshot(filename);")
+        self._endBlock()
+        self._beginBlock("catch (Exception e)")
+        writeLine("System.err.println(e.getMessage());")
+        writeLine("System.exit(1);")
+        self._endBlock()
+        writeLine("return null;")
+        self._endBlock()
+
+        if self._streamsRecords():
+            recordTypeName = self._parallelRecords()[0].getField(0).typeName()
+            self.currentFile.writeNewline()
+            self._beginBlock("private static Stream<" + recordTypeName + "> " + CodeGenerator.STREAM_RECORDS
+                + "(String filename)")
+            self._beginBlock("try")
+            writeLine("return " + CodeGenerator.UTIL_FILE_NAME + "." + CodeGenerator.STREAM_RECORDS + "(filename);")
+            self._endBlock()
+            self._beginBlock("catch (FileNotFoundException e)")
+            writeLine("System.err.println(\"Input file '\" + filename + \"' not found.\");")
+            writeLine("System.exit(1);")
+            self._endBlock()
+            self._beginBlock("catch (Exception e)")
+            writeLine("System.err.println(e.getMessage());")
+            writeLine("System.exit(1);")
+            self._endBlock()
+            writeLine("return null;")
+            self._endBlock()
+
+    def _generateCursorParserFunction( self, declaration, cursor, isFile ):
+        """ For generating a function parsing the body from the LineCursor of the given
+        expression, and reporting the errors of the parse. """
+        writeLine = self.currentFile.writeLine
+        self._beginBlock(declaration)
 
         # Main try block
         self._beginBlock("try")
         # Initial setup
-        writeLine("RandomAccessFile f = new RandomAccessFile(filename, \"r\");")
+        writeLine(CodeGenerator.UTIL_FILE_NAME + ".LineCursor f = " + cursor + ";")
         writeLine("int[] lineNumber = {1};")
         # Begin parsing
         writeLine(self.bodyTypeName + " result = "
@@ -357,15 +852,12 @@ class JavaGenerator(CodeGenerator):
         writeLine("return result;")
         self._endBlock()
 
-        # Catch file not found
-        self._beginBlock("catch (FileNotFoundException e)")
-        writeLine("System.err.println(\"Input file '\" + filename + \"' not found.\");")
-        writeLine("System.exit(1);")
-        self._endBlock()
-        # Catch random IOExceptions
-        self._beginBlock("catch (IOException e)")
-        writeLine("System.err.println(\"Could not open \\\"\" + filename + \"\\\".\");")
-        self._endBlock()
+        if isFile:
+            # Catch file not found
+            self._beginBlock("catch (FileNotFoundException e)")
+            writeLine("System.err.println(\"Input file '\" + filename + \"' not found.\");")
+            writeLine("System.exit(1);")
+            self._endBlock()
         # All other exception catches (EOF exception caught here)
         self._beginBlock("catch (Exception e)")
         writeLine("System.err.println(e.getMessage());")
@@ -379,6 +871,7 @@ class JavaGenerator(CodeGenerator):
 
         # End function declaration
         self._endBlock()
+        self.currentFile.writeNewline()
 
     ################################################################################
     # Helper Functions
@@ -394,6 +887,8 @@ class JavaGenerator(CodeGenerator):
         elif isBool(typeName):
             return "Boolean"
         elif isList(typeName):
+            if self._isUnboxed(listType(typeName)):
+                return self._primitiveTypeName(listType(typeName)) + "[]"
             return "ArrayList<" + self._getBasicTypeName(listType(typeName)) + ">"
         else:
             return None
@@ -404,11 +899,44 @@ class JavaGenerator(CodeGenerator):
         if typeName == None:
             typeName = field.typeName()
 
-        if field.isRepeating():
+        if field.isRepeating() and self._isUnboxed(field.typeName()):
+            # The number of instances sizes an array when it is known before parsing them
+            if field.isCountedRepetition():
+                return self._primitiveTypeName(field.typeName()) + "[]"
+            return CodeGenerator.UTIL_FILE_NAME + "." + self._snapshotFunctionSuffix(field.typeName()) + "List"
+        elif field.isRepeating():
             return "ArrayList<" + typeName + ">"
         else:
             return typeName
 
+    def _isUnboxed( self, typeName ):
+        """ Whether lists and repetitions of the given type hold unboxed values, which the
+        primitives option does for ints, floats and bools. """
+        return self.options.primitives and typeName in ( StringConstants.INTEGER_TYPE,
+            StringConstants.FLOAT_TYPE, StringConstants.BOOL_TYPE )
+
+    def _primitiveTypeName( self, typeName ):
+        """ The Java primitive type holding an unboxed value of the given type. """
+        return { StringConstants.INTEGER_TYPE: "int", StringConstants.FLOAT_TYPE: "float",
+            StringConstants.BOOL_TYPE: "boolean" }[typeName]
+
+    def _streamsRecords(self):
+        """ Whether the util file streams the records of the body, which are found by scanning the
+        file as for parsing them in parallel, and must be instances of a class. """
+        parallelRecords = self._parallelRecords()
+        return parallelRecords is not None and not parallelRecords[0].getField(0).isPrimitive()
+
+    def _signatureName( self, className, field ):
+        """ The name of the constant holding the lookahead signature of a repeated field. """
+        return "SIGNATURE_%s_%s" % ( className, field.name() )
+
+    def _signatureLiteral( self, signature ):
+        """ The expression constructing a LineSignature in the generated code. """
+        tokenTypes = ", ".join([ "\"%s\"" % tokenType for tokenType in signature.tokenTypes() ])
+        listType = "\"%s\"" % signature.listType() if signature.listType() else "null"
+        return "new LineSignature(new String[] { %s }, %s, %s)" % ( tokenTypes, listType,
+            "true" if signature.isSplit() else "false" )
+
     def _beginBlock( self, line ):
         self.currentFile.writeLine(line)
         self.currentFile.writeLine("{")
@@ -1,33 +1,158 @@
 from codegen import CodeGenerator
-from util import InstaParseFile
+from util import InstaParseFile, StringConstants
 
 def javagenStaticHelpers():
     helpers = """
-public static int javagenParseInt(String s, int[] lineNumber)
+// The tokens of a line split by the delimiter, walked by their offsets in the line so that ints,
+// floats and bools are parsed without creating a String for each of them. Like String.split, it
+// drops the empty tokens at the end of the line, unless the line has no delimiter at all.
+public static class Tokenizer
 {
-\ttry
+\tprivate final Matcher floatMatcher = FLOAT_PATTERN.matcher("");
+\tprivate String line;
+\tprivate int count;
+\tprivate int index;
+\t// The current token is line[start, end), and the next one starts at position
+\tprivate int start;
+\tprivate int end;
+\tprivate int position;
+
+\tpublic Tokenizer reset(String line)
 \t{
-\t\treturn Integer.parseInt(s);
+\t\tthis.line = line;
+\t\tcount = 0;
+\t\tindex = 0;
+\t\tposition = 0;
+\t\tint tokens = 0;
+\t\tint tokenStart = 0;
+\t\twhile (true)
+\t\t{
+\t\t\tint delimiter = line.indexOf(DELIMITER, tokenStart);
+\t\t\tint tokenEnd = delimiter < 0 ? line.length() : delimiter;
+\t\t\ttokens += 1;
+\t\t\tif (tokenEnd > tokenStart)
+\t\t\t\tcount = tokens;
+\t\t\tif (delimiter < 0)
+\t\t\t\tbreak;
+\t\t\ttokenStart = delimiter + DELIMITER.length();
+\t\t}
+\t\t// A line without the delimiter is a single token, even when empty
+\t\tif (tokens == 1)
+\t\t\tcount = 1;
+\t\treturn this;
 \t}
-\tcatch (NumberFormatException e)
+
+\t// Makes the whole line the current and only token
+\tpublic void select(String line)
 \t{
-\t\tthrow new NumberFormatException(
-\t\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse \\"" + s + "\\" as int.");
+\t\tthis.line = line;
+\t\tcount = 1;
+\t\tindex = 1;
+\t\tstart = 0;
+\t\tend = line.length();
+\t}
+
+\tpublic int count()
+\t{
+\t\treturn count;
+\t}
+
+\tpublic int remaining()
+\t{
+\t\treturn count - index;
+\t}
+
+\t// Moves on to the next token
+\tpublic void next()
+\t{
+\t\tstart = position;
+\t\tint delimiter = line.indexOf(DELIMITER, start);
+\t\tend = delimiter < 0 ? line.length() : delimiter;
+\t\tposition = end + DELIMITER.length();
+\t\tindex += 1;
 \t}
 }
 
-public static boolean javagenParseBool(String s, int[] lineNumber)
+private static NumberFormatException parseError(String s, int start, int end, String typeName, int[] lineNumber)
 {
-\tif (s.equals("1") || s.toLowerCase().equals("true"))
+\treturn new NumberFormatException(
+\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse \\"" + s.substring(start, end) + "\\" as " + typeName + ".");
+}
+
+// Parses s[start, end) as Integer.parseInt does
+public static int javagenParseInt(String s, int start, int end, int[] lineNumber)
+{
+\tint i = start;
+\tboolean negative = false;
+\tif (i < end && (s.charAt(i) == '-' || s.charAt(i) == '+'))
+\t{
+\t\tnegative = s.charAt(i) == '-';
+\t\ti += 1;
+\t}
+\tif (i == end)
+\t\tthrow parseError(s, start, end, "int", lineNumber);
+\t// Accumulated negatively, as Integer.MIN_VALUE has no positive counterpart
+\tint limit = negative ? Integer.MIN_VALUE : -Integer.MAX_VALUE;
+\tint result = 0;
+\tfor (; i < end; i++)
+\t{
+\t\tint digit = Character.digit(s.charAt(i), 10);
+\t\tif (digit < 0 || result < limit / 10)
+\t\t\tthrow parseError(s, start, end, "int", lineNumber);
+\t\tresult *= 10;
+\t\tif (result < limit + digit)
+\t\t\tthrow parseError(s, start, end, "int", lineNumber);
+\t\tresult -= digit;
+\t}
+\treturn negative ? result : -result;
+}
+
+public static int javagenParseInt(String s, int[] lineNumber)
+{
+\treturn javagenParseInt(s, 0, s.length(), lineNumber);
+}
+
+public static int javagenParseInt(Tokenizer tokens, int[] lineNumber)
+{
+\ttokens.next();
+\treturn javagenParseInt(tokens.line, tokens.start, tokens.end, lineNumber);
+}
+
+// Whether s[start, end) is the given lower case word, ignoring case
+private static boolean equalsIgnoreCase(String s, int start, int end, String word)
+{
+\tif (end - start != word.length())
+\t\treturn false;
+\tfor (int i = 0; i < word.length(); i++)
+\t{
+\t\tif (Character.toLowerCase(s.charAt(start + i)) != word.charAt(i))
+\t\t\treturn false;
+\t}
+\treturn true;
+}
+
+public static boolean javagenParseBool(String s, int start, int end, int[] lineNumber)
+{
+\tif ((end - start == 1 && s.charAt(start) == '1') || equalsIgnoreCase(s, start, end, "true"))
 \t{
 \t\treturn true;
 \t}
-\telse if (s.equals("0") || s.toLowerCase().equals("false"))
+\telse if ((end - start == 1 && s.charAt(start) == '0') || equalsIgnoreCase(s, start, end, "false"))
 \t{
 \t\treturn false;
 \t}
-\tthrow new NumberFormatException(
-\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse \\"" + s + "\\" as bool.");
+\tthrow parseError(s, start, end, "bool", lineNumber);
+}
+
+public static boolean javagenParseBool(String s, int[] lineNumber)
+{
+\treturn javagenParseBool(s, 0, s.length(), lineNumber);
+}
+
+public static boolean javagenParseBool(Tokenizer tokens, int[] lineNumber)
+{
+\ttokens.next();
+\treturn javagenParseBool(tokens.line, tokens.start, tokens.end, lineNumber);
 }
 
 public static String javagenParseString(String s, int[] lineNumber)
@@ -35,100 +160,345 @@ public static String javagenParseString(String s, int[] lineNumber)
 \treturn s;
 }
 
-public static float javagenParseFloat(String s, int[] lineNumber)
+public static String javagenParseString(Tokenizer tokens, int[] lineNumber)
+{
+\ttokens.next();
+\treturn tokens.line.substring(tokens.start, tokens.end);
+}
+
+// Every power of ten up to 10^10 is exact as a float
+private static final float[] POWERS_OF_TEN = { 1e0f, 1e1f, 1e2f, 1e3f, 1e4f, 1e5f, 1e6f, 1e7f, 1e8f, 1e9f, 1e10f };
+
+// Parses s[start, end) as Float.parseFloat does
+public static float javagenParseFloat(String s, int start, int end, int[] lineNumber)
 {
+\t// A plain decimal whose digits make an int below 2^24 is exact as a float, so a single float
+\t// division by an exact power of ten rounds it as Float.parseFloat does
+\tint i = start;
+\tboolean negative = false;
+\tif (i < end && (s.charAt(i) == '-' || s.charAt(i) == '+'))
+\t{
+\t\tnegative = s.charAt(i) == '-';
+\t\ti += 1;
+\t}
+\tint mantissa = 0;
+\tint digits = 0;
+\tint fractionDigits = -1;
+\tfor (; i < end && mantissa < 1 << 24; i++)
+\t{
+\t\tchar c = s.charAt(i);
+\t\tif (c >= '0' && c <= '9')
+\t\t{
+\t\t\tmantissa = mantissa * 10 + (c - '0');
+\t\t\tdigits += 1;
+\t\t\tif (fractionDigits >= 0)
+\t\t\t\tfractionDigits += 1;
+\t\t}
+\t\telse if (c == '.' && fractionDigits < 0)
+\t\t{
+\t\t\tfractionDigits = 0;
+\t\t}
+\t\telse
+\t\t{
+\t\t\tbreak;
+\t\t}
+\t}
+\tif (i == end && digits > 0 && mantissa < 1 << 24 && fractionDigits < POWERS_OF_TEN.length)
+\t{
+\t\tfloat value = fractionDigits > 0 ? mantissa / POWERS_OF_TEN[fractionDigits] : mantissa;
+\t\treturn negative ? -value : value;
+\t}
+\t// Anything else, such as exponents, long mantissas and NaN, takes the slow path
 \ttry
 \t{
-\t\treturn Float.parseFloat(s);
+\t\treturn Float.parseFloat(s.substring(start, end));
 \t}
 \tcatch (NumberFormatException e)
 \t{
-\t\tthrow new NumberFormatException(
-\t\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse \\"" + s + "\\" as float.");
+\t\tthrow parseError(s, start, end, "float", lineNumber);
 \t}
 }
 
-public static ArrayList<Integer> javagenParseIntList(String[] strings, int[] lineNumber)
+public static float javagenParseFloat(String s, int[] lineNumber)
+{
+\treturn javagenParseFloat(s, 0, s.length(), lineNumber);
+}
+
+public static float javagenParseFloat(Tokenizer tokens, int[] lineNumber)
 {
-\tif (strings.length == 0)
+\ttokens.next();
+\treturn javagenParseFloat(tokens.line, tokens.start, tokens.end, lineNumber);
+}
+
+public static ArrayList<Integer> javagenParseIntList(Tokenizer tokens, int[] lineNumber)
+{
+\tif (tokens.remaining() == 0)
 \t\tthrow new NumberFormatException(
 \t\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse empty string as list.");
-\tArrayList<Integer> resval = new ArrayList<Integer>();
-\tfor (String s : strings)
-\t\tresval.add(javagenParseInt(s, lineNumber));
+\tArrayList<Integer> resval = new ArrayList<Integer>(tokens.remaining());
+\twhile (tokens.remaining() > 0)
+\t\tresval.add(javagenParseInt(tokens, lineNumber));
 \treturn resval;
 }
 
-public static ArrayList<Boolean> javagenParseBoolList(String[] strings, int[] lineNumber)
+public static ArrayList<Boolean> javagenParseBoolList(Tokenizer tokens, int[] lineNumber)
 {
-\tif (strings.length == 0)
+\tif (tokens.remaining() == 0)
 \t\tthrow new NumberFormatException(
 \t\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse empty string as list.");
-\tArrayList<Boolean> resval = new ArrayList<Boolean>();
-\tfor (String s : strings)
-\t\tresval.add(javagenParseBool(s, lineNumber));
+\tArrayList<Boolean> resval = new ArrayList<Boolean>(tokens.remaining());
+\twhile (tokens.remaining() > 0)
+\t\tresval.add(javagenParseBool(tokens, lineNumber));
 \treturn resval;
 }
 
-public static ArrayList<String> javagenParseStringList(String[] strings, int[] lineNumber)
+public static ArrayList<String> javagenParseStringList(Tokenizer tokens, int[] lineNumber)
 {
-\tif (strings.length == 0)
+\tif (tokens.remaining() == 0)
 \t\tthrow new NumberFormatException(
 \t\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse empty string as list.");
-\tArrayList<String> resval = new ArrayList<String>();
-\tfor (String s : strings)
-\t\tresval.add(javagenParseString(s, lineNumber));
+\tArrayList<String> resval = new ArrayList<String>(tokens.remaining());
+\twhile (tokens.remaining() > 0)
+\t\tresval.add(javagenParseString(tokens, lineNumber));
 \treturn resval;
 }
 
-public static ArrayList<Float> javagenParseFloatList(String[] strings, int[] lineNumber)
+public static ArrayList<Float> javagenParseFloatList(Tokenizer tokens, int[] lineNumber)
 {
-\tif (strings.length == 0)
+\tif (tokens.remaining() == 0)
 \t\tthrow new NumberFormatException(
 \t\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse empty string as list.");
-\tArrayList<Float> resval = new ArrayList<Float>();
-\tfor (String s : strings)
-\t\tresval.add(javagenParseFloat(s, lineNumber));
+\tArrayList<Float> resval = new ArrayList<Float>(tokens.remaining());
+\twhile (tokens.remaining() > 0)
+\t\tresval.add(javagenParseFloat(tokens, lineNumber));
 \treturn resval;
 }
 
-public static String readLine(RandomAccessFile f, String className)
+public static class LineSignature
 {
-\ttry
+\tpublic final String[] tokenTypes;
+\tpublic final String listType;
+\tpublic final boolean isSplit;
+
+\tpublic LineSignature(String[] tokenTypes, String listType, boolean isSplit)
 \t{
-\t\tString result = f.readLine();
-\t\tif (result == null) throw new RuntimeException("Parser Error: Reached end of file while parsing object \\"" + className + "\\".");
-\t\treturn result;
+\t\tthis.tokenTypes = tokenTypes;
+\t\tthis.listType = listType;
+\t\tthis.isSplit = isSplit;
 \t}
-\tcatch (IOException e)
+}
+
+private static final Pattern FLOAT_PATTERN = Pattern.compile(
+\t"\\\\s*[-+]?(NaN|Infinity|((\\\\d+\\\\.?\\\\d*|\\\\.\\\\d+)([eE][-+]?\\\\d+)?[fFdD]?))\\\\s*");
+
+// Whether the current token looks like a value of the given type
+public static boolean tokenMatches(Tokenizer tokens, String tokenType)
+{
+\tString s = tokens.line;
+\tif (tokenType.equals("int"))
 \t{
-\t\tthrow new RuntimeException("IO Error: Unknown problem when reading input file.");
+\t\tint i = tokens.start;
+\t\tif (i < tokens.end && (s.charAt(i) == '-' || s.charAt(i) == '+'))
+\t\t\ti += 1;
+\t\tif (i == tokens.end)
+\t\t\treturn false;
+\t\tfor (; i < tokens.end; i++)
+\t\t{
+\t\t\tif (s.charAt(i) < '0' || s.charAt(i) > '9')
+\t\t\t\treturn false;
+\t\t}
+\t\treturn true;
 \t}
+\telse if (tokenType.equals("float"))
+\t\treturn tokens.floatMatcher.reset(s).region(tokens.start, tokens.end).matches();
+\telse if (tokenType.equals("bool"))
+\t\treturn (tokens.end - tokens.start == 1 && (s.charAt(tokens.start) == '1' || s.charAt(tokens.start) == '0'))
+\t\t\t|| equalsIgnoreCase(s, tokens.start, tokens.end, "true") || equalsIgnoreCase(s, tokens.start, tokens.end, "false");
+\treturn true;
 }
 
-public static void seek(RandomAccessFile f, long pos)
+public static boolean lineMatches(String line, LineSignature signature, Tokenizer tokens)
 {
-\ttry
+\tif (!signature.isSplit)
 \t{
-\t\tf.seek(pos);
+\t\tif (signature.tokenTypes.length == 0)
+\t\t\treturn line.trim().equals("");
+\t\ttokens.select(line);
+\t\treturn tokenMatches(tokens, signature.tokenTypes[0]);
 \t}
-\tcatch (IOException e)
+\ttokens.reset(line);
+\tint numTokenTypes = signature.tokenTypes.length;
+\tif (signature.listType == null ? tokens.count() != numTokenTypes : tokens.count() <= numTokenTypes)
+\t\treturn false;
+\tfor (int i = 0; i < tokens.count(); i++)
 \t{
-\t\tthrow new RuntimeException("IO Error: Unknown problem when reading input file.");
+\t\tString tokenType = i < numTokenTypes ? signature.tokenTypes[i] : signature.listType;
+\t\ttokens.next();
+\t\tif (!tokenMatches(tokens, tokenType))
+\t\t\treturn false;
 \t}
+\treturn true;
 }
 
-public static long getFilePointer(RandomAccessFile f)
+public static class LineCursor
 {
-\ttry
+\t// Hands out the lines of an input stream, which need not support seeking. Positions are line
+\t// indices, and the lines from the most recently released position on are kept in a buffer so
+\t// that the parser can return to them. Lines before it are discarded.
+\tprivate static final int BUFFER_SIZE = 1 << 16;
+\t// Released lines are only discarded once they make up half of the buffer, so that releasing
+\t// after every record does not shift the lines after it each time
+\tprivate static final int MIN_DISCARDED = 1024;
+\tprivate final BufferedReader reader;
+\tprivate final ArrayList<String> lines = new ArrayList<String>();
+\t// Shared by the parsers of every object, as each is done with a line before reading the next
+\tprivate final Tokenizer tokenizer = new Tokenizer();
+\t// The position of the first buffered line
+\tprivate long base = 0;
+\tprivate long position = 0;
+\tprivate long released = 0;
+
+\tpublic LineCursor(InputStream input)
 \t{
-\t\treturn f.getFilePointer();
+\t\t// The bytes are decoded as UTF-8 a whole buffer at a time
+\t\treader = new BufferedReader(new InputStreamReader(decompressed(input), StandardCharsets.UTF_8), BUFFER_SIZE);
 \t}
-\tcatch (IOException e)
+
+\t// For the cursors reading their lines from elsewhere
+\tprotected LineCursor()
+\t{
+\t\treader = null;
+\t}
+
+\t// Decompresses a gzip compressed input, as told by the two bytes it starts with, while it is read
+\tprivate static InputStream decompressed(InputStream input)
+\t{
+\t\ttry
+\t\t{
+\t\t\tBufferedInputStream buffered = new BufferedInputStream(input, BUFFER_SIZE);
+\t\t\tbuffered.mark(2);
+\t\t\tint first = buffered.read();
+\t\t\tint second = buffered.read();
+\t\t\tbuffered.reset();
+\t\t\tif (first == 0x1f && second == 0x8b)
+\t\t\t\treturn new GZIPInputStream(buffered, BUFFER_SIZE);
+\t\t\treturn buffered;
+\t\t}
+\t\tcatch (IOException e)
+\t\t{
+\t\t\tthrow new RuntimeException("IO Error: Unknown problem when reading input file.");
+\t\t}
+\t}
+
+\tpublic String readLine()
+\t{
+\t\tif (!fill(position))
+\t\t\treturn null;
+\t\tString line = lines.get((int) (position - base));
+\t\tposition += 1;
+\t\treturn line;
+\t}
+
+\tpublic String peekLine(int offset)
+\t{
+\t\tif (!fill(position + offset))
+\t\t\treturn null;
+\t\treturn lines.get((int) (position + offset - base));
+\t}
+
+\tpublic Tokenizer tokenize(String line)
+\t{
+\t\treturn tokenizer.reset(line);
+\t}
+
+\tpublic long mark()
+\t{
+\t\treturn position;
+\t}
+
+\tpublic void reset(long pos)
+\t{
+\t\tposition = pos;
+\t}
+
+\tpublic void release(long pos)
 \t{
-\t\tthrow new RuntimeException("IO Error: Unknown problem when reading input file.");
+\t\treleased = pos;
+\t}
+
+\t// The number of lines between two positions
+\tpublic long linesBetween(long from, long to)
+\t{
+\t\treturn to - from;
+\t}
+
+\tpublic void close()
+\t{
+\t\ttry
+\t\t{
+\t\t\treader.close();
+\t\t}
+\t\tcatch (IOException e)
+\t\t{
+\t\t\tthrow new RuntimeException("IO Error: Unknown problem when reading input file.");
+\t\t}
+\t}
+
+\t// Reads lines until there is one at the given position. Returns false at the end of the input.
+\tprivate boolean fill(long pos)
+\t{
+\t\tint discarded = (int) (Math.min(released, position) - base);
+\t\tif (discarded >= MIN_DISCARDED && discarded * 2 >= lines.size())
+\t\t{
+\t\t\tlines.subList(0, discarded).clear();
+\t\t\tbase += discarded;
+\t\t}
+\t\ttry
+\t\t{
+\t\t\twhile (pos - base >= lines.size())
+\t\t\t{
+\t\t\t\tString line = reader.readLine();
+\t\t\t\tif (line == null)
+\t\t\t\t\treturn false;
+\t\t\t\tlines.add(line);
+\t\t\t}
+\t\t}
+\t\tcatch (IOException e)
+\t\t{
+\t\t\tthrow new RuntimeException("IO Error: Unknown problem when reading input file.");
+\t\t}
+\t\treturn true;
 \t}
 }
+
+public static boolean hasNextInstance(LineCursor f, LineSignature signature, boolean isSeparated)
+{
+\tif (isSeparated)
+\t{
+\t\tString separator = f.peekLine(0);
+\t\tif (separator == null || !separator.trim().equals(""))
+\t\t\treturn false;
+\t}
+\tString line = f.peekLine(isSeparated ? 1 : 0);
+\treturn line != null && lineMatches(line, signature, f.tokenizer);
+}
+
+public static String readLine(LineCursor f, String className)
+{
+\tString result = f.readLine();
+\tif (result == null) throw new RuntimeException("Parser Error: Reached end of file while parsing object \\"" + className + "\\".");
+\treturn result;
+}
+
+public static void seek(LineCursor f, long pos)
+{
+\tf.reset(pos);
+}
+
+public static long getFilePointer(LineCursor f)
+{
+\treturn f.mark();
+}
 """
 
     helpers = helpers.replace("javagenParseIntList", CodeGenerator.PARSE_INT_LIST)
@@ -144,3 +514,754 @@ public static long getFilePointer(RandomAccessFile f)
     helpers = helpers.replace( "\t", InstaParseFile.indentString )
 
     return helpers
+
+# The unboxed types stored by the primitives option, with the names of their lists and parsers
+PRIMITIVE_LISTS = [
+    { "typeName": StringConstants.INTEGER_TYPE, "type": "int", "boxed": "Integer", "name": "Int",
+        "parse": CodeGenerator.PARSE_INT },
+    { "typeName": StringConstants.FLOAT_TYPE, "type": "float", "boxed": "Float", "name": "Float",
+        "parse": CodeGenerator.PARSE_FLOAT },
+    { "typeName": StringConstants.BOOL_TYPE, "type": "boolean", "boxed": "Boolean", "name": "Bool",
+        "parse": CodeGenerator.PARSE_BOOL }
+]
+
+def javagenPrimitiveHelpers():
+    """ The growable lists of unboxed values held by the fields repeated an unknown number of
+    times, and the parsers of list fields into arrays sized by their number of tokens. """
+    template = """
+// A growable list of %(type)ss, held by the fields repeated an unknown number of times. Unlike an
+// ArrayList<%(boxed)s>, it stores its values unboxed.
+public static class %(name)sList
+{
+\tprivate %(type)s[] values;
+\tprivate int size;
+
+\tpublic %(name)sList()
+\t{
+\t\tvalues = new %(type)s[16];
+\t}
+
+\t// Holds the given values, without copying them
+\tpublic %(name)sList(%(type)s[] values)
+\t{
+\t\tthis.values = values;
+\t\tsize = values.length;
+\t}
+
+\tpublic int size()
+\t{
+\t\treturn size;
+\t}
+
+\tpublic %(type)s get(int index)
+\t{
+\t\tif (index < 0 || index >= size)
+\t\t\tthrow new IndexOutOfBoundsException("Index: " + index + ", Size: " + size);
+\t\treturn values[index];
+\t}
+
+\tpublic void add(%(type)s value)
+\t{
+\t\tif (size == values.length)
+\t\t\tvalues = Arrays.copyOf(values, Math.max(16, size * 2));
+\t\tvalues[size++] = value;
+\t}
+
+\t// A copy of the values, sized exactly
+\tpublic %(type)s[] toArray()
+\t{
+\t\treturn Arrays.copyOf(values, size);
+\t}
+}
+
+public static %(type)s[] %(parse)sArray(Tokenizer tokens, int[] lineNumber)
+{
+\tif (tokens.remaining() == 0)
+\t\tthrow new NumberFormatException(
+\t\t\t"Parser Error on line " + lineNumber[0] + ": Could not parse empty string as list.");
+\t%(type)s[] values = new %(type)s[tokens.remaining()];
+\tfor (int i = 0; i < values.length; i++)
+\t\tvalues[i] = %(parse)s(tokens, lineNumber);
+\treturn values;
+}
+"""
+    helpers = "".join([ template % primitive for primitive in PRIMITIVE_LISTS ])
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def javagenMappedHelpers():
+    """ The cursor reading the lines of an input file through memory mappings of it, used by parse
+    with the mmap option and by streamRecords. """
+    helpers = """
+// Hands out the lines of a file through memory mappings of it, so that the file need not fit in the
+// heap. Positions are byte offsets, so returning to one only resets the offset, and nothing is
+// released as the operating system pages the file in and out. Files over 1 GB are mapped in
+// segments, as a single mapping holds at most 2 GB.
+public static class MappedLineCursor extends LineCursor
+{
+\tprivate static final int SEGMENT_BITS = 30;
+\tprivate static final long SEGMENT_MASK = (1L << SEGMENT_BITS) - 1;
+\tprivate final MappedByteBuffer[] segments;
+\tprivate final long size;
+\tprivate long position = 0;
+\t// Holds the bytes of the line being decoded
+\tprivate byte[] lineBytes = new byte[256];
+\t// The line decoded last, from cachedStart up to cachedNext, which the parser usually reads
+\t// right after the lookahead peeked at it
+\tprivate long cachedStart = -1;
+\tprivate long cachedNext;
+\tprivate String cachedLine;
+
+\tprivate MappedLineCursor(String filename) throws IOException
+\t{
+\t\tRandomAccessFile file = new RandomAccessFile(filename, "r");
+\t\ttry
+\t\t{
+\t\t\tFileChannel channel = file.getChannel();
+\t\t\tsize = channel.size();
+\t\t\tsegments = new MappedByteBuffer[(int) ((size + SEGMENT_MASK) >>> SEGMENT_BITS)];
+\t\t\tfor (int i = 0; i < segments.length; i++)
+\t\t\t{
+\t\t\t\tlong start = (long) i << SEGMENT_BITS;
+\t\t\t\tsegments[i] = channel.map(FileChannel.MapMode.READ_ONLY, start, Math.min(size - start, 1L << SEGMENT_BITS));
+\t\t\t}
+\t\t}
+\t\tfinally
+\t\t{
+\t\t\t// The mappings stay valid once the file is closed
+\t\t\tfile.close();
+\t\t}
+\t}
+
+\t// A cursor of its own over the mappings of another, so that threads can read the file at once
+\tprivate MappedLineCursor(MappedLineCursor other)
+\t{
+\t\tsegments = other.segments;
+\t\tsize = other.size;
+\t}
+
+\tpublic MappedLineCursor copy()
+\t{
+\t\treturn new MappedLineCursor(this);
+\t}
+
+\t// Maps the file, unless it is gzip compressed, in which case it is decompressed while it is read
+\tpublic static LineCursor open(String filename) throws IOException
+\t{
+\t\tMappedLineCursor cursor = new MappedLineCursor(filename);
+\t\tif (cursor.size >= 2 && cursor.byteAt(0) == (byte) 0x1f && cursor.byteAt(1) == (byte) 0x8b)
+\t\t\treturn new LineCursor(new FileInputStream(filename));
+\t\treturn cursor;
+\t}
+
+\tprivate byte byteAt(long pos)
+\t{
+\t\treturn segments[(int) (pos >>> SEGMENT_BITS)].get((int) (pos & SEGMENT_MASK));
+\t}
+
+\t// The offset of the end of the line starting at the given offset. Like BufferedReader.readLine,
+\t// lines end with a line feed, a carriage return or both.
+\tprivate long lineEnd(long start)
+\t{
+\t\tlong end = start;
+\t\twhile (end < size)
+\t\t{
+\t\t\tbyte b = byteAt(end);
+\t\t\tif (b == '\\n' || b == '\\r')
+\t\t\t\tbreak;
+\t\t\tend += 1;
+\t\t}
+\t\treturn end;
+\t}
+
+\t// The offset of the line following the end of a line
+\tprivate long nextLine(long end)
+\t{
+\t\tif (end + 1 < size && byteAt(end) == '\\r' && byteAt(end + 1) == '\\n')
+\t\t\treturn end + 2;
+\t\treturn end < size ? end + 1 : end;
+\t}
+
+\t// Whether the line between two offsets holds nothing but whitespace, like String.trim tells
+\tprivate boolean isBlank(long start, long end)
+\t{
+\t\tfor (long pos = start; pos < end; pos++)
+\t\t\tif ((byteAt(pos) & 0xff) > ' ')
+\t\t\t\treturn false;
+\t\treturn true;
+\t}
+
+\t// Decodes the line starting at the given offset. Returns false at the end of the file.
+\tprivate boolean decode(long start)
+\t{
+\t\tif (start == cachedStart)
+\t\t\treturn true;
+\t\tif (start >= size)
+\t\t\treturn false;
+\t\tlong end = lineEnd(start);
+\t\tint length = (int) (end - start);
+\t\tif (length > lineBytes.length)
+\t\t\tlineBytes = new byte[Math.max(length, lineBytes.length * 2)];
+\t\tfor (int i = 0; i < length; i++)
+\t\t\tlineBytes[i] = byteAt(start + i);
+\t\tcachedLine = new String(lineBytes, 0, length, StandardCharsets.UTF_8);
+\t\tcachedStart = start;
+\t\tcachedNext = nextLine(end);
+\t\treturn true;
+\t}
+
+\t@Override
+\tpublic String readLine()
+\t{
+\t\tif (!decode(position))
+\t\t\treturn null;
+\t\tposition = cachedNext;
+\t\treturn cachedLine;
+\t}
+
+\t@Override
+\tpublic String peekLine(int offset)
+\t{
+\t\tlong pos = position;
+\t\tfor (int i = 0; i < offset; i++)
+\t\t{
+\t\t\tif (!decode(pos))
+\t\t\t\treturn null;
+\t\t\tpos = cachedNext;
+\t\t}
+\t\treturn decode(pos) ? cachedLine : null;
+\t}
+
+\t@Override
+\tpublic long mark()
+\t{
+\t\treturn position;
+\t}
+
+\t@Override
+\tpublic void reset(long pos)
+\t{
+\t\tposition = pos;
+\t}
+
+\t@Override
+\tpublic void release(long pos)
+\t{
+\t}
+
+\t@Override
+\tpublic void close()
+\t{
+\t}
+
+\t@Override
+\tpublic long linesBetween(long from, long to)
+\t{
+\t\tlong lines = 0;
+\t\tfor (long pos = from; pos < to; pos = nextLine(lineEnd(pos)))
+\t\t\tlines += 1;
+\t\treturn lines;
+\t}
+}
+"""
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def javagenRecordHelpers():
+    """ The helpers splitting the records of a mapped input file between threads, used by
+    streamRecords. """
+    helpers = """
+// The byte offsets and line numbers of the lines that may start a record, see findRecordStarts
+public static class RecordStarts
+{
+\tpublic long[] offsets = new long[1024];
+\tpublic int[] lineNumbers = new int[1024];
+\tpublic int count = 0;
+\t// The offset following the last line that is not empty
+\tpublic long end;
+
+\tprivate void add(long offset, int lineNumber)
+\t{
+\t\tif (count == offsets.length)
+\t\t{
+\t\t\toffsets = Arrays.copyOf(offsets, count * 2);
+\t\t\tlineNumbers = Arrays.copyOf(lineNumbers, count * 2);
+\t\t}
+\t\toffsets[count] = offset;
+\t\tlineNumbers[count] = lineNumber;
+\t\tcount += 1;
+\t}
+}
+
+// Scans the mapped file from the given offset, the line of the given number, on for the lines that
+// may start a record: every recordLines lines or, if recordLines is 0, the first line and those
+// following an empty line. At most maxRecords of them are kept, and none from the empty lines
+// ending the file on.
+public static RecordStarts findRecordStarts(MappedLineCursor f, long position, int lineNumber, int recordLines, int maxRecords)
+{
+\tRecordStarts starts = new RecordStarts();
+\tstarts.end = position;
+\tint numStarts = 0;
+\tboolean isAfterEmptyLine = false;
+\tfor (long line = 0; position < f.size; line++)
+\t{
+\t\tlong start = position;
+\t\tlong end = f.lineEnd(start);
+\t\tboolean isBlank = f.isBlank(start, end);
+\t\tboolean isStart = recordLines > 0 ? line % recordLines == 0 : line == 0 || (isAfterEmptyLine && !isBlank);
+\t\tif (isStart && starts.count < maxRecords)
+\t\t\tstarts.add(start, (int) (lineNumber + line));
+\t\tposition = f.nextLine(end);
+\t\tif (end > start)
+\t\t{
+\t\t\tnumStarts = starts.count;
+\t\t\tstarts.end = position;
+\t\t}
+\t\tisAfterEmptyLine = isBlank;
+\t}
+\tstarts.count = numStarts;
+\treturn starts;
+}
+
+// Whether a record parsed from the start of the given index is followed by the start of the next
+// one, past the empty line separating them if there is one, or by nothing but empty lines if it is
+// the last one
+public static boolean endsRecord(MappedLineCursor f, RecordStarts starts, int index, boolean isSeparated)
+{
+\tif (index + 1 == starts.count)
+\t{
+\t\tString line;
+\t\twhile ((line = f.readLine()) != null)
+\t\t\tif (!line.equals(""))
+\t\t\t\treturn false;
+\t\treturn true;
+\t}
+\tif (isSeparated)
+\t{
+\t\tString separator = f.readLine();
+\t\tif (separator == null || !separator.trim().equals(""))
+\t\t\treturn false;
+\t}
+\treturn f.mark() == starts.offsets[index + 1];
+}
+
+public interface RecordParser<T>
+{
+\t// Parses the record of the given index from its start, or returns null if it does not end where
+\t// the next one starts
+\tT parse(MappedLineCursor f, RecordStarts starts, int index);
+}
+
+// Hands out the records from their starts found by findRecordStarts, in order. Splitting it hands
+// the first half of its records to another spliterator, which reads them through a cursor of its
+// own over the same mappings, so that a parallel stream parses records on every core.
+public static class RecordSpliterator<T> implements Spliterator<T>
+{
+\tprivate final MappedLineCursor f;
+\tprivate final RecordStarts starts;
+\tprivate final RecordParser<T> parser;
+\tprivate int index;
+\tprivate final int end;
+
+\tpublic RecordSpliterator(MappedLineCursor f, RecordStarts starts, int index, int end, RecordParser<T> parser)
+\t{
+\t\tthis.f = f;
+\t\tthis.starts = starts;
+\t\tthis.index = index;
+\t\tthis.end = end;
+\t\tthis.parser = parser;
+\t}
+
+\t@Override
+\tpublic boolean tryAdvance(Consumer<? super T> action)
+\t{
+\t\tif (index >= end)
+\t\t\treturn false;
+\t\tT record = parser.parse(f, starts, index);
+\t\tindex += 1;
+\t\taction.accept(record);
+\t\treturn true;
+\t}
+
+\t@Override
+\tpublic Spliterator<T> trySplit()
+\t{
+\t\tif (end - index < 2)
+\t\t\treturn null;
+\t\tint middle = (index + end) >>> 1;
+\t\tRecordSpliterator<T> prefix = new RecordSpliterator<T>(f.copy(), starts, index, middle, parser);
+\t\tindex = middle;
+\t\treturn prefix;
+\t}
+
+\t@Override
+\tpublic long estimateSize()
+\t{
+\t\treturn end - index;
+\t}
+
+\t@Override
+\tpublic int characteristics()
+\t{
+\t\treturn ORDERED | SIZED | SUBSIZED | IMMUTABLE;
+\t}
+}
+"""
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def javagenStatsHelpers():
+    """ The counters of the parser of each class, updated by the instrumented parsers, and
+    dumpStats, which reports them. """
+    helpers = """
+public static class ParserStats
+{
+\t// The counters of the parser of a class. Lines only count those of successful calls. The
+\t// exclusive time leaves out the time spent in the instrumented parsers it called.
+\tpublic final String className;
+\tpublic long calls = 0;
+\tpublic long lines = 0;
+\tpublic double inclusiveSeconds = 0;
+\tpublic double exclusiveSeconds = 0;
+\tpublic long rollbacks = 0;
+\tpublic long exceptions = 0;
+
+\tprivate static final ArrayList<ParserStats> all = new ArrayList<ParserStats>();
+\t// The start of each call in progress and the time spent in the calls nested in it
+\tprivate static final ArrayList<long[]> callStack = new ArrayList<long[]>();
+
+\tprivate ParserStats(String className)
+\t{
+\t\tthis.className = className;
+\t}
+
+\tpublic static ParserStats get(String className)
+\t{
+\t\tfor (ParserStats stats : all)
+\t\t{
+\t\t\tif (stats.className.equals(className))
+\t\t\t\treturn stats;
+\t\t}
+\t\tParserStats stats = new ParserStats(className);
+\t\tall.add(stats);
+\t\treturn stats;
+\t}
+
+\tpublic void begin()
+\t{
+\t\tcalls += 1;
+\t\tcallStack.add(new long[] {System.nanoTime(), 0});
+\t}
+
+\tpublic void end()
+\t{
+\t\tlong[] call = callStack.remove(callStack.size() - 1);
+\t\tlong elapsed = System.nanoTime() - call[0];
+\t\tinclusiveSeconds += elapsed / 1e9;
+\t\texclusiveSeconds += (elapsed - call[1]) / 1e9;
+\t\tif (!callStack.isEmpty())
+\t\t\tcallStack.get(callStack.size() - 1)[1] += elapsed;
+\t}
+}
+
+// Prints the counters of each class as JSON, or writes them to the file of the given name.
+public static void dumpStats(String filename)
+{
+\tStringBuilder json = new StringBuilder("{\\n");
+\tfor (int i = 0; i < ParserStats.all.size(); i++)
+\t{
+\t\tParserStats stats = ParserStats.all.get(i);
+\t\tjson.append("  \\"" + stats.className + "\\": {\\"calls\\": " + stats.calls
+\t\t\t+ ", \\"lines\\": " + stats.lines
+\t\t\t+ ", \\"inclusiveSeconds\\": " + stats.inclusiveSeconds
+\t\t\t+ ", \\"exclusiveSeconds\\": " + stats.exclusiveSeconds
+\t\t\t+ ", \\"rollbacks\\": " + stats.rollbacks
+\t\t\t+ ", \\"exceptions\\": " + stats.exceptions + "}"
+\t\t\t+ (i + 1 < ParserStats.all.size() ? "," : "") + "\\n");
+\t}
+\tjson.append("}\\n");
+\tif (filename == null)
+\t{
+\t\tSystem.out.print(json);
+\t\treturn;
+\t}
+\ttry
+\t{
+\t\tFileWriter output = new FileWriter(filename);
+\t\toutput.write(json.toString());
+\t\toutput.close();
+\t}
+\tcatch (IOException e)
+\t{
+\t\tthrow new RuntimeException("IO Error: Could not write the parser stats to '" + filename + "'.");
+\t}
+}
+"""
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def javagenSnapshotHelpers(primitives):
+    """ The writer and reader of the fields of binary snapshots, used by the dumpX and loadX
+    methods generated for each class. With primitives, they also write the arrays and growable
+    lists of unboxed values, and read them back as arrays. """
+    primitiveWriter = """
+\tpublic void write%(name)sList(%(type)s[] values) throws IOException
+\t{
+\t\twriteCount(values.length);
+\t\tfor (%(type)s value : values)
+\t\t\twrite%(name)s(value);
+\t}
+
+\tpublic void write%(name)sList(%(name)sList values) throws IOException
+\t{
+\t\twriteCount(values.size());
+\t\tfor (int i = 0; i < values.size(); i++)
+\t\t\twrite%(name)s(values.get(i));
+\t}
+"""
+    primitiveReader = """
+\tpublic %(type)s[] read%(name)sArray()
+\t{
+\t\tint count = readCount();
+\t\t// Every value takes at least a byte
+\t\tif (count > buffer.remaining())
+\t\t\tthrow new BufferUnderflowException();
+\t\t%(type)s[] values = new %(type)s[count];
+\t\tfor (int i = 0; i < count; i++)
+\t\t\tvalues[i] = read%(name)s();
+\t\treturn values;
+\t}
+"""
+    helpers = """
+private static final byte[] SNAPSHOT_MAGIC = "%(magic)s".getBytes(StandardCharsets.US_ASCII);
+
+// Writes the fields of a binary snapshot, little-endian, through a buffer.
+public static class SnapshotWriter
+{
+\tprivate final OutputStream output;
+\tprivate final ByteBuffer buffer = ByteBuffer.allocate(1 << 16).order(ByteOrder.LITTLE_ENDIAN);
+
+\tpublic SnapshotWriter(OutputStream output)
+\t{
+\t\tthis.output = output;
+\t}
+
+\tprivate void reserve(int size) throws IOException
+\t{
+\t\tif (buffer.remaining() < size)
+\t\t\tflush();
+\t}
+
+\tpublic void flush() throws IOException
+\t{
+\t\toutput.write(buffer.array(), 0, buffer.position());
+\t\tbuffer.clear();
+\t}
+
+\tpublic void writeBytes(byte[] bytes) throws IOException
+\t{
+\t\tif (bytes.length > buffer.capacity())
+\t\t{
+\t\t\tflush();
+\t\t\toutput.write(bytes);
+\t\t\treturn;
+\t\t}
+\t\treserve(bytes.length);
+\t\tbuffer.put(bytes);
+\t}
+
+\t// Ints are written as 64 bits and floats as doubles, which the other languages parse them into
+\tpublic void writeInt(int value) throws IOException
+\t{
+\t\treserve(8);
+\t\tbuffer.putLong(value);
+\t}
+
+\tpublic void writeFloat(float value) throws IOException
+\t{
+\t\treserve(8);
+\t\tbuffer.putDouble(value);
+\t}
+
+\tpublic void writeBool(boolean value) throws IOException
+\t{
+\t\treserve(1);
+\t\tbuffer.put((byte) (value ? 1 : 0));
+\t}
+
+\tpublic void writeCount(int count) throws IOException
+\t{
+\t\treserve(4);
+\t\tbuffer.putInt(count);
+\t}
+
+\tpublic void writeString(String value) throws IOException
+\t{
+\t\tbyte[] bytes = value.getBytes(StandardCharsets.UTF_8);
+\t\twriteCount(bytes.length);
+\t\twriteBytes(bytes);
+\t}
+
+\tpublic void writeIntList(ArrayList<Integer> values) throws IOException
+\t{
+\t\twriteCount(values.size());
+\t\tfor (int value : values)
+\t\t\twriteInt(value);
+\t}
+
+\tpublic void writeFloatList(ArrayList<Float> values) throws IOException
+\t{
+\t\twriteCount(values.size());
+\t\tfor (float value : values)
+\t\t\twriteFloat(value);
+\t}
+
+\tpublic void writeBoolList(ArrayList<Boolean> values) throws IOException
+\t{
+\t\twriteCount(values.size());
+\t\tfor (boolean value : values)
+\t\t\twriteBool(value);
+\t}
+
+\tpublic void writeStringList(ArrayList<String> values) throws IOException
+\t{
+\t\twriteCount(values.size());
+\t\tfor (String value : values)
+\t\t\twriteString(value);
+\t}
+%(primitiveWriters)s}
+
+// Reads the fields of a binary snapshot from a buffer holding all of it. Reading past its end
+// throws a BufferUnderflowException.
+public static class SnapshotReader
+{
+\tprivate final ByteBuffer buffer;
+
+\tpublic SnapshotReader(ByteBuffer buffer)
+\t{
+\t\tthis.buffer = buffer.order(ByteOrder.LITTLE_ENDIAN);
+\t}
+
+\t// Skips the given bytes if the snapshot continues with them
+\tpublic boolean readPrefix(byte[] prefix)
+\t{
+\t\tif (buffer.remaining() < prefix.length)
+\t\t\treturn false;
+\t\tfor (int i = 0; i < prefix.length; i++)
+\t\t{
+\t\t\tif (buffer.get(buffer.position() + i) != prefix[i])
+\t\t\t\treturn false;
+\t\t}
+\t\tbuffer.position(buffer.position() + prefix.length);
+\t\treturn true;
+\t}
+
+\tpublic boolean hasRemaining()
+\t{
+\t\treturn buffer.hasRemaining();
+\t}
+
+\t// A count read from a corrupt snapshot must not reserve more than it can hold
+\tpublic int capacity(int count)
+\t{
+\t\treturn Math.min(count, buffer.remaining());
+\t}
+
+\tpublic int readInt()
+\t{
+\t\tlong value = buffer.getLong();
+\t\tif ((int) value != value)
+\t\t\tthrow new RuntimeException("Parser Error: An int of the binary snapshot does not fit in an int.");
+\t\treturn (int) value;
+\t}
+
+\tpublic float readFloat()
+\t{
+\t\treturn (float) buffer.getDouble();
+\t}
+
+\tpublic boolean readBool()
+\t{
+\t\treturn buffer.get() != 0;
+\t}
+
+\tpublic int readCount()
+\t{
+\t\tlong count = buffer.getInt() & 0xFFFFFFFFL;
+\t\tif (count > Integer.MAX_VALUE)
+\t\t\tthrow new RuntimeException("Parser Error: A list of the binary snapshot is too long to be read.");
+\t\treturn (int) count;
+\t}
+
+\tpublic String readString()
+\t{
+\t\tint length = readCount();
+\t\tif (length > buffer.remaining())
+\t\t\tthrow new BufferUnderflowException();
+\t\tbyte[] bytes = new byte[length];
+\t\tbuffer.get(bytes);
+\t\treturn new String(bytes, StandardCharsets.UTF_8);
+\t}
+
+\tpublic ArrayList<Integer> readIntList()
+\t{
+\t\tint count = readCount();
+\t\tArrayList<Integer> values = new ArrayList<Integer>(capacity(count));
+\t\tfor (int i = 0; i < count; i++)
+\t\t\tvalues.add(readInt());
+\t\treturn values;
+\t}
+
+\tpublic ArrayList<Float> readFloatList()
+\t{
+\t\tint count = readCount();
+\t\tArrayList<Float> values = new ArrayList<Float>(capacity(count));
+\t\tfor (int i = 0; i < count; i++)
+\t\t\tvalues.add(readFloat());
+\t\treturn values;
+\t}
+
+\tpublic ArrayList<Boolean> readBoolList()
+\t{
+\t\tint count = readCount();
+\t\tArrayList<Boolean> values = new ArrayList<Boolean>(capacity(count));
+\t\tfor (int i = 0; i < count; i++)
+\t\t\tvalues.add(readBool());
+\t\treturn values;
+\t}
+
+\tpublic ArrayList<String> readStringList()
+\t{
+\t\tint count = readCount();
+\t\tArrayList<String> values = new ArrayList<String>(capacity(count));
+\t\tfor (int i = 0; i < count; i++)
+\t\t\tvalues.add(readString());
+\t\treturn values;
+\t}
+%(primitiveReaders)s}
+"""
+    primitiveWriters = ""
+    primitiveReaders = ""
+    if primitives:
+        for primitive in PRIMITIVE_LISTS:
+            primitiveWriters += primitiveWriter % primitive
+            primitiveReaders += primitiveReader % primitive
+    helpers = helpers % { "magic": CodeGenerator.SNAPSHOT_MAGIC, "primitiveWriters": primitiveWriters,
+        "primitiveReaders": primitiveReaders }
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
@@ -1,5 +1,6 @@
 from parser import InstaParseFormatFileParser
 from converter import InstaParseFormat
+from codegen import GeneratorOptions
 from pygen import PythonGenerator
 from javagen import JavaGenerator
 from cppgen import CPPGenerator
@@ -18,6 +19,28 @@ if __name__ == "__main__":
                    "Accepts 'python', 'java', or 'c++'." )
     optParser.add_option( "-o", "--output", action = "store", dest = "outputName", default = "out",
             help = "specifies the output file name" )
+    optParser.add_option( "--numpy", action = "store_true", dest = "numpy", default = False,
+            help = "converts list(int) and list(float) fields to NumPy arrays. Python only." )
+    optParser.add_option( "--columnar", action = "store_true", dest = "columnar", default = False,
+            help = "stores repeated objects made of a single line of scalar fields as one array per field. "
+                   "Python only." )
+    optParser.add_option( "--namedtuples", action = "store_true", dest = "namedtuples", default = False,
+            help = "generates read-only namedtuples instead of classes for the parsed objects. Python only." )
+    optParser.add_option( "--mmap", action = "store_true", dest = "mmap", default = False,
+            help = "reads the input file through a memory mapping, in Python as bytes, only decoding string "
+                   "fields. Python and Java." )
+    optParser.add_option( "--lazy", action = "store_true", dest = "lazy", default = False,
+            help = "only parses the structure of the input file, converting the fields of each object when "
+                   "they are first read. Python only." )
+    optParser.add_option( "--instrument", action = "store_true", dest = "instrument", default = False,
+            help = "counts the calls, lines, time, rollbacks and exceptions of the parser of each object, "
+                   "reported as JSON by dumpStats." )
+    optParser.add_option( "--cache", action = "store_true", dest = "cache", default = False,
+            help = "makes parse load the files it parsed before from a cache on disk, keyed by their content. "
+                   "Python only." )
+    optParser.add_option( "--primitives", action = "store_true", dest = "primitives", default = False,
+            help = "stores list and repeated int, float and bool fields in primitive arrays instead of "
+                   "ArrayLists of boxed values. Java only." )
     (options, args) = optParser.parse_args()
 
     # Clean up provided flags
@@ -34,6 +57,13 @@ if __name__ == "__main__":
             elif extension in [ "c", "cc", "cpp" ]:
                 options.language = "c++"
 
+    # Lazy objects cache their fields in the slots of mutable classes
+    if options.lazy and ( options.columnar or options.namedtuples ):
+        optParser.error("--lazy cannot be combined with --columnar or --namedtuples")
+    # Lazy objects hold the lines of the input they have yet to convert
+    if options.lazy and options.cache:
+        optParser.error("--lazy cannot be combined with --cache")
+
     # Check that a format file is provided
     if len(args) != 1:
         optParser.print_help()
@@ -48,14 +78,19 @@ if __name__ == "__main__":
     # Generate a format object from the object model
     formatObject = InstaParseFormat(parser.objectModel)
 
+    # Collect the flags that change the generated code
+    generatorOptions = GeneratorOptions( numpy = options.numpy, columnar = options.columnar,
+        namedtuples = options.namedtuples, mmap = options.mmap, lazy = options.lazy,
+        instrument = options.instrument, cache = options.cache, primitives = options.primitives )
+
     # Depending on output language, call the associated code generator
     generator = None
     if options.language == "python":
-        generator = PythonGenerator(options.outputName, formatObject)
+        generator = PythonGenerator( options.outputName, formatObject, generatorOptions )
     elif options.language == "java":
-        generator = JavaGenerator(options.outputName, formatObject)
+        generator = JavaGenerator( options.outputName, formatObject, generatorOptions )
     elif options.language == "c++":
-        generator = CPPGenerator(options.outputName, formatObject)
+        generator = CPPGenerator( options.outputName, formatObject, generatorOptions )
     else:
         print "language not supported."
         exit(1)
@@ -1,10 +1,25 @@
 from codegen import CodeGenerator
 from converter import *
-from util import StringConstants
-from pygenStatic import pygenStaticHelpers
+from os.path import join
+from util import InstaParseFile, StringConstants
+from pygenStatic import pygenStaticHelpers, pygenNumpyHelpers, pygenColumnarHelpers, pygenMappedHelpers, \
+    pygenParallelHelpers, pygenIndexHelpers, pygenLazyHelpers, pygenPushHelpers, pygenStatsHelpers, \
+    pygenCacheHelpers, pygenSnapshotHelpers
+import hashlib
 
 class PythonGenerator(CodeGenerator):
 
+    # Parts of the body parsed separately when parsing in parallel
+    PREFIX_PART = "Prefix"
+    RECORDS_PART = "Records"
+    # Part of the body scanned when indexing its records
+    INDEX_PART = "Index"
+    # Structural pass of the lazy mode, see generateLazyClass
+    LAZY_PART = "Lazy"
+
+    # Python 3 only module holding aparse, see generateAsyncFile
+    ASYNC_FILE_NAME = CodeGenerator.PARSER_NAME + "Async"
+
     def write( self, line ):
         self.currentFile.write(line)
 
@@ -33,6 +48,57 @@ class PythonGenerator(CodeGenerator):
         self.main.setExtension("py")
         self.util.setExtension("py")
         self.data.setExtension("py")
+        self.asyncFile = InstaParseFile(join(self.foldername, PythonGenerator.ASYNC_FILE_NAME))
+        self.asyncFile.setExtension("py")
+
+    def codeGen(self):
+        """ This method is called to generate and write the parser to the specified file. """
+        CodeGenerator.codeGen(self)
+        if not self.options.mmap:
+            self.generateAsyncFile()
+            self.asyncFile.save()
+
+    ################################################################################
+    # Generate Async File
+    ################################################################################
+
+    def generateAsyncFile(self):
+        """ For generating aparse, which parses the input read from an asyncio stream by feeding
+        PushParser. It lives in its own file as it only compiles under Python 3. """
+        self.currentFile = self.asyncFile
+        self.writeLine("#!/usr/bin/env python3")
+        self.writeNewline()
+        self.writeLine("import collections")
+        self.writeNewline()
+        self.writeLine("import " + CodeGenerator.UTIL_FILE_NAME)
+        self.writeNewline()
+        self.beginBlock("async def aparse( reader, blockSize = 1 << 16 ):")
+        if self._recordLine() is not None:
+            self.comment("Yields every record of the body as soon as it has been parsed from the blocks read")
+            self.comment("from reader, an asyncio.StreamReader or anything with an awaitable read(size).")
+            self.writeLine("records = collections.deque()")
+            self.writeLine("parser = %s.PushParser(records.append)" % CodeGenerator.UTIL_FILE_NAME)
+        else:
+            self.comment("Yields the body once it has been parsed from the blocks read from reader, an")
+            self.comment("asyncio.StreamReader or anything with an awaitable read(size).")
+            self.writeLine("parser = %s.PushParser()" % CodeGenerator.UTIL_FILE_NAME)
+        self.writeLine("data = await reader.read(blockSize)")
+        self.beginBlock("while len(data) > 0:")
+        self.writeLine("parser.feed(data)")
+        if self._recordLine() is not None:
+            self.beginBlock("while len(records) > 0:")
+            self.writeLine("yield records.popleft()")
+            self.endBlock()
+        self.writeLine("data = await reader.read(blockSize)")
+        self.endBlock()
+        if self._recordLine() is not None:
+            self.writeLine("parser.close()")
+            self.beginBlock("while len(records) > 0:")
+            self.writeLine("yield records.popleft()")
+            self.endBlock()
+        else:
+            self.writeLine("yield parser.close()")
+        self.endBlock()
 
     ################################################################################
     # Generate Data File
@@ -42,17 +108,34 @@ class PythonGenerator(CodeGenerator):
         """ For generating the data file header, such as the import statements. """
         self.writeLine("#!/usr/bin/env python")
         self.writeNewline()
+        if self.options.namedtuples:
+            self.writeLine("import collections")
+            self.writeNewline()
 
     def generateClass( self, className, fields ):
         """ Helper function for generating the code segement defining a class (or the corresponding
         data structure). The first argument is the class name and the second argument is a list of
         fields (in order) of that class. """
-        self.beginBlock("class %s:" % className)
-        self.beginBlock("def __init__(self):")
-        # Initialize each field to be None
+        fieldNames = "".join([ "\"%s\", " % f.name() for f in fields ])
+        if self.options.namedtuples:
+            self.writeLine("%s = collections.namedtuple( \"%s\", ( %s) )" % ( className, className, fieldNames ))
+            self.writeNewline()
+            return
+        # Slotted class without a per-instance dict, constructed with all its fields in order
+        self.beginBlock("class %s(object):" % className)
+        self.writeLine("__slots__ = ( %s)" % fieldNames)
+        self.writeNewline()
+        self.beginBlock("def __init__(%s):" % self._argumentList([ "self" ] +
+            [ "%s = None" % f.name() for f in fields ]))
         for f in fields:
-            self.writeLine("self.%s = None" % f.name())
+            self.writeLine("self.%s = %s" % ( f.name(), f.name() ))
         self.endBlock()
+        if self.options.cache:
+            # Pickled as a call of the positional constructor, much faster to load than slot states
+            self.writeNewline()
+            self.beginBlock("def __reduce__(self):")
+            self.writeLine("return ( %s, ( %s) )" % ( className, "".join([ "self.%s, " % f.name() for f in fields ]) ))
+            self.endBlock()
         self.endBlock()
         self.writeNewline()
 
@@ -65,23 +148,934 @@ class PythonGenerator(CodeGenerator):
         self.writeLine("#!/usr/bin/env python")
         self.writeNewline()
         self.writeLine("import " + CodeGenerator.DATA_FILE_NAME)
+        self.writeLine("import codecs")
+        self.writeLine("import bz2")
+        self.writeLine("import gc")
+        self.writeLine("import io")
+        self.writeLine("import re")
+        self.writeLine("import zlib")
+        if self.options.numpy:
+            self.writeLine("import numpy")
+        if self.options.columnar:
+            self.writeLine("import array")
+        if self.options.mmap:
+            self.writeLine("import mmap")
+        if self._parallelRecords() is not None:
+            self.writeLine("import bisect")
+            self.writeLine("import multiprocessing")
+        if self._recordLine() is not None or self.options.cache:
+            self.writeLine("import os")
+        self.writeLine("import struct")
+        if self.options.cache:
+            self.writeLine("import hashlib")
+            self.writeLine("import shutil")
+            self.writeLine("import tempfile")
+            self.beginBlock("try:")
+            self.writeLine("import cPickle as pickle")
+            self.endBlock()
+            self.beginBlock("except ImportError:")
+            self.writeLine("import pickle")
+            self.endBlock()
+        if self.options.instrument:
+            self.writeLine("import collections")
+            self.writeLine("import json")
+            self.writeLine("import sys")
+            self.writeLine("import timeit")
+        self.writeNewline()
+        # The generated code also runs under Python 3, where only the push parser is asynchronous
+        self.beginBlock("try:")
+        self.writeLine("xrange")
+        self.endBlock()
+        self.beginBlock("except NameError:")
+        self.writeLine("xrange = range")
+        self.endBlock()
+        # Only needed to read xz compressed inputs, which Python 2 cannot decompress
+        self.beginBlock("try:")
+        self.writeLine("import lzma")
+        self.endBlock()
+        self.beginBlock("except ImportError:")
+        self.writeLine("lzma = None")
+        self.endBlock()
 
     def generateHelperFunctions(self):
         """ For generating the helper functions that will be useful when parsing in the util file. """
+        # The mapped input hands out lines as bytes, so the delimiter is a bytes literal
+        self.writeLine("DELIMITER = %s%s" % ( "b" if self.options.mmap else "", repr(self.format.lineDelimiter()) ))
         helpers =  pygenStaticHelpers()
         self.write(helpers)
+        if self.options.mmap:
+            self.write(pygenMappedHelpers())
+        if self.options.numpy:
+            self.write(pygenNumpyHelpers())
+        if self.options.columnar:
+            self.write(pygenColumnarHelpers())
+        if self.options.lazy:
+            self.write(pygenLazyHelpers())
+        if self.options.instrument:
+            self.write(pygenStatsHelpers())
+        if self.options.cache:
+            self.comment("Tells the cached bodies of this format apart from those of other formats")
+            self.writeLine("FORMAT_FINGERPRINT = \"%s\"" % self._formatFingerprint())
+            self.write(pygenCacheHelpers(self.options.numpy))
+        if not self.options.mmap:
+            self.write(pygenPushHelpers())
+        self.comment("Tells the binary snapshots of formats of this layout apart from those of other formats")
+        self.writeLine("SCHEMA_HASH = b\"%s\"" % self.schemaHash())
+        self.write(pygenSnapshotHelpers(self.options.numpy))
+        if self._recordLine() is not None:
+            self.write(pygenIndexHelpers())
+        if self._parallelRecords() is not None:
+            self.write(pygenParallelHelpers())
+        self.writeNewline()
+
+    def _formatFingerprint(self):
+        """ A hash of the format and of the options that change the classes of the parsed objects,
+        so that a cache entry is only loaded by a parser of the same format. """
+        description = [ repr(self.format.lineDelimiter()), self.bodyTypeName ]
+        for className, lines in self.classes.items():
+            description.append("%s: %s" % ( className, " | ".join([ str(line) for line in lines ]) ))
+        description.append(repr(( self.options.numpy, self.options.columnar, self.options.namedtuples )))
+        return hashlib.sha1("\n".join(description)).hexdigest()
+
+    def _openInput( self, isUtilFile = False ):
+        """ The expression opening the input file named filename, in the main file unless
+        isUtilFile is True. """
+        module = "" if isUtilFile else CodeGenerator.UTIL_FILE_NAME + "."
+        return "%sopenFile(filename)" % module
+
+    def _localName( self, fieldName ):
+        """ The name of the local variable holding a field while its class is being parsed. The
+        suffix keeps it apart from the other locals of the generated parser functions. """
+        return "%sValue" % fieldName
+
+    def _argumentList( self, arguments ):
+        """ Format the arguments of a generated call, matching the spacing of the generated code. """
+        if len(arguments) == 0:
+            return ""
+        if len(arguments) == 1:
+            return arguments[0]
+        return " %s " % ", ".join(arguments)
+
+    def _signatureName( self, className, field ):
+        """ The name of the constant holding the lookahead signature of a repeated field. """
+        return "SIGNATURE_%s_%s" % ( className, field.name() )
+
+    def _signatureLiteral( self, signature ):
+        """ A LineSignature as the ( tokenTypes, listType, isSplit ) tuple used by the runtime. """
+        tokenTypes = "".join([ "\"%s\", " % tokenType for tokenType in signature.tokenTypes() ])
+        listType = "\"%s\"" % signature.listType() if signature.listType() else "None"
+        return "( (%s), %s, %s )" % ( tokenTypes, listType, signature.isSplit() )
+
+    def _fieldConversions( self, line ):
+        """ The conversions of the fields of a line of primitive fields, split into fields. Each fails
+        exactly when the parser of its field does, raising a ValueError or, for bools, a KeyError.
+        A trailing list is converted by its list parser, which converts it with builtins. """
+        conversions = []
+        for i, field in enumerate(line):
+            token = "fields[%d]" % i
+            if field.isList():
+                conversions.append("%s( fields[%d:], currentLineNumber )" % ( self.typeNameToParseFuncName[field.typeName()], i ))
+            elif field.typeName() == StringConstants.INTEGER_TYPE:
+                conversions.append("int(%s)" % token)
+            elif field.typeName() == StringConstants.FLOAT_TYPE:
+                conversions.append("float(%s)" % token)
+            elif field.typeName() == StringConstants.BOOL_TYPE:
+                conversions.append("BOOL_VALUES[%s.lower()]" % token)
+            # Mapped strings still have to be decoded
+            elif self.options.mmap:
+                conversions.append("%s( %s, currentLineNumber )" % ( CodeGenerator.PARSE_STRING, token ))
+            else:
+                conversions.append(token)
+        return ", ".join(conversions)
+
+    def _isColumnar( self, field ):
+        """ Whether the instances of a repeated field are stored in a ColumnTable. """
+        return self.options.columnar and not field.isPrimitive() and self.format.isScalarRecord(field.typeName())
+
+    def _columnTableLiteral( self, typeName ):
+        """ The expression creating an empty ColumnTable for the given scalar record type. """
+        fieldTypes = "".join([ "( \"%s\", \"%s\" ), " % ( field.name(), field.typeName() )
+            for field in self.classes[typeName][0] ])
+        return "ColumnTable( %s.%s, ( %s) )" % ( CodeGenerator.DATA_FILE_NAME, typeName, fieldTypes )
+
+    def _countFields( self, lines ):
+        """ The names of the fields holding the number of repetitions of a later line. """
+        return set([ line.repetitionAmountString() for line in lines
+            if not line.isEmpty() and line.isRepeating() and line.isVariableRepetition() ])
+
+    def _isScannedLine( self, line ):
+        """ Whether the lazy structural pass finds the instances of a repeated line without parsing
+        them, because they either repeat a known number of times or are found by a lookahead. """
+        return line.lookahead() is not None or line.isIntegerRepetition() or line.isVariableRepetition()
+
+    def _isLazyUnit( self, line, countFields ):
+        """ Whether the lazy structural pass keeps a line, or the lines of a repeated primitive
+        field, as spans converted on first access. Lines holding an object are scanned in turn
+        and lines holding the number of repetitions of a later line are converted right away. """
+        if line.isEmpty():
+            return False
+        if line.isRepeating():
+            return line.getField(0).isPrimitive() and self._isScannedLine(line)
+        fieldNames = [ field.name() for field in line ]
+        if len(fieldNames) == 1 and not line.getField(0).isPrimitive():
+            return False
+        return len(countFields.intersection(fieldNames)) == 0
+
+    def _spanName( self, line ):
+        """ The name of the local variable holding the span of a line kept by the lazy structural pass. """
+        return "%sSpan" % line.getField(0).name()
+
+    def generateClassParserFunctions(self):
+        """ For generating all the functions for parsing user defined classes, followed by the
+        streaming parser of the body and the functions for indexing its records and parsing them
+        in parallel. """
+        CodeGenerator.generateClassParserFunctions(self)
+        if self.options.columnar:
+            for className, lines in self.classes.items():
+                if self.format.isScalarRecord(className):
+                    self.generateColumnAppendFunction( className, lines[0] )
+        self.generateClassParserFunction( self.bodyTypeName, self.classes[self.bodyTypeName], True )
+        if self.options.lazy:
+            for className, lines in self.classes.items():
+                self.generateLazyClass( className, lines )
+        if self._recordLine() is not None:
+            self.generateRecordFunctions()
+            self.generateIndexFunctions()
+        if self._parallelRecords() is not None:
+            self.generateParallelParserFunctions()
+        # The push parser works on text, which the mapped parsers do not accept
+        if not self.options.mmap:
+            self.generatePushParser()
+
+    def generatePushParser(self):
+        """ For generating PushParser, which parses an input pushed to it in blocks by feed. It parses
+        the body in steps, each parsed from the lines buffered so far: the lines before the records
+        of the body, then one record at a time, or the whole body if it does not end in records.
+        Its state between steps is the position the next step starts at, the prefix and records
+        parsed so far and the number of records. A step that runs out of input raises NeedMoreData
+        and is retried from its start once the input has grown by as many lines as the step
+        already spans, so that retrying long steps costs linear time overall. """
+        recordLine = self._recordLine()
+
+        self.beginBlock("class PushParser(object):")
+        self.writeLine("\"\"\" Parses an input pushed to it in blocks. Records are handed to the callback, if any, as")
+        self.writeLine("soon as they have been parsed instead of being collected into the body. \"\"\"")
+        self.writeNewline()
+        self.beginBlock("def __init__( self, callback = None ):")
+        self.writeLine("self.callback = callback")
+        self.writeLine("self.input = PushedInput()")
+        self.writeLine("self.cursor = PushCursor(self.input)")
+        self.writeLine("self.lineNumber = 1")
+        self.writeLine("self.position = 0")
+        self.writeLine("self.body = None")
+        self.writeLine("self.prefix = None")
+        self.writeLine("self.records = []")
+        self.writeLine("self.numRecords = 0")
+        self.writeLine("self.numRepetitions = None")
+        self.writeLine("self.isDone = False")
+        self.writeLine("self.numLinesPushed = 0")
+        self.writeLine("self.retryAt = 0")
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def feed( self, data ):")
+        self.writeLine("\"\"\" Pushes the next block of the input, as bytes, and parses what it completes. \"\"\"")
+        self.writeLine("self.input.push(data)")
+        self.writeLine("self.numLinesPushed += data.count(b\"\\n\")")
+        self.beginBlock("if self.numLinesPushed >= self.retryAt:")
+        self.writeLine("self.parseAvailable()")
+        self.endBlock()
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def close(self):")
+        self.writeLine("\"\"\" Ends the input, parses the rest of it and returns the body. \"\"\"")
+        self.writeLine("self.input.finish()")
+        self.writeLine("self.parseAvailable()")
+        self.writeLine("checkEndOfFile( self.cursor, self.lineNumber )")
+        if recordLine is not None:
+            self.writeLine("self.body = %s.%s(*( self.prefix + ( self.records, ) ))" % \
+                ( CodeGenerator.DATA_FILE_NAME, self.bodyTypeName ))
+        self.writeLine("return self.body")
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def parseAvailable(self):")
+        self.beginBlock("try:")
+        self.beginBlock("while not self.isDone:")
+        self.writeLine("self.step()")
+        self.writeLine("self.cursor.commit(self.position)")
+        self.endBlock()
+        self.endBlock()
+        self.beginBlock("except NeedMoreData as e:")
+        self.writeLine("self.cursor.reset(self.position)")
+        self.writeLine("numLines = self.cursor.numLines()")
+        self.writeLine("self.retryAt = max( numLines + 1, 2 * numLines - self.position )")
+        self.endBlock()
+        self.endBlock()
+        self.writeNewline()
+
+        # A step only changes the state once it has been parsed completely
+        self.beginBlock("def step(self):")
+        if recordLine is None:
+            self.writeLine("self.body, self.lineNumber, self.position = %s( self.cursor, self.lineNumber, self.position )" % \
+                self.typeNameToParseFuncName[self.bodyTypeName])
+            self.writeLine("self.isDone = True")
+        else:
+            self.beginBlock("if self.prefix is None:")
+            self.writeLine("prefix, self.lineNumber, self.position = parse%s%s( self.cursor, self.lineNumber, self.position )" % \
+                ( self.bodyTypeName, PythonGenerator.PREFIX_PART ))
+            self.writeLine("self.numRepetitions = %s" % self._numRecordsExpression())
+            self.writeLine("self.prefix = prefix")
+            self.writeLine("return")
+            self.endBlock()
+            self.writeLine("lineNumber = self.lineNumber")
+            self.writeLine("position = self.position")
+            if recordLine.lookahead() is None:
+                self.beginBlock("if self.numRecords == self.numRepetitions:")
+                self.writeLine("self.isDone = True")
+                self.writeLine("return")
+                self.endBlock()
+            elif recordLine.isSplitByNewline():
+                # The empty line separating records found by a lookahead precedes every record but the first
+                self.beginBlock("if self.numRecords > 0:")
+                self.beginBlock("if not hasNextInstance( self.cursor, %s, True ):" % \
+                    self._signatureName( self.bodyTypeName, recordLine.getField(0) ))
+                self.writeLine("self.isDone = True")
+                self.writeLine("return")
+                self.endBlock()
+                self.writeLine("readline(self.cursor, \"%s\")" % self.bodyTypeName)
+                self.writeLine("lineNumber += 1")
+                self.writeLine("position = self.cursor.mark()")
+                self.endBlock()
+            self.writeLine("records, lineNumber, position = parse%s%s( self.cursor, lineNumber, position, self.numRecords, 1, "
+                "self.numRepetitions )" % ( self.bodyTypeName, PythonGenerator.RECORDS_PART ))
+            if recordLine.lookahead() is not None:
+                self.beginBlock("if len(records) == 0:")
+                # Like the sequential loop, the separator is read again by the end of file check
+                self.writeLine("self.cursor.reset(self.position)")
+                self.writeLine("self.isDone = True")
+                self.writeLine("return")
+                self.endBlock()
+            self.beginBlock("if self.callback is not None:")
+            self.beginBlock("for record in records:")
+            self.writeLine("self.callback(record)")
+            self.endBlock()
+            self.endBlock()
+            self.beginBlock("elif self.numRecords == 0:")
+            self.writeLine("self.records = records")
+            self.endBlock()
+            self.beginBlock("else:")
+            self.writeLine("self.records.extend(records)")
+            self.endBlock()
+            self.writeLine("self.numRecords += 1")
+            self.writeLine("self.lineNumber = lineNumber")
+            self.writeLine("self.position = position")
+        self.endBlock()
+        self.endBlock()
+        self.writeNewline()
+
+    def _numRecordsExpression(self):
+        """ The expression for the total number of records given the tuple of fields parsed before
+        them, named prefix. It is None if the records repeat until the lookahead fails. """
+        recordLine = self._recordLine()
+        prefixFieldNames = [ field.name() for line in self.classes[self.bodyTypeName][:-1] for field in line ]
+        if recordLine.isIntegerRepetition():
+            return recordLine.repetitionAmountString()
+        elif recordLine.isVariableRepetition():
+            return "prefix[%d]" % prefixFieldNames.index(recordLine.repetitionAmountString())
+        return "None"
+
+    def generateRecordFunctions(self):
+        """ For generating the functions shared by everything that parses the records of the body
+        on their own: the parsers of the lines before them, "parseXPrefix", and of the records,
+        "parseXRecords", and openAt. """
+        lines = self.classes[self.bodyTypeName]
+        self.generateClassParserFunction( self.bodyTypeName, lines[:-1], part = PythonGenerator.PREFIX_PART )
+        self.generateClassParserFunction( self.bodyTypeName, lines[-1:], part = PythonGenerator.RECORDS_PART )
+
+        self.beginBlock("def openAt( filename, offset ):")
+        self.writeLine("\"\"\" Opens the input file with the given byte offset as its first line. \"\"\"")
+        if self.options.mmap:
+            self.writeLine("inputFile = MappedLineCursor(open(filename, 'rb'))")
+            self.writeLine("inputFile.reset(offset)")
+        else:
+            self.writeLine("inputFile = open(filename, 'r')")
+            self.writeLine("inputFile.seek(offset)")
+            self.writeLine("inputFile = LineCursor(inputFile)")
+        self.writeLine("return inputFile")
+        self.endBlock()
+        self.writeNewline()
+
+    def generateIndexFunctions(self):
+        """ For generating buildIndex and getRecord. buildIndex parses the whole body once and saves
+        the byte offset and line number of every record to an index file. getRecord then parses a
+        single record by seeking straight to it, rebuilding the index first if it is missing or
+        was built for another version of the input file. """
+        recordLine = self._recordLine()
+        recordField = recordLine.getField(0)
+        self.generateClassParserFunction( self.bodyTypeName, [ recordLine ], part = PythonGenerator.INDEX_PART )
+
+        self.beginBlock("def buildIndex( filename, indexFilename = None ):")
+        self.writeLine("\"\"\" Indexes the records of the input file and returns their number. \"\"\"")
+        # Offsets into a compressed file do not tell where its records start
+        self.beginBlock("if isCompressed(filename):")
+        self.writeLine("raise ValueError(\"Parser Error: Compressed input files cannot be indexed.\")")
+        self.endBlock()
+        self.writeLine("inputFile = %s" % self._openInput(True))
+        self.beginBlock("try:")
+        self.writeLine("prefix, currentLineNumber, currentLinePos = parse%s%s( inputFile, 1, 0 )" % \
+            ( self.bodyTypeName, PythonGenerator.PREFIX_PART ))
+        self.writeLine("numRepetitions = %s" % self._numRecordsExpression())
+        self.writeLine("offsets, lineNumbers = findLineOffsets( filename, index%sRecords( inputFile, "
+            "currentLineNumber, currentLinePos, numRepetitions ) )" % self.bodyTypeName)
+        self.endBlock()
+        self.beginBlock("finally:")
+        self.writeLine("inputFile.close()")
+        self.endBlock()
+        self.writeLine("saveIndex( filename, indexFilename or filename + INDEX_EXTENSION, offsets, lineNumbers )")
+        self.writeLine("return len(offsets)")
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def getRecord( filename, index, indexFilename = None ):")
+        self.writeLine("\"\"\" Parses the record of the given index, negative indices counting from the end. \"\"\"")
+        self.writeLine("indexFilename = indexFilename or filename + INDEX_EXTENSION")
+        self.writeLine("entry = readIndexEntry( filename, indexFilename, index )")
+        self.beginBlock("if entry is None:")
+        self.writeLine("buildIndex( filename, indexFilename )")
+        self.writeLine("entry = readIndexEntry( filename, indexFilename, index )")
+        self.endBlock()
+        self.writeLine("offset, currentLineNumber = entry")
+        self.writeLine("inputFile = openAt( filename, offset )")
+        self.beginBlock("try:")
+        # Parse the record as one instance of the repeated field
+        if not recordField.isPrimitive():
+            self.writeLine("record, currentLineNumber, currentLinePos = %s( inputFile, currentLineNumber, "
+                "inputFile.mark() )" % self.typeNameToParseFuncName[recordField.typeName()])
+        elif not recordField.isList():
+            self.writeLine("record = %s( readline(inputFile, \"%s\"), currentLineNumber )" % \
+                ( self.typeNameToParseFuncName[recordField.typeName()], self.bodyTypeName ))
+        else:
+            self.writeLine("fields = readline(inputFile, \"%s\").split(DELIMITER)" % self.bodyTypeName)
+            self.writeLine("record = %s( fields, currentLineNumber )" % \
+                self.typeNameToParseFuncName["list(%s)" % recordField.listType()])
+        self.endBlock()
+        self.beginBlock("finally:")
+        self.writeLine("inputFile.close()")
+        self.endBlock()
+        self.writeLine("return record")
+        self.endBlock()
+        self.writeNewline()
+
+    def generateParallelParserFunctions(self):
+        """ For generating parseInParallel, which parses the body of an input file with a pool of
+        worker processes. The lines of the body before its records are parsed first, then the
+        records are split into chunks at the record starts found by scanning the file, and the
+        chunks are parsed by the workers and merged in order as they arrive.
+
+        The workers send the records of their chunk back as a binary snapshot, written by
+        "dumpXRecords", rather than pickled objects, which the parent process would have to create
+        one by one. The parent keeps the snapshots in a RecordChunks, which only loads the records
+        of a chunk once they are first used, unless the records are stored in a ColumnTable, whose
+        columns are extended with each chunk right away.
+
+        Should a chunk fail to parse, end anywhere else than where the next chunk starts, or be
+        followed by anything but an empty line when the records are separated by one,
+        parseInParallel returns None so the caller parses the file sequentially, which reports
+        any error exactly as it would have without workers. """
+        recordLine, recordLines = self._parallelRecords()
+        recordField = recordLine.getField(0)
+
+        self.beginBlock("def dump%s%s( write, records ):" % ( self.bodyTypeName, PythonGenerator.RECORDS_PART ))
+        self._generateFieldDump( recordField, "records" )
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def load%s%s( data, offset ):" % ( self.bodyTypeName, PythonGenerator.RECORDS_PART ))
+        self._generateFieldLoad( recordField, "records" )
+        self.writeLine("return records, offset")
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def parseChunk(chunk):")
+        self.writeLine("filename, offset, currentLineNumber, firstIndex, numRecords, numRepetitions, isLast = chunk")
+        self.writeLine("inputFile = openAt( filename, offset )")
+        self.beginBlock("try:")
+        self.writeLine("records, currentLineNumber, currentLinePos = parse%s%s( inputFile, currentLineNumber, "
+            "inputFile.mark(), firstIndex, numRecords, numRepetitions )" % ( self.bodyTypeName, PythonGenerator.RECORDS_PART ))
+        self.beginBlock("if isLast:")
+        self.writeLine("checkEndOfFile( inputFile, currentLineNumber )")
+        self.endBlock()
+        if recordLine.isSplitByNewline() and recordLine.lookahead() is not None:
+            # The records of the next chunk start past the empty line separating them from these,
+            # unless the separators are parsed along with the counted records
+            self.beginBlock("else:")
+            self.writeLine("separator = inputFile.readline()")
+            self.beginBlock("if separator is None or separator.strip():")
+            self.writeLine("raise ValueError(\"Parser Error on line %d: Should be an empty line.\" % currentLineNumber)")
+            self.endBlock()
+            self.writeLine("currentLineNumber += 1")
+            self.endBlock()
+        self.endBlock()
+        self.beginBlock("finally:")
+        self.writeLine("inputFile.close()")
+        self.endBlock()
+        self.writeLine("parts = []")
+        self.writeLine("dump%s%s( parts.append, records )" % ( self.bodyTypeName, PythonGenerator.RECORDS_PART ))
+        self.writeLine("return b\"\".join(parts), len(records), currentLineNumber")
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def parseInParallel( filename, workers ):")
+        # Compressed files cannot be split into chunks, so they are parsed sequentially
+        self.beginBlock("if isCompressed(filename):")
+        self.writeLine("return None")
+        self.endBlock()
+        self.writeLine("inputFile = %s" % self._openInput(True))
+        self.beginBlock("try:")
+        self.writeLine("prefix, currentLineNumber, currentLinePos = parse%s%s( inputFile, 1, 0 )" % \
+            ( self.bodyTypeName, PythonGenerator.PREFIX_PART ))
+        self.endBlock()
+        self.beginBlock("finally:")
+        self.writeLine("inputFile.close()")
+        self.endBlock()
+        self.writeLine("numRepetitions = %s" % self._numRecordsExpression())
+        self.writeLine("starts = findRecordStarts( filename, currentLineNumber, %s, numRepetitions )" % recordLines)
+        self.writeLine("chunks = splitChunks( filename, starts, workers, numRepetitions )")
+        loadRecords = "load%s%s" % ( self.bodyTypeName, PythonGenerator.RECORDS_PART )
+        if self._isColumnar(recordField):
+            self.writeLine("records = %s" % self._columnTableLiteral(recordField.typeName()))
+            self.writeLine("addChunk = lambda data, numRecords: records.extend(%s( data, 0 )[0])" % loadRecords)
+        else:
+            self.writeLine("records = RecordChunks(%s)" % loadRecords)
+            self.writeLine("addChunk = records.append")
+        self.beginBlock("if not parseChunks( chunks, workers, addChunk ):")
+        self.writeLine("return None")
+        self.endBlock()
+        self.writeLine("return %s.%s(*( prefix + ( records, ) ))" % ( CodeGenerator.DATA_FILE_NAME, self.bodyTypeName ))
+        self.endBlock()
+        self.writeNewline()
+
+    def _snapshotTypeCode( self, typeName ):
+        """ The struct type code of an int, float or bool in a binary snapshot, or None for other types. """
+        return { StringConstants.INTEGER_TYPE: "q", StringConstants.FLOAT_TYPE: "d",
+            StringConstants.BOOL_TYPE: "?" }.get(typeName)
+
+    def _snapshotRowFormat( self, typeName ):
+        """ The struct format of the instances of a scalar record class made only of ints, floats
+        and bools, which are written to binary snapshots as fixed width rows, or None for other types. """
+        if not self.format.isScalarRecord(typeName):
+            return None
+        typeCodes = [ self._snapshotTypeCode(field.typeName()) for field in self.classes[typeName][0] ]
+        if None in typeCodes:
+            return None
+        return "".join(typeCodes)
+
+    def generateClassSnapshotFunctions(self):
+        """ For generating the functions writing every user defined class to a binary snapshot and
+        reading it back, followed by those writing and reading the snapshot file of a body. """
+        CodeGenerator.generateClassSnapshotFunctions(self)
+
+        self.beginBlock("def writeSnapshot( body, filename ):")
+        self.writeLine("outputFile = open( filename, 'wb', SNAPSHOT_BUFFER_SIZE )")
+        self.beginBlock("try:")
+        self.writeLine("outputFile.write(SNAPSHOT_MAGIC + SCHEMA_HASH)")
+        self.writeLine("dump%s( outputFile.write, body )" % self.bodyTypeName)
+        self.endBlock()
+        self.beginBlock("except struct.error as e:")
+        self.writeLine("raise ValueError(\"Parser Error: Could not write the binary snapshot %s: %s\" % ( filename, e ))")
+        self.endBlock()
+        self.beginBlock("finally:")
+        self.writeLine("outputFile.close()")
+        self.endBlock()
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def readSnapshot(filename):")
+        self.writeLine("inputFile = open( filename, 'rb' )")
+        self.beginBlock("try:")
+        self.writeLine("data = inputFile.read()")
+        self.endBlock()
+        self.beginBlock("finally:")
+        self.writeLine("inputFile.close()")
+        self.endBlock()
+        self.writeLine("header = SNAPSHOT_MAGIC + SCHEMA_HASH")
+        self.beginBlock("if data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:")
+        self.writeLine("raise ValueError(\"Parser Error: %s is not a binary snapshot.\" % filename)")
+        self.endBlock()
+        self.beginBlock("if data[:len(header)] != header:")
+        self.writeLine("raise ValueError(\"Parser Error: The binary snapshot %s was written for a format of another layout.\" % filename)")
+        self.endBlock()
+        # The collector would scan the objects over and over as they are created
+        self.writeLine("isCollecting = gc.isenabled()")
+        self.writeLine("gc.disable()")
+        self.beginBlock("try:")
+        self.writeLine("body, offset = load%s( data, len(header) )" % self.bodyTypeName)
+        self.endBlock()
+        self.beginBlock("except struct.error as e:")
+        self.writeLine("raise ValueError(\"Parser Error: The binary snapshot %s is truncated.\" % filename)")
+        self.endBlock()
+        self.beginBlock("finally:")
+        self.beginBlock("if isCollecting:")
+        self.writeLine("gc.enable()")
+        self.endBlock()
+        self.endBlock()
+        self.beginBlock("if offset != len(data):")
+        self.writeLine("raise ValueError(\"Parser Error: The binary snapshot %s continues after its body.\" % filename)")
+        self.endBlock()
+        self.writeLine("return body")
+        self.endBlock()
+        self.writeNewline()
+
+    def generateClassSnapshotFunction( self, className, lines ):
+        """ For generating "dumpX", which writes an instance of the class X to a binary snapshot
+        through the function write, and "loadX", which reads one from the bytes of a snapshot at
+        offset and returns it along with the offset following it. Consecutive int, float and bool
+        fields are packed with one Struct, lists of numbers with one pack, and the instances of
+        repeated scalar records of numbers as rows. """
+        fields = [ field for line in lines if not line.isEmpty() for field in line ]
+        local = self._localName
+        # Runs of fixed width fields, each packed by the Struct of the same index
+        groups = []
+        for field in fields:
+            if self._snapshotTypeCode(field.typeName()) is None or field.isRepeating():
+                groups.append(field)
+            elif len(groups) > 0 and isinstance( groups[-1], list ):
+                groups[-1].append(field)
+            else:
+                groups.append([ field ])
+        runs = [ group for group in groups if isinstance( group, list ) ]
+        for index, run in enumerate(runs):
+            self.writeLine("SNAPSHOT_%s_%d = struct.Struct(\"<%s\")" % ( className, index,
+                "".join([ self._snapshotTypeCode(field.typeName()) for field in run ]) ))
+        if len(runs) > 0:
+            self.writeNewline()
+
+        self.beginBlock("def dump%s( write, obj ):" % className)
+        runIndex = 0
+        for group in groups:
+            if isinstance( group, list ):
+                self.writeLine("write(SNAPSHOT_%s_%d.pack(%s))" % ( className, runIndex,
+                    self._argumentList([ "obj." + field.name() for field in group ]) ))
+                runIndex += 1
+                continue
+            self._generateFieldDump( group, "obj." + group.name() )
+        if len(fields) == 0:
+            self.writeLine("pass")
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def load%s( data, offset ):" % className)
+        runIndex = 0
+        for group in groups:
+            if isinstance( group, list ):
+                self.writeLine("%s = SNAPSHOT_%s_%d.unpack_from( data, offset )" % (
+                    "".join([ "%s, " % local(field.name()) for field in group ]).rstrip( " " if len(group) == 1 else ", " ),
+                    className, runIndex ))
+                self.writeLine("offset += SNAPSHOT_%s_%d.size" % ( className, runIndex ))
+                runIndex += 1
+                continue
+            self._generateFieldLoad( group, local(group.name()) )
+        self.writeLine("return %s.%s(%s), offset" % ( CodeGenerator.DATA_FILE_NAME, className,
+            self._argumentList([ local(field.name()) for field in fields ]) ))
+        self.endBlock()
         self.writeNewline()
 
-    def generateClassParserFunction( self, className, lines ):
+    def _snapshotListCall( self, typeName, isDump ):
+        """ The call writing or reading a list of the given element type to a binary snapshot. """
+        prefix = "dump" if isDump else "load"
+        if isString(typeName):
+            return prefix + "Strings( %s )"
+        if self.options.numpy and not isBool(typeName):
+            return prefix + "Array( %%s, \"%s\" )" % self._snapshotTypeCode(typeName)
+        return prefix + "Numbers( %%s, \"%s\" )" % self._snapshotTypeCode(typeName)
+
+    def _generateFieldDump( self, field, value ):
+        """ For generating the code writing the field of the given value expression to a binary
+        snapshot through the function write. """
+        typeName = field.typeName()
+        if not field.isRepeating():
+            if isString(typeName):
+                self.writeLine("dumpString( write, %s )" % value)
+            elif field.isList():
+                self.writeLine(self._snapshotListCall( listType(typeName), True ) % ( "write, " + value ))
+            else:
+                self.writeLine("dump%s( write, %s )" % ( typeName, value ))
+        elif field.isPrimitive() and not field.isList():
+            self.writeLine(( "dumpStrings( %s )" if isString(typeName) else
+                "dumpNumbers( %%s, \"%s\" )" % self._snapshotTypeCode(typeName) ) % ( "write, " + value ))
+        elif self._snapshotRowFormat(typeName) is not None:
+            rowFields = [ rowField.name() for rowField in self.classes[typeName][0] ]
+            if self._isColumnar(field):
+                rows = "zip(%s)" % self._argumentList([ "%s.%s" % ( value, name ) for name in rowFields ])
+            else:
+                rows = "( ( %s) for instance in %s )" % ( "".join([ "instance.%s, " % name for name in rowFields ]), value )
+            self.writeLine("dumpRows( write, \"%s\", len(%s), %s )" % ( self._snapshotRowFormat(typeName), value, rows ))
+        else:
+            self.writeLine("write(COUNT.pack(len(%s)))" % value)
+            self.beginBlock("for instance in %s:" % value)
+            if field.isList():
+                self.writeLine(self._snapshotListCall( listType(typeName), True ) % "write, instance")
+            else:
+                self.writeLine("dump%s( write, instance )" % typeName)
+            self.endBlock()
+
+    def _generateFieldLoad( self, field, value ):
+        """ For generating the code reading the field from the bytes of a binary snapshot at offset
+        into the local of the given name, advancing offset past it. """
+        typeName = field.typeName()
+        if not field.isRepeating():
+            if isString(typeName):
+                self.writeLine("%s, offset = loadString( data, offset )" % value)
+            elif field.isList():
+                self.writeLine("%s, offset = %s" % ( value, self._snapshotListCall( listType(typeName), False ) % "data, offset" ))
+            else:
+                self.writeLine("%s, offset = load%s( data, offset )" % ( value, typeName ))
+        elif field.isPrimitive() and not field.isList():
+            self.writeLine("%s, offset = %s" % ( value, ( "loadStrings( %s )" if isString(typeName) else
+                "loadNumbers( %%s, \"%s\" )" % self._snapshotTypeCode(typeName) ) % "data, offset" ))
+        elif self._snapshotRowFormat(typeName) is not None:
+            self.writeLine("columns, offset = loadRows( data, offset, \"%s\" )" % self._snapshotRowFormat(typeName))
+            if self._isColumnar(field):
+                self.writeLine("%s = %s" % ( value, self._columnTableLiteral(typeName) ))
+                for index, rowField in enumerate(self.classes[typeName][0]):
+                    self.writeLine("%s.%s.extend(columns[%d])" % ( value, rowField.name(), index ))
+            else:
+                self.writeLine("%s = list(map( %s.%s, *columns ))" % ( value, CodeGenerator.DATA_FILE_NAME, typeName ))
+        else:
+            self.writeLine("count, = COUNT.unpack_from( data, offset )")
+            self.writeLine("offset += COUNT.size")
+            instances = "instances" if self._isColumnar(field) else value
+            self.writeLine("%s = []" % instances)
+            self.beginBlock("for i in xrange(count):")
+            if field.isList():
+                self.writeLine("instance, offset = %s" % ( self._snapshotListCall( listType(typeName), False ) % "data, offset" ))
+            else:
+                self.writeLine("instance, offset = load%s( data, offset )" % typeName)
+            self.writeLine("%s.append(instance)" % instances)
+            self.endBlock()
+            if self._isColumnar(field):
+                # Scalar records holding strings, whose rows do not have a fixed width
+                self.writeLine("%s = %s" % ( value, self._columnTableLiteral(typeName) ))
+                for rowField in self.classes[typeName][0]:
+                    self.writeLine("%s.%s.extend([ instance.%s for instance in instances ])" % (
+                        value, rowField.name(), rowField.name() ))
+
+    def generateLazyClass( self, className, lines ):
+        """ For generating the lazy subclass "LazyX" of the data class X and its structural parser
+        "scanX". The structural pass only reads the lines of an object, keeping the line and line
+        number, its span, of every line of primitive fields, and scans nested objects in turn. The
+        fields of a span are converted together by "convertX_field" when any of them is first read
+        through its LazyField, and cached in the slots of X. Conversion errors are raised then,
+        with the line number of the span. """
+        countFields = self._countFields(lines)
+        units = [ line for line in lines if self._isLazyUnit( line, countFields ) ]
+        local = self._localName
+
+        for line in units:
+            convertFunction = "convert%s_%s" % ( className, line.getField(0).name() )
+            if line.isRepeating():
+                field = line.getField(0)
+                self.beginBlock("def %s(spans):" % convertFunction)
+                self.writeLine("values = []")
+                self.beginBlock("for line, currentLineNumber in spans:")
+                self.generateLineConversion( className, line, "line" )
+                self.writeLine("values.append(%s)" % local(field.name()))
+                self.endBlock()
+                self.writeLine("return ( values, )")
+            else:
+                self.beginBlock("def %s(span):" % convertFunction)
+                self.writeLine("line, currentLineNumber = span")
+                self.generateLineConversion( className, line, "line" )
+                self.writeLine("return ( %s)" % "".join([ "%s, " % local(field.name()) for field in line ]))
+            self.endBlock()
+            self.writeNewline()
+
+        eagerFieldNames = [ field.name() for line in lines
+            if not line.isEmpty() and not self._isLazyUnit( line, countFields ) for field in line ]
+        self.beginBlock("class Lazy%s(%s.%s):" % ( className, CodeGenerator.DATA_FILE_NAME, className ))
+        self.writeLine("__slots__ = ( \"_spans\", )")
+        for spanIndex, line in enumerate(units):
+            fieldNames = [ field.name() for field in line ]
+            slots = "".join([ "%s.%s.%s, " % ( CodeGenerator.DATA_FILE_NAME, className, fieldName ) for fieldName in fieldNames ])
+            for position, fieldName in enumerate(fieldNames):
+                self.writeLine("%s = LazyField( ( %s), %d, %d, convert%s_%s )" % ( fieldName, slots, position,
+                    spanIndex, className, fieldNames[0] ))
+        self.writeNewline()
+        self.beginBlock("def __init__(%s):" % self._argumentList([ "self", "_spans" ] + eagerFieldNames))
+        self.writeLine("self._spans = _spans")
+        for fieldName in eagerFieldNames:
+            self.writeLine("self.%s = %s" % ( fieldName, fieldName ))
+        self.endBlock()
+        self.endBlock()
+        self.writeNewline()
+
+        self.generateClassParserFunction( className, lines, part = PythonGenerator.LAZY_PART )
+
+    def generateColumnAppendFunction( self, className, line ):
+        """ For generating the function "appendX" which parses one instance of the scalar record
+        class X and appends its fields to the columns of a ColumnTable instead of creating an
+        object. The fields are only appended once the whole line has been parsed, and the row is
+        dropped again should an int not fit in its column, so the columns stay aligned when the
+        line fails to parse. """
+        self.beginBlock("def append%s( inputFile, currentLineNumber, currentLinePos, columns ):" % className)
+        if line.numFields() == 1:
+            field = line.getField(0)
+            self.writeLine("values = ( %s( readline(inputFile, \"%s\"), currentLineNumber ), )" % \
+                ( self.typeNameToParseFuncName[field.typeName()], className ))
+        else:
+            self.writeLine("fields = readline(inputFile, \"%s\").split(DELIMITER)" % className)
+            self.beginBlock("if len(fields) != %d:" % line.numFields())
+            self.writeLine("raise ValueError('Parser Error on line %d: Expecting " + \
+                str(line.numFields()) + " fields (%d found).' % ( currentLineNumber, len(fields) ))")
+            self.endBlock()
+            # The parsers only run to report the field that failed to parse
+            self.beginBlock("try:")
+            self.writeLine("values = ( %s, )" % self._fieldConversions(line))
+            self.endBlock()
+            self.beginBlock("except ( ValueError, KeyError ) as e:")
+            self.writeLine("values = ( %s)" % "".join([ "%s( fields[%d], currentLineNumber ), " % \
+                ( self.typeNameToParseFuncName[field.typeName()], i ) for i, field in enumerate(line) ]))
+            self.endBlock()
+        hasIntColumns = any([ field.typeName() == StringConstants.INTEGER_TYPE for field in line ])
+        if hasIntColumns:
+            self.beginBlock("try:")
+        for i, field in enumerate(line):
+            self.writeLine("columns.%s.append(values[%d])" % ( field.name(), i ))
+        if hasIntColumns:
+            self.endBlock()
+            self.beginBlock("except OverflowError as e:")
+            self.writeLine("columns.dropPartialRow()")
+            self.writeLine("raise ValueError(\"Parser Error on line %d: Could not store an int of more than 64 bits.\" % currentLineNumber)")
+            self.endBlock()
+        self.writeLine("currentLineNumber += 1")
+        self.writeLine("currentLinePos = inputFile.mark()")
+        self.writeLine("return currentLineNumber, currentLinePos")
+        self.endBlock()
+        self.writeNewline()
+
+    def generateLineConversion( self, className, line, source ):
+        """ For generating the code converting the fields of a line of primitive fields into their
+        locals. The line is the value of the source expression and currentLineNumber its number. """
+        local = self._localName
+        # The case where there is only one primitve field that is not a list.
+        if line.numFields() == 1 and not line.getField(0).isList():
+            field = line.getField(0)
+            self.writeLine("%s = %s( %s, currentLineNumber )" % \
+                ( local(field.name()), self.typeNameToParseFuncName[field.typeName()], source ))
+        # The case where ther is only one list primitive field.
+        elif line.numFields() == 1:
+            field = line.getField(0)
+            listType = "list(%s)" % field.listType()
+            self.writeLine("fields = %s.split(DELIMITER)" % source)
+            self.writeLine("%s = %s( fields, currentLineNumber )" % ( local(field.name()), self.typeNameToParseFuncName[listType] ))
+        # The case where there is multiple fields on a line. The fields are all primitives.
+        else:
+            self.writeLine("fields = %s.split(DELIMITER)" % source)
+            # If the last field is not a list, then the number of fields should match exactly
+            if not line.getField(-1).isList():
+                self.beginBlock("if len(fields) != %d:" % line.numFields())
+                self.writeLine("raise ValueError('Parser Error on line %d: Expecting " + \
+                    str(line.numFields()) + " fields (%d found).' % ( currentLineNumber, len(fields) ))")
+                self.endBlock()
+            # Else there should be at least X fields on the line, where X is the number of fields
+            # on the line in the format file
+            else:
+                self.beginBlock("if len(fields) < %d:" % (line.numFields()))
+                self.writeLine("raise ValueError('Parser Error on line %d: Expecting " + \
+                    str(line.numFields()) + " fields (%d found).' % ( currentLineNumber, len(fields) ))")
+                self.endBlock()
+            # The fields are converted by a single expression, the parsers below only run to report
+            # the field that failed to parse.
+            self.beginBlock("try:")
+            self.writeLine("%s = %s" % ( ", ".join([ local(field.name()) for field in line ]), self._fieldConversions(line) ))
+            self.endBlock()
+            self.beginBlock("except ( ValueError, KeyError ) as e:")
+            for i, field in enumerate(line):
+                if field.isList():
+                    self.writeLine("%s = %s( fields[%d:], currentLineNumber )" % ( \
+                        local(field.name()), self.typeNameToParseFuncName[field.typeName()], i ))
+                else:
+                    self.writeLine("%s = %s( fields[%d], currentLineNumber )" % ( \
+                        local(field.name()), self.typeNameToParseFuncName[field.typeName()], i ))
+            self.endBlock()
+
+    def generateClassParserFunction( self, className, lines, isStreaming = False, part = None ):
         """ For generating the helper functions for parsing a user defined class. The first argument
-        is the class name and the second argument is a list of FormatLine's. """
+        is the class name and the second argument is a list of FormatLine's.
+
+        If isStreaming is True, a generator named "iterparseX" is generated instead. Rather than
+        collecting repeated fields into lists, it yields a (fieldName, value) pair for every field
+        as soon as it has been parsed (once per instance for repeated fields), and it checks that
+        only empty lines follow once the class has been parsed.
+
+        If part is PREFIX_PART, "parseXPrefix" parses the given lines and returns their fields as a
+        tuple instead of an object. If part is RECORDS_PART, "parseXRecords" parses a chunk of the
+        instances of the single repeated line given, starting with the instance firstIndex and
+        parsing at most numRecords of them (all that follow if None). numRepetitions replaces the
+        number of repetitions of a counted line. It returns the instances of the chunk. If part is
+        INDEX_PART, "indexXRecords" parses all the instances of the single repeated line given like
+        a streaming parser, but yields the line number each instance starts on instead. """
         # The name of the class parser should be "parseX" where X is the class name.
-        # The argument to the parser should be the input file to be parsed ,the current
-        # line number and the position of the current line in the input file.
+        # The argument to the parser should be the LineCursor of the input file to be parsed, the
+        # current line number and the cursor position of the current line.
         # If parsed successfully, the parser should return a X object, the new line number and position.
-        self.beginBlock("def parse%s( inputFile, currentLineNumber, currentLinePos ):" % className)
-        self.writeLine("userClass = %s.%s()" % ( CodeGenerator.DATA_FILE_NAME, className ))
-        self.writeNewline()
+        if isStreaming:
+            self.beginBlock("def iterparse%s( inputFile, currentLineNumber, currentLinePos ):" % className)
+        elif part == PythonGenerator.PREFIX_PART:
+            self.beginBlock("def parse%s%s( inputFile, currentLineNumber, currentLinePos ):" % ( className, part ))
+        elif part == PythonGenerator.RECORDS_PART:
+            self.beginBlock("def parse%s%s( inputFile, currentLineNumber, currentLinePos, firstIndex, numRecords, "
+                "numRepetitions ):" % ( className, part ))
+        elif part == PythonGenerator.INDEX_PART:
+            self.beginBlock("def index%sRecords( inputFile, currentLineNumber, currentLinePos, numRepetitions ):" % className)
+        elif part == PythonGenerator.LAZY_PART:
+            self.beginBlock("def scan%s( inputFile, currentLineNumber, currentLinePos ):" % className)
+        else:
+            # Lookahead signatures of the repetitions in this class
+            for line in lines:
+                if not line.isEmpty() and line.lookahead() is not None:
+                    self.writeLine("%s = %s" % ( self._signatureName( className, line.getField(0) ),
+                        self._signatureLiteral(line.lookahead()) ))
+            self.beginBlock("def parse%s( inputFile, currentLineNumber, currentLinePos ):" % className)
+        # The fields are parsed into locals and the object is constructed once all are parsed.
+        local = self._localName
+        # Whether instances are handed to the caller one by one instead of being collected
+        isYielding = isStreaming or part == PythonGenerator.INDEX_PART
+        # Whether only the structure is parsed, leaving the conversion of the fields to LazyField
+        isLazy = part == PythonGenerator.LAZY_PART
+        countFields = self._countFields(lines)
+
+        def handleParsedFields(line):
+            # Streaming parsers hand every non-repeated field to the caller as soon as it is parsed.
+            if isStreaming:
+                for field in line:
+                    self.writeLine("yield \"%s\", %s" % ( field.name(), local(field.name()) ))
+
+        def isColumnar(field):
+            return not isYielding and self._isColumnar(field)
+
+        def handleParsedInstance(field):
+            # Either collect the parsed instance or hand it to the caller right away. Columnar
+            # instances were already appended to their columns while being parsed.
+            if isStreaming:
+                self.writeLine("yield \"%s\", retObj" % field.name())
+                self.writeLine("numInstances += 1")
+            elif part == PythonGenerator.INDEX_PART:
+                self.writeLine("yield recordLineNumber")
+                self.writeLine("numInstances += 1")
+            elif isColumnar(field):
+                pass
+            else:
+                self.writeLine("%s.append(retObj)" % local(field.name()))
+            # Nothing before an instance of the body is revisited, so the cursor may discard it.
+            if className == self.bodyTypeName:
+                self.writeLine("inputFile.release(currentLinePos)")
+
+        def handleRollback():
+            if self.options.instrument:
+                self.writeLine("countRollback(\"%s\")" % className)
 
         def handleEmptyLine():
             self.comment("Parsing empty line")
@@ -91,82 +1085,137 @@ class PythonGenerator(CodeGenerator):
                 " % (currentLineNumber))")
             self.endBlock()
             self.writeLine("currentLineNumber += 1")
-            self.writeLine("currentLinePos = inputFile.tell()")
+            self.writeLine("currentLinePos = inputFile.mark()")
 
         def handleSimpleLine(line):
-            # The case where there is only one primitve field that is not a list.
-            if line.numFields() == 1 and line.getField(0).isPrimitive() and not line.getField(0).isList():
+            # The case where there is only one non-primitive field.
+            if line.numFields() == 1 and not line.getField(0).isPrimitive():
                 field = line.getField(0)
-                self.writeLine("userClass.%s = %s( readline(inputFile, \"%s\"), currentLineNumber )" % \
-                    ( field.name(), self.typeNameToParseFuncName[field.typeName()], className ))
+                parseFunction = self.typeNameToParseFuncName[field.typeName()]
+                if isLazy:
+                    parseFunction = "scan%s" % field.typeName()
+                self.writeLine("%s, currentLineNumber, currentLinePos = %s( inputFile, currentLineNumber, currentLinePos )" % ( local(field.name()), parseFunction ))
+            # The lazy structural pass only keeps the line, converted on first access.
+            elif isLazy and self._isLazyUnit( line, countFields ):
+                self.writeLine("%s = ( readline(inputFile, \"%s\"), currentLineNumber )" % \
+                    ( self._spanName(line), className ))
                 self.writeLine("currentLineNumber += 1")
-                self.writeLine("currentLinePos = inputFile.tell()")
-            # The case where ther is only one list primitive field.
-            elif line.numFields() == 1 and line.getField(0).isPrimitive() and line.getField(0).isList():
-                field = line.getField(0)
-                listType = "list(%s)" % field.listType()
-                self.writeLine("fields = readline(inputFile, \"%s\").split('%s')" % (className, self.format.lineDelimiter()))
-                self.writeLine("userClass.%s = %s( fields, currentLineNumber )" % ( field.name(), self.typeNameToParseFuncName[listType] ))
+                self.writeLine("currentLinePos = inputFile.mark()")
+            else:
+                self.generateLineConversion( className, line, "readline(inputFile, \"%s\")" % className )
                 self.writeLine("currentLineNumber += 1")
-                self.writeLine("currentLinePos = inputFile.tell()")
-            # The case where there is only one non-primitive field.
-            elif line.numFields() == 1 and not line.getField(0).isPrimitive():
-                field = line.getField(0)
-                self.writeLine("userClass.%s, currentLineNumber, currentLinePos = %s( inputFile, currentLineNumber, currentLinePos )" % ( field.name(), self.typeNameToParseFuncName[field.typeName()] ))
-            # The case where there is multiple fields on a line. The fields are all primitives.
+                self.writeLine("currentLinePos = inputFile.mark()")
+            handleParsedFields(line)
+
+        def handleInstance( field, isScanned = False ):
+            # Parse one instance of a repeated field into retObj. Scanned instances are parsed by
+            # the lazy structural pass, primitives being kept as the span of their line.
+            if part == PythonGenerator.INDEX_PART:
+                self.writeLine("recordLineNumber = currentLineNumber")
+            if isScanned and not field.isPrimitive():
+                self.writeLine("retObj, currentLineNumber, currentLinePos = scan%s( inputFile, currentLineNumber, currentLinePos )" % field.typeName())
+            elif isScanned:
+                self.writeLine("retObj = ( readline(inputFile, \"%s\"), currentLineNumber )" % className)
+                self.writeLine("currentLineNumber += 1")
+                self.writeLine("currentLinePos = inputFile.mark()")
+            # Field is a scalar record stored in columns.
+            elif isColumnar(field):
+                self.writeLine("currentLineNumber, currentLinePos = append%s( inputFile, currentLineNumber, currentLinePos, %s )" % \
+                    ( field.typeName(), local(field.name()) ))
+            # Field is an user defined class.
+            elif not field.isPrimitive():
+                self.writeLine("retObj, currentLineNumber, currentLinePos = %s( inputFile, currentLineNumber, currentLinePos )" % self.typeNameToParseFuncName[field.typeName()])
+            # Field is a non-list primitive.
+            elif field.isPrimitive() and not field.isList():
+                self.writeLine("retObj = %s( readline(inputFile, \"%s\"), currentLineNumber )" % \
+                    (self.typeNameToParseFuncName[field.typeName()], className))
+                self.writeLine("currentLineNumber += 1")
+                self.writeLine("currentLinePos = inputFile.mark()")
+            # Field is a list primitive.
             else:
-                self.writeLine("fields = readline(inputFile, \"%s\").split('%s')" % (className, self.format.lineDelimiter()))
-                # If the last field is not a list, then the number of fields should match exactly
-                if not line.getField(-1).isList():
-                    self.beginBlock("if len(fields) != %d:" % line.numFields())
-                    self.writeLine("raise ValueError('Parser Error on line %d: Expecting " + \
-                        str(line.numFields()) + " fields (%d found).' % ( currentLineNumber, len(fields) ))")
-                    self.endBlock()
-                # Else there should be at least X fields on the line, where X is the number of fields
-                # on the line in the format file
-                else:
-                    self.beginBlock("if len(fields) < %d:" % (line.numFields()))
-                    self.writeLine("raise ValueError('Parser Error on line %d: Expecting " + \
-                        str(line.numFields()) + " fields (%d found).' % ( currentLineNumber, len(fields) ))")
-                    self.endBlock()
-                for i, field in enumerate(line):
-                    if field.isList():
-                        listType = "list(%s)" % field.listType()
-                        self.writeLine("userClass.%s = %s( fields[%d:], currentLineNumber )" % ( \
-                            field.name(), self.typeNameToParseFuncName[field.typeName()], i ))
-                    else:
-                        self.writeLine("userClass.%s = %s( fields[%d], currentLineNumber )" % ( \
-                            field.name(), self.typeNameToParseFuncName[field.typeName()], i ))
+                listType = "list(%s)" % field.listType()
+                self.writeLine("fields = readline(inputFile, \"%s\").split(DELIMITER)" % className)
+                self.writeLine("retObj = %s( fields, currentLineNumber )" % \
+                    self.typeNameToParseFuncName[listType])
                 self.writeLine("currentLineNumber += 1")
-                self.writeLine("currentLinePos = inputFile.tell()")
+                self.writeLine("currentLinePos = inputFile.mark()")
+
+        def handleOneOrMoreCheck(line):
+            field = line.getField(0)
+            if isYielding:
+                self.beginBlock("if numInstances < 1:")
+            elif part == PythonGenerator.RECORDS_PART:
+                self.beginBlock("if firstIndex == 0 and len(%s) < 1:" % local(field.name()))
+            else:
+                self.beginBlock("if len(%s) < 1:" % local(field.name()))
+            self.writeLine("raise ValueError(\"Parser Error on line %d: Expecting at least 1 \\\"" + \
+                field.typeName() + "\\\" when parsing \\\"" + className + "." + field.name() + \
+                "\\\" (0 found).\" % currentLineNumber)")
+            self.endBlock()
+
+        def handleLookaheadRepeatingLine(line):
+            # Repeat while the upcoming lines look like the start of another instance. If every
+            # instance is a single line, the lookahead decides the repetition on its own. Otherwise
+            # the instance is still parsed on trial, but the repetition usually ends without an
+            # exception, once the lookahead fails.
+            field = line.getField(0)
+            isSeparated = "False"
+            if line.isSplitByNewline():
+                isSeparated = "isSeparated"
+                self.writeLine("isSeparated = False")
+            hasNextInstance = "hasNextInstance( inputFile, %s, %s )" % \
+                ( self._signatureName( className, field ), isSeparated )
+
+            if part == PythonGenerator.RECORDS_PART:
+                hasNextInstance = "( numRecords is None or len(%s) < numRecords ) and %s" % \
+                    ( local(field.name()), hasNextInstance )
+
+            if not line.isLookaheadDecisive():
+                self.beginBlock("try:")
+            self.beginBlock("while %s:" % hasNextInstance)
+            if not line.isLookaheadDecisive():
+                self.writeLine("prevLineNumber = currentLineNumber")
+                self.writeLine("prevLinePos = currentLinePos")
+            if line.isSplitByNewline():
+                self.beginBlock("if isSeparated:")
+                handleEmptyLine()
+                self.endBlock()
+            handleInstance( field, isLazy )
+            handleParsedInstance(field)
+            if line.isSplitByNewline():
+                self.writeLine("isSeparated = True")
+            self.endBlock()
+            if not line.isLookaheadDecisive():
+                self.endBlock()
+                self.beginBlock("except ( ValueError, EOFError ) as e:")
+                self.writeLine("currentLineNumber = prevLineNumber")
+                self.writeLine("currentLinePos = prevLinePos")
+                self.writeLine("inputFile.reset(currentLinePos)")
+                handleRollback()
+                self.endBlock()
+
+            if line.isOneOrMoreRepetition():
+                handleOneOrMoreCheck(line)
 
         def handleRepeatingLine(line):
             field = line.getField(0)
-            self.writeLine("userClass.%s = []" % field.name())
+            if isYielding:
+                self.writeLine("numInstances = 0")
+            elif isColumnar(field):
+                self.writeLine("%s = %s" % ( local(field.name()), self._columnTableLiteral(field.typeName()) ))
+            else:
+                self.writeLine("%s = []" % local(field.name()))
+
+            if line.lookahead() is not None:
+                handleLookaheadRepeatingLine(line)
 
-            if line.isZeroOrMoreRepetition() or line.isOneOrMoreRepetition():
+            elif line.isZeroOrMoreRepetition() or line.isOneOrMoreRepetition():
                 self.writeLine("prevLineNumber = currentLineNumber")
                 self.writeLine("prevLinePos = currentLinePos")
                 self.beginBlock("try:")
                 self.beginBlock("while True:")
-                # Field is an user defined class.
-                if not field.isPrimitive():
-                    self.writeLine("retObj, currentLineNumber, currentLinePos = %s( inputFile, currentLineNumber, currentLinePos )" % self.typeNameToParseFuncName[field.typeName()])
-                # Field is a non-list primitive.
-                elif field.isPrimitive() and not field.isList():
-                    self.writeLine("retObj = %s( readline(inputFile, \"%s\"), currentLineNumber )" % \
-                        (self.typeNameToParseFuncName[field.typeName()], className))
-                    self.writeLine("currentLineNumber += 1")
-                    self.writeLine("currentLinePos = inputFile.tell()")
-                # Field is a list primitive.
-                else:
-                    listType = "list(%s)" % field.listType()
-                    self.writeLine("fields = readline(inputFile, \"%s\").split(%s)" % (className, self.format.lineDelimiter()))
-                    self.writeLine("retObj = %s( fields, currentLineNumber )" % \
-                        self.typeNameToParseFuncName[listType])
-                    self.writeLine("currentLineNumber += 1")
-                    self.writeLine("currentLinePos = inputFile.tell()")
-                self.writeLine("userClass.%s.append(retObj)" % field.name())
+                handleInstance(field)
+                handleParsedInstance(field)
                 if line.isSplitByNewline():
                     self.writeLine("prevLineNumber = currentLineNumber")
                     self.writeLine("prevLinePos = currentLinePos")
@@ -176,41 +1225,28 @@ class PythonGenerator(CodeGenerator):
 
                 self.beginBlock("except ( ValueError, EOFError ) as e:")
                 if line.isOneOrMoreRepetition():
-                    self.beginBlock("if len(userClass.%s) < 1:" % field.name())
-                    self.writeLine("raise ValueError(\"Parser Error on line %d: Expecting at least 1 \\\"" + \
-                        field.typeName() + "\\\" when parsing \\\"" + className + "." + field.name() + \
-                        "\\\" (0 found).\" % currentLineNumber)")
-                    self.endBlock()
+                    handleOneOrMoreCheck(line)
                 if line.isSplitByNewline():
                     self.writeLine("currentLineNumber = prevLineNumber")
                     self.writeLine("currentLinePos = prevLinePos")
-                self.writeLine("inputFile.seek(currentLinePos)")
+                self.writeLine("inputFile.reset(currentLinePos)")
+                handleRollback()
                 self.endBlock()
 
             elif line.isIntegerRepetition() or line.isVariableRepetition():
                 numRepetition = line.repetitionAmountString()
                 if line.isVariableRepetition():
-                    numRepetition = "userClass." + numRepetition
+                    numRepetition = local(numRepetition)
+                if part in ( PythonGenerator.RECORDS_PART, PythonGenerator.INDEX_PART ):
+                    numRepetition = "numRepetitions"
+                indices = numRepetition
+                if part == PythonGenerator.RECORDS_PART:
+                    indices = "firstIndex, firstIndex + numRecords"
 
                 self.beginBlock("try:")
-                self.beginBlock("for _index in xrange(%s):" % numRepetition)
-                # Field is an user defined class.
-                if not field.isPrimitive():
-                    self.writeLine("retObj, currentLineNumber, currentLinePos = %s( inputFile, currentLineNumber, currentLinePos )" % self.typeNameToParseFuncName[field.typeName()])
-                # Field is a non-list primitive.
-                elif field.isPrimitive() and not field.isList():
-                    self.writeLine("retObj = %s( readline(inputFile, \"%s\"), currentLineNumber )" % \
-                        (self.typeNameToParseFuncName[field.typeName()], className))
-                    self.writeLine("currentLineNumber += 1")
-                    self.writeLine("currentLinePos = inputFile.tell()")
-                # Field is a list primitive.
-                else:
-                    listType = "list(%s)" % field.listType()
-                    self.writeLine("fields = readline(inputFile, \"%s\").split(%s)" % (className, self.format.lineDelimiter()))
-                    self.writeLine("retObj = %s( fields, currentLineNumber )" % \
-                        self.typeNameToParseFuncName[listType])
-                    self.writeLine("currentLineNumber += 1")
-                self.writeLine("userClass.%s.append(retObj)" % field.name())
+                self.beginBlock("for _index in xrange(%s):" % indices)
+                handleInstance( field, isLazy )
+                handleParsedInstance(field)
                 if line.isSplitByNewline():
                     self.beginBlock("if _index + 1 < %s:" % numRepetition)
                     handleEmptyLine()
@@ -236,10 +1272,35 @@ class PythonGenerator(CodeGenerator):
             handleLine(line)
             self.writeNewline()
 
-        self.writeLine("return userClass, currentLineNumber, currentLinePos")
+        if isYielding:
+            self.writeLine("checkEndOfFile( inputFile, currentLineNumber )")
+        elif part == PythonGenerator.PREFIX_PART:
+            fieldNames = [ field.name() for line in lines for field in line ]
+            self.writeLine("return ( %s), currentLineNumber, currentLinePos" % \
+                "".join([ "%s, " % local(fieldName) for fieldName in fieldNames ]))
+        elif part == PythonGenerator.RECORDS_PART:
+            self.writeLine("return %s, currentLineNumber, currentLinePos" % local(lines[0].getField(0).name()))
+        elif isLazy:
+            spans = [ self._spanName(line) if not line.isRepeating() else local(line.getField(0).name())
+                for line in lines if self._isLazyUnit( line, countFields ) ]
+            eagerFieldNames = [ field.name() for line in lines
+                if not line.isEmpty() and not self._isLazyUnit( line, countFields ) for field in line ]
+            self.writeLine("return Lazy%s(%s), currentLineNumber, currentLinePos" % ( className,
+                self._argumentList([ "( %s)" % "".join([ "%s, " % span for span in spans ]) ] +
+                [ local(fieldName) for fieldName in eagerFieldNames ]) ))
+        else:
+            fieldNames = [ field.name() for line in lines for field in line ]
+            self.writeLine("return %s.%s(%s), currentLineNumber, currentLinePos" % ( CodeGenerator.DATA_FILE_NAME,
+                className, self._argumentList([ local(fieldName) for fieldName in fieldNames ]) ))
         self.endBlock()
         self.writeNewline()
 
+        # The wrapped parser replaces the original, so calls from the parsers of other classes are counted
+        if self.options.instrument and not isStreaming and part in ( None, PythonGenerator.LAZY_PART ):
+            parseFunction = "scan%s" % className if isLazy else "parse%s" % className
+            self.writeLine("%s = instrumented( \"%s\", %s )" % ( parseFunction, className, parseFunction ))
+            self.writeNewline()
+
     ################################################################################
     # Generate Main File
     ################################################################################
@@ -253,29 +1314,161 @@ class PythonGenerator(CodeGenerator):
         self.writeNewline()
 
     def generateInputParserFunction(self):
-        """ For generating the function to parse an input file. """
-        self.beginBlock("def %s( filename ):" % CodeGenerator.PARSE_INPUT)
+        """ For generating the function to parse an input file, as well as the generator that
+        streams the fields of the body of an input file and, if the body ends in records, the
+        functions indexing them. """
+        if self.options.cache:
+            self.beginBlock("def %s( filename, workers = 1, cacheDir = %s.CACHE_DIR, maxCacheBytes = %s.CACHE_MAX_BYTES ):"
+                % ( CodeGenerator.PARSE_INPUT, CodeGenerator.UTIL_FILE_NAME, CodeGenerator.UTIL_FILE_NAME ))
+        else:
+            self.beginBlock("def %s( filename, workers = 1 ):" % CodeGenerator.PARSE_INPUT)
+        if self._parallelRecords() is not None:
+            self.comment("With more than one worker, the records of the body are parsed by a pool of that many")
+            self.comment("processes. Errors are reported by parsing the file again sequentially.")
+        else:
+            self.comment("The body of this format cannot be split into records, so workers is ignored.")
+        if self.options.cache:
+            self.comment("Unless cacheDir is None, a file whose content was parsed before is loaded from the cache")
+            self.comment("in cacheDir, which is otherwise given its body. The entries used least recently are removed")
+            self.comment("once they take more than maxCacheBytes.")
 
         self.beginBlock("try:")
+        if self.options.cache:
+            self.beginBlock("if cacheDir is not None:")
+            self.writeLine("return %s.parseCached( filename, cacheDir, maxCacheBytes," % CodeGenerator.UTIL_FILE_NAME)
+            self.writeLine("    lambda: %s( filename, workers, None ) )" % CodeGenerator.PARSE_INPUT)
+            self.endBlock()
+        if self._parallelRecords() is not None:
+            self.beginBlock("if workers > 1:")
+            self.writeLine("body = %s.parseInParallel( filename, workers )" % CodeGenerator.UTIL_FILE_NAME)
+            self.beginBlock("if body is not None:")
+            self.writeLine("return body")
+            self.endBlock()
+            self.endBlock()
         # Open file
-        self.writeLine("inputFile = open(filename, 'r')")
-        # Parse file
-        self.writeLine("body, lineNumber, linePos = %s.%s( inputFile, 1, 0 )"
-            % ( CodeGenerator.UTIL_FILE_NAME, self.typeNameToParseFuncName[self.bodyTypeName] ))
-        # Handle trailing newlines
-        self.writeLine("line = inputFile.readline()")
-        self.beginBlock("while line != '':")
-        self.beginBlock("if line.strip() != '':")
-        self.writeLine("sys.stderr.write(\"Parser Error on line %d: Finished parsing but did not reach end of file.\" % lineNumber)")
-        self.writeLine("exit(1)")
+        self.writeLine("inputFile = %s" % self._openInput())
+        self.generateParseBody()
         self.endBlock()
-        self.writeLine("lineNumber += 1")
-        self.writeLine("line = inputFile.readline()")
+        self.generateParserErrorHandlers()
+
         self.endBlock()
+        self.writeNewline()
 
-        self.writeLine("return body")
+        # Inputs that are not files are read through the same cursors, which never seek
+        self.beginBlock("def %s(stream):" % CodeGenerator.PARSE_STREAM)
+        self.comment("Parses the input read from a file object, such as sys.stdin or a pipe, which does not")
+        self.comment("need to support seeking.")
+        self.beginBlock("try:")
+        self.writeLine("inputFile = %s.openStream(stream)" % CodeGenerator.UTIL_FILE_NAME)
+        self.generateParseBody()
+        self.endBlock()
+        self.generateParserErrorHandlers()
+
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def %s(data):" % CodeGenerator.PARSE_BUFFER)
+        self.comment("Parses an input held in memory, as bytes or text.")
+        self.beginBlock("try:")
+        self.writeLine("inputFile = %s.openBuffer(data)" % CodeGenerator.UTIL_FILE_NAME)
+        self.generateParseBody()
+        self.endBlock()
+        self.generateParserErrorHandlers()
+
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def %s( filename ):" % CodeGenerator.ITERPARSE_INPUT)
+        self.comment("Yields a (fieldName, value) pair for every field of the body in file order, repeated")
+        self.comment("fields yielding one pair per instance as soon as it has been parsed.")
+
+        self.beginBlock("try:")
+        self.writeLine("inputFile = %s" % self._openInput())
+        # The consumer may stop early, which closes the generator at the yield
+        self.beginBlock("try:")
+        self.beginBlock("for fieldName, value in %s.iterparse%s( inputFile, 1, 0 ):"
+            % ( CodeGenerator.UTIL_FILE_NAME, self.bodyTypeName ))
+        self.writeLine("yield fieldName, value")
+        self.endBlock()
+        self.endBlock()
+        self.beginBlock("finally:")
+        self.writeLine("inputFile.close()")
+        self.endBlock()
         self.endBlock()
+        self.generateParserErrorHandlers()
 
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def %s( body, filename ):" % CodeGenerator.DUMP_SNAPSHOT)
+        self.comment("Writes the body to a binary snapshot, which %s reads back without parsing any text. The" % CodeGenerator.LOAD_SNAPSHOT)
+        self.comment("snapshots of a format are read by its parsers in every language.")
+        self.beginBlock("try:")
+        self.writeLine("%s.writeSnapshot( body, filename )" % CodeGenerator.UTIL_FILE_NAME)
+        self.endBlock()
+        self.generateParserErrorHandlers()
+
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def %s(filename):" % CodeGenerator.LOAD_SNAPSHOT)
+        self.comment("Reads the body from a binary snapshot written by %s." % CodeGenerator.DUMP_SNAPSHOT)
+        self.beginBlock("try:")
+        self.writeLine("return %s.readSnapshot(filename)" % CodeGenerator.UTIL_FILE_NAME)
+        self.endBlock()
+        self.generateParserErrorHandlers()
+
+        self.endBlock()
+        self.writeNewline()
+
+        if self.options.instrument:
+            self.beginBlock("def dumpStats( filename = None ):")
+            self.comment("Prints the calls, lines, time, rollbacks and exceptions of the parser of each class as")
+            self.comment("JSON, or writes them to the file of the given name.")
+            self.writeLine("%s.dumpStats(filename)" % CodeGenerator.UTIL_FILE_NAME)
+            self.endBlock()
+            self.writeNewline()
+
+        if self._recordLine() is None:
+            return
+
+        self.beginBlock("def buildIndex( filename, indexFilename = None ):")
+        self.comment("Saves the byte offset of every record of the body to filename + \".idx\", unless another")
+        self.comment("index file is given, and returns the number of records.")
+        self.beginBlock("try:")
+        self.writeLine("return %s.buildIndex( filename, indexFilename )" % CodeGenerator.UTIL_FILE_NAME)
+        self.endBlock()
+        self.generateParserErrorHandlers()
+
+        self.endBlock()
+        self.writeNewline()
+
+        self.beginBlock("def getRecord( filename, index, indexFilename = None ):")
+        self.comment("Parses only the record of the given index, building the index first if it is missing or")
+        self.comment("the file has changed since.")
+        self.beginBlock("try:")
+        self.writeLine("return %s.getRecord( filename, index, indexFilename )" % CodeGenerator.UTIL_FILE_NAME)
+        self.endBlock()
+        self.generateParserErrorHandlers()
+
+        self.endBlock()
+        self.writeNewline()
+
+    def generateParseBody(self):
+        """ For generating the statements parsing the body from the cursor named inputFile and
+        returning it. """
+        # Parse file, only its structure in lazy mode
+        parseFunction = self.typeNameToParseFuncName[self.bodyTypeName]
+        if self.options.lazy:
+            parseFunction = "scan%s" % self.bodyTypeName
+        self.writeLine("body, lineNumber, linePos = %s.%s( inputFile, 1, 0 )"
+            % ( CodeGenerator.UTIL_FILE_NAME, parseFunction ))
+        # Handle trailing newlines
+        self.writeLine("%s.checkEndOfFile( inputFile, lineNumber )" % CodeGenerator.UTIL_FILE_NAME)
+        self.writeLine("return body")
+
+    def generateParserErrorHandlers(self):
+        """ For generating the except clauses shared by the functions that parse an input file. """
         # Catch File IO errors
         self.beginBlock("except IOError as e:")
         self.writeLine("sys.stderr.write('Parser Error: Problem opening file, %s' % e)" )
@@ -294,13 +1487,26 @@ class PythonGenerator(CodeGenerator):
         self.writeLine("exit(1)")
         self.endBlock()
 
-        self.endBlock()
-        self.writeNewline()
-
     def generateMainFunction(self):
         """ For generating the empty main method that the user can fill in. """
         self.beginBlock("if __name__ == '__main__':")
         self.currentFile.comment("Call " + CodeGenerator.PARSE_INPUT + "(filename) to parse the file of that name.")
+        self.currentFile.comment("Call " + CodeGenerator.PARSE_STREAM + "(stream) or " + CodeGenerator.PARSE_BUFFER
+            + "(data) to parse a file object or an input held in memory.")
+        self.currentFile.comment("Call " + CodeGenerator.ITERPARSE_INPUT + "(filename) to stream the fields of its body instead.")
+        self.currentFile.comment("Call " + CodeGenerator.DUMP_SNAPSHOT + "(body, filename) to save a body as a binary snapshot, and "
+            + CodeGenerator.LOAD_SNAPSHOT + "(filename) to read it back.")
+        if self._recordLine() is not None:
+            self.currentFile.comment("Call getRecord(filename, index) to parse a single record of its body.")
+        if self.options.instrument:
+            self.currentFile.comment("Call dumpStats() to print the counters of the parser of each class.")
+        if self.options.cache:
+            self.currentFile.comment(CodeGenerator.PARSE_INPUT + "(filename) loads a file parsed before from the cache, unless given cacheDir = None.")
+        if not self.options.mmap:
+            self.currentFile.comment("Feed the blocks of an input to %s.PushParser to parse it as it arrives, or call" % \
+                CodeGenerator.UTIL_FILE_NAME)
+            self.currentFile.comment("%s.aparse(reader) under Python 3 to parse an asyncio stream." % \
+                PythonGenerator.ASYNC_FILE_NAME)
         self.writeLine("pass")
         self.endBlock()
 
@@ -3,12 +3,282 @@ from util import InstaParseFile
 
 def pygenStaticHelpers():
     helpers = """
+class LineCursor:
+\t\"\"\" Hands out the lines of an input file, which is read in large blocks. Positions are line
+\tindices into the buffered lines, so marking and resetting a position to look ahead never
+\ttouches the position of the underlying file. Lines before the most recently released position
+\tare discarded from the buffer. \"\"\"
+
+\tblockSize = 1 << 20
+
+\tdef __init__( self, inputFile ):
+\t\tself.inputFile = inputFile
+\t\tself.lines = []
+\t\t# The position of the first buffered line
+\t\tself.base = 0
+\t\tself.position = 0
+\t\tself.released = 0
+\t\tself.partialLine = ""
+\t\tself.isExhausted = False
+
+\tdef readline(self):
+\t\t\"\"\" Returns the next line without its line terminator, or None at the end of the file. \"\"\"
+\t\tindex = self.position - self.base
+\t\tif index >= len(self.lines):
+\t\t\tif not self.fill(self.position):
+\t\t\t\treturn None
+\t\t\tindex = self.position - self.base
+\t\tself.position += 1
+\t\treturn self.lines[index]
+
+\tdef peek( self, offset ):
+\t\t\"\"\" Returns the line the given number of lines after the next one without consuming
+\t\tanything, or None if the file ends before it. \"\"\"
+\t\tindex = self.position + offset - self.base
+\t\tif index >= len(self.lines):
+\t\t\tif not self.fill(self.position + offset):
+\t\t\t\treturn None
+\t\t\tindex = self.position + offset - self.base
+\t\treturn self.lines[index]
+
+\tdef mark(self):
+\t\treturn self.position
+
+\tdef reset( self, position ):
+\t\tself.position = position
+
+\tdef release( self, position ):
+\t\t\"\"\" Allows the lines before the given position to be discarded. \"\"\"
+\t\tself.released = position
+
+\tdef fill( self, position ):
+\t\t\"\"\" Reads blocks until there is a line at the given position. Returns False at the end of the file. \"\"\"
+\t\tdiscarded = min( self.released, self.position ) - self.base
+\t\tif discarded > 0:
+\t\t\tdel self.lines[:discarded]
+\t\t\tself.base += discarded
+\t\twhile position - self.base >= len(self.lines):
+\t\t\tif self.isExhausted:
+\t\t\t\treturn False
+\t\t\tblock = self.inputFile.read(self.blockSize)
+\t\t\tif block == "":
+\t\t\t\tself.isExhausted = True
+\t\t\t\tif self.partialLine != "":
+\t\t\t\t\tself.lines.append(self.partialLine)
+\t\t\t\t\tself.partialLine = ""
+\t\t\t\tcontinue
+\t\t\tnewLines = ( self.partialLine + block ).split("\\n")
+\t\t\tself.partialLine = newLines.pop()
+\t\t\tself.lines.extend(newLines)
+\t\treturn True
+
+\tdef close(self):
+\t\tself.inputFile.close()
+
+# Patterns of the first bytes of the compressed inputs that are decompressed while they are read
+COMPRESSION_PATTERNS = (
+\t( re.compile(br"\\x1f\\x8b"), "gzip" ),
+\t( re.compile(br"BZh[1-9](\\x31\\x41\\x59\\x26\\x53\\x59|\\x17\\x72\\x45\\x38\\x50\\x90)"), "bz2" ),
+\t( re.compile(br"\\xfd7zXZ\\x00"), "xz" ),
+)
+COMPRESSION_MAGIC_SIZE = 10
+
+def compressionOf(block):
+\t\"\"\" Returns the compression of an input starting with the given block, or None. \"\"\"
+\tif not isinstance( block, bytes ):
+\t\treturn None
+\tfor pattern, compression in COMPRESSION_PATTERNS:
+\t\tif pattern.match(block):
+\t\t\treturn compression
+\treturn None
+
+def newDecompressor(compression):
+\tif compression == "gzip":
+\t\treturn zlib.decompressobj( 16 + zlib.MAX_WBITS )
+\tif compression == "bz2":
+\t\treturn bz2.BZ2Decompressor()
+\tif lzma is None:
+\t\traise IOError("Reading xz compressed input requires the lzma module.")
+\treturn lzma.LZMADecompressor()
+
+class DecompressedStream:
+\t\"\"\" Reads a stream compressed with gzip, bzip2 or xz, as told by the bytes it starts with, and
+\tdecompresses it block by block. Other streams are read as they are. \"\"\"
+
+\tdef __init__( self, stream ):
+\t\tself.stream = stream
+\t\tself.compression = None
+\t\tself.decompressor = None
+\t\tself.isStarted = False
+
+\tdef read( self, size ):
+\t\tblock = self.stream.read(size)
+\t\tif not self.isStarted:
+\t\t\tself.isStarted = True
+\t\t\t# The first bytes may come in several reads from a pipe
+\t\t\twhile isinstance( block, bytes ) and 0 < len(block) < COMPRESSION_MAGIC_SIZE:
+\t\t\t\tmore = self.stream.read(size)
+\t\t\t\tif not more:
+\t\t\t\t\tbreak
+\t\t\t\tblock += more
+\t\t\tself.compression = compressionOf(block)
+\t\t\tif self.compression is not None:
+\t\t\t\tself.decompressor = newDecompressor(self.compression)
+\t\tif self.compression is None:
+\t\t\treturn block
+\t\t# A block may only complete the input of the decompressor without yielding anything yet
+\t\twhile block:
+\t\t\tdata = self.decompress(block)
+\t\t\tif data:
+\t\t\t\treturn data
+\t\t\tblock = self.stream.read(size)
+\t\tif not getattr( self.decompressor, "eof", True ):
+\t\t\traise IOError("Compressed input ended unexpectedly.")
+\t\treturn b""
+
+\tdef decompress( self, block ):
+\t\tdata = self.decompressor.decompress(block)
+\t\t# Concatenated inputs, such as those appended to a compressed file, each need a new decompressor
+\t\twhile self.decompressor.unused_data:
+\t\t\tunused = self.decompressor.unused_data
+\t\t\tself.decompressor = newDecompressor(self.compression)
+\t\t\tdata += self.decompressor.decompress(unused)
+\t\treturn data
+
+\tdef close(self):
+\t\tself.stream.close()
+
+def isCompressed(filename):
+\tinputFile = open( filename, 'rb' )
+\ttry:
+\t\treturn compressionOf(inputFile.read(COMPRESSION_MAGIC_SIZE)) is not None
+\tfinally:
+\t\tinputFile.close()
+
+class StreamInput:
+\t\"\"\" A stream for a LineCursor to read, such as standard input, a pipe or an in-memory buffer. It
+\tonly needs a read method, so it does not have to support seeking. Compressed streams are
+\tdecompressed and under Python 3 streams of bytes are decoded as UTF-8. \"\"\"
+
+\tdef __init__( self, stream ):
+\t\tself.stream = DecompressedStream(stream)
+\t\tself.decoder = codecs.getincrementaldecoder("utf-8")()
+
+\tdef read( self, size ):
+\t\tblock = self.stream.read(size)
+\t\t# Bytes and str are the same type before Python 3
+\t\tif isinstance( block, bytes ) and not isinstance( block, str ):
+\t\t\tblock = self.decoder.decode( block, len(block) == 0 )
+\t\treturn block
+
+\tdef close(self):
+\t\tself.stream.close()
+
+def openStream(stream):
+\t\"\"\" Returns the cursor over the input read from a stream. \"\"\"
+\treturn LineCursor(StreamInput(stream))
+
+def openFile(filename):
+\t\"\"\" Returns the cursor over the input file of the given name. \"\"\"
+\treturn openStream(open( filename, 'rb' ))
+
+def openBuffer(data):
+\t\"\"\" Returns the cursor over an input held in memory, as bytes or text. \"\"\"
+\tif isinstance( data, bytes ):
+\t\treturn openStream(io.BytesIO(data))
+\treturn openStream(io.StringIO(data))
+
 def readline(inputFile, className):
 \tline = inputFile.readline()
-\tif line == "":
+\tif line is None:
 \t\traise ValueError("Parser Error: Reached end of file while parsing object \\"" + className + "\\".")
 \treturn line.strip()
 
+def checkEndOfFile( inputFile, currentLineNumber ):
+\tline = inputFile.readline()
+\twhile line is not None:
+\t\tif line.strip():
+\t\t\traise ValueError("Parser Error on line %d: Finished parsing but did not reach end of file." % currentLineNumber)
+\t\tcurrentLineNumber += 1
+\t\tline = inputFile.readline()
+
+# Patterns of the tokens that the primitive parsers below accept
+tokenPatterns = {
+\t"int": re.compile(r"\\s*[-+]?\\d+\\s*$"),
+\t"float": re.compile(r"\\s*[-+]?(\\d+\\.?\\d*([eE][-+]?\\d+)?|\\.\\d+([eE][-+]?\\d+)?|inf(inity)?|nan)\\s*$", re.I),
+\t"bool": re.compile(r"(1|0|true|false)$", re.I),
+\t"string": re.compile(r""),
+}
+
+# Sources of the token patterns above, to be joined into the pattern of a whole line
+tokenSources = {
+\t"int": r"\\s*[-+]?\\d+\\s*",
+\t"float": r"\\s*[-+]?(\\d+\\.?\\d*([eE][-+]?\\d+)?|\\.\\d+([eE][-+]?\\d+)?|inf(inity)?|nan)\\s*",
+\t"bool": r"(1|0|true|false)",
+}
+linePatterns = {}
+# Values of the tokens accepted by the bool parser, by lower case token
+BOOL_VALUES = { "1": True, "true": True, "0": False, "false": False }
+
+def linePattern(signature):
+\t\"\"\" Compiles a split lookahead signature into a single pattern matching the whole stripped line,
+\tso that a line is checked in one match. Returns None if a token could contain the delimiter, in
+\twhich case the line has to be split instead. \"\"\"
+\tif signature not in linePatterns:
+\t\ttokenTypes, listType, isSplit = signature
+\t\tisBytes = not isinstance( DELIMITER, type("") )
+\t\tdelimiter = DELIMITER.decode("latin-1") if isBytes else DELIMITER
+\t\tpattern = None
+\t\tif len(delimiter) == 1 and not delimiter.isalnum() and delimiter not in "+-." and ( tokenTypes or listType ):
+\t\t\tseparator = re.escape(delimiter)
+\t\t\ttokens = { "string": "[^%s]*" % separator }
+\t\t\tfor tokenType, source in tokenSources.items():
+\t\t\t\t# Whitespace around a token must not run into a whitespace delimiter
+\t\t\t\tif delimiter.isspace():
+\t\t\t\t\tsource = source.replace( r"\\s", r"[^\\S%s]" % separator )
+\t\t\t\ttokens[tokenType] = "(?:%s)" % source
+\t\t\tsource = separator.join([ tokens[tokenType] for tokenType in tokenTypes ])
+\t\t\tif listType is not None and tokenTypes:
+\t\t\t\tsource += "(?:%s%s)+" % ( separator, tokens[listType] )
+\t\t\telif listType is not None:
+\t\t\t\tsource = "%s(?:%s%s)*" % ( tokens[listType], separator, tokens[listType] )
+\t\t\tsource += "$"
+\t\t\tpattern = re.compile( source.encode("latin-1") if isBytes else source, re.I )
+\t\tlinePatterns[signature] = pattern
+\treturn linePatterns[signature]
+
+def lineMatches( line, signature ):
+\t\"\"\" Checks a line against a lookahead signature, a ( tokenTypes, listType, isSplit ) tuple. \"\"\"
+\ttokenTypes, listType, isSplit = signature
+\tline = line.strip()
+\tif not isSplit:
+\t\tif len(tokenTypes) == 0:
+\t\t\treturn not line
+\t\treturn tokenPatterns[tokenTypes[0]].match(line) is not None
+\tpattern = linePattern(signature)
+\tif pattern is not None:
+\t\treturn pattern.match(line) is not None
+\ttokens = line.split(DELIMITER)
+\tif listType is None and len(tokens) != len(tokenTypes):
+\t\treturn False
+\tif listType is not None and len(tokens) <= len(tokenTypes):
+\t\treturn False
+\tfor i, token in enumerate(tokens):
+\t\ttokenType = tokenTypes[i] if i < len(tokenTypes) else listType
+\t\tif tokenPatterns[tokenType].match(token) is None:
+\t\t\treturn False
+\treturn True
+
+def hasNextInstance( inputFile, signature, isSeparated ):
+\t\"\"\" Checks whether the upcoming lines could start another instance of a repetition, without
+\tconsuming them. If isSeparated, the instance has to be preceded by an empty line. \"\"\"
+\tline = inputFile.peek(0)
+\tif isSeparated:
+\t\tif line is None or line.strip():
+\t\t\treturn False
+\t\tline = inputFile.peek(1)
+\treturn line is not None and lineMatches( line, signature )
+
 def intParse( s, currentLineNumber ):
 \ttry:
 \t\treturn int(s)
@@ -16,11 +286,10 @@ def intParse( s, currentLineNumber ):
 \t\traise ValueError("Parser Error on line %d: Could not parse \\\"%s\\\" as int." % ( currentLineNumber, s ))
 
 def boolParse( s, currentLineNumber ):
-\tif s == "1" or s.lower() == "true":
-\t\treturn True
-\telif s == "0" or s.lower() == "false":
-\t\treturn False
-\traise ValueError("Parser Error on line %d: Could not parse \\\"%s\\\" as bool." % ( currentLineNumber, s ))
+\tvalue = BOOL_VALUES.get(s.lower())
+\tif value is None:
+\t\traise ValueError("Parser Error on line %d: Could not parse \\\"%s\\\" as bool." % ( currentLineNumber, s ))
+\treturn value
 
 def stringParse( s, currentLineNumber ):
 \treturn s
@@ -31,38 +300,36 @@ def floatParse( s, currentLineNumber ):
 \texcept ValueError as e:
 \t\traise ValueError("Parser Error on line %d: Could not parse \\\"%s\\\" as float." % ( currentLineNumber, s ))
 
+# The list parsers convert the whole list with builtins and only parse the tokens one by one
+# to report the offending token.
 def intListParse( strings, currentLineNumber ):
-\tintList = []
 \tif len(strings) == 0:
 \t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
-\tfor s in strings:
-\t\tintList.append(intParse( s, currentLineNumber ))
-\treturn intList
+\ttry:
+\t\treturn list(map( int, strings ))
+\texcept ValueError as e:
+\t\treturn [ intParse( s, currentLineNumber ) for s in strings ]
 
 def boolListParse( strings, currentLineNumber ):
-\tboolList = []
 \tif len(strings) == 0:
 \t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
-\tfor s in strings:
-\t\tboolList.append(boolParse( s, currentLineNumber ))
+\tboolList = [ BOOL_VALUES.get(s.lower()) for s in strings ]
+\tif None in boolList:
+\t\treturn [ boolParse( s, currentLineNumber ) for s in strings ]
 \treturn boolList
 
 def stringListParse( strings, currentLineNumber ):
-\tstringList = []
 \tif len(strings) == 0:
 \t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
-\tfor s in strings:
-\t\tstringList.append(stringParse( s, currentLineNumber ))
-\treturn stringList
+\treturn list(strings)
 
 def floatListParse( strings, currentLineNumber ):
-\tfloatList = []
 \tif len(strings) == 0:
 \t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
-\tfor s in strings:
-\t\tfloatList.append(floatParse( s, currentLineNumber ))
-\treturn floatList
-
+\ttry:
+\t\treturn list(map( float, strings ))
+\texcept ValueError as e:
+\t\treturn [ floatParse( s, currentLineNumber ) for s in strings ]
 
 """
     helpers = helpers.replace( "intParse", CodeGenerator.PARSE_INT )
@@ -78,3 +345,895 @@ def floatListParse( strings, currentLineNumber ):
     helpers = helpers.replace( "\t", InstaParseFile.indentString )
 
     return helpers
+
+def pygenNumpyHelpers():
+    """ Replacements for the int and float list helpers that convert the whole list to a NumPy
+    array at once. They must be written after pygenStaticHelpers so that they take precedence. """
+    helpers = """
+def intListParse( strings, currentLineNumber ):
+\tif len(strings) == 0:
+\t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
+\ttry:
+\t\treturn numpy.array( strings, dtype = numpy.int64 )
+\texcept ( ValueError, OverflowError ) as e:
+\t\t# Re-scan token by token to report the offending token
+\t\tfor s in strings:
+\t\t\tintParse( s, currentLineNumber )
+\t\traise ValueError("Parser Error on line %d: Could not fit list(int) into a 64-bit array." % currentLineNumber)
+
+def floatListParse( strings, currentLineNumber ):
+\tif len(strings) == 0:
+\t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
+\ttry:
+\t\treturn numpy.array( strings, dtype = numpy.float64 )
+\texcept ValueError as e:
+\t\t# Re-scan token by token to report the offending token
+\t\tfor s in strings:
+\t\t\tfloatParse( s, currentLineNumber )
+\t\traise ValueError("Parser Error on line %d: Could not parse list(float) as an array." % currentLineNumber)
+
+"""
+    helpers = helpers.replace( "intParse", CodeGenerator.PARSE_INT )
+    helpers = helpers.replace( "floatParse", CodeGenerator.PARSE_FLOAT )
+    helpers = helpers.replace( "intListParse", CodeGenerator.PARSE_INT_LIST )
+    helpers = helpers.replace( "floatListParse", CodeGenerator.PARSE_FLOAT_LIST )
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenColumnarHelpers():
+    """ The ColumnTable used to store repeated scalar records column by column. """
+    helpers = """
+try:
+\tarray.array("q")
+\tINT_TYPE_CODE = "q"
+except ValueError as e:
+\t# Arrays of "q" only exist from Python 3.3 on, before which "l" holds 64 bits on most platforms
+\tINT_TYPE_CODE = "l"
+
+class ColumnTable:
+\t\"\"\" Stores the instances of a scalar record class as one column per field. Each field is an
+\tattribute holding its column, an array for int, float and bool fields and a list for string
+\tfields. Indexing and iterating creates the corresponding data objects on demand. \"\"\"
+\ttypeCodes = { "int": INT_TYPE_CODE, "float": "d", "bool": "b" }
+
+\tdef __init__( self, dataClass, fieldTypes ):
+\t\tself._dataClass = dataClass
+\t\tself._fieldTypes = fieldTypes
+\t\tfor name, typeName in fieldTypes:
+\t\t\tif typeName in ColumnTable.typeCodes:
+\t\t\t\tsetattr( self, name, array.array(ColumnTable.typeCodes[typeName]) )
+\t\t\telse:
+\t\t\t\tsetattr( self, name, [] )
+
+\tdef __len__(self):
+\t\treturn len(getattr( self, self._fieldTypes[0][0] ))
+
+\tdef __getitem__( self, index ):
+\t\tvalues = []
+\t\tfor name, typeName in self._fieldTypes:
+\t\t\tvalue = getattr( self, name )[index]
+\t\t\tvalues.append(bool(value) if typeName == "bool" else value)
+\t\treturn self._dataClass(*values)
+
+\tdef __iter__(self):
+\t\tfor index in xrange(len(self)):
+\t\t\tyield self[index]
+
+\tdef extend( self, other ):
+\t\t\"\"\" Appends the rows of another ColumnTable of the same class. \"\"\"
+\t\tfor name, typeName in self._fieldTypes:
+\t\t\tgetattr( self, name ).extend(getattr( other, name ))
+
+\tdef dropPartialRow(self):
+\t\t\"\"\" Drops the values of a row that could only be appended to some of the columns. \"\"\"
+\t\tnumRows = min([ len(getattr( self, name )) for name, typeName in self._fieldTypes ])
+\t\tfor name, typeName in self._fieldTypes:
+\t\t\tdel getattr( self, name )[numRows:]
+
+"""
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenMappedHelpers():
+    """ The MappedLineCursor, along with replacements for the helpers that compare tokens to str
+    literals or quote them in error messages, so that they accept the bytes it hands out. They
+    must be written after pygenStaticHelpers so that they take precedence. """
+    helpers = """
+class MappedLineCursor:
+\t\"\"\" Hands out the lines of an input file mapped into memory, as bytes. Lines are found by
+\tscanning the mapping for newlines, so the file is neither copied into a buffer nor decoded;
+\tonly string fields are decoded, by stringParse. Positions are byte offsets into the mapping. \"\"\"
+
+\tdef __init__( self, inputFile, data = None ):
+\t\tself.inputFile = inputFile
+\t\tif data is not None:
+\t\t\t# An input that cannot be mapped, already held in memory
+\t\t\tself.data = data if isinstance( data, bytes ) else data.encode("utf-8")
+\t\t\tself.position = 0
+\t\t\treturn
+\t\ttry:
+\t\t\tself.data = mmap.mmap( inputFile.fileno(), 0, access = mmap.ACCESS_READ )
+\t\texcept ValueError as e:
+\t\t\t# Empty files cannot be mapped
+\t\t\tself.data = b""
+\t\tself.position = 0
+
+\tdef lineAt( self, position ):
+\t\t\"\"\" Returns the line starting at the given position without its line terminator, or None
+\t\tat the end of the file, along with the position of the following line. \"\"\"
+\t\tif position >= len(self.data):
+\t\t\treturn None, position
+\t\tend = self.data.find( b"\\n", position )
+\t\tif end == -1:
+\t\t\tend = len(self.data)
+\t\treturn self.data[position:end], end + 1
+
+\tdef readline(self):
+\t\tline, self.position = self.lineAt(self.position)
+\t\treturn line
+
+\tdef peek( self, offset ):
+\t\tposition = self.position
+\t\tfor _index in xrange(offset):
+\t\t\tline, position = self.lineAt(position)
+\t\t\tif line is None:
+\t\t\t\treturn None
+\t\treturn self.lineAt(position)[0]
+
+\tdef mark(self):
+\t\treturn self.position
+
+\tdef reset( self, position ):
+\t\tself.position = position
+
+\tdef release( self, position ):
+\t\t# The operating system pages the mapping in and out, there is nothing to discard.
+\t\tpass
+
+\tdef close(self):
+\t\tif isinstance( self.data, mmap.mmap ):
+\t\t\tself.data.close()
+\t\tif self.inputFile is not None:
+\t\t\tself.inputFile.close()
+
+def openStream(stream):
+\t\"\"\" Returns the cursor over the input read from a stream, which is read whole as it cannot be
+\tmapped. \"\"\"
+\tstream = DecompressedStream(stream)
+\tblocks = []
+\tblock = stream.read(LineCursor.blockSize)
+\twhile block:
+\t\tblocks.append(block)
+\t\tblock = stream.read(LineCursor.blockSize)
+\t# The empty block is of the type of the others, bytes or text
+\treturn MappedLineCursor( stream, block.join(blocks) )
+
+def openFile(filename):
+\t\"\"\" Returns the cursor over the input file of the given name, mapped unless it is compressed. \"\"\"
+\tif isCompressed(filename):
+\t\treturn openStream(open( filename, 'rb' ))
+\treturn MappedLineCursor(open( filename, 'rb' ))
+
+def openBuffer(data):
+\t\"\"\" Returns the cursor over an input held in memory, as bytes or text. \"\"\"
+\tif compressionOf(data) is not None:
+\t\treturn openStream(io.BytesIO(data))
+\treturn MappedLineCursor( None, data )
+
+tokenPatterns = {
+\t"int": re.compile(br"\\s*[-+]?\\d+\\s*$"),
+\t"float": re.compile(br"\\s*[-+]?(\\d+\\.?\\d*([eE][-+]?\\d+)?|\\.\\d+([eE][-+]?\\d+)?|inf(inity)?|nan)\\s*$", re.I),
+\t"bool": re.compile(br"(1|0|true|false)$", re.I),
+\t"string": re.compile(br""),
+}
+BOOL_VALUES = { b"1": True, b"true": True, b"0": False, b"false": False }
+
+def tokenText(s):
+\t\"\"\" The text of a token, decoded for the error messages. \"\"\"
+\tif bytes is str:
+\t\treturn s
+\treturn s.decode( "utf-8", "replace" )
+
+def intParse( s, currentLineNumber ):
+\ttry:
+\t\treturn int(s)
+\texcept ValueError as e:
+\t\traise ValueError("Parser Error on line %d: Could not parse \\\"%s\\\" as int." % ( currentLineNumber, tokenText(s) ))
+
+def boolParse( s, currentLineNumber ):
+\tvalue = BOOL_VALUES.get(s.lower())
+\tif value is None:
+\t\traise ValueError("Parser Error on line %d: Could not parse \\\"%s\\\" as bool." % ( currentLineNumber, tokenText(s) ))
+\treturn value
+
+def floatParse( s, currentLineNumber ):
+\ttry:
+\t\treturn float(s)
+\texcept ValueError as e:
+\t\traise ValueError("Parser Error on line %d: Could not parse \\\"%s\\\" as float." % ( currentLineNumber, tokenText(s) ))
+
+def stringParse( s, currentLineNumber ):
+\t# Bytes and str are the same type before Python 3
+\tif bytes is str:
+\t\treturn s
+\treturn s.decode("utf-8")
+
+def stringListParse( strings, currentLineNumber ):
+\tif len(strings) == 0:
+\t\traise ValueError("Parser Error on line %d: Could not parse empty string as list." % currentLineNumber)
+\tif bytes is str:
+\t\treturn list(strings)
+\treturn [ s.decode("utf-8") for s in strings ]
+
+"""
+    helpers = helpers.replace( "intParse", CodeGenerator.PARSE_INT )
+    helpers = helpers.replace( "boolParse", CodeGenerator.PARSE_BOOL )
+    helpers = helpers.replace( "stringParse", CodeGenerator.PARSE_STRING )
+    helpers = helpers.replace( "floatParse", CodeGenerator.PARSE_FLOAT )
+    helpers = helpers.replace( "stringListParse", CodeGenerator.PARSE_STRING_LIST )
+
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenParallelHelpers():
+    """ The helpers that find the records of an input file, parse chunks of them in a pool of
+    worker processes and hold the records of the chunks. The chunks are parsed by parseChunk,
+    which is generated for each format. """
+    helpers = """
+def findRecordStarts( filename, lineNumber, recordLines, maxRecords ):
+\t\"\"\" Scans the input file from the given line number on for the lines that may start a record,
+\teither every recordLines lines or, if recordLines is None, the lines following an empty line.
+\tReturns the byte offset and line number of at most maxRecords of them (all if None), always
+\tincluding the first line scanned. \"\"\"
+\tstarts = []
+\tinputFile = open( filename, 'rb' )
+\toffset = 0
+\tfirstOffset = None
+\tcurrentLineNumber = 1
+\tisAfterEmptyLine = False
+\tfor line in inputFile:
+\t\tif currentLineNumber == lineNumber:
+\t\t\tfirstOffset = offset
+\t\tif maxRecords is not None and len(starts) == maxRecords:
+\t\t\tbreak
+\t\tif currentLineNumber >= lineNumber:
+\t\t\tif recordLines is not None:
+\t\t\t\tisStart = ( currentLineNumber - lineNumber ) % recordLines == 0
+\t\t\telse:
+\t\t\t\tisStart = currentLineNumber == lineNumber or ( isAfterEmptyLine and line.strip() )
+\t\t\tif isStart:
+\t\t\t\tstarts.append(( offset, currentLineNumber ))
+\t\tisAfterEmptyLine = not line.strip()
+\t\toffset += len(line)
+\t\tcurrentLineNumber += 1
+\tinputFile.close()
+\tif len(starts) == 0:
+\t\tstarts.append(( offset if firstOffset is None else firstOffset, lineNumber ))
+\treturn starts
+
+def splitChunks( filename, starts, workers, numRepetitions ):
+\t\"\"\" Groups the record starts into the chunks handed to parseChunk, several per worker so that
+\tthe workers even out. The last chunk parses all remaining records and checks the end of file. \"\"\"
+\tnumChunks = workers * 4
+\trecordsPerChunk = max( 1, ( len(starts) + numChunks - 1 ) // numChunks )
+\tchunks = []
+\tfor firstIndex in xrange( 0, len(starts), recordsPerChunk ):
+\t\toffset, lineNumber = starts[firstIndex]
+\t\tnumRecords = min( recordsPerChunk, len(starts) - firstIndex )
+\t\tchunks.append([ filename, offset, lineNumber, firstIndex, numRecords, numRepetitions, False ])
+\tlastChunk = chunks[-1]
+\tlastChunk[4] = None if numRepetitions is None else numRepetitions - lastChunk[3]
+\tlastChunk[6] = True
+\treturn chunks
+
+def parseChunks( chunks, workers, addChunk ):
+\t\"\"\" Parses the chunks in a pool of worker processes and hands the snapshot and number of records
+\tof each to addChunk in order, as soon as it arrives, while the workers parse the following chunks.
+\tReturns False if any chunk failed to parse or ended anywhere else than where the next one starts. \"\"\"
+\tpool = multiprocessing.Pool(workers)
+\ttry:
+\t\tfor index, ( data, numRecords, lineNumber ) in enumerate(pool.imap( parseChunk, chunks )):
+\t\t\tif index + 1 < len(chunks) and lineNumber != chunks[index + 1][2]:
+\t\t\t\treturn False
+\t\t\taddChunk( data, numRecords )
+\t\treturn True
+\texcept ( ValueError, EOFError ) as e:
+\t\treturn False
+\tfinally:
+\t\tpool.terminate()
+
+class RecordChunks:
+\t\"\"\" The records of a body parsed in parallel, kept as the binary snapshot of each chunk until they
+\tare first used, so that the parent process does not create them all as the chunks arrive. Like the
+\tlist of the records, it supports len, indexing and iteration, which load the records of a whole
+\tchunk at once with loadRecords. \"\"\"
+
+\tdef __init__( self, loadRecords ):
+\t\tself._loadRecords = loadRecords
+\t\tself._chunks = []
+\t\t# The number of records up to the end of each chunk
+\t\tself._ends = []
+
+\tdef append( self, data, numRecords ):
+\t\t\"\"\" Appends the snapshot of the records of the next chunk. \"\"\"
+\t\tself._ends.append(len(self) + numRecords)
+\t\tself._chunks.append(data)
+
+\tdef chunk( self, index ):
+\t\t\"\"\" Returns the records of the chunk of the given index, loading them on first use. \"\"\"
+\t\trecords = self._chunks[index]
+\t\tif isinstance( records, bytes ):
+\t\t\t# The collector would scan the records over and over as they are created
+\t\t\tisCollecting = gc.isenabled()
+\t\t\tgc.disable()
+\t\t\ttry:
+\t\t\t\trecords, offset = self._loadRecords( records, 0 )
+\t\t\tfinally:
+\t\t\t\tif isCollecting:
+\t\t\t\t\tgc.enable()
+\t\t\tself._chunks[index] = records
+\t\treturn records
+
+\tdef __len__(self):
+\t\treturn self._ends[-1] if len(self._ends) > 0 else 0
+
+\tdef __getitem__( self, index ):
+\t\tif isinstance( index, slice ):
+\t\t\treturn [ self[i] for i in xrange(*index.indices(len(self))) ]
+\t\tif index < 0:
+\t\t\tindex += len(self)
+\t\tif index < 0 or index >= len(self):
+\t\t\traise IndexError("record index out of range")
+\t\tchunkIndex = bisect.bisect_right( self._ends, index )
+\t\tstart = self._ends[chunkIndex - 1] if chunkIndex > 0 else 0
+\t\treturn self.chunk(chunkIndex)[index - start]
+
+\tdef __iter__(self):
+\t\tfor index in xrange(len(self._chunks)):
+\t\t\tfor record in self.chunk(index):
+\t\t\t\tyield record
+
+"""
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenIndexHelpers():
+    """ The helpers that save the byte offset and line number of the records of an input file to
+    its index file and look them up again. The records are found by indexXRecords, which is
+    generated for each format. """
+    helpers = """
+INDEX_EXTENSION = ".idx"
+INDEX_MAGIC = b"IPINDEX1"
+# Magic, size and modification time of the indexed input file, and number of records
+INDEX_HEADER = struct.Struct("<8sqdq")
+INDEX_ENTRY = struct.Struct("<q")
+
+def findLineOffsets( filename, lineNumbers ):
+\t\"\"\" Finds the byte offset of each of the increasing line numbers, read from any iterable, by
+\tscanning the input file alongside it. \"\"\"
+\toffsets = []
+\tfoundLineNumbers = []
+\tinputFile = open( filename, 'rb' )
+\ttry:
+\t\toffset = 0
+\t\tcurrentLineNumber = 1
+\t\tfor lineNumber in lineNumbers:
+\t\t\twhile currentLineNumber < lineNumber:
+\t\t\t\toffset += len(inputFile.readline())
+\t\t\t\tcurrentLineNumber += 1
+\t\t\toffsets.append(offset)
+\t\t\tfoundLineNumbers.append(lineNumber)
+\tfinally:
+\t\tinputFile.close()
+\treturn offsets, foundLineNumbers
+
+def saveIndex( filename, indexFilename, offsets, lineNumbers ):
+\t\"\"\" Saves the index of the input file: a header identifying the version of the input file
+\tit was built for, followed by the offsets and then the line numbers of the records. \"\"\"
+\tstat = os.stat(filename)
+\tindexFile = open( indexFilename, 'wb' )
+\ttry:
+\t\tindexFile.write(INDEX_HEADER.pack( INDEX_MAGIC, stat.st_size, stat.st_mtime, len(offsets) ))
+\t\tfor values in ( offsets, lineNumbers ):
+\t\t\tfor start in xrange( 0, len(values), 4096 ):
+\t\t\t\tblock = values[start:start + 4096]
+\t\t\t\tindexFile.write(struct.pack( "<%dq" % len(block), *block ))
+\tfinally:
+\t\tindexFile.close()
+
+def readIndexEntry( filename, indexFilename, index ):
+\t\"\"\" Reads the byte offset and line number of the record of the given index, or returns None if
+\tthe index file is missing or was built for another version of the input file. \"\"\"
+\tstat = os.stat(filename)
+\ttry:
+\t\tindexFile = open( indexFilename, 'rb' )
+\texcept IOError as e:
+\t\treturn None
+\ttry:
+\t\theader = indexFile.read(INDEX_HEADER.size)
+\t\tif len(header) < INDEX_HEADER.size:
+\t\t\treturn None
+\t\tmagic, size, mtime, numRecords = INDEX_HEADER.unpack(header)
+\t\tif magic != INDEX_MAGIC or size != stat.st_size or mtime != stat.st_mtime:
+\t\t\treturn None
+\t\tif index < 0:
+\t\t\tindex += numRecords
+\t\tif index < 0 or index >= numRecords:
+\t\t\traise IndexError("Record index out of range (%d records)." % numRecords)
+\t\tindexFile.seek(INDEX_HEADER.size + index * INDEX_ENTRY.size)
+\t\toffset, = INDEX_ENTRY.unpack(indexFile.read(INDEX_ENTRY.size))
+\t\tindexFile.seek(INDEX_HEADER.size + ( numRecords + index ) * INDEX_ENTRY.size)
+\t\tlineNumber, = INDEX_ENTRY.unpack(indexFile.read(INDEX_ENTRY.size))
+\t\treturn offset, lineNumber
+\tfinally:
+\t\tindexFile.close()
+
+"""
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenCacheHelpers(numpy):
+    """ The cache of parsed bodies, keyed by the content of the input file and the fingerprint of
+    the format. With numpy, the arrays of the body are saved next to it and mapped when loaded. """
+    helpers = """
+CACHE_DIR = os.path.join( tempfile.gettempdir(), "instaparse-cache" )
+CACHE_MAX_BYTES = 10 << 30
+# Holds the content hash of each input file along with its size and modification time
+CACHE_INPUTS_DIR = "inputs"
+CACHE_BODY_FILE = "body.pickle"
+HASH_BLOCK_SIZE = 1 << 20
+
+def asBytes(text):
+\treturn text if isinstance( text, bytes ) else text.encode("utf-8")
+
+def hashFile(filename):
+\tdigest = hashlib.sha1()
+\tinputFile = open( filename, 'rb' )
+\ttry:
+\t\tblock = inputFile.read(HASH_BLOCK_SIZE)
+\t\twhile len(block) > 0:
+\t\t\tdigest.update(block)
+\t\t\tblock = inputFile.read(HASH_BLOCK_SIZE)
+\tfinally:
+\t\tinputFile.close()
+\treturn digest.hexdigest()
+
+def replaceDirectory( directory, tempDirectory ):
+\t\"\"\" Moves the finished temporary directory into place, unless another process got there first. \"\"\"
+\ttry:
+\t\tos.rename( tempDirectory, directory )
+\texcept OSError as e:
+\t\tshutil.rmtree( tempDirectory, True )
+
+class ParseCache:
+\t\"\"\" The bodies parsed from input files, one directory per entry, named after the hash of the
+\tcontent of the input file and of FORMAT_FINGERPRINT. The entries used least recently are removed
+\tonce they take more than maxBytes. \"\"\"
+
+\tdef __init__( self, cacheDir, maxBytes ):
+\t\tself.cacheDir = cacheDir
+\t\tself.maxBytes = maxBytes
+
+\tdef key( self, filename ):
+\t\t\"\"\" The key of the entry of the input file. The content of the file is only hashed again
+\t\twhen its size or modification time changed since it was last hashed. \"\"\"
+\t\tstat = os.stat(filename)
+\t\tversion = "%d %r" % ( stat.st_size, stat.st_mtime )
+\t\tinputsDir = os.path.join( self.cacheDir, CACHE_INPUTS_DIR )
+\t\tinputFilename = os.path.join( inputsDir, hashlib.sha1(asBytes(os.path.abspath(filename))).hexdigest() )
+\t\ttry:
+\t\t\tinputFile = open(inputFilename)
+\t\t\ttry:
+\t\t\t\tsavedVersion, contentHash = inputFile.read().rsplit( " ", 1 )
+\t\t\tfinally:
+\t\t\t\tinputFile.close()
+\t\texcept ( IOError, ValueError ) as e:
+\t\t\tsavedVersion = None
+\t\tif savedVersion != version:
+\t\t\tcontentHash = hashFile(filename)
+\t\t\ttry:
+\t\t\t\tif not os.path.isdir(inputsDir):
+\t\t\t\t\tos.makedirs(inputsDir)
+\t\t\t\ttempFilename = "%s.%d" % ( inputFilename, os.getpid() )
+\t\t\t\tinputFile = open( tempFilename, "w" )
+\t\t\t\ttry:
+\t\t\t\t\tinputFile.write("%s %s" % ( version, contentHash ))
+\t\t\t\tfinally:
+\t\t\t\t\tinputFile.close()
+\t\t\t\tos.rename( tempFilename, inputFilename )
+\t\t\texcept ( IOError, OSError ) as e:
+\t\t\t\tpass
+\t\treturn hashlib.sha1(asBytes(FORMAT_FINGERPRINT + contentHash)).hexdigest()
+
+\tdef load( self, key ):
+\t\t\"\"\" The body of the entry of the given key, or None if there is no such entry. \"\"\"
+\t\tentryDir = os.path.join( self.cacheDir, key )
+\t\tif not os.path.isdir(entryDir):
+\t\t\treturn None
+\t\ttry:
+\t\t\tbodyFile = open( os.path.join( entryDir, CACHE_BODY_FILE ), 'rb' )
+\t\t\ttry:
+\t\t\t\tunpickler = pickle.Unpickler(bodyFile)
+%(persistentLoad)s\t\t\t\t# The collector would scan the objects over and over as they are created
+\t\t\t\tisCollecting = gc.isenabled()
+\t\t\t\tgc.disable()
+\t\t\t\ttry:
+\t\t\t\t\tbody = unpickler.load()
+\t\t\t\tfinally:
+\t\t\t\t\tif isCollecting:
+\t\t\t\t\t\tgc.enable()
+\t\t\tfinally:
+\t\t\t\tbodyFile.close()
+\t\t\t# Marks the entry as used, for the eviction of the least recently used entries
+\t\t\tos.utime( entryDir, None )
+\t\t\treturn body
+\t\texcept Exception as e:
+\t\t\t# A damaged entry is parsed again
+\t\t\tshutil.rmtree( entryDir, True )
+\t\t\treturn None
+
+\tdef store( self, key, body ):
+\t\t\"\"\" Saves the body as the entry of the given key, then removes the entries used least
+\t\trecently beyond maxBytes. Failing to save it is not an error, the body is parsed next time. \"\"\"
+\t\ttry:
+\t\t\tif not os.path.isdir(self.cacheDir):
+\t\t\t\tos.makedirs(self.cacheDir)
+\t\t\ttempDir = tempfile.mkdtemp( prefix = ".", dir = self.cacheDir )
+\t\t\ttry:
+\t\t\t\tbodyFile = open( os.path.join( tempDir, CACHE_BODY_FILE ), 'wb' )
+\t\t\t\ttry:
+\t\t\t\t\tpickler = pickle.Pickler( bodyFile, pickle.HIGHEST_PROTOCOL )
+%(persistentId)s\t\t\t\t\tpickler.dump(body)
+\t\t\t\tfinally:
+\t\t\t\t\tbodyFile.close()
+\t\t\texcept Exception as e:
+\t\t\t\tshutil.rmtree( tempDir, True )
+\t\t\t\treturn
+\t\t\treplaceDirectory( os.path.join( self.cacheDir, key ), tempDir )
+\t\t\tself.evict()
+\t\texcept ( IOError, OSError ) as e:
+\t\t\tpass
+
+\tdef evict(self):
+\t\tentries = []
+\t\tfor name in os.listdir(self.cacheDir):
+\t\t\tentryDir = os.path.join( self.cacheDir, name )
+\t\t\tif name == CACHE_INPUTS_DIR or name.startswith(".") or not os.path.isdir(entryDir):
+\t\t\t\tcontinue
+\t\t\tsize = sum([ os.path.getsize(os.path.join( entryDir, f )) for f in os.listdir(entryDir) ])
+\t\t\tentries.append(( os.path.getmtime(entryDir), size, entryDir ))
+\t\tentries.sort()
+\t\ttotalBytes = sum([ size for used, size, entryDir in entries ])
+\t\tfor used, size, entryDir in entries:
+\t\t\tif totalBytes <= self.maxBytes:
+\t\t\t\tbreak
+\t\t\tshutil.rmtree( entryDir, True )
+\t\t\ttotalBytes -= size
+
+def parseCached( filename, cacheDir, maxBytes, parseFile ):
+\t\"\"\" Loads the body of the input file from the cache, or parses it with parseFile and saves it. \"\"\"
+\tcache = ParseCache( cacheDir, maxBytes )
+\tkey = cache.key(filename)
+\tbody = cache.load(key)
+\tif body is None:
+\t\tbody = parseFile()
+\t\tcache.store( key, body )
+\treturn body
+
+"""
+    persistentLoad = ""
+    persistentId = ""
+    if numpy:
+        # The arrays are saved as .npy files and mapped copy-on-write, so loading them reads nothing
+        persistentLoad = "\t\t\t\tunpickler.persistent_load = lambda name: numpy.load( os.path.join( entryDir, name ), mmap_mode = 'c' )\n"
+        persistentId = "\t\t\t\t\tpickler.persistent_id = ArraySaver(tempDir)\n"
+        helpers += """class ArraySaver:
+\t\"\"\" Saves each numeric NumPy array met while pickling to a file of its own in directory, which the
+\tpickle refers to by name. \"\"\"
+
+\tdef __init__( self, directory ):
+\t\tself.directory = directory
+\t\tself.numArrays = 0
+
+\tdef __call__( self, obj ):
+\t\tif not isinstance( obj, numpy.ndarray ) or obj.dtype.hasobject:
+\t\t\treturn None
+\t\tname = "array%d.npy" % self.numArrays
+\t\tself.numArrays += 1
+\t\tnumpy.save( os.path.join( self.directory, name ), obj )
+\t\treturn name
+
+"""
+    helpers = helpers.replace( "%(persistentLoad)s", persistentLoad ).replace( "%(persistentId)s", persistentId )
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenLazyHelpers():
+    """ The descriptor through which the lazily parsed objects convert their fields. """
+    helpers = """
+class LazyField(object):
+\t\"\"\" A field of a lazily parsed object. On first access, all the fields of its span are converted
+\tand cached in the slots of the data class, except those already assigned. \"\"\"
+\t__slots__ = ( "slots", "position", "spanIndex", "convert" )
+
+\tdef __init__( self, slots, position, spanIndex, convert ):
+\t\tself.slots = slots
+\t\tself.position = position
+\t\tself.spanIndex = spanIndex
+\t\tself.convert = convert
+
+\tdef __get__( self, obj, objType = None ):
+\t\tif obj is None:
+\t\t\treturn self
+\t\ttry:
+\t\t\treturn self.slots[self.position].__get__( obj, objType )
+\t\texcept AttributeError as e:
+\t\t\tpass
+\t\tvalues = self.convert(obj._spans[self.spanIndex])
+\t\tfor slot, value in zip( self.slots, values ):
+\t\t\ttry:
+\t\t\t\tslot.__get__( obj, objType )
+\t\t\texcept AttributeError as e:
+\t\t\t\tslot.__set__( obj, value )
+\t\treturn self.slots[self.position].__get__( obj, objType )
+
+\tdef __set__( self, obj, value ):
+\t\tself.slots[self.position].__set__( obj, value )
+
+"""
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenStatsHelpers():
+    """ The counters of the parser of each class, which instrumented wraps around it, and
+    dumpStats, which reports them. """
+    helpers = """
+class ParserStats:
+\t\"\"\" The counters of the parser of a class. Lines only count those of successful calls. The
+\texclusive time leaves out the time spent in the instrumented parsers it called. \"\"\"
+
+\tdef __init__(self):
+\t\tself.calls = 0
+\t\tself.lines = 0
+\t\tself.inclusiveTime = 0.0
+\t\tself.exclusiveTime = 0.0
+\t\tself.rollbacks = 0
+\t\tself.exceptions = 0
+
+# The counters by class name, and the time spent in nested calls by each call in progress
+parserStats = collections.OrderedDict()
+nestedTimes = [ 0.0 ]
+
+def statsOf(className):
+\tif className not in parserStats:
+\t\tparserStats[className] = ParserStats()
+\treturn parserStats[className]
+
+def instrumented( className, parseFunction ):
+\t\"\"\" Wraps the parser of a class with the updates of its counters. \"\"\"
+\tstats = statsOf(className)
+\tdef instrumentedParse( inputFile, currentLineNumber, currentLinePos ):
+\t\tstats.calls += 1
+\t\tnestedTimes.append(0.0)
+\t\tstart = timeit.default_timer()
+\t\ttry:
+\t\t\tresult = parseFunction( inputFile, currentLineNumber, currentLinePos )
+\t\texcept Exception as e:
+\t\t\tstats.exceptions += 1
+\t\t\traise
+\t\tfinally:
+\t\t\telapsed = timeit.default_timer() - start
+\t\t\tstats.inclusiveTime += elapsed
+\t\t\tstats.exclusiveTime += elapsed - nestedTimes.pop()
+\t\t\tnestedTimes[-1] += elapsed
+\t\tstats.lines += result[1] - currentLineNumber
+\t\treturn result
+\treturn instrumentedParse
+
+def countRollback(className):
+\tstatsOf(className).rollbacks += 1
+
+def dumpStats( filename = None ):
+\t\"\"\" Prints the counters of each class as JSON, or writes them to the file of the given name. \"\"\"
+\tstats = collections.OrderedDict()
+\tfor className, classStats in parserStats.items():
+\t\tstats[className] = collections.OrderedDict([ ( "calls", classStats.calls ), ( "lines", classStats.lines ),
+\t\t\t( "inclusiveSeconds", classStats.inclusiveTime ), ( "exclusiveSeconds", classStats.exclusiveTime ),
+\t\t\t( "rollbacks", classStats.rollbacks ), ( "exceptions", classStats.exceptions ) ])
+\ttext = json.dumps( stats, indent = 2, separators = ( ",", ": " ) ) + "\\n"
+\tif filename is None:
+\t\tsys.stdout.write(text)
+\t\treturn
+\toutputFile = open( filename, 'w' )
+\ttry:
+\t\toutputFile.write(text)
+\tfinally:
+\t\toutputFile.close()
+
+"""
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenPushHelpers():
+    """ The helpers through which a PushParser, which is generated for each format, reads the
+    blocks pushed to it. """
+    helpers = """
+class NeedMoreData(Exception):
+\t\"\"\" Raised when the pushed input runs out before it has been closed. \"\"\"
+
+class PushedInput:
+\t\"\"\" The blocks pushed to a PushParser, read by its cursor. Reading past them raises NeedMoreData
+\tuntil the input has been finished. Under Python 3 the blocks are decoded as UTF-8. \"\"\"
+
+\tdef __init__(self):
+\t\tself.blocks = []
+\t\tself.isFinished = False
+\t\t# Bytes and str are the same type before Python 3
+\t\tself.decoder = None if bytes is str else codecs.getincrementaldecoder("utf-8")()
+
+\tdef push( self, data ):
+\t\tif self.decoder is not None:
+\t\t\tdata = self.decoder.decode(data)
+\t\tif data:
+\t\t\tself.blocks.append(data)
+
+\tdef finish(self):
+\t\t# Raises a UnicodeDecodeError if the input ends within a character
+\t\tif self.decoder is not None:
+\t\t\tself.decoder.decode( b"", True )
+\t\tself.isFinished = True
+
+\tdef read( self, size ):
+\t\tif self.blocks:
+\t\t\tdata = "".join(self.blocks)
+\t\t\tself.blocks = []
+\t\t\treturn data
+\t\tif self.isFinished:
+\t\t\treturn ""
+\t\traise NeedMoreData()
+
+\tdef close(self):
+\t\tpass
+
+class PushCursor(LineCursor):
+\t\"\"\" A LineCursor over pushed blocks. A parse step that runs out of input is retried from where
+\tit started, so only the PushParser discards lines, once a step has been parsed completely. \"\"\"
+
+\tdef release( self, position ):
+\t\tpass
+
+\tdef commit( self, position ):
+\t\tLineCursor.release( self, position )
+
+\tdef numLines(self):
+\t\t\"\"\" The number of complete lines buffered so far, counting discarded ones. \"\"\"
+\t\treturn self.base + len(self.lines)
+
+"""
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
+
+def pygenSnapshotHelpers(numpy):
+    """ The helpers that write the fields of the body to a binary snapshot and read them back, used
+    by the dumpX and loadX functions generated for each class. The loaders take the whole snapshot
+    and the offset to read from, and return the value read along with the offset following it.
+    With numpy, list(int) and list(float) fields are written and read as whole arrays. """
+    helpers = """
+SNAPSHOT_MAGIC = b"%(magic)s"
+SNAPSHOT_BUFFER_SIZE = 1 << 20
+# Written before every string, list and repeated field
+COUNT = struct.Struct("<I")
+NUMBER_SIZES = { "q": 8, "d": 8, "?": 1 }
+# Number of fixed width rows packed at once
+ROWS_PER_BLOCK = 4096
+
+# Strings are bytes under Python 2, as they are when parsed
+if str is bytes:
+\tdef decodeString(raw):
+\t\treturn raw
+else:
+\tdef decodeString(raw):
+\t\treturn raw.decode("utf-8")
+
+def checkSize( data, end ):
+\tif end > len(data):
+\t\traise struct.error("snapshot ends at byte %%d, before byte %%d" %% ( len(data), end ))
+
+def dumpString( write, s ):
+\traw = s if isinstance( s, bytes ) else s.encode("utf-8")
+\twrite(COUNT.pack(len(raw)))
+\twrite(raw)
+
+def loadString( data, offset ):
+\tlength, = COUNT.unpack_from( data, offset )
+\toffset += COUNT.size
+\tcheckSize( data, offset + length )
+\treturn decodeString(data[offset:offset + length]), offset + length
+
+def dumpStrings( write, strings ):
+\twrite(COUNT.pack(len(strings)))
+\tfor s in strings:
+\t\tdumpString( write, s )
+
+def loadStrings( data, offset ):
+\tcount, = COUNT.unpack_from( data, offset )
+\toffset += COUNT.size
+\tstrings = []
+\tfor i in xrange(count):
+\t\ts, offset = loadString( data, offset )
+\t\tstrings.append(s)
+\treturn strings, offset
+
+def dumpNumbers( write, numbers, typeCode ):
+\twrite(struct.pack( "<I%%d%%s" %% ( len(numbers), typeCode ), len(numbers), *numbers ))
+
+def loadNumbers( data, offset, typeCode ):
+\tcount, = COUNT.unpack_from( data, offset )
+\toffset += COUNT.size
+\tnumbers = list(struct.unpack_from( "<%%d%%s" %% ( count, typeCode ), data, offset ))
+\treturn numbers, offset + count * NUMBER_SIZES[typeCode]
+
+def dumpRows( write, rowFormat, count, rows ):
+\t\"\"\" Writes the number of rows followed by the rows, tuples of ints, floats and bools packed
+\twith rowFormat, block by block. \"\"\"
+\twrite(COUNT.pack(count))
+\tvalues = []
+\tnumRows = 0
+\tfor row in rows:
+\t\tvalues.extend(row)
+\t\tnumRows += 1
+\t\tif numRows == ROWS_PER_BLOCK:
+\t\t\twrite(struct.pack( "<" + rowFormat * numRows, *values ))
+\t\t\tvalues = []
+\t\t\tnumRows = 0
+\twrite(struct.pack( "<" + rowFormat * numRows, *values ))
+
+def loadRows( data, offset, rowFormat ):
+\t\"\"\" Reads rows written by dumpRows with a single unpack. Returns them as one tuple per field. \"\"\"
+\tcount, = COUNT.unpack_from( data, offset )
+\toffset += COUNT.size
+\tend = offset + count * struct.calcsize( "<" + rowFormat )
+\tcheckSize( data, end )
+\tvalues = struct.unpack_from( "<" + rowFormat * count, data, offset )
+\treturn [ values[i::len(rowFormat)] for i in xrange(len(rowFormat)) ], end
+
+"""
+    if numpy:
+        helpers += """def dumpArray( write, array, typeCode ):
+\twrite(COUNT.pack(len(array)))
+\twrite(numpy.asarray(array).astype( "<i8" if typeCode == "q" else "<f8" ).tobytes())
+
+def loadArray( data, offset, typeCode ):
+\tcount, = COUNT.unpack_from( data, offset )
+\toffset += COUNT.size
+\tend = offset + count * NUMBER_SIZES[typeCode]
+\tcheckSize( data, end )
+\tdtype = numpy.int64 if typeCode == "q" else numpy.float64
+\t# Copied out of the snapshot, converting to the byte order of the machine
+\treturn numpy.frombuffer( data, numpy.dtype(dtype).newbyteorder("<"), count, offset ).astype(dtype), end
+
+"""
+    helpers = helpers % { "magic": CodeGenerator.SNAPSHOT_MAGIC }
+    # Replace the tabs with the appropriate amount of indent spaces
+    helpers = helpers.replace( "\t", InstaParseFile.indentString )
+
+    return helpers
@@ -0,0 +1,241 @@
+""" Measures the throughput of the generated parsers of every format, in every language, on
+synthetic inputs of increasing size. Run it from the root of the repository:
+
+    python tests/benchmark.py -o before.json
+    python tests/benchmark.py -o after.json --compare before.json
+
+Each parser is timed on inputs with an increasing number of records, the instances of the last line
+of the body, and on an input of a single record for its startup time. The results are written as
+JSON, and comparing them to the results of an earlier run reports the runs that got slower. """
+
+from os.path import abspath, basename, dirname, isdir, isfile, join, splitext
+import sys
+sys.path.insert( 0, dirname(dirname(abspath(__file__))) )
+
+from src.parser import InstaParseFormatFileParser
+from src.converter import InstaParseFormat
+from src.inputgen import InputGenerator
+from fixtures import GeneratorFixture, PythonFixture, JavaFixture, CPPFixture, runShellCommand
+
+from collections import OrderedDict
+from glob import glob
+from optparse import OptionParser
+from os import chdir, devnull, getcwd, mkdir, wait4, WEXITSTATUS, WIFEXITED
+from os.path import getsize
+from shutil import rmtree
+from subprocess import Popen, PIPE
+from sys import exit
+import json
+import time
+
+USAGE = "usage: %prog [options]"
+
+inputDir = "benchmark_tmp"
+
+# The format files benchmarked by default
+FORMAT_FILES = sorted(glob(join( "tests", "files", "format", "*.format" ))) + \
+    sorted([ f for f in glob(join( "examples", "*" )) if isfile(f) ])
+
+FIXTURES = OrderedDict([ ( "python", PythonFixture ), ( "java", JavaFixture ), ( "c++", CPPFixture ) ])
+
+# The main functions only parse the input given as their argument
+MAIN_FILES = { "python": "benchmark.py", "java": "benchmark.java", "c++": "benchmark.cpp" }
+
+class Measurement:
+    """ The wall time and peak resident memory of a run of a parser. """
+    def __init__( self, seconds, peakRss ):
+        self.seconds = seconds
+        self.peakRss = peakRss
+
+def runCommand(command):
+    """ Run a command, discarding its output, and measure it.
+
+    Raises a RuntimeError with the error output if the command fails. """
+    output = open( devnull, "w" )
+    start = time.time()
+    pipe = Popen( command, stdout = output, stderr = PIPE )
+    err = pipe.stderr.read()
+    # Unlike getrusage(RUSAGE_CHILDREN), wait4 reports the peak memory of this child alone
+    pid, status, usage = wait4( pipe.pid, 0 )
+    seconds = time.time() - start
+    output.close()
+    if not WIFEXITED(status) or WEXITSTATUS(status) != 0:
+        raise RuntimeError(err)
+    # ru_maxrss is in kilobytes on Linux
+    return Measurement( seconds, usage.ru_maxrss * 1024 )
+
+def measure( fixture, inputFileName ):
+    """ Run the compiled parser on the given input and measure it. """
+    prevWD = getcwd()
+    chdir(fixture.mainFileDirname)
+    try:
+        return runCommand(fixture.command(inputFileName))
+    finally:
+        chdir(prevWD)
+
+def fastest( fixture, inputFileName, repeat ):
+    """ The run with the shortest time out of repeat runs, which is the least disturbed by the
+    other processes of the machine. """
+    measurements = [ measure( fixture, inputFileName ) for i in range(repeat) ]
+    return min( measurements, key = lambda m: m.seconds )
+
+def generateInputs( formatFileName, recordCounts, seed ):
+    """ Write an input for each number of records, plus one of a single record. Returns the
+    names of the input files by number of records.
+
+    Raises a ValueError if the format is invalid or its number of records cannot be chosen. """
+    parser = InstaParseFormatFileParser(formatFileName)
+    if parser.parseFailed():
+        raise ValueError(parser.failureString())
+    formatObject = InstaParseFormat(parser.objectModel)
+    inputs = OrderedDict()
+    for numRecords in [ 1 ] + recordCounts:
+        inputFileName = join( inputDir, "%s_%d.input" % ( splitext(basename(formatFileName))[0], numRecords ) )
+        inputFile = open( inputFileName, "w", 1 << 20 )
+        try:
+            InputGenerator( formatObject, seed ).generate( inputFile, numRecords )
+        finally:
+            inputFile.close()
+        inputs[numRecords] = inputFileName
+    return inputs
+
+def benchmarkLanguage( language, formatFileName, inputs, repeat ):
+    """ Generate, compile and time the parser of one language. Returns its results, or the error
+    that stopped it. """
+    fixture = FIXTURES[language]([])
+    # The fixture does not return to the working directory when a compiler cannot be found
+    prevWD = getcwd()
+    if isdir(GeneratorFixture.testDir):
+        rmtree(GeneratorFixture.testDir)
+    mkdir(GeneratorFixture.testDir)
+    try:
+        generator = fixture.createGenerator(formatFileName)
+        fixture.insertMainFunction( generator, join( "tests", "files", "main", MAIN_FILES[language] ) )
+        generator.codeGen()
+        out, err, success = fixture.compile()
+        if not success:
+            return OrderedDict([ ( "error", "Compilation failed: " + err ) ])
+        results = OrderedDict()
+        results["startupSeconds"] = fastest( fixture, inputs[1], repeat ).seconds
+        results["runs"] = []
+        for numRecords, inputFileName in inputs.items()[1:]:
+            measurement = fastest( fixture, inputFileName, repeat )
+            numBytes = getsize(inputFileName)
+            results["runs"].append(OrderedDict([
+                ( "records", numRecords ),
+                ( "bytes", numBytes ),
+                ( "seconds", measurement.seconds ),
+                ( "mbPerSecond", numBytes / float(1 << 20) / measurement.seconds ),
+                ( "recordsPerSecond", numRecords / measurement.seconds ),
+                ( "peakRssMB", measurement.peakRss / float(1 << 20) ) ]))
+        return results
+    except ( OSError, RuntimeError, ValueError ) as e:
+        return OrderedDict([ ( "error", str(e) ) ])
+    finally:
+        chdir(prevWD)
+        rmtree(GeneratorFixture.testDir)
+
+def benchmark( formatFileNames, languages, recordCounts, seed, repeat ):
+    """ Benchmark the parsers of every format in every language. """
+    results = OrderedDict()
+    if isdir(inputDir):
+        rmtree(inputDir)
+    mkdir(inputDir)
+    try:
+        for formatFileName in formatFileNames:
+            formatName = splitext(basename(formatFileName))[0]
+            try:
+                inputs = generateInputs( formatFileName, recordCounts, seed )
+            except ValueError as e:
+                results[formatName] = OrderedDict([ ( "skipped", str(e) ) ])
+                print "%s: skipped, %s" % ( formatName, e )
+                continue
+            results[formatName] = OrderedDict()
+            for language in languages:
+                results[formatName][language] = benchmarkLanguage( language, formatFileName, inputs, repeat )
+                printResults( formatName, language, results[formatName][language] )
+    finally:
+        rmtree(inputDir)
+    return results
+
+def printResults( formatName, language, results ):
+    if "error" in results:
+        print "%s, %s: %s" % ( formatName, language, "".join(results["error"].strip().splitlines()[-1:]) )
+        return
+    print "%s, %s: startup %.3fs" % ( formatName, language, results["startupSeconds"] )
+    for run in results["runs"]:
+        print "    %8d records %8.2f MB/s %10.0f records/s %8.1f MB peak" % \
+            ( run["records"], run["mbPerSecond"], run["recordsPerSecond"], run["peakRssMB"] )
+
+def compare( previous, current, threshold ):
+    """ Print the change in throughput of every run found in both results. Returns the number of
+    runs that got slower by more than the threshold, a fraction of the previous throughput. """
+    regressions = 0
+    for formatName, languages in current["formats"].items():
+        if "skipped" in languages:
+            continue
+        for language, results in languages.items():
+            previousResults = previous["formats"].get( formatName, {} ).get( language, {} )
+            if "runs" not in results or "runs" not in previousResults:
+                continue
+            previousRuns = dict([ ( run["records"], run ) for run in previousResults["runs"] ])
+            for run in results["runs"]:
+                if run["records"] not in previousRuns:
+                    continue
+                change = run["mbPerSecond"] / previousRuns[run["records"]]["mbPerSecond"] - 1
+                isRegression = change < -threshold
+                regressions += isRegression
+                print "%s, %s, %d records: %+.1f%%%s" % ( formatName, language, run["records"],
+                    change * 100, " REGRESSION" if isRegression else "" )
+    return regressions
+
+if __name__ == "__main__":
+    # Option parser
+    optParser = OptionParser(usage = USAGE)
+    optParser.add_option( "-o", "--output", action = "store", dest = "outputName", default = "benchmark.json",
+            help = "specifies the name of the JSON file the results are written to." )
+    optParser.add_option( "-f", "--format", action = "append", dest = "formatFileNames", default = None,
+            help = "benchmarks the given format file. Can be repeated. Defaults to every format file of "
+                   "tests/files/format and examples." )
+    optParser.add_option( "-l", "--lang", action = "append", dest = "languages", default = None,
+            help = "benchmarks the parsers of the given language, 'python', 'java', or 'c++'. Can be "
+                   "repeated. Defaults to every language." )
+    optParser.add_option( "-n", "--records", action = "store", dest = "recordCounts", default = "1000,10000,100000",
+            help = "specifies the comma separated numbers of records of the inputs." )
+    optParser.add_option( "--seed", action = "store", type = "int", dest = "seed", default = 0,
+            help = "seeds the generation of the inputs." )
+    optParser.add_option( "--repeat", action = "store", type = "int", dest = "repeat", default = 3,
+            help = "runs each parser this many times on each input, keeping the fastest run." )
+    optParser.add_option( "--optimize", action = "store", dest = "optimize", default = "-O2",
+            help = "specifies the optimization flag passed to g++." )
+    optParser.add_option( "--compare", action = "store", dest = "previousName", default = None,
+            help = "compares the results to those of the given JSON file of an earlier run." )
+    optParser.add_option( "--threshold", action = "store", type = "float", dest = "threshold", default = 0.1,
+            help = "specifies the loss of throughput, as a fraction, reported as a regression." )
+    (options, args) = optParser.parse_args()
+
+    languages = options.languages or FIXTURES.keys()
+    for language in languages:
+        if language not in FIXTURES:
+            optParser.error("language not supported: " + language)
+    CPPFixture.compileFlags = [ options.optimize ]
+
+    out, err, rc = runShellCommand([ "git", "rev-parse", "HEAD" ])
+    results = OrderedDict()
+    results["commit"] = out.strip() if rc == 0 else None
+    # Linux keeps the peak memory of this process in that of its children, so no peak is reported
+    # below what a command doing nothing is measured with
+    results["rssFloorMB"] = runCommand([ "true" ]).peakRss / float(1 << 20)
+    results["formats"] = benchmark( options.formatFileNames or FORMAT_FILES, languages,
+        [ int(n) for n in options.recordCounts.split(",") ], options.seed, options.repeat )
+
+    outputFile = open( options.outputName, "w" )
+    json.dump( results, outputFile, indent = 2, separators = ( ",", ": " ) )
+    outputFile.close()
+
+    if options.previousName is not None:
+        previousFile = open(options.previousName)
+        previous = json.load(previousFile)
+        previousFile.close()
+        if compare( previous, results, options.threshold ) > 0:
+            exit(1)
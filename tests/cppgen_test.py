@@ -1,10 +1,29 @@
-from testSuite import getTests
+from testSuite import getTests, getSourceTests, getInstrumentTests, getBinaryTests
 from fixtures import checkTest
 
 from fixtures import CPPFixture
+from src.codegen import GeneratorOptions
 
 def testCPPGen():
     fixture = CPPFixture(getTests(".cpp"))
     testGenerator = fixture.generateTests()
     for test in testGenerator:
         yield checkTest, test
+
+def testCPPGenSources():
+    fixture = CPPFixture(getSourceTests(".cpp"))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testCPPGenInstrument():
+    fixture = CPPFixture(getInstrumentTests(".cpp"), GeneratorOptions( instrument = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testCPPGenBinary():
+    fixture = CPPFixture(getBinaryTests(".cpp"))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
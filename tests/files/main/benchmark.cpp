@@ -0,0 +1,4 @@
+int main(int argc, char** argv)
+{
+    parse(argv[1]);
+}
@@ -0,0 +1,4 @@
+public static void main(String[] args)
+{
+    parse(args[0]);
+}
@@ -0,0 +1,2 @@
+if __name__ == "__main__":
+    parse(sys.argv[1])
@@ -0,0 +1,33 @@
+public static void main(String[] args)
+{
+    dump(parse(args[0]), "snapshot.bin");
+    Body body = load("snapshot.bin");
+
+    int total = 0;
+    for (int n : body.numbers)
+    {
+        total += n;
+    }
+    System.out.println(total);
+    if (body.z)
+    {
+        System.out.println("T");
+    }
+    else
+    {
+        System.out.println("F");
+    }
+    for (int i = 0; i < body.str_array.size(); i++)
+    {
+        for (String s : body.str_array.get(i))
+        {
+            System.out.println(s);
+        }
+    }
+    total = 0;
+    for (int n : body.int_array)
+    {
+        total += n;
+    }
+    System.out.println(total);
+}
@@ -0,0 +1,9 @@
+if __name__ == "__main__":
+    dump( parse(sys.argv[1]), "snapshot.bin" )
+    body = load("snapshot.bin")
+    print(sum(body.numbers))
+    print("T" if body.z else "F")
+    for s_list in body.str_array:
+        for s in s_list:
+            print(s)
+    print(body.int_array.sum())
@@ -0,0 +1,17 @@
+if __name__ == "__main__":
+    fields = {}
+    numbers = []
+    str_array = []
+    for fieldName, value in iterparse(sys.argv[1]):
+        if fieldName == "numbers":
+            numbers.append(value)
+        elif fieldName == "str_array":
+            str_array.append(value)
+        else:
+            fields[fieldName] = value
+    print sum(numbers)
+    print ("T" if fields["z"] else "F")
+    for s_list in str_array:
+        for s in s_list:
+            print s
+    print sum(fields["int_array"])
@@ -0,0 +1,8 @@
+if __name__ == "__main__":
+    body = parse(sys.argv[1])
+    print(sum(body.numbers))
+    print("T" if body.z else "F")
+    for s_list in body.str_array:
+        for s in s_list:
+            print(s)
+    print(body.int_array.sum())
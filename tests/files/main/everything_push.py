@@ -0,0 +1,15 @@
+if __name__ == "__main__":
+    parser = InstaParseUtil.PushParser()
+    inputFile = open(sys.argv[1], "rb")
+    block = inputFile.read(3)
+    while len(block) > 0:
+        parser.feed(block)
+        block = inputFile.read(3)
+    inputFile.close()
+    body = parser.close()
+    print sum(body.numbers)
+    print ("T" if body.z else "F")
+    for s_list in body.str_array:
+        for s in s_list:
+            print s
+    print sum(body.int_array)
@@ -0,0 +1,20 @@
+public static void main(String[] args)
+{
+    dump(parse(args[0]), "snapshot.bin");
+    Body body = load("snapshot.bin");
+
+    for (Graph graph : body.graphs)
+    {
+        System.out.println(graph.name);
+        for (Adjacency adjacency : graph.adjacencies)
+        {
+            int total = 0;
+            total += adjacency.vertex;
+            for (int neighbor : adjacency.neighbors)
+            {
+                total += neighbor;
+            }
+            System.out.println(total);
+        }
+    }
+}
@@ -0,0 +1,11 @@
+if __name__ == "__main__":
+    dump( parse(sys.argv[1]), "snapshot.bin" )
+    body = load("snapshot.bin")
+    for graph in body.graphs:
+        print graph.name
+        for adjacency in graph.adjacencies:
+            total = 0
+            total += adjacency.vertex
+            for neighbor in adjacency.neighbors:
+                total += neighbor
+            print total
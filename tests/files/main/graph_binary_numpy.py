@@ -0,0 +1,7 @@
+if __name__ == "__main__":
+    dump( parse(sys.argv[1]), "snapshot.bin" )
+    body = load("snapshot.bin")
+    for graph in body.graphs:
+        print(graph.name)
+        for adjacency in graph.adjacencies:
+            print(adjacency.vertex + adjacency.neighbors.sum())
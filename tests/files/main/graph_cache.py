@@ -0,0 +1,19 @@
+if __name__ == "__main__":
+    import os
+    cacheDir = "cache"
+    parse( sys.argv[1], cacheDir = cacheDir )
+    entries = [ name for name in os.listdir(cacheDir) if name != InstaParseUtil.CACHE_INPUTS_DIR ]
+    assert len(entries) == 1
+
+    # The second parse has to load the body from the cache
+    InstaParseUtil.parseBody = None
+    body = parse( sys.argv[1], cacheDir = cacheDir )
+
+    for graph in body.graphs:
+        print graph.name
+        for adjacency in graph.adjacencies:
+            total = 0
+            total += adjacency.vertex
+            for neighbor in adjacency.neighbors:
+                total += neighbor
+            print total
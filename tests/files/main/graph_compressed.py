@@ -0,0 +1,39 @@
+import bz2
+import gzip
+
+def summarize(body):
+    lines = []
+    for graph in body.graphs:
+        lines.append(graph.name)
+        for adjacency in graph.adjacencies:
+            total = 0
+            total += adjacency.vertex
+            for neighbor in adjacency.neighbors:
+                total += neighbor
+            lines.append(str(total))
+    return lines
+
+if __name__ == "__main__":
+    data = open(sys.argv[1], "rb").read()
+    gzipFile = gzip.open("compressed.gz", "wb")
+    gzipFile.write(data)
+    gzipFile.close()
+    bz2File = bz2.BZ2File("compressed.bz2", "wb")
+    bz2File.write(data)
+    bz2File.close()
+    # Two gzip members, as written by appending to a compressed file
+    middle = data.find(b"\n", len(data) // 2) + 1
+    appendedFile = open("appended.gz", "wb")
+    for part in ( data[:middle], data[middle:] ):
+        memberFile = gzip.GzipFile( fileobj = appendedFile, mode = "wb" )
+        memberFile.write(part)
+        memberFile.close()
+    appendedFile.close()
+    lines = summarize(parse("compressed.gz"))
+    assert summarize(parse("compressed.bz2")) == lines
+    assert summarize(parse("appended.gz")) == lines
+    assert summarize(parseStream(open("compressed.bz2", "rb"))) == lines
+    assert summarize(parseBuffer(open("compressed.gz", "rb").read())) == lines
+    assert summarize(parse( "compressed.gz", workers = 2 )) == lines
+    for line in lines:
+        print line
@@ -0,0 +1,11 @@
+if __name__ == "__main__":
+    numGraphs = buildIndex( sys.argv[1], "graph.idx" )
+    for index in xrange(numGraphs):
+        graph = getRecord( sys.argv[1], index, "graph.idx" )
+        print graph.name
+        for adjacency in graph.adjacencies:
+            total = 0
+            total += adjacency.vertex
+            for neighbor in adjacency.neighbors:
+                total += neighbor
+            print total
@@ -0,0 +1,32 @@
+int main(int argc, char** argv)
+{
+    using namespace std;
+    Body body = parse(argv[1]);
+    InstaParse::dumpStats("stats.json");
+
+    InstaParse::ParserStats &bodyStats = InstaParse::ParserStats::get("Body");
+    InstaParse::ParserStats &graphStats = InstaParse::ParserStats::get("Graph");
+    if (bodyStats.calls != 1 || graphStats.calls != body.graphs.size()
+        || bodyStats.lines < graphStats.lines
+        || graphStats.exclusiveSeconds > graphStats.inclusiveSeconds)
+    {
+        cerr << "Unexpected parser stats." << endl;
+        return 1;
+    }
+
+    for (int i = 0; i < body.graphs.size(); i++)
+    {
+        Graph &graph = body.graphs[i];
+        cout << graph.name << endl;
+        for (int j = 0; j < graph.adjacencies.size(); j++)
+        {
+            Adjacency &adjacency = graph.adjacencies[j];
+            int total = adjacency.vertex;
+            for (int k = 0; k < adjacency.neighbors.size(); k++)
+            {
+                total += adjacency.neighbors[k];
+            }
+            cout << total << endl;
+        }
+    }
+}
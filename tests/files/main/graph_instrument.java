@@ -0,0 +1,30 @@
+public static void main(String[] args)
+{
+    Body body = parse(args[0]);
+    InstaParseUtil.dumpStats("stats.json");
+
+    InstaParseUtil.ParserStats bodyStats = InstaParseUtil.ParserStats.get("Body");
+    InstaParseUtil.ParserStats graphStats = InstaParseUtil.ParserStats.get("Graph");
+    if (bodyStats.calls != 1 || graphStats.calls != body.graphs.size()
+        || bodyStats.lines < graphStats.lines
+        || graphStats.exclusiveSeconds > graphStats.inclusiveSeconds)
+    {
+        System.err.println("Unexpected parser stats.");
+        System.exit(1);
+    }
+
+    for (Graph graph : body.graphs)
+    {
+        System.out.println(graph.name);
+        for (Adjacency adjacency : graph.adjacencies)
+        {
+            int total = 0;
+            total += adjacency.vertex;
+            for (int neighbor : adjacency.neighbors)
+            {
+                total += neighbor;
+            }
+            System.out.println(total);
+        }
+    }
+}
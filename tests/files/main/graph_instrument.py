@@ -0,0 +1,23 @@
+import json
+
+if __name__ == "__main__":
+    body = parse(sys.argv[1])
+    dumpStats("stats.json")
+    statsFile = open("stats.json")
+    stats = json.load(statsFile)
+    statsFile.close()
+
+    assert stats["Body"]["calls"] == 1
+    assert stats["Graph"]["calls"] == len(body.graphs)
+    assert stats["Body"]["lines"] >= stats["Graph"]["lines"]
+    for className in stats:
+        assert stats[className]["exclusiveSeconds"] <= stats[className]["inclusiveSeconds"]
+
+    for graph in body.graphs:
+        print graph.name
+        for adjacency in graph.adjacencies:
+            total = 0
+            total += adjacency.vertex
+            for neighbor in adjacency.neighbors:
+                total += neighbor
+            print total
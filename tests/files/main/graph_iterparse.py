@@ -0,0 +1,9 @@
+if __name__ == "__main__":
+    for fieldName, graph in iterparse(sys.argv[1]):
+        print graph.name
+        for adjacency in graph.adjacencies:
+            total = 0
+            total += adjacency.vertex
+            for neighbor in adjacency.neighbors:
+                total += neighbor
+            print total
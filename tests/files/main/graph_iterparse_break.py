@@ -0,0 +1,23 @@
+openFiles = []
+
+def trackedOpen( *args ):
+    openFiles.append(open(*args))
+    return openFiles[-1]
+
+if __name__ == "__main__":
+    InstaParseUtil.open = trackedOpen
+    # A consumer stopping early must not leave the input file open
+    graphs = iterparse(sys.argv[1])
+    for fieldName, graph in graphs:
+        break
+    graphs.close()
+    if not all([ inputFile.closed for inputFile in openFiles ]):
+        sys.exit("The input file was left open.")
+    for fieldName, graph in iterparse(sys.argv[1]):
+        print graph.name
+        for adjacency in graph.adjacencies:
+            total = 0
+            total += adjacency.vertex
+            for neighbor in adjacency.neighbors:
+                total += neighbor
+            print total
@@ -0,0 +1,6 @@
+if __name__ == "__main__":
+    body = parse(sys.argv[1])
+    for graph in body.graphs:
+        print(graph.name)
+        for adjacency in graph.adjacencies:
+            print(adjacency.vertex + adjacency.neighbors.sum())
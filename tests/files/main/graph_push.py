@@ -0,0 +1,18 @@
+def printGraph(graph):
+    print graph.name
+    for adjacency in graph.adjacencies:
+        total = 0
+        total += adjacency.vertex
+        for neighbor in adjacency.neighbors:
+            total += neighbor
+        print total
+
+if __name__ == "__main__":
+    parser = InstaParseUtil.PushParser(printGraph)
+    inputFile = open(sys.argv[1], "rb")
+    block = inputFile.read(7)
+    while len(block) > 0:
+        parser.feed(block)
+        block = inputFile.read(7)
+    inputFile.close()
+    parser.close()
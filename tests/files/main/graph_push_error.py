@@ -0,0 +1,16 @@
+def printGraph(graph):
+    print graph.name
+
+if __name__ == "__main__":
+    # The error of the input is printed, so that its line is checked against the solution
+    parser = InstaParseUtil.PushParser(printGraph)
+    inputFile = open(sys.argv[1], "rb")
+    block = inputFile.read(7)
+    while len(block) > 0:
+        parser.feed(block)
+        block = inputFile.read(7)
+    inputFile.close()
+    try:
+        parser.close()
+    except ValueError as e:
+        print e
@@ -0,0 +1,18 @@
+public static void main(String[] args)
+{
+    // The graphs are parsed on every core and printed in the order of the file
+    streamRecords(args[0]).parallel().forEachOrdered(graph ->
+    {
+        System.out.println(graph.name);
+        for (Adjacency adjacency : graph.adjacencies)
+        {
+            int total = 0;
+            total += adjacency.vertex;
+            for (int neighbor : adjacency.neighbors)
+            {
+                total += neighbor;
+            }
+            System.out.println(total);
+        }
+    });
+}
@@ -0,0 +1,23 @@
+public static void main(String[] args) throws IOException
+{
+    byte[] data = java.nio.file.Files.readAllBytes(java.nio.file.Paths.get(args[0]));
+    java.util.zip.GZIPOutputStream compressed = new java.util.zip.GZIPOutputStream(
+        new java.io.FileOutputStream("compressed.gz"));
+    compressed.write(data);
+    compressed.close();
+
+    streamRecords("compressed.gz").parallel().forEachOrdered(graph ->
+    {
+        System.out.println(graph.name);
+        for (Adjacency adjacency : graph.adjacencies)
+        {
+            int total = 0;
+            total += adjacency.vertex;
+            for (int neighbor : adjacency.neighbors)
+            {
+                total += neighbor;
+            }
+            System.out.println(total);
+        }
+    });
+}
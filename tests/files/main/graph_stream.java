@@ -0,0 +1,19 @@
+public static void main(String[] args) throws IOException
+{
+    Body body = parseStream(new FileInputStream(args[0]));
+
+    for (Graph graph : body.graphs)
+    {
+        System.out.println(graph.name);
+        for (Adjacency adjacency : graph.adjacencies)
+        {
+            int total = 0;
+            total += adjacency.vertex;
+            for (int neighbor : adjacency.neighbors)
+            {
+                total += neighbor;
+            }
+            System.out.println(total);
+        }
+    }
+}
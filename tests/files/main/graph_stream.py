@@ -0,0 +1,10 @@
+if __name__ == "__main__":
+    body = parseStream(open(sys.argv[1], "rb"))
+    for graph in body.graphs:
+        print graph.name
+        for adjacency in graph.adjacencies:
+            total = 0
+            total += adjacency.vertex
+            for neighbor in adjacency.neighbors:
+                total += neighbor
+            print total
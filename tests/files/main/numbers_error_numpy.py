@@ -0,0 +1,7 @@
+if __name__ == "__main__":
+    # The error of the input is written to stdout, where it is checked against the solution
+    sys.stderr = sys.stdout
+    try:
+        parse(sys.argv[1])
+    except SystemExit:
+        pass
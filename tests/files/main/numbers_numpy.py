@@ -0,0 +1,4 @@
+if __name__ == "__main__":
+    body = parse(sys.argv[1])
+    print("%d %d" % ( len(body.counts), body.counts.sum() ))
+    print("%d %.2f" % ( len(body.weights), body.weights.sum() ))
@@ -0,0 +1,33 @@
+public static void main(String[] args)
+{
+    dump(parse(args[0]), "snapshot.bin");
+    Body body = load("snapshot.bin");
+
+    int result = 1;
+    int total = 0;
+    for (int i : body.a.numbers)
+    {
+        total += i;
+    }
+    result *= total;
+    total = 0;
+    for (int i : body.b.numbers)
+    {
+        total += i;
+    }
+    result *= total;
+    total = 0;
+    for (int i : body.c.numbers)
+    {
+        total += i;
+    }
+    result *= total;
+    total = 0;
+    for (int i : body.d.numbers)
+    {
+        total += i;
+    }
+    result *= total;
+
+    System.out.println(result);
+}
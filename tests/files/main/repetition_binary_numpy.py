@@ -0,0 +1,4 @@
+if __name__ == "__main__":
+    dump( parse(sys.argv[1]), "snapshot.bin" )
+    body = load("snapshot.bin")
+    print(sum(body.a.numbers) * sum(body.b.numbers) * sum(body.c.numbers) * sum(body.d.numbers))
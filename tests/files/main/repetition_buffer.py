@@ -0,0 +1,3 @@
+if __name__ == "__main__":
+    body = parseBuffer(open(sys.argv[1], "rb").read())
+    print sum(body.a.numbers) * sum(body.b.numbers) * sum(body.c.numbers) * sum(body.d.numbers)
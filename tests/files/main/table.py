@@ -0,0 +1,7 @@
+if __name__ == "__main__":
+    body = parse(sys.argv[1])
+    print len(body.edges)
+    for edge in body.edges:
+        print edge.source, edge.target, "%.2f" % edge.weight, edge.directed, edge.label
+    print body.edges[-1].label
+    print sum([ edge.source for edge in body.extra ])
@@ -0,0 +1,8 @@
+if __name__ == "__main__":
+    body = parse(sys.argv[1])
+    print len(body.edges)
+    for edge in body.edges:
+        print edge.source, edge.target, "%.2f" % edge.weight, edge.directed, edge.label
+    print body.edges[-1].label
+    # The index is built by the first record looked up
+    print sum([ getRecord( sys.argv[1], index, "table.idx" ).source for index in xrange( -2, 0 ) ])
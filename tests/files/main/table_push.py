@@ -0,0 +1,16 @@
+extra = []
+
+if __name__ == "__main__":
+    parser = InstaParseUtil.PushParser(extra.append)
+    inputFile = open(sys.argv[1], "rb")
+    block = inputFile.read(5)
+    while len(block) > 0:
+        parser.feed(block)
+        block = inputFile.read(5)
+    inputFile.close()
+    body = parser.close()
+    print len(body.edges)
+    for edge in body.edges:
+        print edge.source, edge.target, "%.2f" % edge.weight, edge.directed, edge.label
+    print body.edges[-1].label
+    print sum([ edge.source for edge in extra ])
@@ -0,0 +1,5 @@
+if __name__ == "__main__":
+    body = parse( sys.argv[1], workers = 4 )
+    for n in body.numbers:
+        print n.a
+        print n.b
@@ -25,7 +25,7 @@ class GeneratorFixture:
     testDir = "test_tmp"
     filename = join(testDir, "Main")
 
-    def __init__( self, generatorType, mainFileExtension, tests ):
+    def __init__( self, generatorType, mainFileExtension, tests, options = None ):
         """ Create a GeneratorFixture.
 
         Arguments:
@@ -51,20 +51,32 @@ class GeneratorFixture:
                 main function code generated by the associated CodeGenerator.
             4) solutionFileName - the solution file that will be checked against
                 the output of the compiled code.
+        options - The GeneratorOptions passed to every generator created, or
+            None for the default options
         """
         self.generatorType = generatorType
         self.mainFileName = GeneratorFixture.filename + "." + mainFileExtension
         self.mainFileDirname = dirname(self.mainFileName)
         self.mainFileBasename = basename(self.mainFileName)
         self.tests = tests
+        self.options = options
 
     def compile(self):
         """ Compile the generated code. """
         raise NotImplementedError()
 
+    def command( self, inputFileName ):
+        """ The command running the compiled code on the given input, from the directory of the
+        main file. """
+        raise NotImplementedError()
+
     def run( self, inputFileName ):
         """ Run the generated code. """
-        raise NotImplementedError()
+        prevWD = getcwd()
+        chdir(self.mainFileDirname)
+        out, err, rc = runShellCommand(self.command(inputFileName))
+        chdir(prevWD)
+        return out, err, rc == 0
 
     def insertMainFunction( self, generator, mainFunctionFileName ):
         """ Helper to insert the main function into the main file. """
@@ -86,7 +98,7 @@ class GeneratorFixture:
         if parser.parseFailed():
             raise ValueError(parser.failureString())
         formatObject = InstaParseFormat(parser.objectModel)
-        return self.generatorType( self.mainFileName, formatObject )
+        return self.generatorType( self.mainFileName, formatObject, self.options )
 
     def _createReturnValue( self, testID, expectedOutcome, outcome, msg ):
         """ Helper for generatetestIDs to create return values  """
@@ -183,56 +195,54 @@ class GeneratorFixture:
 
 class JavaFixture(GeneratorFixture):
 
-    def __init__( self, tests ):
-        GeneratorFixture.__init__( self, JavaGenerator, "java", tests)
+    def __init__( self, tests, options = None ):
+        GeneratorFixture.__init__( self, JavaGenerator, "java", tests, options )
 
     def compile(self):
         prevWD = getcwd()
         chdir(self.mainFileDirname)
-        out, err, rc = runShellCommand([ "javac", self.mainFileBasename ])
+        # The generated classes are compiled along with the main file, by whichever compiler
+        # provides javac, so they are looked up in the test directory explicitly
+        out, err, rc = runShellCommand([ "javac", "-sourcepath", ".", self.mainFileBasename ])
         chdir(prevWD)
         return out, err, rc == 0
 
-    def run( self, inputFileName ):
-        prevWD = getcwd()
-        chdir(self.mainFileDirname)
-        out, err, rc = runShellCommand([ "java", self.mainFileBasename[:-5], join( "..", inputFileName ) ])
-        chdir(prevWD)
-        return out, err, rc == 0
+    def command( self, inputFileName ):
+        return [ "java", self.mainFileBasename[:-5], join( "..", inputFileName ) ]
 
 class PythonFixture(GeneratorFixture):
 
-    def __init__( self, tests ):
-        GeneratorFixture.__init__( self, PythonGenerator, "py", tests)
+    def __init__( self, tests, options = None ):
+        GeneratorFixture.__init__( self, PythonGenerator, "py", tests, options )
 
     def compile(self):
         return "", "", True
 
-    def run( self, inputFileName ):
-        prevWD = getcwd()
-        chdir(self.mainFileDirname)
-        out, err, rc = runShellCommand([ "python", self.mainFileBasename, join( "..", inputFileName ) ])
-        chdir(prevWD)
-        return out, err, rc == 0
+    def command( self, inputFileName ):
+        return [ "python", self.mainFileBasename, join( "..", inputFileName ) ]
+
+class Python3Fixture(PythonFixture):
+
+    def command( self, inputFileName ):
+        return [ "python3", self.mainFileBasename, join( "..", inputFileName ) ]
 
 class CPPFixture(GeneratorFixture):
 
-    def __init__( self, tests ):
-        GeneratorFixture.__init__( self, CPPGenerator, "cpp", tests)
+    # Extra flags passed to g++
+    compileFlags = []
+
+    def __init__( self, tests, options = None ):
+        GeneratorFixture.__init__( self, CPPGenerator, "cpp", tests, options )
 
     def compile(self):
         prevWD = getcwd()
         chdir(self.mainFileDirname)
-        out, err, rc = runShellCommand([ "g++", self.mainFileBasename ])
+        out, err, rc = runShellCommand([ "g++" ] + self.compileFlags + [ self.mainFileBasename ])
         chdir(prevWD)
         return out, err, rc == 0
 
-    def run( self, inputFileName ):
-        prevWD = getcwd()
-        chdir(self.mainFileDirname)
-        out, err, rc = runShellCommand([ "./a.out", join( "..", inputFileName ) ])
-        chdir(prevWD)
-        return out, err, rc == 0
+    def command( self, inputFileName ):
+        return [ "./a.out", join( "..", inputFileName ) ]
 
 def getTest( expectedOutcome, testName, extension, number, **kwargs ):
     """ Get a test assuming the standard naming scheme.
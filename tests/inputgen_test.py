@@ -0,0 +1,69 @@
+from src.inputgen import InputGenerator, parseSize
+from src.converter import getFormat
+from src.pygen import PythonGenerator
+from fixtures import runShellCommand
+
+from os import mkdir
+from os.path import join
+from shutil import rmtree
+from StringIO import StringIO
+from nose.tools import *
+
+testDir = "test_tmp"
+
+def createTestDir():
+    mkdir(testDir)
+
+def removeTestDir():
+    rmtree(testDir)
+
+def generateInput( formatName, **kwargs ):
+    output = StringIO()
+    numRecords = kwargs.pop( "numRecords", None )
+    size = kwargs.pop( "size", None )
+    generator = InputGenerator( getFormat(join( "tests", "files", "format", formatName + ".format" )), **kwargs )
+    written = generator.generate( output, numRecords, size )
+    assert_equal( written, len(output.getvalue()) )
+    return output.getvalue()
+
+def parseInput( formatName, data, statement ):
+    """ Parse data with the generated Python parser and return what statement, run on the parsed
+    body, prints. """
+    PythonGenerator( join( testDir, "Main" ), getFormat(join( "tests", "files", "format", formatName + ".format" )) ).codeGen()
+    inputFile = open( join( testDir, "input" ), "w" )
+    inputFile.write(data)
+    inputFile.close()
+    out, err, rc = runShellCommand([ "python", "-c", "import sys; sys.path.insert(0, '%s'); from Main import *; "
+        "body = parse('%s'); print %s" % ( testDir, join( testDir, "input" ), statement ) ])
+    assert_equal( rc, 0, err )
+    return out.strip()
+
+@with_setup( createTestDir, removeTestDir )
+def testRecordCount():
+    data = generateInput( "graph", seed = 1, numRecords = 7 )
+    assert_equal( parseInput( "graph", data, "len(body.graphs)" ), "7" )
+
+@with_setup( createTestDir, removeTestDir )
+def testVariableRepetition():
+    data = generateInput( "table", seed = 2, numRecords = 5, repetitions = ( 3, 3 ) )
+    assert_equal( parseInput( "table", data, "body.count, len(body.edges), len(body.extra)" ), "3 3 5" )
+
+@with_setup( createTestDir, removeTestDir )
+def testEveryFormat():
+    for formatName in [ "everything", "repetition", "whitespace" ]:
+        for seed in range(5):
+            parseInput( formatName, generateInput( formatName, seed = seed ), "body" )
+
+def testSize():
+    data = generateInput( "graph", seed = 3, size = parseSize("64K") )
+    assert_true( 64 * 1024 <= len(data) < 65 * 1024 )
+    data = generateInput( "table", seed = 3, size = parseSize("64K") )
+    assert_true( 60 * 1024 <= len(data) < 68 * 1024 )
+
+def testSeed():
+    assert_equal( generateInput( "everything", seed = 4 ), generateInput( "everything", seed = 4 ) )
+    assert_not_equal( generateInput( "graph", seed = 4 ), generateInput( "graph", seed = 5 ) )
+
+@raises(ValueError)
+def testNoRecords():
+    generateInput( "everything", numRecords = 3 )
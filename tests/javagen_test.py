@@ -1,10 +1,60 @@
-from testSuite import getTests
+from testSuite import getTests, getSourceTests, getCompressedTests, getInstrumentTests, getBinaryTests, \
+    getPrimitiveTests, getRecordStreamTests
 from fixtures import checkTest
 
 from fixtures import JavaFixture
+from src.codegen import GeneratorOptions
 
 def testJavaGen():
     fixture = JavaFixture(getTests(".java"))
     testGenerator = fixture.generateTests()
     for test in testGenerator:
         yield checkTest, test
+
+def testJavaGenSources():
+    fixture = JavaFixture(getSourceTests(".java"))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testJavaGenCompressed():
+    fixture = JavaFixture(getCompressedTests(".java"))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testJavaGenMmap():
+    fixture = JavaFixture(getTests(".java") + getCompressedTests(".java"), GeneratorOptions( mmap = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testJavaGenInstrument():
+    fixture = JavaFixture(getInstrumentTests(".java"), GeneratorOptions( instrument = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testJavaGenBinary():
+    fixture = JavaFixture(getBinaryTests(".java"))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testJavaGenPrimitives():
+    fixture = JavaFixture(getPrimitiveTests(".java"), GeneratorOptions( primitives = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testJavaGenInstrumentMmap():
+    fixture = JavaFixture(getInstrumentTests(".java"), GeneratorOptions( instrument = True, mmap = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testJavaGenRecordStream():
+    fixture = JavaFixture(getRecordStreamTests(".java"))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
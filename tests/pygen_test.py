@@ -1,10 +1,169 @@
-from testSuite import getTests
+from testSuite import getTests, getStreamingTests, getNumpyTests, getColumnarTests, \
+    getParallelTests, getIndexTests, getLazyTests, getPushTests, \
+    getSourceTests, getCompressedTests, getInstrumentTests, getCacheTests, \
+    getBinaryTests, getColumnarBinaryTests, getErrorTests
 from fixtures import checkTest
 
-from fixtures import PythonFixture
+from fixtures import PythonFixture, Python3Fixture, runShellCommand
+from src.codegen import GeneratorOptions
+from distutils.spawn import find_executable
+from nose.plugins.skip import SkipTest
+
+def skipUnlessPython3(*modules):
+    """ Skips a test run by python3 unless it is installed, along with the given modules. """
+    if find_executable("python3") is None:
+        raise SkipTest("python3 is not installed.")
+    for module in modules:
+        out, err, rc = runShellCommand([ "python3", "-c", "import " + module ])
+        if rc != 0:
+            raise SkipTest("%s is not installed for python3." % module)
 
 def testPyGen():
     fixture = PythonFixture(getTests(".py"))
     testGenerator = fixture.generateTests()
     for test in testGenerator:
         yield checkTest, test
+
+def testPyGenSources():
+    fixture = PythonFixture(getSourceTests(".py"))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenSourcesMapped():
+    fixture = PythonFixture(getSourceTests(".py"), GeneratorOptions( mmap = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenCompressed():
+    fixture = PythonFixture(getCompressedTests(".py"))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenCompressedMapped():
+    fixture = PythonFixture(getCompressedTests(".py"), GeneratorOptions( mmap = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenInstrument():
+    fixture = PythonFixture(getInstrumentTests(".py"), GeneratorOptions( instrument = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenCache():
+    fixture = PythonFixture(getCacheTests(".py"), GeneratorOptions( cache = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenBinary():
+    fixture = PythonFixture(getBinaryTests(".py"))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenBinaryColumnar():
+    fixture = PythonFixture(getColumnarBinaryTests(".py"), GeneratorOptions( columnar = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenBinaryNumpy():
+    # Current NumPy releases only support Python 3, so the NumPy mode is run by python3
+    skipUnlessPython3("numpy")
+    fixture = Python3Fixture(getBinaryTests("_numpy.py"), GeneratorOptions( numpy = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenStreaming():
+    fixture = PythonFixture(getStreamingTests(".py"))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenNamedTuples():
+    fixture = PythonFixture(getTests(".py"), GeneratorOptions( namedtuples = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenParallel():
+    fixture = PythonFixture(getParallelTests(".py"))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenParallelColumnar():
+    fixture = PythonFixture(getParallelTests(".py"), GeneratorOptions( columnar = True, mmap = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenIndex():
+    fixture = PythonFixture(getIndexTests(".py"))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenIndexMapped():
+    fixture = PythonFixture(getIndexTests(".py"), GeneratorOptions( mmap = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenLazy():
+    fixture = PythonFixture(getLazyTests(".py"), GeneratorOptions( lazy = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenLazyMapped():
+    fixture = PythonFixture(getLazyTests(".py"), GeneratorOptions( lazy = True, mmap = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenPush():
+    fixture = PythonFixture(getPushTests(".py"))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenMapped():
+    fixture = PythonFixture(getTests(".py") + getStreamingTests(".py"), GeneratorOptions( mmap = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenMappedErrors():
+    fixture = PythonFixture(getErrorTests(".py"), GeneratorOptions( mmap = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPy3GenMappedErrors():
+    # The mapped input hands out bytes under Python 3
+    skipUnlessPython3()
+    fixture = Python3Fixture(getErrorTests(".py"), GeneratorOptions( mmap = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenColumnar():
+    fixture = PythonFixture(getColumnarTests(".py"), GeneratorOptions( columnar = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
+
+def testPyGenNumpy():
+    # Current NumPy releases only support Python 3, so the NumPy mode is run by python3
+    skipUnlessPython3("numpy")
+    fixture = Python3Fixture(getNumpyTests("_numpy.py"), GeneratorOptions( numpy = True ))
+    testGenerator = fixture.generateTests()
+    for test in testGenerator:
+        yield checkTest, test
@@ -3,6 +3,7 @@ from fixtures import getTest
 def getTests(extension):
     return [
         getTest(0, "graph", extension, 1),
+        getTest(0, "graph", extension, 2),
         getTest(4, "graph", extension, 1),
         getTest(0, "whitespace", extension, 1),
         getTest(4, "whitespace", extension, 1),
@@ -17,6 +18,143 @@ def getTests(extension):
         getTest(0, "everything", extension, 1)
     ]
 
+def getSourceTests(extension):
+    return [
+        getTest(0, "graph", "_stream" + extension, 1),
+        getTest(4, "graph", "_stream" + extension, 1),
+        getTest(0, "repetition", "_buffer" + extension, 1),
+        getTest(0, "repetition", "_buffer" + extension, 2),
+        getTest(0, "repetition", "_buffer" + extension, 3),
+        getTest(4, "repetition", "_buffer" + extension, 1)
+    ]
+
+def getCompressedTests(extension):
+    return [
+        getTest(0, "graph", "_compressed" + extension, 1),
+        getTest(4, "graph", "_compressed" + extension, 1)
+    ]
+
+def getRecordStreamTests(extension):
+    return [
+        getTest(0, "graph", "_records" + extension, 1),
+        getTest(0, "graph", "_records" + extension, 2),
+        getTest(4, "graph", "_records" + extension, 1),
+        getTest(0, "graph", "_records_compressed" + extension, 1),
+        getTest(4, "graph", "_records_compressed" + extension, 1)
+    ]
+
+def getInstrumentTests(extension):
+    return [
+        getTest(0, "graph", "_instrument" + extension, 1),
+        getTest(4, "graph", "_instrument" + extension, 1)
+    ]
+
+def getCacheTests(extension):
+    return [
+        getTest(0, "graph", "_cache" + extension, 1),
+        getTest(4, "graph", "_cache" + extension, 1)
+    ]
+
+def getBinaryTests(extension):
+    return [
+        getTest(0, "graph", "_binary" + extension, 1),
+        getTest(4, "graph", "_binary" + extension, 1),
+        getTest(0, "repetition", "_binary" + extension, 1),
+        getTest(0, "everything", "_binary" + extension, 1)
+    ]
+
+def getPrimitiveTests(extension):
+    return [
+        getTest(0, "graph", extension, 1),
+        getTest(4, "graph", extension, 1),
+        getTest(0, "repetition", "_primitives" + extension, 1),
+        getTest(0, "repetition", "_primitives" + extension, 2),
+        getTest(0, "repetition", "_primitives" + extension, 3),
+        getTest(4, "repetition", "_primitives" + extension, 1),
+        getTest(0, "everything", "_primitives" + extension, 1),
+        getTest(0, "graph", "_binary" + extension, 1)
+    ]
+
+def getColumnarBinaryTests(extension):
+    return [
+        getTest(0, "table", "_binary" + extension, 1),
+        getTest(0, "graph", "_binary" + extension, 1),
+        getTest(0, "everything", "_binary" + extension, 1)
+    ]
+
+def getStreamingTests(extension):
+    return [
+        getTest(0, "graph", "_iterparse" + extension, 1),
+        getTest(4, "graph", "_iterparse" + extension, 1),
+        getTest(0, "graph", "_iterparse_break" + extension, 1),
+        getTest(0, "everything", "_iterparse" + extension, 1)
+    ]
+
+def getNumpyTests(extension):
+    return [
+        getTest(0, "graph", extension, 1),
+        getTest(4, "graph", extension, 1),
+        getTest(0, "everything", extension, 1),
+        getTest(0, "numbers", extension, 1),
+        getTest(0, "numbers", "_error" + extension, 1, passDir = "fail"),
+        getTest(0, "numbers", "_error" + extension, 2, passDir = "fail")
+    ]
+
+def getColumnarTests(extension):
+    return [
+        getTest(0, "table", extension, 1),
+        getTest(4, "table", extension, 1),
+        getTest(4, "table", extension, 2),
+        getTest(0, "table", "_error" + extension, 3, passDir = "fail"),
+        getTest(0, "table", "_error" + extension, 4, passDir = "fail"),
+        getTest(0, "graph", extension, 1),
+        getTest(0, "everything", extension, 1)
+    ]
+
+def getParallelTests(extension):
+    return [
+        getTest(0, "graph", "_parallel" + extension, 1),
+        getTest(0, "graph", "_parallel" + extension, 2),
+        getTest(4, "graph", "_parallel" + extension, 1),
+        getTest(0, "table", "_parallel" + extension, 1),
+        getTest(4, "table", "_parallel" + extension, 1),
+        getTest(0, "whitespace", "_parallel" + extension, 1),
+        getTest(4, "whitespace", "_parallel" + extension, 4),
+        getTest(0, "everything", "_parallel" + extension, 1)
+    ]
+
+def getLazyTests(extension):
+    return getTests(extension) + [
+        getTest(0, "table", extension, 1),
+        getTest(4, "table", extension, 1),
+        getTest(4, "table", extension, 2)
+    ]
+
+def getIndexTests(extension):
+    return [
+        getTest(0, "graph", "_index" + extension, 1),
+        getTest(4, "graph", "_index" + extension, 1),
+        getTest(0, "table", "_index" + extension, 1)
+    ]
+
+def getPushTests(extension):
+    return [
+        getTest(0, "graph", "_push" + extension, 1),
+        getTest(4, "graph", "_push" + extension, 1),
+        getTest(0, "graph", "_push_error" + extension, 2, passDir = "fail"),
+        getTest(0, "table", "_push" + extension, 1),
+        getTest(4, "table", "_push" + extension, 1),
+        getTest(0, "everything", "_push" + extension, 1)
+    ]
+
+def getErrorTests(extension):
+    # The mains print the error of the input, so the failing inputs have solutions
+    return [
+        getTest(0, "everything", "_error" + extension, 1, passDir = "fail"),
+        getTest(0, "everything", "_error" + extension, 2, passDir = "fail"),
+        getTest(0, "everything", "_error" + extension, 3, passDir = "fail")
+    ]
+
 def getParserTests(extension):
     return [
         getTest(2, "invalidChars1", extension, 0),